@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Measure the time required for validating object data with and without the
+compiled validators, using the example schema and object from the test data.
+
+Usage: python benchmark_validation.py [<number of objects>]
+"""
+
+import copy
+import json
+import os
+import sys
+import time
+
+from sampledb.logic.schemas import validate
+from sampledb.logic.schemas.validate import _validate
+
+
+def main(num_objects: int) -> None:
+    test_data_dir = os.path.join(os.path.dirname(__file__), 'tests', 'test_data')
+    with open(os.path.join(test_data_dir, 'schemas', 'ombe_measurement.sampledb.json'), encoding='utf-8') as schema_file:
+        schema = json.load(schema_file)
+    with open(os.path.join(test_data_dir, 'objects', 'ombe-1.sampledb.json'), encoding='utf-8') as object_file:
+        data = json.load(object_file)
+
+    uncompiled_instances = [copy.deepcopy(data) for _ in range(num_objects)]
+    start_time = time.perf_counter()
+    for instance in uncompiled_instances:
+        _validate(instance, schema, [])
+    uncompiled_duration = time.perf_counter() - start_time
+
+    compiled_instances = [copy.deepcopy(data) for _ in range(num_objects)]
+    start_time = time.perf_counter()
+    for instance in compiled_instances:
+        validate(instance, schema)
+    compiled_duration = time.perf_counter() - start_time
+
+    if compiled_instances != uncompiled_instances:
+        print('Error: the compiled validators changed the data differently', file=sys.stderr)
+        sys.exit(1)
+    print(f'Validated {num_objects} objects in {uncompiled_duration:.2f}s without and {compiled_duration:.2f}s with compiled validators.')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
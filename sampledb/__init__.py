@@ -72,6 +72,10 @@ def setup_database(app: flask.Flask) -> None:
     with app.app_context():
         db.metadata.create_all(bind=db.engine)
         sampledb.models.Objects.bind = db.engine
+        if app.config['ENABLE_DELTA_ENCODED_OBJECT_VERSIONS']:
+            sampledb.models.Objects.delta_encoding_snapshot_interval = app.config['OBJECT_VERSION_SNAPSHOT_INTERVAL']
+        else:
+            sampledb.models.Objects.delta_encoding_snapshot_interval = None
         sampledb.models.migrations.run(db)
         sampledb.logic.object_data_to_html.clear_object_data_to_html_cache()
 
@@ -222,7 +226,7 @@ def create_app(include_dashboard: bool = True) -> flask.Flask:
     with app.app_context():
         sampledb.logic.utils.print_deprecation_warnings()
 
-        if app.config['ENABLE_BACKGROUND_TASKS']:
+        if app.config['ENABLE_BACKGROUND_TASKS'] and app.config['BACKGROUND_TASK_HANDLER_THREADS'] > 0:
             sampledb.logic.background_tasks.reset_claimed_background_tasks()
             sampledb.logic.background_tasks.start_handler_threads(app)
 
@@ -230,6 +234,8 @@ def create_app(include_dashboard: bool = True) -> flask.Flask:
         if sig == signal.SIGTERM:
             if app.config['ENABLE_BACKGROUND_TASKS']:
                 sampledb.logic.background_tasks.stop_handler_threads(app)
+            with app.app_context():
+                sampledb.logic.api_log.stop_log_writer()
             sys.exit(0)
 
     signal.signal(signal.SIGTERM, signal_handler)
@@ -4,14 +4,16 @@ RESTful API for SampleDB
 """
 
 import datetime
+import json
 import typing
 
 import flask
+import werkzeug.exceptions
 
 from ..utils import Resource, ResponseData
 from ...logic import errors
 from ...logic.components import Component, get_components, get_component_infos
-from ...logic.shares import get_shares_for_component, get_share, ObjectShare, set_object_share_import_status, parse_object_share_import_status
+from ...logic.shares import get_shares_for_component, get_modified_shared_object_ids, get_share, ObjectShare, set_object_share_import_status, parse_object_share_import_status
 from ...logic.federation.action_types import shared_action_type_preprocessor
 from ...logic.federation.actions import shared_action_preprocessor
 from ...logic.federation.instruments import shared_instrument_preprocessor
@@ -19,12 +21,14 @@ from ...logic.federation.location_types import shared_location_type_preprocessor
 from ...logic.federation.locations import shared_location_preprocessor
 from ...logic.federation.login import get_idp_metadata, get_sp_metadata, check_component_locally_ready
 from ...logic.federation.objects import shared_object_preprocessor
-from ...logic.federation.update import import_updates, PROTOCOL_VERSION_MAJOR, PROTOCOL_VERSION_MINOR
+from ...logic.federation.update import import_updates, PROTOCOL_VERSION_MAJOR, PROTOCOL_VERSION_MINOR, FEDERATION_SYNC_OVERLAP
 from ...logic.federation.users import shared_user_preprocessor
 from ...api.federation.authentication import http_token_auth
 from ...logic.files import get_file
 from ...logic.users import get_user_aliases_for_component, get_users, get_user_email_hashes, User
+from ...logic.utils import single_transaction
 from ...models import UserType
+from ...utils import send_file_content
 
 preprocessors = {
     'actions': shared_action_preprocessor,
@@ -121,57 +125,147 @@ class ImportStatus(Resource):
         return '', 204
 
 
+class ImportStatuses(Resource):
+    @http_token_auth.login_required
+    def put(self) -> ResponseData:
+        component_id = flask.g.component.id
+        import_statuses = flask.request.json
+        if not import_statuses or not isinstance(import_statuses, dict):
+            return {
+                "message": "missing import statuses"
+            }, 400
+        parsed_import_statuses = {}
+        for object_id_str, import_status in import_statuses.items():
+            try:
+                object_id = int(object_id_str)
+            except ValueError:
+                return {
+                    "message": f"invalid object id {object_id_str}"
+                }, 400
+            parsed_import_status = parse_object_share_import_status(import_status)
+            if parsed_import_status is None:
+                return {
+                    "message": f"invalid import status for object {object_id}"
+                }, 400
+            try:
+                get_share(object_id, component_id)
+            except (errors.ObjectDoesNotExistError, errors.ShareDoesNotExistError):
+                # the share may have been removed since the update was sent
+                continue
+            parsed_import_statuses[object_id] = parsed_import_status
+        with single_transaction():
+            for object_id, parsed_import_status in parsed_import_statuses.items():
+                set_object_share_import_status(
+                    object_id=object_id,
+                    component_id=component_id,
+                    import_status=dict(parsed_import_status)
+                )
+        return '', 204
+
+
 class Objects(Resource):
     @http_token_auth.login_required
     def get(self) -> ResponseData:
+        last_sync = _get_last_sync(flask.request.args)
         component = flask.g.component
-        shares = get_shares_for_component(component.id)
-        refs: typing.List[typing.Tuple[str, int]] = []
-        markdown_images: typing.Dict[str, str] = {}
-        ref_ids: typing.Dict[str, typing.List[int]] = {
-            'actions': [],
-            'users': [],
-            'instruments': [],
-            'locations': [],
-            'location_types': [],
-            'action_types': []
-        }
+        limit: typing.Optional[int] = None
+        after_object_id: typing.Optional[int] = None
+        for parameter_name in ['limit', 'after']:
+            parameter_str = flask.request.args.get(parameter_name)
+            if parameter_str is None:
+                continue
+            try:
+                parameter = int(parameter_str)
+            except ValueError:
+                return {
+                    'message': f'Unable to parse {parameter_name}'
+                }, 400
+            if parameter_name == 'limit':
+                if parameter < 1:
+                    return {
+                        'message': 'limit must be positive'
+                    }, 400
+                limit = parameter
+            else:
+                after_object_id = parameter
+        shares = get_shares_for_component(
+            component.id,
+            after_object_id=after_object_id,
+            # request one more share to find out whether there is another page
+            limit=limit + 1 if limit is not None else None
+        )
+        next_after_object_id = None
+        if limit is not None and len(shares) > limit:
+            shares = shares[:limit]
+            next_after_object_id = shares[-1].object_id
+        modified_object_ids: typing.Optional[typing.Set[int]] = None
+        if last_sync is not None:
+            # the last synchronization time was taken by the importing component
+            modified_object_ids = get_modified_shared_object_ids(component.id, [share.object_id for share in shares], last_sync - FEDERATION_SYNC_OVERLAP)
+        header = _get_header(component)
+        return flask.Response(
+            flask.stream_with_context(_generate_objects_response(component, shares, modified_object_ids, header, limit, next_after_object_id)),
+            mimetype='application/json'
+        )
 
-        result_lists: typing.Dict[str, typing.List[typing.Any]] = {
-            'actions': [],
-            'users': [],
-            'instruments': [],
-            'locations': [],
-            'location_types': [],
-            'objects': [],
-            'action_types': []
-        }
 
-        for share in shares:
-            obj = shared_object_preprocessor(share.object_id, share.policy, refs, markdown_images, sharing_user_id=share.user_id)
-            result_lists['objects'].append(obj)
+def _generate_objects_response(
+        component: Component,
+        shares: typing.List[ObjectShare],
+        modified_object_ids: typing.Optional[typing.Set[int]],
+        header: typing.Dict[str, typing.Any],
+        limit: typing.Optional[int],
+        next_after_object_id: typing.Optional[int]
+) -> typing.Iterator[str]:
+    # objects are serialized one at a time, so that the response does not
+    # have to be kept in memory until it is complete
+    refs: typing.List[typing.Tuple[str, int]] = []
+    markdown_images: typing.Dict[str, str] = {}
+    ref_ids: typing.Dict[str, typing.List[int]] = {
+        'actions': [],
+        'users': [],
+        'instruments': [],
+        'locations': [],
+        'location_types': [],
+        'action_types': []
+    }
 
-        while len(refs) > 0:
-            type, id = refs.pop()
-            if type == 'instruments' and flask.current_app.config['DISABLE_INSTRUMENTS']:
-                continue
-            if type in ref_ids and id not in ref_ids[type]:
-                processed = preprocessors[type](id, component, refs, markdown_images)
-                if processed is not None:
-                    result_lists[type].append(processed)
-                ref_ids[type].append(id)
+    result_lists: typing.Dict[str, typing.List[typing.Any]] = {
+        'actions': [],
+        'users': [],
+        'instruments': [],
+        'locations': [],
+        'location_types': [],
+        'action_types': []
+    }
 
-        return {
-            'header': _get_header(component),
-            'markdown_images': markdown_images,
-            'actions': result_lists['actions'],
-            'users': result_lists['users'],
-            'instruments': result_lists['instruments'],
-            'locations': result_lists['locations'],
-            'location_types': result_lists['location_types'],
-            'objects': result_lists['objects'],
-            'action_types': result_lists['action_types']
-        }
+    yield '{"header": ' + json.dumps(header) + ', "objects": ['
+    num_objects = 0
+    for share in shares:
+        obj = shared_object_preprocessor(share.object_id, share.policy, refs, markdown_images, sharing_user_id=share.user_id)
+        # unmodified objects are not sent, but the data they reference is, as it may have changed
+        if modified_object_ids is not None and share.object_id not in modified_object_ids:
+            continue
+        yield (', ' if num_objects > 0 else '') + json.dumps(obj)
+        num_objects += 1
+    yield ']'
+
+    while len(refs) > 0:
+        type, id = refs.pop()
+        if type == 'instruments' and flask.current_app.config['DISABLE_INSTRUMENTS']:
+            continue
+        if type in ref_ids and id not in ref_ids[type]:
+            processed = preprocessors[type](id, component, refs, markdown_images)
+            if processed is not None:
+                result_lists[type].append(processed)
+            ref_ids[type].append(id)
+
+    for type in ['actions', 'users', 'instruments', 'locations', 'location_types', 'action_types']:
+        yield f', "{type}": ' + json.dumps(result_lists[type])
+    yield ', "markdown_images": ' + json.dumps(markdown_images)
+    if limit is not None:
+        yield ', "next_after": ' + json.dumps(next_after_object_id)
+    yield '}'
 
 
 class Users(Resource):
@@ -255,10 +349,14 @@ class File(Resource):
 
         if file.storage == 'database':
             try:
-                with file.open() as f:
-                    response = flask.make_response(f.read())
-                    response.headers.set('Content-Disposition', 'attachment', filename=file.original_file_name)
-                    return response
+                return send_file_content(
+                    file,
+                    mimetype='application/octet-stream',
+                    as_attachment=True,
+                    download_name=file.original_file_name
+                )
+            except werkzeug.exceptions.HTTPException:
+                raise
             except Exception:
                 return {
                     "message": f"file {file_id} of object {object_id} could not be read"
@@ -5,12 +5,12 @@ RESTful API for SampleDB
 
 from flask import Blueprint
 from flask_cors import CORS
-from .objects import Object, Objects, ObjectVersion, ObjectVersions, RelatedObjects
+from .objects import Object, ObjectBatch, Objects, ObjectVersion, ObjectVersions, RelatedObjects
 from .actions import Action, Actions
 from .action_types import ActionType, ActionTypes
 from .authentication import AccessTokens
 from .comments import ObjectComment, ObjectComments
-from .files import ObjectFile, ObjectFiles
+from .files import ObjectFile, ObjectFileContent, ObjectFiles
 from .instruments import Instrument, Instruments
 from .instrument_log import InstrumentLogEntry, InstrumentLogEntries, InstrumentLogEntryVersions, InstrumentLogEntryVersion, InstrumentLogEntryFileAttachment, InstrumentLogEntryFileAttachments, InstrumentLogEntryObjectAttachment, InstrumentLogEntryObjectAttachments, InstrumentLogCategory, InstrumentLogCategories
 from .locations import Location, Locations, ObjectLocationAssignment, ObjectLocationAssignments, LocationType, LocationTypes
@@ -23,6 +23,7 @@ from .projects import Project, Projects, ProjectMemberUser, ProjectMemberUsers
 api = Blueprint('api', __name__)
 CORS(api)
 api.add_url_rule('/api/v1/objects/', endpoint='objects', view_func=Objects.as_view('objects'))
+api.add_url_rule('/api/v1/objects/batch', endpoint='object_batch', view_func=ObjectBatch.as_view('object_batch'))
 api.add_url_rule('/api/v1/objects/<int:object_id>', endpoint='object', view_func=Object.as_view('object'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/versions/', endpoint='object_versions', view_func=ObjectVersions.as_view('object_versions'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/versions/<int:version_id>', endpoint='object_version', view_func=ObjectVersion.as_view('object_version'))
@@ -53,6 +54,7 @@ api.add_url_rule('/api/v1/location_types/<int(signed=True):location_type_id>', e
 api.add_url_rule('/api/v1/objects/permissions/copy/', endpoint='copy_objects_permissions', view_func=CopyObjectsPermissions.as_view('copy_objects_permissions'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/files/', endpoint='object_files', view_func=ObjectFiles.as_view('object_files'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/files/<int:file_id>', endpoint='object_file', view_func=ObjectFile.as_view('object_file'))
+api.add_url_rule('/api/v1/objects/<int:object_id>/files/<int:file_id>/content', endpoint='object_file_content', view_func=ObjectFileContent.as_view('object_file_content'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/locations/', endpoint='object_location_assignments', view_func=ObjectLocationAssignments.as_view('object_location_assignments'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/locations/<int:object_location_assignment_index>', endpoint='object_location_assignment', view_func=ObjectLocationAssignment.as_view('object_location_assignment'))
 api.add_url_rule('/api/v1/objects/<int:object_id>/permissions/', endpoint='object_permissions', view_func=ObjectPermissions.as_view('object_permissions'))
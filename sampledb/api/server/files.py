@@ -4,6 +4,7 @@ RESTful API for SampleDB
 """
 
 import base64
+import shutil
 import typing
 
 import flask
@@ -16,6 +17,7 @@ from ...logic.files import create_database_file, create_local_file_reference, cr
 from ...logic.objects import get_object
 from ...logic.utils import parse_url
 from ...models import Permissions
+from ...utils import send_file_content
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
@@ -66,14 +68,131 @@ class ObjectFile(Resource):
         return file_info_to_json(file_info)
 
 
+class ObjectFileContent(Resource):
+    @object_permissions_required(Permissions.READ)
+    def get(self, object_id: int, file_id: int) -> ResponseData:
+        try:
+            file_info = get_file_for_object(object_id=object_id, file_id=file_id)
+            if file_info is None:
+                raise errors.FileDoesNotExistError()
+        except errors.FileDoesNotExistError:
+            return {
+                "message": f"file {file_id} of object {object_id} does not exist"
+            }, 404
+        if file_info.is_hidden:
+            return {
+                "message": f"file {file_id} of object {object_id} has been hidden"
+            }, 403
+        if file_info.storage not in ('database', 'federation'):
+            return {
+                "message": f"file {file_id} of object {object_id} has no content"
+            }, 404
+        try:
+            return send_file_content(
+                file_info,
+                mimetype='application/octet-stream',
+                as_attachment=True,
+                download_name=file_info.original_file_name
+            )
+        except errors.FederationFileNotAvailableError:
+            return {
+                "message": f"file {file_id} of object {object_id} is stored in another database and is not available"
+            }, 404
+
+
+# size of the chunks used for copying uploaded files
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _post_multipart_file(object_id: int) -> ResponseData:
+    for key in flask.request.form:
+        if key not in {'original_file_name', 'hash_algorithm', 'hash_hexdigest', 'preview_image_mime_type'}:
+            return {
+                "message": f"invalid key '{key}'"
+            }, 400
+    for key in flask.request.files:
+        if key not in {'file', 'preview_image'}:
+            return {
+                "message": f"invalid key '{key}'"
+            }, 400
+    uploaded_file = flask.request.files.get('file')
+    if uploaded_file is None:
+        return {
+            "message": "file must be set"
+        }, 400
+    original_file_name = flask.request.form.get('original_file_name', uploaded_file.filename)
+    if not original_file_name:
+        return {
+            "message": "original_file_name must be set"
+        }, 400
+    hash_algorithm = flask.request.form.get('hash_algorithm', DEFAULT_HASH_ALGORITHM)
+    if hash_algorithm not in SUPPORTED_HASH_ALGORITHMS:
+        return {
+            "message": "only the following hash algorithms are supported: " + ", ".join(
+                SUPPORTED_HASH_ALGORITHMS)
+        }, 400
+    expected_hash_hexdigest = flask.request.form.get('hash_hexdigest')
+    preview_image = flask.request.files.get('preview_image')
+    if preview_image is not None:
+        preview_image_mime_type = flask.request.form.get('preview_image_mime_type', '').lower()
+        supported_mime_types = sorted(flask.current_app.config['MIME_TYPES'].values())
+        if preview_image_mime_type not in supported_mime_types:
+            return {
+                "message": "preview_image_mime_type must be one of: " + ", ".join(supported_mime_types)
+            }, 400
+
+    def save_content(stream: typing.BinaryIO) -> None:
+        # the contents are spooled to a temporary file by werkzeug and are hashed while they are copied
+        shutil.copyfileobj(uploaded_file.stream, stream, UPLOAD_CHUNK_SIZE)
+
+    try:
+        if preview_image is not None:
+            file = create_database_file(
+                object_id=object_id,
+                user_id=flask.g.user.id,
+                file_name=original_file_name,
+                save_content=save_content,
+                hash_algorithm=hash_algorithm,
+                expected_hash_hexdigest=expected_hash_hexdigest,
+                preview_image_binary_data=preview_image.stream.read(),
+                preview_image_mime_type=preview_image_mime_type
+            )
+        else:
+            file = create_database_file(
+                object_id=object_id,
+                user_id=flask.g.user.id,
+                file_name=original_file_name,
+                save_content=save_content,
+                hash_algorithm=hash_algorithm,
+                expected_hash_hexdigest=expected_hash_hexdigest
+            )
+    except errors.FileNameTooLongError:
+        return {
+            "message": "original_file_name must not be longer than 150 bytes"
+        }, 400
+    except errors.FileHashMismatchError as e:
+        return {
+            "message": "hash hexdigest mismatch, expected: " + e.hash_hexdigest
+        }, 400
+    file_url = flask.url_for(
+        'api.object_file',
+        object_id=file.object_id,
+        file_id=file.id,
+        _external=True
+    )
+    return flask.redirect(file_url, code=201)
+
+
 class ObjectFiles(Resource):
     @object_permissions_required(Permissions.WRITE)
     def post(self, object_id: int) -> ResponseData:
-        request_json = flask.request.get_json(force=True)
-        if not isinstance(request_json, dict):
-            return {
-                "message": "JSON object body required"
-            }, 400
+        is_multipart = flask.request.mimetype == 'multipart/form-data'
+        if not is_multipart:
+            request_json = flask.request.get_json(force=True)
+            if not isinstance(request_json, dict):
+                return {
+                    "message": "JSON object body required"
+                }, 400
         object = get_object(object_id=object_id)
         if object.action_id is not None:
             action = get_action(action_id=object.action_id)
@@ -81,6 +200,8 @@ class ObjectFiles(Resource):
                 return {
                     "message": "Adding files is not enabled for objects of this type"
                 }, 403
+        if is_multipart:
+            return _post_multipart_file(object_id)
         if 'object_id' in request_json:
             if request_json['object_id'] != object.object_id:
                 return {
@@ -15,9 +15,10 @@ from ...logic.action_types import check_action_type_exists
 from ...logic.actions import get_action, check_action_exists
 from ...logic.action_permissions import get_user_action_permissions
 from ...logic.object_search import generate_filter_func, wrap_filter_func
-from ...logic.objects import get_object, update_object, create_object
+from ...logic.objects import get_object, update_object, create_object, create_object_batch
 from ...logic.object_permissions import get_objects_with_permissions
 from ...logic.object_relationships import get_referencing_object_ids, get_related_object_ids
+from ...logic.schemas import validate
 from ...logic.schemas.data_diffs import apply_diff, calculate_diff
 from ...logic import errors, users
 from ... import models
@@ -269,6 +270,26 @@ class Objects(Resource):
         if offset is not None and not 0 <= offset < 1e15:
             offset = None
 
+        after_object_id: typing.Optional[int] = None
+        before_object_id: typing.Optional[int] = None
+        for cursor_name in ['after', 'before']:
+            cursor_str = flask.request.args.get(cursor_name)
+            if cursor_str is None:
+                continue
+            try:
+                cursor = int(cursor_str)
+            except ValueError:
+                return {
+                    'message': f'Unable to parse {cursor_name}'
+                }, 400
+            if cursor_name == 'after':
+                after_object_id = cursor
+            else:
+                before_object_id = cursor
+        if after_object_id is not None or before_object_id is not None:
+            # cursors replace the offset for pagination
+            offset = None
+
         name_only = text_to_bool(flask.request.args.get('name_only', ''))
         query_string = flask.request.args.get('q', '')
         if query_string:
@@ -296,6 +317,8 @@ class Objects(Resource):
                 project_id=project_id,
                 limit=limit,
                 offset=offset,
+                after_object_id=after_object_id,
+                before_object_id=before_object_id,
                 name_only=name_only
             )
         except Exception as e:
@@ -456,6 +479,95 @@ class Objects(Resource):
         return flask.redirect(object_version_url, code=201)
 
 
+class ObjectBatch(Resource):
+    @multi_auth.login_required
+    def post(self) -> ResponseData:
+        if flask.g.user.is_readonly:
+            return {
+                'message': 'user has been marked as read only'
+            }, 400
+        request_json = flask.request.get_json(force=True)
+        if not isinstance(request_json, dict):
+            return {
+                "message": "JSON object body required"
+            }, 400
+        for key in request_json:
+            if key not in {'action_id', 'schema', 'data'}:
+                return {
+                    "message": f"invalid key '{key}'"
+                }, 400
+        if 'action_id' not in request_json:
+            return {
+                "message": "action_id must be set"
+            }, 400
+        if not isinstance(request_json['action_id'], int):
+            return {
+                "message": "action_id must be an integer"
+            }, 400
+        action_id = request_json['action_id']
+        try:
+            action = get_action(action_id=action_id)
+        except errors.ActionDoesNotExistError:
+            return {
+                "message": f"action {action_id} does not exist"
+            }, 400
+        if action.type is None or action.type.disable_create_objects or action.disable_create_objects or (action.admin_only and not flask.g.user.is_admin):
+            return {
+                "message": f"creating objects with action {action_id} is disabled"
+            }, 400
+        if 'schema' in request_json:
+            if request_json['schema'] != action.schema:
+                return {
+                    "message": "schema must be:\n" + json.dumps(action.schema, indent=4)
+                }, 400
+        if action.schema is None:
+            return {
+                "message": f"action {action_id} has no schema"
+            }, 400
+        if 'data' not in request_json:
+            return {
+                "message": "data must be set"
+            }, 400
+        data_sequence = request_json['data']
+        if not isinstance(data_sequence, list) or not data_sequence:
+            return {
+                "message": "data must be a non-empty list"
+            }, 400
+        max_batch_size = flask.current_app.config['MAX_BATCH_SIZE']
+        if len(data_sequence) > max_batch_size:
+            return {
+                "message": f"data must contain at most {max_batch_size} entries"
+            }, 400
+        # validate all data first, so that errors can be reported with the index of the invalid entry
+        for index, data in enumerate(data_sequence):
+            try:
+                validate(data, action.schema, file_names_by_id={})
+            except errors.ValidationError as e:
+                messages = e.message.splitlines()
+                return {
+                    "message": f"validation failed for data at index {index}:\n - " + "\n - ".join(messages),
+                    "error_paths": e.paths,
+                    "index": index
+                }, 400
+        try:
+            objects = create_object_batch(
+                action_id=action_id,
+                data_sequence=data_sequence,
+                user_id=flask.g.user.id,
+                validate_data=False
+            )
+        except Exception:
+            return {
+                "message": "failed to create objects"
+            }, 400
+        return {
+            'object_ids': [
+                object.object_id
+                for object in objects
+            ]
+        }, 201
+
+
 class RelatedObjects(Resource):
     @object_permissions_required(Permissions.READ)
     def get(self, object_id: int) -> ResponseData:
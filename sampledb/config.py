@@ -79,6 +79,15 @@ def parse_configuration_values() -> None:
         'SHARED_DEVICE_SIGN_OUT_MINUTES',
         'MIN_NUM_TEXT_CHOICES_FOR_SEARCH',
         'PDFEXPORT_LOGO_WIDTH',
+        'API_TOKEN_CACHE_TIMEOUT',
+        'API_TOKEN_CACHE_SIZE',
+        'API_LOG_FLUSH_INTERVAL_MILLISECONDS',
+        'API_LOG_FLUSH_BATCH_SIZE',
+        'API_LOG_MAX_BUFFER_SIZE',
+        'OBJECT_VERSION_SNAPSHOT_INTERVAL',
+        'BACKGROUND_TASK_HANDLER_THREADS',
+        'BACKGROUND_TASK_CLAIM_TIMEOUT',
+        'FEDERATED_FILE_CACHE_SIZE',
     ]:
         value = globals().get(config_name)
         if isinstance(value, str):
@@ -152,6 +161,10 @@ def parse_configuration_values() -> None:
         'WORKFLOW_VIEW_SHOW_OUTDATED_REFERENCES',
         'ENABLE_ISOLATED_OBJECT_DATA_RENDERING',
         'ENABLE_OBJECT_DATA_HTML_CACHE',
+        'ENABLE_DELTA_ENCODED_OBJECT_VERSIONS',
+        'ESTIMATE_NUMBER_OF_OBJECTS_FOUND',
+        'PREFETCH_FEDERATED_FILES',
+        'GENERATE_PREVIEW_IMAGES',
     ]:
         value = globals().get(config_name)
         if isinstance(value, str):
@@ -775,6 +788,81 @@ def check_config(
         can_run = False
         show_config_info = True
 
+    if not isinstance(config['OBJECT_VERSION_SNAPSHOT_INTERVAL'], int) or config['OBJECT_VERSION_SNAPSHOT_INTERVAL'] <= 0:
+        print(
+            ansi_color(
+                f'Expected OBJECT_VERSION_SNAPSHOT_INTERVAL to be a positive integer, but got {config["OBJECT_VERSION_SNAPSHOT_INTERVAL"]!r}\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+
+    if not isinstance(config['BACKGROUND_TASK_HANDLER_THREADS'], int) or config['BACKGROUND_TASK_HANDLER_THREADS'] < 0:
+        print(
+            ansi_color(
+                f'Expected BACKGROUND_TASK_HANDLER_THREADS to be a non-negative integer, but got {config["BACKGROUND_TASK_HANDLER_THREADS"]!r}\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+
+    if not isinstance(config['BACKGROUND_TASK_CLAIM_TIMEOUT'], int) or config['BACKGROUND_TASK_CLAIM_TIMEOUT'] <= 0:
+        print(
+            ansi_color(
+                f'Expected BACKGROUND_TASK_CLAIM_TIMEOUT to be a positive integer, but got {config["BACKGROUND_TASK_CLAIM_TIMEOUT"]!r}\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+
+    if config['FILE_CONTENT_STORAGE'] not in {'database', 'filesystem', 's3'}:
+        print(
+            ansi_color(
+                f'Expected FILE_CONTENT_STORAGE to be one of \'database\', \'filesystem\' or \'s3\', but got {config["FILE_CONTENT_STORAGE"]!r}\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+    elif config['FILE_CONTENT_STORAGE'] == 'filesystem' and not config['FILE_CONTENT_DIRECTORY']:
+        print(
+            ansi_color(
+                'FILE_CONTENT_STORAGE is set to \'filesystem\', but FILE_CONTENT_DIRECTORY is not set.\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+    elif config['FILE_CONTENT_STORAGE'] == 's3' and not (config['FILE_CONTENT_S3_ENDPOINT_URL'] and config['FILE_CONTENT_S3_BUCKET'] and config['FILE_CONTENT_S3_ACCESS_KEY_ID'] and config['FILE_CONTENT_S3_SECRET_ACCESS_KEY']):
+        print(
+            ansi_color(
+                'FILE_CONTENT_STORAGE is set to \'s3\', but FILE_CONTENT_S3_ENDPOINT_URL, FILE_CONTENT_S3_BUCKET, FILE_CONTENT_S3_ACCESS_KEY_ID and FILE_CONTENT_S3_SECRET_ACCESS_KEY are not all set.\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+
+    if not isinstance(config['FEDERATED_FILE_CACHE_SIZE'], int) or config['FEDERATED_FILE_CACHE_SIZE'] < 0:
+        print(
+            ansi_color(
+                f'Expected FEDERATED_FILE_CACHE_SIZE to be a non-negative integer, but got {config["FEDERATED_FILE_CACHE_SIZE"]!r}\n',
+                color=31
+            ),
+            file=sys.stderr
+        )
+        can_run = False
+        show_config_info = True
+
     if not isinstance(config['EXTRA_USER_FIELDS'], dict):
         print(
             ansi_color(
@@ -1000,11 +1088,19 @@ VALID_TIME_DELTA = 300
 ENABLE_DEFAULT_USER_ALIASES = False
 ENABLE_FEDERATED_LOGIN = False
 ENABLE_FEDERATED_LOGIN_CREATE_NEW_USER = False
+# contents of federated files can be cached on disk, limited to the given number of bytes
+FEDERATED_FILE_CACHE_DIRECTORY = None
+FEDERATED_FILE_CACHE_SIZE = 1024 * 1024 * 1024
+PREFETCH_FEDERATED_FILES = False
 
 ENABLE_WEBHOOKS_FOR_USERS = False
 WEBHOOKS_ALLOW_HTTP = False
 
 ENABLE_BACKGROUND_TASKS = True
+# number of threads handling background tasks in each process, set to 0 if tasks are only handled by the background_worker script
+BACKGROUND_TASK_HANDLER_THREADS = 4
+# time in seconds after which a claimed task is handled again if the process that claimed it has stopped renewing its claim
+BACKGROUND_TASK_CLAIM_TIMEOUT = 10 * 60
 
 TIMEZONE = None
 
@@ -1023,6 +1119,18 @@ ENABLE_FUNCTION_CACHES = True
 # temporary file time limit
 TEMPORARY_FILE_TIME_LIMIT = 7 * 24 * 60 * 60
 
+# contents of uploaded files can be stored in the database, in a local directory or in an S3-compatible object store
+FILE_CONTENT_STORAGE = 'database'
+FILE_CONTENT_DIRECTORY = None
+FILE_CONTENT_S3_ENDPOINT_URL = None
+FILE_CONTENT_S3_BUCKET = None
+FILE_CONTENT_S3_ACCESS_KEY_ID = None
+FILE_CONTENT_S3_SECRET_ACCESS_KEY = None
+FILE_CONTENT_S3_REGION = 'us-east-1'
+
+# downscaled preview images can be generated for uploaded images that have none
+GENERATE_PREVIEW_IMAGES = True
+
 # CSP headers should be set, however this value can be used to disable them if necessary
 ENABLE_CONTENT_SECURITY_POLICY = True
 
@@ -1031,6 +1139,22 @@ ELN_FILE_IMPORT_ALLOW_HTTP = False
 
 ENABLE_FIDO2_PASSKEY_AUTHENTICATION = False
 
+# verified API tokens are cached to avoid running bcrypt for every API request
+API_TOKEN_CACHE_TIMEOUT = 5 * 60
+API_TOKEN_CACHE_SIZE = 1000
+
+# API log entries are buffered and written in bulk to keep them off the critical path of API requests
+API_LOG_FLUSH_INTERVAL_MILLISECONDS = 1000
+API_LOG_FLUSH_BATCH_SIZE = 100
+API_LOG_MAX_BUFFER_SIZE = 10000
+
+# previous object versions can be stored as deltas to the next version, with every n-th version stored in full
+ENABLE_DELTA_ENCODED_OBJECT_VERSIONS = False
+OBJECT_VERSION_SNAPSHOT_INTERVAL = 10
+
+# the number of objects found in the objects list can be estimated by the query planner instead of being counted
+ESTIMATE_NUMBER_OF_OBJECTS_FOUND = False
+
 SHARED_DEVICE_SIGN_OUT_MINUTES = 30
 
 DISABLE_OUTDATED_USE_AS_TEMPLATE = False
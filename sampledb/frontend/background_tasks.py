@@ -5,7 +5,7 @@ import flask
 import flask_login
 
 from . import frontend
-from ..logic.background_tasks import get_background_tasks
+from ..logic.background_tasks import get_background_tasks, get_background_task_metrics
 from ..utils import FlaskResponseT
 
 
@@ -16,5 +16,6 @@ def background_tasks() -> FlaskResponseT:
         return flask.abort(HTTPStatus.FORBIDDEN)
     return flask.render_template(
         'admin/background_tasks.html',
-        tasks=get_background_tasks()
+        tasks=get_background_tasks(),
+        task_metrics=get_background_task_metrics()
     )
@@ -3,6 +3,8 @@
 
 """
 
+import typing
+
 import flask
 import flask_login
 from flask_babel import _
@@ -47,6 +49,7 @@ def export(user_id: int) -> FlaskResponseT:
     ]
     if create_export_form.validate_on_submit():
         file_extension = create_export_form.file_extension.data
+        file_bytes: typing.Optional[typing.Union[bytes, typing.Iterator[bytes]]]
         if file_extension == '.pdf':
             readable_objects = logic.object_permissions.get_objects_with_permissions(
                 user_id,
@@ -58,7 +61,7 @@ def export(user_id: int) -> FlaskResponseT:
             )))
             file_type = 'application/pdf'
         elif file_extension in logic.export.FILE_FORMATS:
-            file_bytes = logic.export.FILE_FORMATS[file_extension][1](user_id)
+            file_bytes = flask.stream_with_context(logic.export.FILE_FORMATS[file_extension][1](user_id))
             file_type = logic.export.FILE_FORMATS[file_extension][2]
         else:
             flask.flash(_('Please select an export format.'), 'warning')
@@ -19,8 +19,8 @@ from ...logic.objects import get_object
 from ...models import Permissions
 from ...logic.errors import UserDoesNotExistError, FederationFileNotAvailableError
 from .forms import FileForm, FileInformationForm, FileHidingForm, ExternalLinkForm
-from ...utils import object_permissions_required, FlaskResponseT
-from ..utils import check_current_user_is_not_readonly
+from ...utils import object_permissions_required, FlaskResponseT, send_file_content
+from ..utils import check_current_user_is_not_readonly, file_name_is_image
 from .permissions import on_unauthorized
 from ...logic.temporary_files import create_temporary_file, delete_expired_temporary_files
 
@@ -60,20 +60,22 @@ def object_file(object_id: int, file_id: int) -> FlaskResponseT:
     if file.is_hidden:
         return flask.abort(403)
     if file.storage in ('database', 'federation'):
-        if 'preview' in flask.request.args:
+        if 'preview' in flask.request.args or 'thumbnail' in flask.request.args:
             mime_types = flask.current_app.config.get('MIME_TYPES', {})
-            if file.preview_image_binary_data is not None and file.preview_image_mime_type is not None and file.preview_image_mime_type.lower() in mime_types.values():
-                return flask.send_file(io.BytesIO(file.preview_image_binary_data), mimetype=file.preview_image_mime_type.lower(), last_modified=file.utc_datetime)
+            # images are previewed in full resolution, while thumbnails may use the downscaled preview image
+            if 'thumbnail' in flask.request.args or not file_name_is_image(file.original_file_name):
+                if file.preview_image_binary_data is not None and file.preview_image_mime_type is not None and file.preview_image_mime_type.lower() in mime_types.values():
+                    return flask.send_file(io.BytesIO(file.preview_image_binary_data), mimetype=file.preview_image_mime_type.lower(), last_modified=file.utc_datetime)
             file_extension = os.path.splitext(file.original_file_name)[1]
             mime_type = mime_types.get(file_extension, None)
             if mime_type is not None:
                 try:
-                    return flask.send_file(file.open(), mimetype=mime_type, last_modified=file.utc_datetime)
+                    return send_file_content(file, mimetype=mime_type)
                 except FederationFileNotAvailableError:
                     flask.flash(_('File stored in other database is not available.'), 'error')
                     return flask.abort(404)
         try:
-            return flask.send_file(file.open(), as_attachment=True, download_name=file.original_file_name, last_modified=file.utc_datetime)
+            return send_file_content(file, as_attachment=True, download_name=file.original_file_name)
         except FederationFileNotAvailableError:
             flask.flash(_('File stored in other database is not available.'), 'error')
             return flask.abort(404)
@@ -168,6 +168,8 @@ def objects() -> FlaskResponseT:
         search_tree = None
         pagination_limit = None
         pagination_offset = None
+        pagination_after_object_id = None
+        pagination_before_object_id = None
         pagination_enabled = True
         num_objects_found = len(db_objects)
         sorting_enabled = False
@@ -429,8 +431,8 @@ def objects() -> FlaskResponseT:
                 pagination_offset = None
             elif pagination_offset > 100000000:
                 pagination_offset = 100000000
-        if pagination_limit is not None and pagination_offset is None:
-            pagination_offset = 0
+        pagination_after_object_id = flask.request.args.get('after', default=None, type=int)
+        pagination_before_object_id = flask.request.args.get('before', default=None, type=int)
 
         sorting_order_name = flask.request.args.get('order', None)
         if sorting_order_name == 'asc':
@@ -453,6 +455,14 @@ def objects() -> FlaskResponseT:
             sorting_property_name = '_object_id'
         else:
             name_only = False
+        if sorting_property_name != '_object_id':
+            # cursors can only be used when sorting by object ID
+            pagination_after_object_id = None
+            pagination_before_object_id = None
+        if pagination_after_object_id is not None or pagination_before_object_id is not None:
+            pagination_offset = None
+        elif pagination_limit is not None and pagination_offset is None:
+            pagination_offset = 0
         if sorting_property_name == '_object_id':
             sorting_property = object_sorting.object_id()
         elif sorting_property_name == '_creation_date':
@@ -573,6 +583,8 @@ def objects() -> FlaskResponseT:
                 pagination_enabled = False
                 pagination_limit = None
                 pagination_offset = None
+                pagination_after_object_id = None
+                pagination_before_object_id = None
             if object_ids is not None and not object_ids:
                 db_objects = []
                 num_objects_found = 0
@@ -601,6 +613,8 @@ def objects() -> FlaskResponseT:
                     sorting_func=sorting_function,
                     limit=pagination_limit,
                     offset=pagination_offset,
+                    after_object_id=pagination_after_object_id,
+                    before_object_id=pagination_before_object_id,
                     action_ids=actual_filter_action_ids,
                     action_type_ids=filter_action_type_ids,
                     other_user_id=actual_filter_user_id,
@@ -613,6 +627,7 @@ def objects() -> FlaskResponseT:
                     anonymous_users_permissions=filter_anonymous_permissions,
                     object_ids=list(object_ids) if object_ids is not None else None,
                     num_objects_found=num_objects_found_list,
+                    estimate_num_objects_found=flask.current_app.config['ESTIMATE_NUMBER_OF_OBJECTS_FOUND'],
                     name_only=name_only
                 )
                 num_objects_found = num_objects_found_list[0]
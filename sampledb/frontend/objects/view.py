@@ -1034,6 +1034,7 @@ def export_data(object_id: int) -> FlaskResponseT:
             return flask.abort(400)
         if not object_ids:
             return flask.abort(400)
+    file_bytes: typing.Optional[typing.Union[io.BytesIO, typing.Iterator[bytes]]]
     if file_extension == '.pdf':
         sections = pdfexport.SECTIONS
         if 'sections' in flask.request.args:
@@ -1056,7 +1057,7 @@ def export_data(object_id: int) -> FlaskResponseT:
         pdf_data = pdfexport.create_pdfexport(object_ids, sections, lang_code)
         file_bytes = io.BytesIO(pdf_data)
     elif file_extension in logic.export.FILE_FORMATS:
-        file_bytes = io.BytesIO(logic.export.FILE_FORMATS[file_extension][1](flask_login.current_user.id, object_ids=object_ids))
+        file_bytes = flask.stream_with_context(logic.export.FILE_FORMATS[file_extension][1](flask_login.current_user.id, object_ids=object_ids))
     else:
         file_bytes = None
     if file_bytes:
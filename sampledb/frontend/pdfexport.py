@@ -53,6 +53,8 @@ def create_html_for_pdfexport(
 
     base_url = flask.url_for('.index', _external=True)
 
+    files_by_object_id = logic.files.get_files_for_objects(object_ids)
+
     objects = []
     for object_id in object_ids:
         object = get_object(object_id)
@@ -230,7 +232,7 @@ def create_html_for_pdfexport(
             publications = []
 
         if 'files' in sections:
-            files = logic.files.get_files_for_object(object.id)
+            files = files_by_object_id[object.id]
             for file in files:
                 exported_files[(object.id, file.id)] = file
         else:
@@ -264,9 +266,6 @@ def create_html_for_pdfexport(
         else:
             return get_translated_text(action.type.object_name, default=_('Object'))
 
-    files_by_object_id = {}
-    for object_tuple in objects:
-        files_by_object_id[object_tuple[0].object_id] = logic.files.get_files_for_object(object_tuple[0].object_id)
     html = flask.render_template(
         'pdfexport/export.html',
         get_object_type_name=get_object_type_name,
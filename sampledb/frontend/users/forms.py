@@ -65,6 +65,7 @@ class AddWebhookForm(FlaskForm):
     name = StringField(validators=[Length(min=0, max=100)])
     address = StringField(validators=[Length(min=1, max=100)])
     type = SelectField(validators=[DataRequired()], choices=[('object_log', 'Object Log'), ('object_permissions', 'Object Permissions')])
+    batch_delivery = BooleanField(default=False)
 
 
 class RemoveWebhookForm(FlaskForm):
@@ -430,7 +430,7 @@ def _handle_webhook_forms(
                     name = None
                 if address == '':
                     address = None
-                new_webhook = create_webhook(type=webhook_type, user_id=flask_login.current_user.id, target_url=address, name=name)
+                new_webhook = create_webhook(type=webhook_type, user_id=flask_login.current_user.id, target_url=address, name=name, batch_delivery=bool(add_webhook_form.batch_delivery.data))
             except errors.WebhookAlreadyExistsError:
                 add_webhook_form.address.errors.append(_('A webhook of this type with this target address already exists', service_name=flask.current_app.config['SERVICE_NAME']))
             except errors.InsecureComponentAddressError:
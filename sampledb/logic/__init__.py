@@ -29,6 +29,7 @@ from . import fed_logs
 from . import files
 from . import groups
 from . import group_categories
+from . import indexed_properties
 from . import info_pages
 from . import instruments
 from . import instrument_log_entries
@@ -103,6 +104,7 @@ __all__ = [
     'files',
     'groups',
     'group_categories',
+    'indexed_properties',
     'info_pages',
     'instruments',
     'instrument_translations',
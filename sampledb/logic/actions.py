@@ -436,6 +436,23 @@ def get_action_type_ids_for_action_ids(
     }
 
 
+def get_actions_for_action_ids(
+        action_ids: typing.Collection[int]
+) -> typing.Dict[int, Action]:
+    """
+    Get the actions for a collection of action IDs using a single query.
+
+    :param action_ids: the IDs of actions
+    :return: the actions by ID, without IDs of actions that do not exist
+    """
+    if not action_ids:
+        return {}
+    return {
+        action.id: Action.from_database(action)
+        for action in models.Action.query.filter(models.Action.id.in_(action_ids)).all()
+    }
+
+
 def get_actions_for_topic(
         topic_id: int
 ) -> typing.List[Action]:
@@ -1,16 +1,135 @@
 # coding: utf-8
 """
+API Log
 
+API log entries are created for every request authenticated using an API
+token or API access token. To keep database writes off the critical path of
+these requests, new entries are buffered in memory and written in bulk by a
+writer thread, either once API_LOG_FLUSH_BATCH_SIZE entries have been
+buffered or every API_LOG_FLUSH_INTERVAL_MILLISECONDS milliseconds. If the
+buffer contains API_LOG_MAX_BUFFER_SIZE entries, new entries are dropped and
+counted instead. Entries that could not be written are returned to the
+buffer, as far as it has room for them.
+
+Setting API_LOG_FLUSH_INTERVAL_MILLISECONDS to 0 disables the buffer, so that
+each entry is written immediately.
 """
 
 import datetime
+import sys
+import threading
+import traceback
 import typing
-from ..models import APILogEntry, HTTPMethod
+
+import flask
+import sqlalchemy.exc
+
+from ..models import APILogEntry, Authentication, HTTPMethod
 from .. import db
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
 
+class _APILogWriter:
+    def __init__(self) -> None:
+        self._buffer: typing.List[typing.Dict[str, typing.Any]] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._thread: typing.Optional[threading.Thread] = None
+        self._should_stop = False
+        self._max_buffer_size = 0
+        self.num_dropped_entries = 0
+
+    def add(self, entry: typing.Dict[str, typing.Any], app: flask.Flask) -> None:
+        with self._buffer_lock:
+            self._max_buffer_size = app.config['API_LOG_MAX_BUFFER_SIZE']
+            if len(self._buffer) >= self._max_buffer_size:
+                self.num_dropped_entries += 1
+                return
+            self._buffer.append(entry)
+            if len(self._buffer) >= app.config['API_LOG_FLUSH_BATCH_SIZE']:
+                self._wake_event.set()
+        self._start(app)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._buffer_lock:
+                entries, self._buffer = self._buffer, []
+            if not entries:
+                return
+            try:
+                _insert_log_entries(entries)
+            except Exception:
+                self._requeue(entries)
+                raise
+
+    def _requeue(self, entries: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        with self._buffer_lock:
+            # like when adding entries to a full buffer, the newest entries are dropped
+            entries = entries + self._buffer
+            num_kept_entries = min(len(entries), self._max_buffer_size)
+            self.num_dropped_entries += len(entries) - num_kept_entries
+            self._buffer = entries[:num_kept_entries]
+
+    def stop(self) -> None:
+        self._should_stop = True
+        self._wake_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _start(self, app: flask.Flask) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._buffer_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            # get actual app instead of thread local proxy from this thread to pass it to the new thread
+            get_current_app = getattr(app, '_get_current_object', None)
+            if get_current_app is not None:
+                app = get_current_app()
+            self._should_stop = False
+            self._thread = threading.Thread(target=self._run, args=[app], daemon=True)
+            self._thread.start()
+
+    def _run(self, app: flask.Flask) -> None:
+        flush_interval = app.config['API_LOG_FLUSH_INTERVAL_MILLISECONDS'] / 1000
+        with app.app_context():
+            while True:
+                self._wake_event.wait(flush_interval)
+                self._wake_event.clear()
+                try:
+                    self.flush()
+                except Exception:
+                    # database might be unavailable for the moment, so the entries are written later
+                    print("Exception while writing API log entries:\n", traceback.format_exc(), file=sys.stderr)
+                if self._should_stop:
+                    break
+
+
+_api_log_writer = _APILogWriter()
+
+
+def _insert_log_entries(entries: typing.List[typing.Dict[str, typing.Any]]) -> None:
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(db.insert(APILogEntry.__table__), entries)
+    except sqlalchemy.exc.IntegrityError:
+        # API tokens might have been removed since the entries were created
+        with db.engine.begin() as connection:
+            existing_api_token_ids = set(connection.execute(
+                db.select(Authentication.id).where(Authentication.id.in_({entry['api_token_id'] for entry in entries}))
+            ).scalars().all())
+            entries = [
+                entry
+                for entry in entries
+                if entry['api_token_id'] in existing_api_token_ids
+            ]
+            if entries:
+                connection.execute(db.insert(APILogEntry.__table__), entries)
+
+
 def get_api_log_entries(api_token_id: int) -> typing.List[APILogEntry]:
     """
     Return a list of API log entries for a given API token.
@@ -18,6 +137,7 @@ def get_api_log_entries(api_token_id: int) -> typing.List[APILogEntry]:
     :param api_token_id: the ID of an existing API token
     :return: a list of API log entries for this token
     """
+    flush_log_entries()
     return APILogEntry.query.filter_by(api_token_id=api_token_id).order_by(db.desc(APILogEntry.utc_datetime)).all()
 
 
@@ -29,15 +149,54 @@ def create_log_entry(
     """
     Create a new API log entry.
 
+    The entry will be written to the database by the API log writer thread,
+    unless buffering is disabled.
+
     :param api_token_id: the ID of an existing API token
     :param method: the HTTP method
     :param route: the route
     """
-    api_log_entry = APILogEntry(
-        api_token_id=api_token_id,
-        method=method,
-        route=route,
-        utc_datetime=datetime.datetime.now(datetime.timezone.utc)
+    utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    if flask.current_app.config['API_LOG_FLUSH_INTERVAL_MILLISECONDS'] <= 0:
+        api_log_entry = APILogEntry(
+            api_token_id=api_token_id,
+            method=method,
+            route=route,
+            utc_datetime=utc_datetime
+        )
+        db.session.add(api_log_entry)
+        db.session.commit()
+        return
+    _api_log_writer.add(
+        {
+            'api_token_id': api_token_id,
+            'method': method,
+            'route': route,
+            'utc_datetime': utc_datetime,
+        },
+        flask.current_app
     )
-    db.session.add(api_log_entry)
-    db.session.commit()
+
+
+def flush_log_entries() -> None:
+    """
+    Write all buffered API log entries to the database.
+    """
+    _api_log_writer.flush()
+
+
+def stop_log_writer() -> None:
+    """
+    Stop the API log writer thread after writing all buffered entries.
+    """
+    _api_log_writer.stop()
+    flush_log_entries()
+
+
+def get_number_of_dropped_log_entries() -> int:
+    """
+    Return the number of API log entries that were dropped due to a full buffer.
+
+    :return: the number of dropped entries
+    """
+    return _api_log_writer.num_dropped_entries
@@ -1,9 +1,14 @@
 import base64
+import collections
 import copy
 import datetime
 import dataclasses
 import functools
+import hashlib
+import hmac
 import secrets
+import threading
+import time
 import typing
 import urllib.parse
 
@@ -14,7 +19,7 @@ from fido2.webauthn import AttestationConveyancePreference, PublicKeyCredentialR
 
 from .. import logic, db
 from .ldap import validate_user, create_user_from_ldap, is_ldap_configured
-from ..models import Authentication, AuthenticationType, Login, TwoFactorAuthenticationMethod, HTTPMethod, FederatedIdentity
+from ..models import Authentication, AuthenticationType, Login, TwoFactorAuthenticationMethod, HTTPMethod, FederatedIdentity, APILogEntry
 from . import errors, api_log
 
 
@@ -91,6 +96,90 @@ def _validate_password_authentication(authentication_method: Authentication, pas
     return _validate_password_hash(password, password_hash)
 
 
+@dataclasses.dataclass(frozen=True)
+class _VerifiedAPITokenCacheEntry:
+    authentication_method_id: int
+    bcrypt_hash: str
+    expires_at: float
+
+
+class _VerifiedAPITokenCache:
+    """
+    A bounded, thread-safe cache of API tokens that have been verified using bcrypt.
+
+    Tokens are never stored in the cache, instead entries are keyed by an HMAC
+    of the token using the application's SECRET_KEY. Each entry stores the
+    bcrypt hash it was verified against, so that it only remains valid while
+    the authentication method still contains that hash. Removing an
+    authentication method or changing its hash therefore invalidates the
+    entry, even if it was cached by another process.
+    """
+
+    def __init__(self) -> None:
+        self._entries: collections.OrderedDict[bytes, _VerifiedAPITokenCacheEntry] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(api_token: str) -> bytes:
+        secret_key = flask.current_app.config['SECRET_KEY']
+        if isinstance(secret_key, str):
+            secret_key = secret_key.encode('utf-8')
+        return hmac.new(secret_key, api_token.encode('utf-8'), hashlib.sha256).digest()
+
+    def is_verified(self, api_token: str, authentication_method_id: int, bcrypt_hash: str) -> bool:
+        key = self._get_key(api_token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return False
+            if entry.authentication_method_id != authentication_method_id or not hmac.compare_digest(entry.bcrypt_hash, bcrypt_hash):
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, api_token: str, authentication_method_id: int, bcrypt_hash: str) -> None:
+        timeout = flask.current_app.config['API_TOKEN_CACHE_TIMEOUT']
+        max_size = flask.current_app.config['API_TOKEN_CACHE_SIZE']
+        if timeout <= 0 or max_size <= 0:
+            return
+        key = self._get_key(api_token)
+        with self._lock:
+            self._entries[key] = _VerifiedAPITokenCacheEntry(
+                authentication_method_id=authentication_method_id,
+                bcrypt_hash=bcrypt_hash,
+                expires_at=time.monotonic() + timeout
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, authentication_method_id: int) -> None:
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.authentication_method_id == authentication_method_id:
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_verified_api_token_cache = _VerifiedAPITokenCache()
+
+
+def _validate_api_token_authentication(authentication_method: Authentication, api_token: str) -> bool:
+    password_hash = authentication_method.login['bcrypt_hash']
+    if _verified_api_token_cache.is_verified(api_token, authentication_method.id, password_hash):
+        return True
+    if not _validate_password_hash(api_token[8:], password_hash):
+        return False
+    _verified_api_token_cache.add(api_token, authentication_method.id, password_hash)
+    return True
+
+
 def _add_password_authentication(user_id: int, login: str, password: str, authentication_type: AuthenticationType, confirmed: bool = True) -> None:
     login = login.lower().strip()
     if check_authentication_method_with_login_exists(login=login):
@@ -218,7 +307,12 @@ def get_authentication_methods(
     """
     authentication_methods = Authentication.query.filter(
         Authentication.user_id == user_id,
-        Authentication.type.in_(authentication_types)
+        Authentication.type.in_(authentication_types),
+        # expired API access tokens might not have been removed yet
+        db.or_(
+            Authentication.expiration_utc_datetime == db.null(),
+            Authentication.expiration_utc_datetime > db.func.now()
+        )
     ).all()
     return [
         AuthenticationMethod.from_database(authentication_method)
@@ -592,7 +686,7 @@ def login_via_api_token(api_token: str) -> typing.Optional[logic.users.User]:
     """
     # convert to lower case to enforce case insensitivity
     api_token = api_token.lower().strip()
-    username, password = api_token[:8], api_token[8:]
+    username = api_token[:8]
     authentication_methods = Authentication.query.filter(
         db.and_(Authentication.login['login'].astext == username,
                 Authentication.type == AuthenticationType.API_TOKEN)
@@ -601,7 +695,7 @@ def login_via_api_token(api_token: str) -> typing.Optional[logic.users.User]:
     for authentication_method in authentication_methods:
         if not authentication_method.confirmed:
             continue
-        if _validate_password_authentication(authentication_method, password):
+        if _validate_api_token_authentication(authentication_method, api_token):
             api_log.create_log_entry(authentication_method.id, HTTPMethod.from_name(flask.request.method), flask.request.path)
             return logic.users.User.from_database(authentication_method.user)
     return None
@@ -618,7 +712,8 @@ def generate_api_access_token(
     :param description: an optional description
     :return: a dict containing the access token information
     """
-    expiration_utc_datetime = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+    remove_expired_api_access_tokens()
+    expiration_utc_datetime = _get_new_api_access_token_expiration_utc_datetime()
     expiration_utc_datetime_str = expiration_utc_datetime.strftime('%Y-%m-%d %H:%M:%S')
 
     access_token = secrets.token_hex(32)
@@ -635,7 +730,8 @@ def generate_api_access_token(
         },
         authentication_type=AuthenticationType.API_ACCESS_TOKEN,
         confirmed=True,
-        user_id=user_id
+        user_id=user_id,
+        expiration_utc_datetime=expiration_utc_datetime
     ))
     db.session.commit()
     return {
@@ -646,22 +742,35 @@ def generate_api_access_token(
     }
 
 
+def _get_new_api_access_token_expiration_utc_datetime() -> datetime.datetime:
+    expiration_utc_datetime = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+    # the expiration datetime is also stored with a precision of seconds in the login data
+    return expiration_utc_datetime.replace(microsecond=0)
+
+
+def _is_api_access_token_unexpired() -> typing.Any:
+    return db.and_(
+        Authentication.type == AuthenticationType.API_ACCESS_TOKEN,
+        Authentication.expiration_utc_datetime > db.func.now()
+    )
+
+
 def remove_expired_api_access_tokens() -> None:
     """
     Delete all expired API access tokens.
     """
-    authentication_methods = Authentication.query.filter_by(
-        type=AuthenticationType.API_ACCESS_TOKEN
-    ).all()
-    current_utc_datetime = datetime.datetime.now(datetime.timezone.utc)
-    for authentication_method in authentication_methods:
-        expiration_utc_datetime_str = authentication_method.login['expiration_utc_datetime']
-        expiration_utc_datetime = datetime.datetime.strptime(
-            expiration_utc_datetime_str,
-            '%Y-%m-%d %H:%M:%S'
-        ).replace(tzinfo=datetime.timezone.utc)
-        if expiration_utc_datetime <= current_utc_datetime:
-            db.session.delete(authentication_method)
+    expired_api_access_token_ids = db.select(Authentication.id).where(
+        Authentication.type == AuthenticationType.API_ACCESS_TOKEN,
+        Authentication.expiration_utc_datetime <= db.func.now()
+    ).scalar_subquery()
+    db.session.execute(
+        db.delete(APILogEntry).where(APILogEntry.api_token_id.in_(expired_api_access_token_ids)),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.execute(
+        db.delete(Authentication).where(Authentication.id.in_(expired_api_access_token_ids)),
+        execution_options={'synchronize_session': False}
+    )
     db.session.commit()
 
 
@@ -672,16 +781,15 @@ def refresh_api_access_token(api_refresh_token: str) -> typing.Optional[typing.D
     :param api_refresh_token: the refresh token
     :return: a dict containing the new access token information
     """
-    remove_expired_api_access_tokens()
     api_refresh_token = api_refresh_token.lower().strip()
     refresh_token_login, refresh_token_password = api_refresh_token[:8], api_refresh_token[8:]
     authentication_methods = Authentication.query.filter(
         db.and_(
             Authentication.login['refresh_token_login'].astext == refresh_token_login,
-            Authentication.type == AuthenticationType.API_ACCESS_TOKEN
+            _is_api_access_token_unexpired()
         )
     ).all()
-    expiration_utc_datetime = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)
+    expiration_utc_datetime = _get_new_api_access_token_expiration_utc_datetime()
     expiration_utc_datetime_str = expiration_utc_datetime.strftime('%Y-%m-%d %H:%M:%S')
 
     for authentication_method in authentication_methods:
@@ -699,6 +807,7 @@ def refresh_api_access_token(api_refresh_token: str) -> typing.Optional[typing.D
                 'expiration_utc_datetime': expiration_utc_datetime_str,
                 'description': description
             }
+            authentication_method.expiration_utc_datetime = expiration_utc_datetime
             db.session.add(authentication_method)
             db.session.commit()
             return {
@@ -719,11 +828,10 @@ def login_via_api_access_token(api_access_token: str) -> typing.Optional[logic.u
     """
     # convert to lower case to enforce case insensitivity
     api_access_token = api_access_token.lower().strip()
-    remove_expired_api_access_tokens()
     authentication_methods = Authentication.query.filter(
         db.and_(
             Authentication.login['access_token'].astext == api_access_token,
-            Authentication.type == AuthenticationType.API_ACCESS_TOKEN
+            _is_api_access_token_unexpired()
         )
     ).all()
 
@@ -745,11 +853,10 @@ def login_via_api_refresh_token(api_refresh_token: str) -> typing.Optional[logic
     # convert to lower case to enforce case insensitivity
     api_refresh_token = api_refresh_token.lower().strip()
     refresh_token_login, refresh_token_password = api_refresh_token[:8], api_refresh_token[8:]
-    remove_expired_api_access_tokens()
     authentication_methods = Authentication.query.filter(
         db.and_(
             Authentication.login['refresh_token_login'].astext == refresh_token_login,
-            Authentication.type == AuthenticationType.API_ACCESS_TOKEN
+            _is_api_access_token_unexpired()
         )
     ).all()
 
@@ -830,6 +937,7 @@ def remove_authentication_method(authentication_method_id: int) -> bool:
             raise errors.OnlyOneAuthenticationMethod('one authentication-method must at least exist, delete not possible')
     db.session.delete(authentication_method)
     db.session.commit()
+    _verified_api_token_cache.invalidate(authentication_method_id)
     return True
 
 
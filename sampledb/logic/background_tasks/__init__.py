@@ -3,10 +3,11 @@ from . import core
 from . import send_mail
 from . import background_dataverse_export
 from .automatic_schema_updates import post_check_for_automatic_schema_updates_task, post_perform_automatic_schema_updates_task
-from .core import start_handler_threads, stop_handler_threads, post_background_task, get_background_tasks, get_background_task_result, reset_claimed_background_tasks
+from .core import start_handler_threads, stop_handler_threads, post_background_task, get_background_tasks, get_background_task_metrics, get_background_task_result, reset_claimed_background_tasks
 from .send_mail import post_send_mail_task
 from .background_dataverse_export import post_dataverse_export_task
 from .poke_components import post_poke_components_task
+from .generate_preview_images import post_generate_preview_image_task
 from .trigger_webhooks import post_trigger_object_log_webhooks, post_trigger_object_permissions_webhooks
 
 __all__ = [
@@ -18,9 +19,11 @@ __all__ = [
     'stop_handler_threads',
     'post_background_task',
     'get_background_tasks',
+    'get_background_task_metrics',
     'get_background_task_result',
     'post_check_for_automatic_schema_updates_task',
     'post_dataverse_export_task',
+    'post_generate_preview_image_task',
     'post_perform_automatic_schema_updates_task',
     'post_poke_components_task',
     'post_trigger_object_log_webhooks',
@@ -9,14 +9,35 @@ in the background, as well as querying tasks to check their status or results.
 Currently, background tasks need to be enabled via the ENABLE_BACKGROUND_TASKS
 configuration value. If they are not enabled, tasks will be performed
 synchronously instead.
+
+Tasks are handled by BACKGROUND_TASK_HANDLER_THREADS handler threads in each
+SampleDB process, and by any processes running the background_worker script.
+Handler threads claim posted tasks using SELECT ... FOR UPDATE SKIP LOCKED, so
+that they do not compete for the same task, and are woken up by a PostgreSQL
+notification whenever a task is posted.
+
+Tasks with a higher priority are claimed first, and the number of tasks of a
+type that are handled at the same time can be limited, so that long-running
+tasks cannot block the handling of others. Failed tasks can be retried with
+an exponentially increasing delay.
+
+Each process periodically renews the claims of the tasks it is handling. If a
+process is killed without releasing its tasks, their claims expire after
+BACKGROUND_TASK_CLAIM_TIMEOUT seconds and the tasks are claimed again by
+another handler thread.
 """
 
+import dataclasses
+import datetime
+import select
 import sys
 import threading
+import time
 import traceback
 import typing
 
 import flask
+import sqlalchemy
 
 from ... import db
 from ...utils import ansi_color
@@ -26,10 +47,26 @@ from .background_dataverse_export import handle_dataverse_export_task
 from .automatic_schema_updates import handle_check_for_automatic_schema_updates_task, handle_perform_automatic_schema_updates_task
 from .send_mail import handle_send_mail_task
 from .poke_components import handle_poke_components_task
-from .trigger_webhooks import handle_trigger_object_log_webhooks, handle_trigger_object_permissions_webhooks, handle_webhook_send
+from .trigger_webhooks import handle_trigger_object_log_webhooks, handle_trigger_object_permissions_webhooks, handle_webhook_send, handle_webhook_send_batch
+from .generate_preview_images import handle_generate_preview_image_task
+from .remove_expired_api_access_tokens import handle_remove_expired_api_access_tokens_task
 
 TASK_WAIT_TIMEOUT = 30
-NUM_HANDLER_THREADS = 4
+# number of posted tasks claimed by a handler thread at once
+TASK_CLAIM_BATCH_SIZE = 4
+# interval (in seconds) in which the listener thread checks whether it should stop
+LISTENER_POLL_INTERVAL = 1
+
+NOTIFICATION_CHANNEL = 'sampledb_background_tasks'
+# processes handling tasks hold a shared advisory lock with this name, so
+# that claimed tasks are only reset when no other process is handling them
+HANDLER_LOCK_NAME = 'sampledb_background_task_handlers'
+# claiming tasks of types with a concurrency limit is serialized using this advisory lock
+CLAIM_LOCK_NAME = 'sampledb_background_task_claims'
+
+# delay (in seconds) before retrying a failed task, doubled for each further attempt
+RETRY_DELAY = 60
+MAX_RETRY_DELAY = 60 * 60
 
 HANDLERS: typing.Dict[str, typing.Callable[[typing.Dict[str, typing.Any], typing.Optional[int]], typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]]] = {
     'send_mail': handle_send_mail_task,
@@ -38,17 +75,71 @@ HANDLERS: typing.Dict[str, typing.Callable[[typing.Dict[str, typing.Any], typing
     'trigger_object_log_webhooks': handle_trigger_object_log_webhooks,
     'trigger_object_permissions_webhooks': handle_trigger_object_permissions_webhooks,
     'webhook_send': handle_webhook_send,
+    'webhook_send_batch': handle_webhook_send_batch,
     'check_for_automatic_schema_updates': handle_check_for_automatic_schema_updates_task,
     'perform_automatic_schema_updates': handle_perform_automatic_schema_updates_task,
+    'generate_preview_image': handle_generate_preview_image_task,
+}
+
+# tasks with a higher priority are claimed first, the default priority is 0
+PRIORITIES: typing.Dict[str, int] = {
+    'send_mail': 10,
+    'dataverse_export': 10,
+    'check_for_automatic_schema_updates': -10,
+    'perform_automatic_schema_updates': -10,
+    'generate_preview_image': -5,
+}
+
+# maximum number of attempts for handling a task, tasks are not retried by default
+MAX_ATTEMPTS: typing.Dict[str, int] = {
+    'send_mail': 5,
+    'webhook_send': 5,
+    'webhook_send_batch': 5,
+}
+
+# maximum number of tasks of a type that are handled at the same time by all processes
+CONCURRENCY_LIMITS: typing.Dict[str, int] = {
+    'dataverse_export': 2,
+    'check_for_automatic_schema_updates': 1,
+    'perform_automatic_schema_updates': 1,
+    'generate_preview_image': 2,
+}
+
+# periodic tasks are performed by the first handler thread in each process,
+# at most once per interval (in seconds)
+PERIODIC_TASKS: typing.Dict[str, typing.Tuple[int, typing.Callable[[], None]]] = {
+    'remove_expired_api_access_tokens': (60 * 60, handle_remove_expired_api_access_tokens_task),
 }
 
 should_stop = False
 wake_event = threading.Event()
 
+periodic_task_last_run_times: typing.Dict[str, float] = {}
+
+# IDs of the tasks currently being handled in this process, their claims are renewed by the listener thread
+handled_task_ids: typing.Set[int] = set()
+handled_task_ids_lock = threading.Lock()
+
 handler_threads: typing.List[threading.Thread] = []
+listener_thread: typing.Optional[threading.Thread] = None
 cleanup_thread: typing.Optional[threading.Thread] = None
 
 
+@dataclasses.dataclass(frozen=True)
+class BackgroundTaskTypeMetrics:
+    """
+    Queue metrics for the background tasks of a type.
+    """
+    type: str
+    num_posted_tasks: int
+    num_scheduled_tasks: int
+    num_claimed_tasks: int
+    num_failed_tasks: int
+    max_waiting_time: typing.Optional[datetime.timedelta]
+    mean_claim_latency: typing.Optional[datetime.timedelta]
+    concurrency_limit: typing.Optional[int]
+
+
 def get_background_tasks() -> typing.Sequence[BackgroundTask]:
     return typing.cast(typing.Sequence[BackgroundTask], BackgroundTask.query.order_by(BackgroundTask.id).all())
 
@@ -60,10 +151,54 @@ def get_background_task(task_id: int) -> BackgroundTask:
     return task
 
 
+def get_background_task_metrics() -> typing.List[BackgroundTaskTypeMetrics]:
+    """
+    Return queue metrics for each type of background task.
+
+    As tasks may be deleted once they are done, the metrics are based on the
+    tasks which are currently stored.
+
+    :return: the metrics, sorted by task type
+    """
+    ready_datetime = db.func.greatest(BackgroundTask.utc_datetime_posted, BackgroundTask.not_before)
+    is_ready = db.or_(BackgroundTask.not_before.is_(None), BackgroundTask.not_before <= db.func.now())
+    rows = db.session.execute(
+        db.select(
+            BackgroundTask.type,
+            db.func.count().filter(db.and_(BackgroundTask.status == BackgroundTaskStatus.POSTED, is_ready)),
+            db.func.count().filter(db.and_(BackgroundTask.status == BackgroundTaskStatus.POSTED, db.not_(is_ready))),
+            db.func.count().filter(BackgroundTask.status == BackgroundTaskStatus.CLAIMED),
+            db.func.count().filter(BackgroundTask.status == BackgroundTaskStatus.FAILED),
+            db.func.max(db.func.now() - ready_datetime).filter(db.and_(BackgroundTask.status == BackgroundTaskStatus.POSTED, is_ready)),
+            db.func.avg(BackgroundTask.utc_datetime_claimed - ready_datetime).filter(BackgroundTask.utc_datetime_claimed.is_not(None)),
+        ).group_by(
+            BackgroundTask.type
+        ).order_by(
+            BackgroundTask.type
+        )
+    ).all()
+    return [
+        BackgroundTaskTypeMetrics(
+            type=type,
+            num_posted_tasks=num_posted_tasks,
+            num_scheduled_tasks=num_scheduled_tasks,
+            num_claimed_tasks=num_claimed_tasks,
+            num_failed_tasks=num_failed_tasks,
+            max_waiting_time=max_waiting_time,
+            mean_claim_latency=mean_claim_latency,
+            concurrency_limit=CONCURRENCY_LIMITS.get(type)
+        )
+        for type, num_posted_tasks, num_scheduled_tasks, num_claimed_tasks, num_failed_tasks, max_waiting_time, mean_claim_latency in rows
+    ]
+
+
 def post_background_task(
         type: str,
         data: typing.Dict[str, typing.Any],
-        auto_delete: bool = True
+        auto_delete: bool = True,
+        priority: typing.Optional[int] = None,
+        max_attempts: typing.Optional[int] = None,
+        not_before: typing.Optional[datetime.datetime] = None
 ) -> typing.Tuple[BackgroundTaskStatus, typing.Optional[BackgroundTask]]:
     """
     Create a background task and post it to be performed.
@@ -77,18 +212,34 @@ def post_background_task(
     :param data: data for the task
     :param auto_delete: whether the task should be deleted automatically, once
         it is done or has failed
+    :param priority: the priority of the task, or None to use the default
+        priority for its type
+    :param max_attempts: the maximum number of attempts for handling the task
+        in the background, or None to use the default for its type
+    :param not_before: the time before which the task should not be handled
+        in the background, or None
     :return: the task status and the task object itself
     """
     if flask.current_app.config['ENABLE_BACKGROUND_TASKS']:
         if flask.current_app.config['TESTING']:
             auto_delete = False
+        if priority is None:
+            priority = PRIORITIES.get(type, 0)
+        if max_attempts is None:
+            max_attempts = MAX_ATTEMPTS.get(type, 1)
         task = BackgroundTask(
             type=type,
             auto_delete=auto_delete,
             data=data,
-            status=BackgroundTaskStatus.POSTED
+            status=BackgroundTaskStatus.POSTED,
+            priority=priority,
+            max_attempts=max_attempts,
+            not_before=not_before,
+            utc_datetime_posted=datetime.datetime.now(datetime.timezone.utc)
         )
         db.session.add(task)
+        # the notification is sent to handler processes once the transaction is committed
+        db.session.execute(db.select(db.func.pg_notify(NOTIFICATION_CHANNEL, '')))
         db.session.commit()
         wake_event.set()
         start_handler_threads(flask.current_app)
@@ -102,13 +253,18 @@ def start_handler_threads(app: flask.Flask) -> None:
     Start handler threads for background tasks.
 
     This function first cleans up all dead threads, then creates and starts
-    handler threads until the desired number of handler threads has been
-    reached.
+    handler threads until the number of handler threads set in
+    BACKGROUND_TASK_HANDLER_THREADS has been reached, as well as a thread
+    listening for notifications about new tasks.
 
-    If background tasks are disabled, this function returns immediately.
+    If background tasks are disabled or no handler threads should be used in
+    this process, this function returns immediately.
     """
     if not app.config['ENABLE_BACKGROUND_TASKS']:
         return
+    num_handler_threads = app.config['BACKGROUND_TASK_HANDLER_THREADS']
+    if num_handler_threads <= 0:
+        return
 
     # remove handler threads that might have died
     for handler_thread in handler_threads.copy():
@@ -121,11 +277,16 @@ def start_handler_threads(app: flask.Flask) -> None:
         app = get_current_app()
     # use daemon threads during testing, as a failed test may circumvent the thread stop signal
     daemon = app.config.get('TESTING', False)
-    while len(handler_threads) < NUM_HANDLER_THREADS:
+    while len(handler_threads) < num_handler_threads:
         handler_thread = threading.Thread(target=_handle_background_tasks, args=[app, len(handler_threads) == 0], daemon=daemon)
         handler_thread.start()
         handler_threads.append(handler_thread)
 
+    global listener_thread
+    if listener_thread is None or not listener_thread.is_alive():
+        listener_thread = threading.Thread(target=_listen_for_background_tasks, args=[app], daemon=daemon)
+        listener_thread.start()
+
     if not daemon:
         global cleanup_thread
         # create thread that takes care of stopping the background task threads if
@@ -165,6 +326,8 @@ def stop_handler_threads(app: flask.Flask) -> None:
     # then join handler threads
     # this is tried repeatedly, so that even if one thread is blocking, all others will be joined correctly
     running_threads = set(handler_threads)
+    if listener_thread is not None:
+        running_threads.add(listener_thread)
     while running_threads:
         for handler_thread in running_threads.copy():
             handler_thread.join(1)
@@ -211,43 +374,230 @@ def _handle_background_tasks(app: flask.Flask, should_delete_expired_tasks: bool
         while not should_stop:
             if should_delete_expired_tasks:
                 BackgroundTask.delete_expired_tasks()
+                _handle_periodic_tasks()
+            # clear the event before claiming, so that tasks posted afterwards are not missed
+            wake_event.clear()
+            tasks = _claim_background_tasks(TASK_CLAIM_BATCH_SIZE)
+            if not tasks:
+                if not should_stop:
+                    wake_event.wait(TASK_WAIT_TIMEOUT)
+                continue
+            with handled_task_ids_lock:
+                handled_task_ids.update(task.id for task in tasks)
             try:
-                task = BackgroundTask.query.filter_by(status=BackgroundTaskStatus.POSTED).first()
-            except Exception:
-                # database might be unavailable for the moment, so no task to work on
-                task = None
-            if task is not None:
-                if _claim_background_task(task):
+                for task_index, task in enumerate(tasks):
+                    if should_stop:
+                        # let other processes handle the remaining tasks
+                        _release_background_tasks(tasks[task_index:])
+                        break
                     status, result = _handle_background_task(task.type, task.data, task.id)
                     _set_background_task_status_with_result(task, status, result)
-                else:
-                    # another thread might have claimed the task first
-                    continue
-            else:
-                wake_event.clear()
-                wake_event.wait(TASK_WAIT_TIMEOUT)
+            finally:
+                with handled_task_ids_lock:
+                    handled_task_ids.difference_update(task.id for task in tasks)
 
 
-def _claim_background_task(
-        task: BackgroundTask
-) -> bool:
+def _listen_for_background_tasks(app: flask.Flask) -> None:
+    with app.app_context():
+        while not should_stop:
+            try:
+                connection = db.engine.raw_connection()
+            except Exception:
+                # database might be unavailable for the moment, handler threads will poll for tasks until it is available again
+                for _ in range(TASK_WAIT_TIMEOUT):
+                    if should_stop:
+                        return
+                    time.sleep(1)
+                continue
+            try:
+                dbapi_connection = typing.cast(typing.Any, connection.driver_connection)
+                dbapi_connection.rollback()
+                dbapi_connection.autocommit = True
+                with dbapi_connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_advisory_lock_shared(hashtext(%s))", [HANDLER_LOCK_NAME])
+                    cursor.execute(f"LISTEN {NOTIFICATION_CHANNEL}")
+                # tasks might have been posted before listening
+                wake_event.set()
+                claim_renewal_interval = app.config['BACKGROUND_TASK_CLAIM_TIMEOUT'] / 4
+                last_claim_renewal_time = time.monotonic()
+                while not should_stop:
+                    if time.monotonic() - last_claim_renewal_time >= claim_renewal_interval:
+                        last_claim_renewal_time = time.monotonic()
+                        _renew_background_task_claims()
+                    if select.select([dbapi_connection], [], [], LISTENER_POLL_INTERVAL) == ([], [], []):
+                        continue
+                    dbapi_connection.poll()
+                    if dbapi_connection.notifies:
+                        dbapi_connection.notifies.clear()
+                        wake_event.set()
+            except Exception:
+                print("Exception while listening for background tasks:\n", traceback.format_exc(), file=sys.stderr)
+            finally:
+                # the connection must not be returned to the pool while it is listening and holding the lock
+                connection.invalidate()
+
+
+def _handle_periodic_tasks() -> None:
+    for type, (interval, handler) in PERIODIC_TASKS.items():
+        current_time = time.monotonic()
+        last_run_time = periodic_task_last_run_times.get(type)
+        if last_run_time is not None and current_time - last_run_time < interval:
+            continue
+        periodic_task_last_run_times[type] = current_time
+        try:
+            handler()
+        except Exception:
+            db.session.rollback()
+            print("Exception during handler for periodic task:\n", traceback.format_exc(), file=sys.stderr)
+
+
+def _renew_background_task_claims() -> None:
+    with handled_task_ids_lock:
+        task_ids = list(handled_task_ids)
+    if not task_ids:
+        return
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(
+                db.update(
+                    BackgroundTask
+                ).where(
+                    BackgroundTask.id.in_(task_ids),
+                    BackgroundTask.status == BackgroundTaskStatus.CLAIMED
+                ).values(
+                    utc_datetime_heartbeat=db.func.now()
+                )
+            )
+    except Exception:
+        # database might be temporarily unavailable, the claims will be renewed on the next attempt
+        pass
+
+
+def _is_claim_expired() -> sqlalchemy.ColumnElement[bool]:
+    claim_timeout = datetime.timedelta(seconds=flask.current_app.config['BACKGROUND_TASK_CLAIM_TIMEOUT'])
+    return typing.cast(sqlalchemy.ColumnElement[bool], BackgroundTask.utc_datetime_heartbeat < db.func.now() - claim_timeout)
+
+
+def _get_num_claimed_tasks_by_type(
+        connection: sqlalchemy.Connection
+) -> typing.Dict[str, int]:
+    return {
+        type: num_claimed_tasks
+        for type, num_claimed_tasks in connection.execute(
+            db.select(
+                BackgroundTask.type,
+                db.func.count()
+            ).where(
+                BackgroundTask.status == BackgroundTaskStatus.CLAIMED,
+                # tasks with an expired claim are no longer being handled
+                db.not_(_is_claim_expired()),
+                BackgroundTask.type.in_(list(CONCURRENCY_LIMITS))
+            ).group_by(
+                BackgroundTask.type
+            )
+        ).all()
+    }
+
+
+def _claim_background_tasks(
+        limit: int
+) -> typing.List[BackgroundTask]:
+    try:
+        with db.engine.begin() as connection:
+            # skip types that have reached their concurrency limit, so that they do not block other tasks
+            num_claimed_tasks_by_type = _get_num_claimed_tasks_by_type(connection)
+            saturated_types = [
+                type
+                for type, num_claimed_tasks in num_claimed_tasks_by_type.items()
+                if num_claimed_tasks >= CONCURRENCY_LIMITS[type]
+            ]
+            # tasks locked by other transactions are being claimed already, so they are skipped instead of waited for
+            # claimed tasks whose claim has expired were abandoned by their process and are claimed again
+            posted_tasks = connection.execute(
+                db.select(
+                    BackgroundTask.id,
+                    BackgroundTask.type,
+                    BackgroundTask.status
+                ).where(
+                    db.or_(
+                        db.and_(
+                            BackgroundTask.status == BackgroundTaskStatus.POSTED,
+                            db.or_(
+                                BackgroundTask.not_before.is_(None),
+                                BackgroundTask.not_before <= db.func.now()
+                            )
+                        ),
+                        db.and_(
+                            BackgroundTask.status == BackgroundTaskStatus.CLAIMED,
+                            _is_claim_expired()
+                        )
+                    ),
+                    BackgroundTask.type.not_in(saturated_types)
+                ).order_by(
+                    BackgroundTask.priority.desc(),
+                    BackgroundTask.id
+                ).limit(
+                    limit
+                ).with_for_update(
+                    skip_locked=True
+                )
+            ).all()
+            if any(type in CONCURRENCY_LIMITS for _, type, _ in posted_tasks):
+                # count claimed tasks again while no other transaction can claim tasks of limited types
+                connection.execute(db.select(db.func.pg_advisory_xact_lock(db.func.hashtext(CLAIM_LOCK_NAME))))
+                num_claimed_tasks_by_type = _get_num_claimed_tasks_by_type(connection)
+            claimable_task_ids = []
+            for task_id, type, status in posted_tasks:
+                if type in CONCURRENCY_LIMITS:
+                    if num_claimed_tasks_by_type.get(type, 0) >= CONCURRENCY_LIMITS[type]:
+                        continue
+                    num_claimed_tasks_by_type[type] = num_claimed_tasks_by_type.get(type, 0) + 1
+                if status == BackgroundTaskStatus.CLAIMED:
+                    print(ansi_color(f"Claiming background task #{task_id} again, as its claim has expired.", color=33), file=sys.stderr)
+                claimable_task_ids.append(task_id)
+            if not claimable_task_ids:
+                return []
+            connection.execute(
+                db.update(
+                    BackgroundTask
+                ).where(
+                    BackgroundTask.id.in_(claimable_task_ids)
+                ).values(
+                    status=BackgroundTaskStatus.CLAIMED,
+                    attempts=BackgroundTask.attempts + 1,
+                    utc_datetime_claimed=db.func.now(),
+                    utc_datetime_heartbeat=db.func.now()
+                )
+            )
+        return BackgroundTask.query.filter(BackgroundTask.id.in_(claimable_task_ids)).populate_existing().order_by(BackgroundTask.priority.desc(), BackgroundTask.id).all()
+    except Exception:
+        # database might be temporarily unavailable, assume no task was claimed
+        db.session.rollback()
+        return []
+
+
+def _release_background_tasks(
+        tasks: typing.Sequence[BackgroundTask]
+) -> None:
     try:
         stmt = (
             db.update(
                 BackgroundTask
             ).where(
-                BackgroundTask.id == task.id,
-                BackgroundTask.status == BackgroundTaskStatus.POSTED
+                BackgroundTask.id.in_([task.id for task in tasks]),
+                BackgroundTask.status == BackgroundTaskStatus.CLAIMED
             ).values(
-                status=BackgroundTaskStatus.CLAIMED
+                status=BackgroundTaskStatus.POSTED,
+                # the tasks were not attempted
+                attempts=BackgroundTask.attempts - 1
             )
         )
         with db.engine.begin() as connection:
-            updated_rowcount = connection.execute(stmt).rowcount
-        return bool(updated_rowcount == 1)
+            connection.execute(stmt)
+            connection.execute(db.select(db.func.pg_notify(NOTIFICATION_CHANNEL, '')))
     except Exception:
-        # database might be temporarily unavailable, assume task was not claimed
-        return False
+        # tasks will be reset once no process is handling tasks anymore
+        pass
 
 
 def _handle_background_task(
@@ -274,6 +624,11 @@ def _set_background_task_status_with_result(
         result: typing.Optional[typing.Dict[str, typing.Any]]
 ) -> None:
     try:
+        if task_status == BackgroundTaskStatus.FAILED and task.attempts < task.max_attempts:
+            # post the task again, to be retried after a delay
+            retry_delay = min(RETRY_DELAY * 2 ** max(task.attempts - 1, 0), MAX_RETRY_DELAY)
+            task_status = BackgroundTaskStatus.POSTED
+            task.not_before = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=retry_delay)
         task.status = task_status
         if result is not None:
             if 'expiration_date' in result:
@@ -296,8 +651,12 @@ def reset_claimed_background_tasks() -> None:
 
     This should only be used before the handler threads are started, to allow
     retrying tasks which had been claimed when the app last ran, but did not
-    finish before it was stopped.
+    finish before it was stopped. If another process is currently handling
+    tasks, the claimed tasks might still be in progress, so they are not reset.
     """
+    if not db.session.execute(db.select(db.func.pg_try_advisory_xact_lock(db.func.hashtext(HANDLER_LOCK_NAME)))).scalar():
+        db.session.rollback()
+        return
     claimed_tasks = BackgroundTask.query.filter_by(status=BackgroundTaskStatus.CLAIMED).all()
     for task in claimed_tasks:
         print(ansi_color(f"Resetting background task {task} to POSTED.", color=33), file=sys.stderr)
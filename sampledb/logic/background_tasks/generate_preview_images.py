@@ -0,0 +1,36 @@
+import typing
+
+import flask
+
+from . import core
+from .. import errors
+from ... import logic
+
+
+def post_generate_preview_image_task(
+    object_id: int,
+    file_id: int
+) -> None:
+    data = {'object_id': object_id, 'file_id': file_id}
+    if flask.current_app.config["ENABLE_BACKGROUND_TASKS"]:
+        core.post_background_task(
+            type='generate_preview_image',
+            data=data,
+            auto_delete=True
+        )
+    else:
+        handle_generate_preview_image_task(data, None)
+
+
+def handle_generate_preview_image_task(
+    data: typing.Dict[str, typing.Any],
+    task_id: typing.Optional[int]
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    try:
+        # files that already have a preview image are skipped, so handling a task again has no effect
+        logic.files.generate_preview_image(object_id=data['object_id'], file_id=data['file_id'])
+    except errors.FileDoesNotExistError:
+        pass
+    except errors.ObjectDoesNotExistError:
+        pass
+    return True, None
@@ -0,0 +1,5 @@
+from ... import logic
+
+
+def handle_remove_expired_api_access_tokens_task() -> None:
+    logic.authentication.remove_expired_api_access_tokens()
@@ -1,11 +1,12 @@
+import datetime
 import typing
 
 import flask
 
 from . import core
 from .. import errors
-from ... import logic
-from ...models import ObjectLogEntry
+from ... import db, logic
+from ...models import BackgroundTask, BackgroundTaskStatus, ObjectLogEntry
 
 
 def post_trigger_object_log_webhooks(
@@ -38,29 +39,73 @@ def post_trigger_object_permissions_webhooks(
 
 def post_webhook_send(
     data: typing.Dict[str, typing.Any],
-    webhook_id: int
+    webhook_id: int,
+    not_before: typing.Optional[datetime.datetime] = None
 ) -> None:
     if flask.current_app.config["ENABLE_BACKGROUND_TASKS"]:
         core.post_background_task(
             type='webhook_send',
             data={'webhook_id': webhook_id, 'data': data},
-            auto_delete=True
+            auto_delete=True,
+            not_before=not_before
         )
     else:
         handle_webhook_send({'webhook_id': webhook_id, 'data': data}, None)
 
 
+def post_webhook_send_batch(
+    webhook_id: int
+) -> None:
+    data = {'webhook_id': webhook_id}
+    if flask.current_app.config["ENABLE_BACKGROUND_TASKS"]:
+        # a posted task will send all events queued until it is handled, so no further task is needed
+        is_task_posted = db.session.execute(db.select(db.exists().where(
+            BackgroundTask.type == 'webhook_send_batch',
+            BackgroundTask.status == BackgroundTaskStatus.POSTED,
+            BackgroundTask.data['webhook_id'].as_integer() == webhook_id
+        ))).scalar()
+        if not is_task_posted:
+            core.post_background_task(
+                type='webhook_send_batch',
+                data=data,
+                auto_delete=True,
+                not_before=datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=logic.webhooks.WEBHOOK_BATCH_WINDOW)
+            )
+    else:
+        handle_webhook_send_batch(data, None)
+
+
+def _send_data_to_webhooks(
+    deliveries: typing.Sequence[typing.Tuple['logic.webhooks.Webhook', typing.Dict[str, typing.Any]]]
+) -> None:
+    immediate_deliveries = []
+    for webhook, data in deliveries:
+        if webhook.batch_delivery:
+            logic.webhooks.add_webhook_event(webhook.id, data)
+            post_webhook_send_batch(webhook.id)
+        else:
+            immediate_deliveries.append((webhook, data))
+    failed_deliveries = logic.webhooks.send_data_to_webhooks(immediate_deliveries)
+    if flask.current_app.config["ENABLE_BACKGROUND_TASKS"]:
+        # retry failed deliveries in separate tasks, so that other webhooks do not receive the data twice
+        retry_datetime = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=core.RETRY_DELAY)
+        for webhook, data in failed_deliveries:
+            post_webhook_send(data, webhook.id, not_before=retry_datetime)
+
+
 def handle_trigger_object_log_webhooks(
     data: typing.Dict[str, typing.Any],
     task_id: typing.Optional[int]
 ) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
     webhooks = logic.webhooks.get_object_log_webhooks_for_object(data['object_id'])
+    deliveries = []
     for webhook in webhooks:
         user = logic.users.get_user(webhook.user_id)
         if flask.current_app.config['ENABLE_WEBHOOKS_FOR_USERS'] or user.is_admin:
             object_log_entry = logic.object_log.get_object_log_entry(data['object_log_entry_id'], webhook.user_id)
             object_log_entry_json = logic.object_log.object_log_entry_to_json(object_log_entry)
-            post_webhook_send(object_log_entry_json, webhook.id)
+            deliveries.append((webhook, object_log_entry_json))
+    _send_data_to_webhooks(deliveries)
     return True, {}
 
 
@@ -69,10 +114,12 @@ def handle_trigger_object_permissions_webhooks(
     task_id: typing.Optional[int]
 ) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
     webhooks = logic.webhooks.get_object_permissions_webhooks_for_object(data['object_id'])
+    deliveries = []
     for webhook in webhooks:
         user = logic.users.get_user(webhook.user_id)
         if flask.current_app.config['ENABLE_WEBHOOKS_FOR_USERS'] or user.is_admin:
-            post_webhook_send(data, webhook.id)
+            deliveries.append((webhook, data))
+    _send_data_to_webhooks(deliveries)
     return True, {}
 
 
@@ -86,3 +133,19 @@ def handle_webhook_send(
     except errors.WebhookConnectionException:
         return False, {}
     return True, {}
+
+
+def handle_webhook_send_batch(
+    data: typing.Dict[str, typing.Any],
+    task_id: typing.Optional[int]
+) -> typing.Tuple[bool, typing.Optional[dict[str, typing.Any]]]:
+    try:
+        while logic.webhooks.send_webhook_events(data['webhook_id']) == logic.webhooks.WEBHOOK_MAX_BATCH_SIZE:
+            # further events might be queued
+            pass
+    except errors.WebhookDoesNotExistError:
+        # the webhook and its queued events have been removed
+        return True, {}
+    except errors.WebhookConnectionException:
+        return False, {}
+    return True, {}
@@ -12,6 +12,7 @@ import minisign
 from flask import url_for
 
 from . import minisign_keys, markdown_images
+from .export import ArchiveFile
 from .files import File
 from .utils import get_translated_text
 from .actions import get_action
@@ -41,12 +42,12 @@ def _unpack_single_item_arrays(json_value: typing.Any) -> typing.Any:
 
 
 def generate_ro_crate_metadata(
-        archive_files: typing.Dict[str, typing.Union[str, bytes]],
+        archive_files: typing.Dict[str, typing.Union[str, bytes, ArchiveFile]],
         infos: typing.Dict[str, typing.Any],
         user_id: int,
         object_ids: typing.Optional[typing.List[int]]
-) -> typing.Dict[str, bytes]:
-    result_files: typing.Dict[str, bytes] = {}
+) -> typing.Dict[str, typing.Union[bytes, ArchiveFile]]:
+    result_files: typing.Dict[str, typing.Union[bytes, ArchiveFile]] = {}
     date_created = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat(timespec='microseconds')
     description = f"SampleDB .eln export generated for user #{user_id}"
     if object_ids:
@@ -328,7 +329,18 @@ def generate_ro_crate_metadata(
                     file_content = file_content.encode('utf-8')
                     charset = 'UTF-8'
 
-                file_hash = hashlib.sha256(file_content).hexdigest()
+                if isinstance(file_content, ArchiveFile):
+                    file_size = file_content.size
+                    if file_content.sha256 is not None:
+                        file_hash = file_content.sha256
+                    else:
+                        file_hasher = hashlib.sha256()
+                        for chunk in file_content.iter_chunks():
+                            file_hasher.update(chunk)
+                        file_hash = file_hasher.hexdigest()
+                else:
+                    file_size = len(file_content)
+                    file_hash = hashlib.sha256(file_content).hexdigest()
 
                 file_extension = os.path.splitext(relative_file_name)[1]
                 supported_mime_types = flask.current_app.config['MIME_TYPES']
@@ -350,7 +362,7 @@ def generate_ro_crate_metadata(
                     } if file_info['uploader_id'] is not None else None,
                     "dateCreated": file_info['utc_datetime'],
                     "encodingFormat": file_type,
-                    "contentSize": str(len(file_content)),
+                    "contentSize": str(file_size),
                     "contentUrl": flask.url_for('frontend.object_file', object_id=object_info['id'], file_id=file_info['id'], _external=True),
                     "sha256": file_hash
                 })
@@ -403,8 +415,9 @@ def generate_ro_crate_metadata(
         }
     })
 
-    result_files['sampledb_export/ro-crate-metadata.json'] = json.dumps(_unpack_single_item_arrays(ro_crate_metadata), indent=2).encode('utf-8')
-    result_files['sampledb_export/ro-crate-metadata.json.minisig'] = _sign_ro_crate_metadata(result_files['sampledb_export/ro-crate-metadata.json'])
+    ro_crate_metadata_json = json.dumps(_unpack_single_item_arrays(ro_crate_metadata), indent=2).encode('utf-8')
+    result_files['sampledb_export/ro-crate-metadata.json'] = ro_crate_metadata_json
+    result_files['sampledb_export/ro-crate-metadata.json.minisig'] = _sign_ro_crate_metadata(ro_crate_metadata_json)
     result_files['sampledb_export/ro-crate-preview.html'] = _create_preview_html(user_id, list(exported_object_ids), result_files).encode('utf-8')
     return result_files
 
@@ -412,7 +425,7 @@ def generate_ro_crate_metadata(
 def _create_preview_html(
         user_id: int,
         object_ids: typing.List[int],
-        result_files: typing.Dict[str, bytes]
+        result_files: typing.Dict[str, typing.Union[bytes, ArchiveFile]]
 ) -> str:
     from ..frontend.markdown_images import IMAGE_FORMATS
     from ..frontend.pdfexport import create_html_for_pdfexport
@@ -49,6 +49,16 @@ class FederationFileNotAvailableError(Exception):
     pass
 
 
+class FileContentStorageError(Exception):
+    pass
+
+
+class FileHashMismatchError(Exception):
+    def __init__(self, hash_hexdigest: str) -> None:
+        self.hash_hexdigest = hash_hexdigest
+        super().__init__()
+
+
 class GroupDoesNotExistError(Exception):
     pass
 
@@ -563,3 +573,15 @@ class AutomaticSchemaUpdateAlreadyInProgressError(Exception):
 
 class AutomaticSchemaUpdateDoesNotExistError(Exception):
     pass
+
+
+class IndexedPropertyDoesNotExistError(Exception):
+    pass
+
+
+class IndexedPropertyAlreadyExistsError(Exception):
+    pass
+
+
+class InvalidIndexedPropertyError(Exception):
+    pass
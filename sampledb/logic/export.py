@@ -1,9 +1,16 @@
 # coding: utf-8
 """
 Export all SampleDB information readable by the user to an archive.
+
+Archives are created as iterators of chunks, so that they can be streamed to
+the client while they are being written. Files stored in the database are
+only read in chunks while they are written to the archive, so that the
+memory required for an export does not depend on its size.
 """
 
+import dataclasses
 import datetime
+import gzip
 import io
 import json
 import os
@@ -17,6 +24,43 @@ import flask
 from .. import logic
 from ..models import Permissions, ObjectLogEntryType
 
+_TAR_BLOCK_SIZE = 512
+_TAR_RECORD_SIZE = 20 * _TAR_BLOCK_SIZE
+
+
+@dataclasses.dataclass(frozen=True)
+class ArchiveFile:
+    """
+    A file in an export archive, with contents that are only read while the archive is written.
+    """
+    size: int
+    iter_chunks: typing.Callable[[], typing.Iterable[bytes]]
+    sha256: typing.Optional[str] = None
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """
+    A non-seekable stream collecting written data until it is retrieved.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: typing.List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: typing.Any) -> int:
+        data = bytes(data)
+        if data:
+            self._chunks.append(data)
+        return len(data)
+
+    def pop_data(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
 
 def get_export_infos(
         user_id: typing.Optional[int],
@@ -26,8 +70,8 @@ def get_export_infos(
         include_users: bool = True,
         include_locations: bool = True,
         include_rdf_files: bool = True
-) -> typing.Tuple[typing.Dict[str, typing.Union[bytes, str]], typing.Dict[str, typing.Any]]:
-    archive_files: typing.Dict[str, typing.Union[bytes, str]] = {}
+) -> typing.Tuple[typing.Dict[str, typing.Union[bytes, str, ArchiveFile]], typing.Dict[str, typing.Any]]:
+    archive_files: typing.Dict[str, typing.Union[bytes, str, ArchiveFile]] = {}
     if object_ids is None:
         relevant_instrument_ids = {
             instrument.id
@@ -44,11 +88,12 @@ def get_export_infos(
         permissions=Permissions.READ,
         object_ids=object_ids
     )
+    if object_ids is not None:
+        objects = [object for object in objects if object.id in object_ids]
+    files_by_object_id = logic.files.get_files_for_objects([object.id for object in objects])
     infos = {}
     object_infos: typing.List[typing.Dict[str, typing.Any]] = []
     for object in objects:
-        if object_ids is not None and object.id not in object_ids:
-            continue
 
         if include_rdf_files:
             archive_files[f"sampledb_export/{object.id}.rdf"] = logic.rdf.generate_rdf(user_id, object.id)
@@ -135,7 +180,7 @@ def get_export_infos(
                 object_infos[-1]['publications'][-1]['user_id'] = publication_log_entry.user_id
                 object_infos[-1]['publications'][-1]['utc_datetime'] = publication_log_entry.utc_datetime.replace(tzinfo=None).isoformat(timespec='microseconds')
 
-        for file_info in logic.files.get_files_for_object(object.id):
+        for file_info in files_by_object_id[object.id]:
             if not file_info.is_hidden:
                 relevant_user_ids.add(file_info.user_id)
                 object_infos[-1]['files'].append({
@@ -149,13 +194,17 @@ def get_export_infos(
                 if file_info.storage == 'database':
                     object_infos[-1]['files'][-1]['original_file_name'] = file_info.original_file_name
                     try:
-                        file_bytes = file_info.open(read_only=True).read()
+                        file_size = file_info.binary_data_size
                     except Exception:
                         pass
                     else:
                         file_name = os.path.basename(file_info.original_file_name)
                         object_infos[-1]['files'][-1]['path'] = f'objects/{object.id}/files/{file_info.id}/{file_name}'
-                        archive_files[f"sampledb_export/objects/{object.id}/files/{file_info.id}/{file_name}"] = file_bytes
+                        archive_files[f"sampledb_export/objects/{object.id}/files/{file_info.id}/{file_name}"] = ArchiveFile(
+                            size=file_size,
+                            iter_chunks=file_info.iter_binary_data,
+                            sha256=file_info.hash.hexdigest if file_info.hash is not None and file_info.hash.algorithm == 'sha256' else None
+                        )
                 elif file_info.storage == 'url':
                     object_infos[-1]['files'][-1]['url'] = file_info.url
             else:
@@ -318,7 +367,7 @@ def get_export_infos(
     return archive_files, infos
 
 
-def get_archive_files(user_id: typing.Optional[int], object_ids: typing.Optional[typing.List[int]] = None) -> typing.Dict[str, bytes]:
+def get_archive_files(user_id: typing.Optional[int], object_ids: typing.Optional[typing.List[int]] = None) -> typing.Dict[str, typing.Union[bytes, ArchiveFile]]:
     archive_files, infos = get_export_infos(user_id, object_ids)
     archive_files['sampledb_export/data.json'] = json.dumps(infos, indent=2)
 
@@ -342,7 +391,7 @@ This archive was created for an anonymous user at {datetime.datetime.now(datetim
 
     archive_files["sampledb_export/README.txt"] = readme_text
 
-    binary_archive_files = {}
+    binary_archive_files: typing.Dict[str, typing.Union[bytes, ArchiveFile]] = {}
     for file_name, file_content in archive_files.items():
         if isinstance(file_content, str):
             binary_archive_files[file_name] = file_content.encode('utf-8')
@@ -352,35 +401,110 @@ This archive was created for an anonymous user at {datetime.datetime.now(datetim
     return binary_archive_files
 
 
-def get_zip_archive(
+def _iter_zip_archive_chunks(archive_files: typing.Dict[str, typing.Union[bytes, ArchiveFile]]) -> typing.Iterator[bytes]:
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w') as zip_file:
+        for file_name, file_content in archive_files.items():
+            if isinstance(file_content, ArchiveFile):
+                zip_info = zipfile.ZipInfo(file_name, date_time=time.localtime(time.time())[:6])
+                zip_info.external_attr = 0o600 << 16
+                # setting the file size allows zipfile to decide whether ZIP64 extensions are required
+                zip_info.file_size = file_content.size
+                with zip_file.open(zip_info, 'w') as zip_entry:
+                    for chunk in file_content.iter_chunks():
+                        zip_entry.write(chunk)
+                        yield buffer.pop_data()
+            else:
+                zip_file.writestr(file_name, file_content)
+            yield buffer.pop_data()
+    yield buffer.pop_data()
+
+
+def _iter_tar_gz_archive_chunks(archive_files: typing.Dict[str, typing.Union[bytes, ArchiveFile]]) -> typing.Iterator[bytes]:
+    buffer = _ChunkBuffer()
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer) as gzip_file:
+        tar_size = 0
+        for file_name, file_content in archive_files.items():
+            tar_info = tarfile.TarInfo(file_name)
+            tar_info.size = file_content.size if isinstance(file_content, ArchiveFile) else len(file_content)
+            tar_info.mode = 0o444
+            tar_info.mtime = int(time.time())
+            tar_header = tar_info.tobuf(tarfile.DEFAULT_FORMAT, tarfile.ENCODING, 'surrogateescape')
+            gzip_file.write(tar_header)
+            tar_size += len(tar_header)
+            if isinstance(file_content, ArchiveFile):
+                written_size = 0
+                for chunk in file_content.iter_chunks():
+                    # the size in the header has to match the number of bytes written
+                    chunk = chunk[:tar_info.size - written_size]
+                    gzip_file.write(chunk)
+                    written_size += len(chunk)
+                    yield buffer.pop_data()
+                if written_size < tar_info.size:
+                    gzip_file.write(b'\0' * (tar_info.size - written_size))
+            else:
+                gzip_file.write(file_content)
+            tar_size += tar_info.size
+            if tar_size % _TAR_BLOCK_SIZE:
+                padding_size = _TAR_BLOCK_SIZE - tar_size % _TAR_BLOCK_SIZE
+                gzip_file.write(b'\0' * padding_size)
+                tar_size += padding_size
+            yield buffer.pop_data()
+        # end the archive with two empty blocks and fill the last record, like tarfile does
+        gzip_file.write(b'\0' * (2 * _TAR_BLOCK_SIZE))
+        tar_size += 2 * _TAR_BLOCK_SIZE
+        if tar_size % _TAR_RECORD_SIZE:
+            gzip_file.write(b'\0' * (_TAR_RECORD_SIZE - tar_size % _TAR_RECORD_SIZE))
+    yield buffer.pop_data()
+
+
+def iter_zip_archive(
         user_id: typing.Optional[int],
         object_ids: typing.Optional[typing.List[int]] = None
-) -> bytes:
+) -> typing.Iterator[bytes]:
+    """
+    Create a .zip archive and return an iterator over its contents.
+
+    The information on the exported objects is gathered immediately, while
+    files are only read while the iterator is consumed.
+
+    :param user_id: the ID of the user to export data for, or None
+    :param object_ids: the IDs of the objects to export, or None
+    :return: an iterator of chunks of the archive
+    """
     archive_files = get_archive_files(user_id, object_ids=object_ids)
-    zip_bytes = io.BytesIO()
-    with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
-        for file_name, file_content in archive_files.items():
-            zip_file.writestr(file_name, file_content)
-    return zip_bytes.getvalue()
+    return _iter_zip_archive_chunks(archive_files)
 
 
-def get_tar_gz_archive(
+def iter_tar_gz_archive(
         user_id: typing.Optional[int],
         object_ids: typing.Optional[typing.List[int]] = None
-) -> bytes:
+) -> typing.Iterator[bytes]:
+    """
+    Create a .tar.gz archive and return an iterator over its contents.
+
+    The information on the exported objects is gathered immediately, while
+    files are only read while the iterator is consumed.
+
+    :param user_id: the ID of the user to export data for, or None
+    :param object_ids: the IDs of the objects to export, or None
+    :return: an iterator of chunks of the archive
+    """
     archive_files = get_archive_files(user_id, object_ids=object_ids)
-    tar_bytes = io.BytesIO()
-    with tarfile.open('sampledb_export.tar.gz', 'w:gz', fileobj=tar_bytes) as tar_file:
-        for file_name, file_content in archive_files.items():
-            tar_info = tarfile.TarInfo(file_name)
-            tar_info.size = len(file_content)
-            tar_info.mode = 0o444
-            tar_info.mtime = int(time.time())
-            tar_file.addfile(tar_info, fileobj=io.BytesIO(file_content))
-    return tar_bytes.getvalue()
+    return _iter_tar_gz_archive_chunks(archive_files)
 
 
-def get_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]] = None) -> bytes:
+def iter_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]] = None) -> typing.Iterator[bytes]:
+    """
+    Create a .eln file and return an iterator over its contents.
+
+    The information on the exported objects is gathered immediately, while
+    files are only read while the iterator is consumed.
+
+    :param user_id: the ID of the user to export data for
+    :param object_ids: the IDs of the objects to export, or None
+    :return: an iterator of chunks of the archive
+    """
     archive_files, infos = get_export_infos(
         user_id=user_id,
         object_ids=object_ids,
@@ -391,15 +515,29 @@ def get_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]]
         include_locations=False,
     )
     binary_archive_files = logic.eln_export.generate_ro_crate_metadata(archive_files, infos, user_id, object_ids)
-    zip_bytes = io.BytesIO()
-    with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
-        for file_name, file_content in binary_archive_files.items():
-            zip_file.writestr(file_name, file_content)
-    return zip_bytes.getvalue()
+    return _iter_zip_archive_chunks(binary_archive_files)
+
+
+def get_zip_archive(
+        user_id: typing.Optional[int],
+        object_ids: typing.Optional[typing.List[int]] = None
+) -> bytes:
+    return b''.join(iter_zip_archive(user_id, object_ids=object_ids))
+
+
+def get_tar_gz_archive(
+        user_id: typing.Optional[int],
+        object_ids: typing.Optional[typing.List[int]] = None
+) -> bytes:
+    return b''.join(iter_tar_gz_archive(user_id, object_ids=object_ids))
+
+
+def get_eln_archive(user_id: int, object_ids: typing.Optional[typing.List[int]] = None) -> bytes:
+    return b''.join(iter_eln_archive(user_id, object_ids=object_ids))
 
 
 FILE_FORMATS = {
-    '.zip': ('.zip Archive', get_zip_archive, 'application/zip'),
-    '.tar.gz': ('.tar.gz Archive', get_tar_gz_archive, 'application/gzip'),
-    '.eln': ('.eln File', get_eln_archive, 'application/zip')
+    '.zip': ('.zip Archive', iter_zip_archive, 'application/zip'),
+    '.tar.gz': ('.tar.gz Archive', iter_tar_gz_archive, 'application/gzip'),
+    '.eln': ('.eln File', iter_eln_archive, 'application/zip')
 }
@@ -0,0 +1,183 @@
+# coding: utf-8
+"""
+Logic module for the local cache of federated file contents
+
+The contents of files with the storage 'federation' are stored by the
+component they were imported from, so they have to be fetched whenever they
+are viewed or downloaded. If FEDERATED_FILE_CACHE_DIRECTORY is set, fetched
+contents are stored in this directory, so that they can be served again
+without contacting the other component, e.g. during an outage.
+
+Cached contents are stored in files named after a hash of the component UUID,
+the federated object ID and the federated file ID. If the file has hash
+information, cached contents are validated against it before they are used.
+Once the total size of the cache exceeds FEDERATED_FILE_CACHE_SIZE bytes, the
+least recently used contents are removed.
+"""
+
+import hashlib
+import os
+import tempfile
+import typing
+
+import flask
+
+# algorithms that may be used to validate cached contents
+_SUPPORTED_HASH_ALGORITHMS = {'sha256', 'sha512'}
+
+
+def _get_cache_directory() -> typing.Optional[str]:
+    cache_directory = flask.current_app.config.get('FEDERATED_FILE_CACHE_DIRECTORY')
+    if not cache_directory:
+        return None
+    return str(cache_directory)
+
+
+def _get_cache_file_path(
+        cache_directory: str,
+        component_uuid: str,
+        fed_object_id: int,
+        fed_file_id: int
+) -> str:
+    cache_key = f'{component_uuid}/{fed_object_id}/{fed_file_id}'
+    return os.path.join(cache_directory, hashlib.sha256(cache_key.encode('utf-8')).hexdigest())
+
+
+def _is_content_valid(
+        content: bytes,
+        expected_hash: typing.Optional[typing.Tuple[str, str]]
+) -> bool:
+    if expected_hash is None:
+        return True
+    algorithm, hexdigest = expected_hash
+    if algorithm not in _SUPPORTED_HASH_ALGORITHMS:
+        return True
+    return bool(hashlib.new(algorithm, content).hexdigest() == hexdigest)
+
+
+def get_cached_file_content(
+        component_uuid: str,
+        fed_object_id: int,
+        fed_file_id: int,
+        expected_hash: typing.Optional[typing.Tuple[str, str]] = None
+) -> typing.Optional[bytes]:
+    """
+    Return the cached contents of a federated file.
+
+    :param component_uuid: the UUID of the component the file was imported from
+    :param fed_object_id: the ID of the object at the component
+    :param fed_file_id: the ID of the file at the component
+    :param expected_hash: the hash algorithm and hexdigest of the file, if known
+    :return: the file contents, or None if they are not cached or invalid
+    """
+    cache_directory = _get_cache_directory()
+    if cache_directory is None:
+        return None
+    cache_file_path = _get_cache_file_path(cache_directory, component_uuid, fed_object_id, fed_file_id)
+    try:
+        with open(cache_file_path, 'rb') as cache_file:
+            content = cache_file.read()
+    except OSError:
+        return None
+    if not _is_content_valid(content, expected_hash):
+        try:
+            os.remove(cache_file_path)
+        except OSError:
+            pass
+        return None
+    try:
+        # the modification time is used to find the least recently used contents
+        os.utime(cache_file_path)
+    except OSError:
+        pass
+    return content
+
+
+def is_file_content_cached(
+        component_uuid: str,
+        fed_object_id: int,
+        fed_file_id: int
+) -> bool:
+    """
+    Return whether the contents of a federated file are cached.
+
+    :param component_uuid: the UUID of the component the file was imported from
+    :param fed_object_id: the ID of the object at the component
+    :param fed_file_id: the ID of the file at the component
+    :return: whether the contents are cached
+    """
+    cache_directory = _get_cache_directory()
+    if cache_directory is None:
+        return False
+    return os.path.isfile(_get_cache_file_path(cache_directory, component_uuid, fed_object_id, fed_file_id))
+
+
+def store_file_content(
+        component_uuid: str,
+        fed_object_id: int,
+        fed_file_id: int,
+        content: bytes,
+        expected_hash: typing.Optional[typing.Tuple[str, str]] = None
+) -> bool:
+    """
+    Store the contents of a federated file in the cache.
+
+    :param component_uuid: the UUID of the component the file was imported from
+    :param fed_object_id: the ID of the object at the component
+    :param fed_file_id: the ID of the file at the component
+    :param content: the file contents
+    :param expected_hash: the hash algorithm and hexdigest of the file, if known
+    :return: whether the contents were stored
+    """
+    cache_directory = _get_cache_directory()
+    if cache_directory is None:
+        return False
+    cache_size = flask.current_app.config['FEDERATED_FILE_CACHE_SIZE']
+    if len(content) > cache_size:
+        return False
+    if not _is_content_valid(content, expected_hash):
+        return False
+    try:
+        os.makedirs(cache_directory, exist_ok=True)
+        # write to a temporary file first, so that readers never see partial contents
+        file_descriptor, temporary_file_path = tempfile.mkstemp(dir=cache_directory, prefix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                temporary_file.write(content)
+            os.replace(temporary_file_path, _get_cache_file_path(cache_directory, component_uuid, fed_object_id, fed_file_id))
+        except OSError:
+            os.remove(temporary_file_path)
+            raise
+    except OSError:
+        return False
+    _evict_least_recently_used(cache_directory, cache_size)
+    return True
+
+
+def _evict_least_recently_used(
+        cache_directory: str,
+        cache_size: int
+) -> None:
+    cache_entries = []
+    total_size = 0
+    with os.scandir(cache_directory) as directory_entries:
+        for directory_entry in directory_entries:
+            if directory_entry.name.startswith('.') or not directory_entry.is_file():
+                continue
+            try:
+                stat_result = directory_entry.stat()
+            except OSError:
+                continue
+            cache_entries.append((stat_result.st_mtime, stat_result.st_size, directory_entry.path))
+            total_size += stat_result.st_size
+    if total_size <= cache_size:
+        return
+    cache_entries.sort()
+    for _, size, path in cache_entries:
+        if total_size <= cache_size:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
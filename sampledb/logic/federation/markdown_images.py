@@ -32,6 +32,25 @@ def import_markdown_image(
         db.session.commit()
 
 
+def import_markdown_images(
+        markdown_images_data: typing.Sequence[typing.Tuple[str, bytes]],
+        component: Component
+) -> None:
+    if not markdown_images_data:
+        return
+    filenames = {filename for filename, data in markdown_images_data}
+    existing_filenames = set(db.session.execute(
+        db.select(MarkdownImage.file_name)
+        .where(MarkdownImage.file_name.in_(filenames))
+        .where(MarkdownImage.component_id == component.id)
+    ).scalars().all())
+    for filename, data in markdown_images_data:
+        if filename not in existing_filenames:
+            db.session.add(MarkdownImage(filename, data, None, permanent=True, component_id=component.id))
+            existing_filenames.add(filename)
+    db.session.commit()
+
+
 def parse_import_markdown_image(
         markdown_image_data: typing.Tuple[str, bytes],
         component: Component
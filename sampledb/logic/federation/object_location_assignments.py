@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 import typing
 
 import flask
@@ -56,6 +56,7 @@ def import_object_location_assignment(
         assignment.confirmed = assignment_data['confirmed']
         assignment.utc_datetime = assignment_data['utc_datetime']
         assignment.declined = assignment_data.get('declined', False)
+        assignment.last_modified = datetime.now(timezone.utc)
         db.session.commit()
         fed_logs.update_object_location_assignment(assignment.id, component.id)
     return ObjectLocationAssignment.from_database(assignment)
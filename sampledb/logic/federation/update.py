@@ -2,33 +2,43 @@
 """
 Logic module handling communication with other components in a SampleDB federation
 """
+import concurrent.futures
 import typing
 import datetime
 import io
 import flask
 import requests
 
-from .utils import _get_dict, _get_list, _get_bool
+from .utils import _get_dict, _get_list, _get_bool, _get_int
 from .users import import_user, parse_user
 from .components import import_component_info, parse_component_info
 from .location_types import import_location_type, parse_location_type
 from .instruments import import_instrument, parse_instrument
 from .action_types import import_action_type, parse_action_type
 from .locations import import_location, parse_location, locations_check_for_cyclic_dependencies
-from .markdown_images import parse_markdown_image, import_markdown_image
+from .markdown_images import parse_markdown_image, import_markdown_images
 from .actions import import_action, parse_action
 from .objects import import_object, parse_object
 from ..components import Component, set_component_discoverable
+from ..files import get_files_for_object
+from ..objects import get_object
 from ..component_authentication import get_own_authentication
 from ..users import link_users_by_email_hashes
+from ..utils import single_transaction
 from ..federation.login import update_metadata
-from .. import errors
+from .. import errors, federated_file_cache
 from ...models import ComponentAuthenticationType
 
 PROTOCOL_VERSION_MAJOR = 0
 PROTOCOL_VERSION_MINOR = 1
 
 FEDERATION_TIMEOUT = 60
+# number of shared objects requested at once during an update
+FEDERATION_OBJECTS_PAGE_SIZE = 100
+# changes this long before the last synchronization are sent again, to tolerate clock differences and late commits
+FEDERATION_SYNC_OVERLAP = datetime.timedelta(minutes=10)
+# maximum number of federated files fetched at once when prefetching file contents
+FEDERATION_MAX_CONCURRENT_FILE_REQUESTS = 4
 
 
 def _send_request(
@@ -76,8 +86,8 @@ def put(
         component: Component,
         headers: typing.Optional[typing.Dict[str, str]] = None,
         **kwargs: typing.Any
-) -> None:
-    _send_request('put', endpoint, component, headers, **kwargs)
+) -> requests.Response:
+    return _send_request('put', endpoint, component, headers, **kwargs)
 
 
 def get_binary(
@@ -101,7 +111,8 @@ def get(
         component: Component,
         headers: typing.Optional[typing.Dict[str, str]] = None,
         *,
-        ignore_last_sync_time: bool = False
+        ignore_last_sync_time: bool = False,
+        parameters: typing.Optional[typing.Dict[str, str]] = None
 ) -> typing.Dict[str, typing.Any]:
     if component.address is None:
         raise errors.MissingComponentAddressError()
@@ -112,7 +123,7 @@ def get(
     if auth:
         headers['Authorization'] = 'Bearer ' + auth.login['token']
 
-    parameters = {}
+    parameters = dict(parameters) if parameters is not None else {}
     if component.last_sync_timestamp is not None and not ignore_last_sync_time:
         parameters['last_sync_timestamp'] = component.last_sync_timestamp.strftime('%Y-%m-%d %H:%M:%S.%f')
     req = requests.get(
@@ -191,12 +202,22 @@ def import_updates(
         pass
     if users:
         update_users(component, users)
-    try:
-        updates = get('/federation/v1/shares/objects/', component, ignore_last_sync_time=ignore_last_sync_time)
-    except errors.InvalidJSONError:
-        raise errors.InvalidDataExportError('Received an invalid JSON string.')
-    if updates:
-        update_shares(component, updates)
+    after_object_id = None
+    while True:
+        parameters = {'limit': str(FEDERATION_OBJECTS_PAGE_SIZE)}
+        if after_object_id is not None:
+            parameters['after'] = str(after_object_id)
+        try:
+            updates = get('/federation/v1/shares/objects/', component, ignore_last_sync_time=ignore_last_sync_time, parameters=parameters)
+        except errors.InvalidJSONError:
+            raise errors.InvalidDataExportError('Received an invalid JSON string.')
+        if updates:
+            update_shares(component, updates)
+        # components without pagination support send all objects at once
+        next_after_object_id = _get_int(updates.get('next_after')) if isinstance(updates, dict) else None
+        if next_after_object_id is None or (after_object_id is not None and next_after_object_id <= after_object_id):
+            break
+        after_object_id = next_after_object_id
 
     metadata = get('/federation/v1/shares/metadata/', component)
     if metadata is not None:
@@ -293,45 +314,133 @@ def update_shares(
     for object_data in object_data_list:
         objects.append(parse_object(object_data, component))
 
-    # apply
-    for markdown_image_data in markdown_images:
-        import_markdown_image(markdown_image_data, component)
+    # import all entities in dependency order in a single transaction, so that an
+    # update is either imported completely or not at all
+    import_status_by_object_id = {}
+    imported_object_ids = []
+    with single_transaction():
+        import_markdown_images(markdown_images, component)
 
-    for user_data in users:
-        import_user(user_data, component)
+        for user_data in users:
+            import_user(user_data, component)
 
-    for instrument_data in instruments:
-        import_instrument(instrument_data, component)
+        for instrument_data in instruments:
+            import_instrument(instrument_data, component)
 
-    for action_type_data in action_types:
-        import_action_type(action_type_data, component)
+        for action_type_data in action_types:
+            import_action_type(action_type_data, component)
 
-    for action_data in actions:
-        import_action(action_data, component)
+        for action_data in actions:
+            import_action(action_data, component)
 
-    for location_type_data in location_types:
-        import_location_type(location_type_data, component)
+        for location_type_data in location_types:
+            import_location_type(location_type_data, component)
 
-    while len(locations) > 0:
-        key = list(locations)[0]
-        import_location(locations[key], component, locations, users)
-        if key in locations:
-            locations.pop(key)
+        while len(locations) > 0:
+            key = list(locations)[0]
+            import_location(locations[key], component, locations, users)
+            if key in locations:
+                locations.pop(key)
 
-    import_status_by_object_id = {}
-    for object_data in objects:
-        import_status: typing.Dict[str, typing.Any] = {}
-        import_object(object_data, component, import_status=import_status)
-        import_status_by_object_id[object_data['fed_object_id']] = import_status
+        for object_data in objects:
+            import_status: typing.Dict[str, typing.Any] = {}
+            imported_object = import_object(object_data, component, import_status=import_status)
+            import_status_by_object_id[object_data['fed_object_id']] = import_status
+            imported_object_ids.append(imported_object.object_id)
 
+    # fetch the contents of the imported files concurrently
+    if flask.current_app.config['PREFETCH_FEDERATED_FILES']:
+        prefetch_federated_files(component, imported_object_ids)
+
+    # report the import statuses once the update has been committed
     if component.address:
-        for object_id, import_status in import_status_by_object_id.items():
-            if import_status:
-                send_object_share_import_status(
-                    object_id=object_id,
-                    component=component,
-                    import_status=import_status
-                )
+        send_object_share_import_statuses(
+            component=component,
+            import_statuses={
+                object_id: import_status
+                for object_id, import_status in import_status_by_object_id.items()
+                if import_status
+            }
+        )
+
+
+def prefetch_federated_files(
+        component: Component,
+        object_ids: typing.Sequence[int]
+) -> None:
+    if component.address is None or not flask.current_app.config['FEDERATED_FILE_CACHE_DIRECTORY']:
+        return
+    files_to_fetch = []
+    for object_id in object_ids:
+        object = get_object(object_id)
+        if object.fed_object_id is None:
+            continue
+        for file in get_files_for_object(object_id):
+            if file.storage != 'federation' or file.component_id != component.id or file.fed_id is None:
+                continue
+            if federated_file_cache.is_file_content_cached(component.uuid, object.fed_object_id, file.fed_id):
+                continue
+            if file.hash is not None:
+                expected_hash = (file.hash.algorithm, file.hash.hexdigest)
+            else:
+                expected_hash = None
+            files_to_fetch.append((object.fed_object_id, file.fed_id, expected_hash))
+    if not files_to_fetch:
+        return
+    headers = {}
+    auth = get_own_authentication(component.id, ComponentAuthenticationType.TOKEN)
+    if auth:
+        headers['Authorization'] = 'Bearer ' + auth.login['token']
+
+    def fetch_file_content(fed_object_id: int, fed_file_id: int) -> typing.Optional[bytes]:
+        # only perform the request here, as the database session must not be shared between threads
+        assert component.address is not None
+        try:
+            response = requests.get(
+                component.address.rstrip('/') + f'/federation/v1/shares/objects/{fed_object_id}/files/{fed_file_id}',
+                headers=headers,
+                timeout=FEDERATION_TIMEOUT
+            )
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        return response.content
+
+    num_workers = min(len(files_to_fetch), FEDERATION_MAX_CONCURRENT_FILE_REQUESTS)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(fetch_file_content, fed_object_id, fed_file_id)
+            for fed_object_id, fed_file_id, expected_hash in files_to_fetch
+        ]
+        for (fed_object_id, fed_file_id, expected_hash), future in zip(files_to_fetch, futures):
+            content = future.result()
+            if content is not None:
+                federated_file_cache.store_file_content(component.uuid, fed_object_id, fed_file_id, content, expected_hash)
+
+
+def send_object_share_import_statuses(
+        component: Component,
+        import_statuses: typing.Dict[int, typing.Dict[str, typing.Any]]
+) -> None:
+    if not import_statuses:
+        return
+    response = put(
+        endpoint='/federation/v1/shares/objects/import_status',
+        component=component,
+        json={
+            str(object_id): import_status
+            for object_id, import_status in import_statuses.items()
+        }
+    )
+    if response.status_code in (404, 405):
+        # components without support for batched import statuses
+        for object_id, import_status in import_statuses.items():
+            send_object_share_import_status(
+                object_id=object_id,
+                component=component,
+                import_status=import_status
+            )
 
 
 def send_object_share_import_status(
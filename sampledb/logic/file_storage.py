@@ -0,0 +1,253 @@
+# coding: utf-8
+"""
+Logic module for storing the contents of uploaded files
+
+By default, the contents of files uploaded to SampleDB are stored in the
+binary_data column of the files table. Alternatively, FILE_CONTENT_STORAGE can
+be set to 'filesystem' or 's3' to store the contents of new files in a local
+directory or in an S3-compatible object store, so that large files do not
+increase the size of the database and its backups.
+
+Contents are addressed by their SHA-256 hash, so identical contents are only
+stored once. As files are never deleted, stored contents are never removed.
+"""
+
+import abc
+import datetime
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import typing
+import urllib.parse
+
+import flask
+import requests
+
+from . import errors
+
+FILE_CONTENT_STORAGES = {'database', 'filesystem', 's3'}
+
+# timeout for requests to the S3-compatible object store in seconds
+S3_TIMEOUT = 60
+
+_EMPTY_PAYLOAD_HASH = hashlib.sha256(b'').hexdigest()
+
+# contents are stored using the hexdigest of this hash algorithm as key
+CONTENT_KEY_HASH_ALGORITHM = 'sha256'
+
+
+def get_content_key(content: bytes) -> str:
+    """
+    Return the key for storing file contents.
+
+    :param content: the file contents
+    :return: the content key
+    """
+    return hashlib.new(CONTENT_KEY_HASH_ALGORITHM, content).hexdigest()
+
+
+class FileStorage(abc.ABC):
+    """
+    Base class for storages of file contents addressed by a content key.
+    """
+
+    @abc.abstractmethod
+    def store(self, content_key: str, stream: typing.BinaryIO) -> None:
+        """
+        Store file contents, unless contents with this key already exist.
+
+        :param content_key: the key of the contents
+        :param stream: a stream to read the contents from
+        :raise errors.FileContentStorageError: if the contents cannot be stored
+        """
+
+    @abc.abstractmethod
+    def open(self, content_key: str) -> typing.BinaryIO:
+        """
+        Open stored file contents for reading.
+
+        :param content_key: the key of the contents
+        :return: the opened stream
+        :raise errors.FileContentStorageError: if the contents cannot be read
+        """
+
+    @abc.abstractmethod
+    def get_size(self, content_key: str) -> int:
+        """
+        Return the size of stored file contents.
+
+        :param content_key: the key of the contents
+        :return: the size in bytes
+        :raise errors.FileContentStorageError: if the contents cannot be read
+        """
+
+
+class FilesystemFileStorage(FileStorage):
+    """
+    Storage for file contents in a local directory.
+
+    Contents are stored in subdirectories named after the first characters of
+    their key, so that no single directory contains too many files.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def _get_path(self, content_key: str) -> str:
+        return os.path.join(self.directory, content_key[:2], content_key[2:4], content_key)
+
+    def store(self, content_key: str, stream: typing.BinaryIO) -> None:
+        path = self._get_path(content_key)
+        if os.path.isfile(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write to a temporary file first, so that readers never see partial contents
+            file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp')
+            try:
+                with os.fdopen(file_descriptor, 'wb') as temporary_file:
+                    shutil.copyfileobj(stream, temporary_file)
+                    temporary_file.flush()
+                    os.fsync(temporary_file.fileno())
+                os.replace(temporary_path, path)
+            except BaseException:
+                os.remove(temporary_path)
+                raise
+        except OSError as e:
+            raise errors.FileContentStorageError(f'Failed to store file contents: {e}')
+
+    def open(self, content_key: str) -> typing.BinaryIO:
+        try:
+            return open(self._get_path(content_key), 'rb')
+        except OSError as e:
+            raise errors.FileContentStorageError(f'Failed to read file contents: {e}')
+
+    def get_size(self, content_key: str) -> int:
+        try:
+            return os.path.getsize(self._get_path(content_key))
+        except OSError as e:
+            raise errors.FileContentStorageError(f'Failed to read file contents: {e}')
+
+
+class S3FileStorage(FileStorage):
+    """
+    Storage for file contents in a bucket of an S3-compatible object store.
+
+    Requests are signed using AWS Signature Version 4 and use path-style URLs,
+    which are supported by AWS S3 and self-hosted object stores like MinIO.
+    """
+
+    def __init__(
+            self,
+            endpoint_url: str,
+            bucket: str,
+            access_key_id: str,
+            secret_access_key: str,
+            region: str
+    ) -> None:
+        self.endpoint_url = endpoint_url.rstrip('/')
+        self.bucket = bucket
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.region = region
+
+    def _send_request(
+            self,
+            method: str,
+            content_key: str,
+            payload_hash: str = _EMPTY_PAYLOAD_HASH,
+            **kwargs: typing.Any
+    ) -> requests.Response:
+        parsed_endpoint_url = urllib.parse.urlsplit(self.endpoint_url)
+        path = parsed_endpoint_url.path + '/' + urllib.parse.quote(self.bucket, safe='-_.~') + '/' + urllib.parse.quote(content_key, safe='-_.~')
+        now = datetime.datetime.now(datetime.timezone.utc)
+        amz_date = now.strftime('%Y%m%dT%H%M%SZ')
+        date = now.strftime('%Y%m%d')
+        headers = {
+            'host': parsed_endpoint_url.netloc,
+            'x-amz-content-sha256': payload_hash,
+            'x-amz-date': amz_date,
+        }
+        signed_headers = ';'.join(sorted(headers))
+        canonical_request = '\n'.join([
+            method,
+            path,
+            '',
+            ''.join(f'{name}:{headers[name]}\n' for name in sorted(headers)),
+            signed_headers,
+            payload_hash
+        ])
+        scope = f'{date}/{self.region}/s3/aws4_request'
+        string_to_sign = '\n'.join([
+            'AWS4-HMAC-SHA256',
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode('utf-8')).hexdigest()
+        ])
+        signing_key = ('AWS4' + self.secret_access_key).encode('utf-8')
+        for scope_part in [date, self.region, 's3', 'aws4_request']:
+            signing_key = hmac.digest(signing_key, scope_part.encode('utf-8'), 'sha256')
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), 'sha256').hexdigest()
+        headers['authorization'] = f'AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, SignedHeaders={signed_headers}, Signature={signature}'
+        try:
+            return requests.request(
+                method,
+                urllib.parse.urlunsplit((parsed_endpoint_url.scheme, parsed_endpoint_url.netloc, path, '', '')),
+                headers=headers,
+                timeout=S3_TIMEOUT,
+                **kwargs
+            )
+        except requests.exceptions.RequestException as e:
+            raise errors.FileContentStorageError(f'Failed to connect to object store: {e}')
+
+    def store(self, content_key: str, stream: typing.BinaryIO) -> None:
+        response = self._send_request('HEAD', content_key)
+        if response.status_code == 200:
+            return
+        # the content key is the SHA-256 hash of the contents, so it can be used as payload hash
+        response = self._send_request('PUT', content_key, payload_hash=content_key, data=stream)
+        if response.status_code != 200:
+            raise errors.FileContentStorageError(f'Failed to store file contents: object store returned status code {response.status_code}')
+
+    def open(self, content_key: str) -> typing.BinaryIO:
+        response = self._send_request('GET', content_key, stream=True)
+        if response.status_code != 200:
+            response.close()
+            raise errors.FileContentStorageError(f'Failed to read file contents: object store returned status code {response.status_code}')
+        response.raw.decode_content = True
+        return typing.cast(typing.BinaryIO, response.raw)
+
+    def get_size(self, content_key: str) -> int:
+        response = self._send_request('HEAD', content_key)
+        if response.status_code != 200:
+            raise errors.FileContentStorageError(f'Failed to read file contents: object store returned status code {response.status_code}')
+        return int(response.headers['Content-Length'])
+
+
+def get_file_storage(content_storage: str) -> FileStorage:
+    """
+    Return the storage for file contents with the given name.
+
+    :param content_storage: either 'filesystem' or 's3'
+    :return: the file storage
+    :raise errors.FileContentStorageError: if the storage is unknown or not
+        configured
+    """
+    config = flask.current_app.config
+    if content_storage == 'filesystem':
+        if not config['FILE_CONTENT_DIRECTORY']:
+            raise errors.FileContentStorageError('FILE_CONTENT_DIRECTORY is not set')
+        return FilesystemFileStorage(config['FILE_CONTENT_DIRECTORY'])
+    if content_storage == 's3':
+        if not config['FILE_CONTENT_S3_ENDPOINT_URL'] or not config['FILE_CONTENT_S3_BUCKET']:
+            raise errors.FileContentStorageError('FILE_CONTENT_S3_ENDPOINT_URL and FILE_CONTENT_S3_BUCKET must be set')
+        return S3FileStorage(
+            endpoint_url=config['FILE_CONTENT_S3_ENDPOINT_URL'],
+            bucket=config['FILE_CONTENT_S3_BUCKET'],
+            access_key_id=config['FILE_CONTENT_S3_ACCESS_KEY_ID'] or '',
+            secret_access_key=config['FILE_CONTENT_S3_SECRET_ACCESS_KEY'] or '',
+            region=config['FILE_CONTENT_S3_REGION']
+        )
+    raise errors.FileContentStorageError(f'Unknown file content storage {content_storage!r}')
@@ -23,13 +23,16 @@ import datetime
 import hashlib
 import io
 import os
+import tempfile
 import typing
 
 import flask
 import requests
 from flask_babel import gettext
+from PIL import Image, ImageOps
 
-from . import components, errors, object_log, objects, user_log, users
+from . import components, errors, federated_file_cache, file_storage, object_log, objects, user_log, users
+from .background_tasks.generate_preview_images import post_generate_preview_image_task
 from .components import get_component
 from .errors import FileDoesNotExistError, FileNameTooLongError, \
     InvalidFileStorageError, TooManyFilesForObjectError, FederationFileNotAvailableError
@@ -41,10 +44,46 @@ from ..models.file_log import FileLogEntry, FileLogEntryType
 
 MAX_NUM_FILES: int = 10000
 
+# size of the chunks used for reading file contents stored in the database without loading them at once
+BINARY_DATA_CHUNK_SIZE: int = 4 * 1024 * 1024
+
+# size up to which the contents of new files are kept in memory before they are spooled to a temporary file
+SPOOLED_CONTENT_MAX_MEMORY_SIZE: int = 4 * 1024 * 1024
+
+# maximum width and height of generated preview images in pixels
+PREVIEW_IMAGE_MAX_SIZE: int = 512
+
 SUPPORTED_HASH_ALGORITHMS = ['sha256', 'sha512']
 DEFAULT_HASH_ALGORITHM = 'sha256'
 
 
+class _HashingWriter(io.RawIOBase):
+    """
+    Writable stream which passes the data on to another stream and hashes it.
+    """
+
+    def __init__(self, stream: typing.IO[bytes], hash_algorithms: typing.Set[str]) -> None:
+        super().__init__()
+        self._stream = stream
+        self._hashes = {
+            hash_algorithm: hashlib.new(hash_algorithm)
+            for hash_algorithm in hash_algorithms
+        }
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: typing.Any) -> int:
+        view = memoryview(data)
+        self._stream.write(view)
+        for hash in self._hashes.values():
+            hash.update(view)
+        return view.nbytes
+
+    def hexdigest(self, hash_algorithm: str) -> str:
+        return self._hashes[hash_algorithm].hexdigest()
+
+
 @dataclasses.dataclass(frozen=True)
 class File:
     """
@@ -59,6 +98,8 @@ class File:
     fed_id: typing.Optional[int] = None
     component_id: typing.Optional[int] = None
     preview_image_mime_type: typing.Optional[str] = None
+    content_storage: typing.Optional[str] = None
+    content_key: typing.Optional[str] = None
 
     @dataclasses.dataclass(frozen=True)
     class HashInfo:
@@ -87,6 +128,9 @@ class File:
         title: typing.Optional[str] = None
         url: typing.Optional[str] = None
         description: typing.Optional[str] = None
+        uploader: typing.Optional[users.User] = None
+        # whether the latest log entries have been loaded by _load_file_infos
+        log_entries_loaded: bool = False
 
     _info_cache: InfoCache = dataclasses.field(default_factory=InfoCache, kw_only=True, repr=False, compare=False)
 
@@ -121,13 +165,20 @@ class File:
             component_id=file.component_id,
             hash=hash,
             preview_image_mime_type=file.preview_image_mime_type,
-            _mutable_file=file
+            content_storage=file.content_storage,
+            content_key=file.content_key,
+            _mutable_file=file,
+            _info_cache=File.InfoCache(is_hidden=file.is_hidden)
         )
 
     @property
     def binary_data(self) -> typing.Optional[bytes]:
         if self._data_cache.binary_data is None:
-            self._data_cache.binary_data = self._mutable_file.binary_data
+            if self.content_storage is not None and self.content_key is not None:
+                with file_storage.get_file_storage(self.content_storage).open(self.content_key) as content_file:
+                    self._data_cache.binary_data = content_file.read()
+            else:
+                self._data_cache.binary_data = self._mutable_file.binary_data
         return self._data_cache.binary_data
 
     @property
@@ -177,12 +228,15 @@ class File:
     def uploader(self) -> typing.Optional[users.User]:
         if self.user_id is None:
             return None
-        return users.get_user(self.user_id)
+        if self._info_cache.uploader is None:
+            self._info_cache.uploader = users.get_user(self.user_id)
+        return self._info_cache.uploader
 
     @property
     def title(self) -> typing.Optional[str]:
         if self._info_cache.title is None:
-            self._info_cache.title = self.real_title
+            if not self._info_cache.log_entries_loaded:
+                self._info_cache.title = self.real_title
             if self._info_cache.title is None:
                 if self.storage in {'database', 'federation'}:
                     return self.original_file_name
@@ -210,6 +264,8 @@ class File:
     @property
     def description(self) -> typing.Union[str, None]:
         if self._info_cache.description is None:
+            if self._info_cache.log_entries_loaded:
+                return None
             log_entry = FileLogEntry.query.filter_by(
                 object_id=self.object_id,
                 file_id=self.id,
@@ -237,36 +293,78 @@ class File:
     @property
     def is_hidden(self) -> bool:
         if self._info_cache.is_hidden is None:
+            self._info_cache.is_hidden = self._mutable_file.is_hidden
+        return bool(self._info_cache.is_hidden)
+
+    @property
+    def hide_reason(self) -> typing.Optional[str]:
+        if not self.is_hidden:
+            return None
+        if self._info_cache.hide_reason is None:
             log_entry = FileLogEntry.query.filter_by(
                 object_id=self.object_id,
                 file_id=self.id,
                 type=FileLogEntryType.HIDE_FILE
             ).order_by(FileLogEntry.utc_datetime.desc()).first()
-            if log_entry is None:
-                self._info_cache.is_hidden = False
-                return False
-            hide_time = log_entry.utc_datetime
-            self._info_cache.hide_reason = log_entry.data['reason']
-            log_entry = FileLogEntry.query.filter_by(
-                object_id=self.object_id,
-                file_id=self.id,
-                type=FileLogEntryType.UNHIDE_FILE
-            ).order_by(FileLogEntry.utc_datetime.desc()).first()
-            if log_entry is None:
-                self._info_cache.is_hidden = True
-                return True
-            unhide_time = log_entry.utc_datetime
-            self._info_cache.is_hidden = hide_time > unhide_time
-        return bool(self._info_cache.is_hidden)
+            self._info_cache.hide_reason = log_entry.data['reason'] if log_entry is not None else ''
+        return self._info_cache.hide_reason
 
     @property
-    def hide_reason(self) -> typing.Optional[str]:
-        if self.is_hidden:
-            return self._info_cache.hide_reason
-        return None
+    def binary_data_size(self) -> int:
+        """
+        The size of the contents of a file stored in the database, queried without loading the contents.
+        """
+        if self.storage != 'database':
+            raise InvalidFileStorageError()
+        if self._data_cache.binary_data is not None:
+            return len(self._data_cache.binary_data)
+        if self.content_storage is not None and self.content_key is not None:
+            return file_storage.get_file_storage(self.content_storage).get_size(self.content_key)
+        return int(db.session.execute(
+            db.select(
+                db.func.coalesce(db.func.octet_length(files.File.binary_data), 0)
+            ).where(
+                files.File.object_id == self.object_id,
+                files.File.id == self.id
+            )
+        ).scalar_one())
+
+    def iter_binary_data(self, chunk_size: int = BINARY_DATA_CHUNK_SIZE) -> typing.Iterator[bytes]:
+        """
+        Yield the contents of a file stored in the database in chunks, so that they do not need to be loaded at once.
+
+        :param chunk_size: the maximum size of each chunk in bytes
+        :return: an iterator of the chunks
+        :raise errors.InvalidFileStorageError: if the file is not stored in
+            the database
+        """
+        if self.storage != 'database':
+            raise InvalidFileStorageError()
+        if self._data_cache.binary_data is not None:
+            for offset in range(0, len(self._data_cache.binary_data), chunk_size):
+                yield self._data_cache.binary_data[offset:offset + chunk_size]
+            return
+        if self.content_storage is not None and self.content_key is not None:
+            with file_storage.get_file_storage(self.content_storage).open(self.content_key) as content_file:
+                while chunk := content_file.read(chunk_size):
+                    yield chunk
+            return
+        binary_data_size = self.binary_data_size
+        for offset in range(0, binary_data_size, chunk_size):
+            yield bytes(db.session.execute(
+                db.select(
+                    # PostgreSQL substring positions start at 1
+                    db.func.substring(files.File.binary_data, offset + 1, chunk_size)
+                ).where(
+                    files.File.object_id == self.object_id,
+                    files.File.id == self.id
+                )
+            ).scalar_one())
 
     def open(self, read_only: bool = True) -> typing.BinaryIO:
         if self.storage == 'database':
+            if self.content_storage is not None and self.content_key is not None and self._data_cache.binary_data is None:
+                return file_storage.get_file_storage(self.content_storage).open(self.content_key)
             if self.binary_data is not None:
                 return io.BytesIO(self.binary_data)
             else:
@@ -277,6 +375,14 @@ class File:
                 component = get_component(self.component_id)
             else:
                 raise InvalidFileStorageError()
+            if self.hash is not None:
+                expected_hash = (self.hash.algorithm, self.hash.hexdigest)
+            else:
+                expected_hash = None
+            if object.fed_object_id is not None and self.fed_id is not None:
+                cached_content = federated_file_cache.get_cached_file_content(component.uuid, object.fed_object_id, self.fed_id, expected_hash)
+                if cached_content is not None:
+                    return io.BytesIO(cached_content)
             from .federation.update import get_binary
             try:
                 file_data = get_binary(f'/federation/v1/shares/objects/{object.fed_object_id}/files/{self.fed_id}', component)
@@ -292,6 +398,10 @@ class File:
                 raise FederationFileNotAvailableError()
             except errors.NoAuthenticationMethodError:
                 raise FederationFileNotAvailableError()
+            if object.fed_object_id is not None and self.fed_id is not None:
+                content = file_data.read()
+                federated_file_cache.store_file_content(component.uuid, object.fed_object_id, self.fed_id, content, expected_hash)
+                return io.BytesIO(content)
             return file_data
         else:
             raise InvalidFileStorageError()
@@ -400,6 +510,8 @@ def create_database_file(
         save_content: typing.Callable[[typing.BinaryIO], None],
         hash: typing.Optional[File.HashInfo] = None,
         *,
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+        expected_hash_hexdigest: typing.Optional[str] = None,
         create_log_entry: bool = True,
         preview_image_binary_data: bytes,
         preview_image_mime_type: str,
@@ -416,6 +528,8 @@ def create_database_file(
         save_content: typing.Callable[[typing.BinaryIO], None],
         hash: typing.Optional[File.HashInfo] = None,
         *,
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+        expected_hash_hexdigest: typing.Optional[str] = None,
         create_log_entry: bool = True,
         preview_image_binary_data: None = None,
         preview_image_mime_type: None = None,
@@ -431,6 +545,8 @@ def create_database_file(
         save_content: typing.Callable[[typing.BinaryIO], None],
         hash: typing.Optional[File.HashInfo] = None,
         *,
+        hash_algorithm: str = DEFAULT_HASH_ALGORITHM,
+        expected_hash_hexdigest: typing.Optional[str] = None,
         create_log_entry: bool = True,
         preview_image_binary_data: typing.Optional[bytes] = None,
         preview_image_mime_type: typing.Optional[str] = None,
@@ -446,7 +562,12 @@ def create_database_file(
     :param file_name: the original file name
     :param save_content: a function which will save the file's content to the
         given stream. The function will be called at most once.
-    :param hash: the hash info for this file
+    :param hash: the hash info for this file, or None to hash the contents
+        using hash_algorithm
+    :param hash_algorithm: the algorithm to hash the contents with, if hash
+        is None
+    :param expected_hash_hexdigest: the hexdigest the contents must have, if
+        hash is None
     :param create_log_entry: whether to create a log entry
     :param preview_image_binary_data: binary data for the preview image, or None
     :param preview_image_mime_type: mime type for the preview image, or None
@@ -458,19 +579,33 @@ def create_database_file(
         exists
     :raise errors.FileNameTooLongError: when the file name is longer than 150
         bytes when encoded as UTF-8
+    :raise errors.FileContentStorageError: when the contents cannot be stored
+        in the configured FILE_CONTENT_STORAGE
+    :raise errors.FileHashMismatchError: when the hexdigest of the contents
+        differs from expected_hash_hexdigest
     """
     # ensure that the file name is valid
     if len(file_name.encode('utf8')) > 150:
         raise FileNameTooLongError()
 
-    binary_data_file = io.BytesIO()
-    save_content(binary_data_file)
-    binary_data = binary_data_file.getvalue()
-    if hash is None:
-        hash = File.HashInfo.from_binary_data(
-            algorithm=DEFAULT_HASH_ALGORITHM,
-            binary_data=binary_data
-        )
+    content_storage = flask.current_app.config['FILE_CONTENT_STORAGE']
+    with tempfile.SpooledTemporaryFile(max_size=SPOOLED_CONTENT_MAX_MEMORY_SIZE) as content_file:
+        hashing_writer = _HashingWriter(content_file, {hash_algorithm, file_storage.CONTENT_KEY_HASH_ALGORITHM})
+        save_content(typing.cast(typing.BinaryIO, hashing_writer))
+        if hash is None:
+            hash = File.HashInfo(
+                algorithm=hash_algorithm,
+                hexdigest=hashing_writer.hexdigest(hash_algorithm)
+            )
+            if expected_hash_hexdigest is not None and expected_hash_hexdigest != hash.hexdigest:
+                raise errors.FileHashMismatchError(hash.hexdigest)
+        content_file.seek(0)
+        if content_storage != 'database':
+            # store the contents first, so that no file exists without them
+            content_key = hashing_writer.hexdigest(file_storage.CONTENT_KEY_HASH_ALGORITHM)
+            file_storage.get_file_storage(content_storage).store(content_key, typing.cast(typing.BinaryIO, content_file))
+        else:
+            binary_data = content_file.read()
 
     db_file = _create_db_file(
         object_id=object_id,
@@ -485,13 +620,19 @@ def create_database_file(
         },
         utc_datetime=utc_datetime
     )
-    db_file.binary_data = binary_data
+    if content_storage != 'database':
+        db_file.content_storage = content_storage
+        db_file.content_key = content_key
+    else:
+        db_file.binary_data = binary_data
     db_file.preview_image_binary_data = preview_image_binary_data
     db_file.preview_image_mime_type = preview_image_mime_type.lower() if preview_image_mime_type else ''
     db.session.commit()
     file = File.from_database(db_file)
     if create_log_entry:
         _create_file_logs(file)
+    if flask.current_app.config['GENERATE_PREVIEW_IMAGES'] and can_generate_preview_image(file):
+        post_generate_preview_image_task(object_id=file.object_id, file_id=file.id)
     return file
 
 
@@ -702,8 +843,8 @@ def hide_file(
     :raise errors.FileDoesNotExistError: when no file with the given object ID
         and file ID exists
     """
-    file = get_file_for_object(object_id=object_id, file_id=file_id)
-    if file is None:
+    db_file = files.File.query.filter_by(object_id=object_id, id=file_id).first()
+    if db_file is None:
         raise FileDoesNotExistError()
     if not reason:
         reason = ''
@@ -711,6 +852,7 @@ def hide_file(
         'reason': reason
     }, utc_datetime=utc_datetime)
     db.session.add(log_entry)
+    db_file.is_hidden = True
     db.session.commit()
 
 
@@ -728,6 +870,78 @@ def get_file_for_object(object_id: int, file_id: int) -> typing.Optional[File]:
     return File.from_database(db_file)
 
 
+def _load_file_infos(object_files: typing.Sequence[File]) -> None:
+    """
+    Populate the info caches of files using set-based queries.
+
+    The latest relevant log entries of all files and their uploaders are
+    loaded at once, instead of querying them separately for each file.
+
+    :param object_files: the files to load the infos for
+    """
+    if not object_files:
+        return
+    latest_log_entries = db.session.execute(
+        db.select(
+            FileLogEntry.object_id,
+            FileLogEntry.file_id,
+            FileLogEntry.type,
+            FileLogEntry.data
+        ).where(
+            FileLogEntry.object_id.in_(list({file.object_id for file in object_files})),
+            FileLogEntry.type.in_([
+                FileLogEntryType.EDIT_TITLE,
+                FileLogEntryType.EDIT_DESCRIPTION,
+                FileLogEntryType.EDIT_URL,
+                FileLogEntryType.HIDE_FILE
+            ])
+        ).distinct(
+            FileLogEntry.object_id,
+            FileLogEntry.file_id,
+            FileLogEntry.type
+        ).order_by(
+            FileLogEntry.object_id,
+            FileLogEntry.file_id,
+            FileLogEntry.type,
+            FileLogEntry.utc_datetime.desc()
+        )
+    ).all()
+    log_entry_data_by_key = {
+        (object_id, file_id, type): data
+        for object_id, file_id, type, data in latest_log_entries
+    }
+    uploaders_by_id = users.get_users_by_ids({
+        file.user_id
+        for file in object_files
+        if file.user_id is not None
+    })
+    for file in object_files:
+        info_cache = file._info_cache
+        title_data = log_entry_data_by_key.get((file.object_id, file.id, FileLogEntryType.EDIT_TITLE))
+        if title_data is not None and 'title' in title_data:
+            info_cache.title = str(title_data['title'])
+        description_data = log_entry_data_by_key.get((file.object_id, file.id, FileLogEntryType.EDIT_DESCRIPTION))
+        if description_data is not None:
+            info_cache.description = description_data['description']
+        if file.storage == 'url':
+            url_data = log_entry_data_by_key.get((file.object_id, file.id, FileLogEntryType.EDIT_URL))
+            info_cache.url = url_data['url'] if url_data is not None else file.data['url']
+        hide_data = log_entry_data_by_key.get((file.object_id, file.id, FileLogEntryType.HIDE_FILE))
+        if file.is_hidden and hide_data is not None:
+            info_cache.hide_reason = hide_data['reason']
+        if file.user_id is not None:
+            info_cache.uploader = uploaders_by_id.get(file.user_id)
+        info_cache.log_entries_loaded = True
+
+
+def _get_db_files_for_object(object_id: int) -> typing.List[files.File]:
+    db_files = files.File.query.filter_by(object_id=object_id).order_by(db.asc(files.File.utc_datetime)).all()
+    if not db_files:
+        # ensure that the object exists
+        objects.check_object_exists(object_id)
+    return db_files
+
+
 def get_files_for_object(object_id: int) -> typing.List[File]:
     """
     Returns a list of files for an object.
@@ -737,17 +951,42 @@ def get_files_for_object(object_id: int) -> typing.List[File]:
     :raise errors.ObjectDoesNotExistError: when no object with the given
         object ID exists
     """
-    db_files = files.File.query.filter_by(object_id=object_id).order_by(db.asc(files.File.utc_datetime)).all()
-    if not db_files:
-        # ensure that the object exists
-        objects.check_object_exists(object_id)
-    return [File.from_database(db_file) for db_file in db_files]
+    object_files = [File.from_database(db_file) for db_file in _get_db_files_for_object(object_id)]
+    _load_file_infos(object_files)
+    return object_files
+
+
+def get_files_for_objects(object_ids: typing.Collection[int]) -> typing.Dict[int, typing.List[File]]:
+    """
+    Returns lists of files for multiple objects.
+
+    :param object_ids: the IDs of existing objects
+    :return: a dict mapping the object IDs to lists of their files, sorted by
+        upload time from first to last
+    """
+    files_by_object_id: typing.Dict[int, typing.List[File]] = {
+        object_id: []
+        for object_id in object_ids
+    }
+    if not files_by_object_id:
+        return files_by_object_id
+    object_files = [
+        File.from_database(db_file)
+        for db_file in files.File.query.filter(
+            files.File.object_id.in_(list(files_by_object_id))
+        ).order_by(db.asc(files.File.utc_datetime)).all()
+    ]
+    _load_file_infos(object_files)
+    for file in object_files:
+        files_by_object_id[file.object_id].append(file)
+    return files_by_object_id
 
 
 def get_file_names_by_id_for_object(
         object_id: int
 ) -> typing.Dict[int, typing.Tuple[str, str]]:
-    files = get_files_for_object(object_id)
+    # the file infos are not needed, as the hidden state is stored in the files table
+    files = [File.from_database(db_file) for db_file in _get_db_files_for_object(object_id)]
     file_names_by_id = {}
     for file in files:
         if file.storage in {'database', 'federation'}:
@@ -758,3 +997,147 @@ def get_file_names_by_id_for_object(
                 display_name = actual_name
             file_names_by_id[file.id] = (actual_name, display_name)
     return file_names_by_id
+
+
+def move_file_contents_to_storage(
+        content_storage: str,
+        batch_size: int = 100
+) -> int:
+    """
+    Move the contents of files stored in the binary_data column to a file storage.
+
+    The contents are moved in batches, each of which is committed separately,
+    so that the process can be interrupted and resumed.
+
+    :param content_storage: either 'filesystem' or 's3'
+    :param batch_size: the number of files to move in each batch
+    :return: the number of files whose contents were moved
+    :raise errors.FileContentStorageError: when the storage is not configured
+        or the contents cannot be stored
+    """
+    storage = file_storage.get_file_storage(content_storage)
+    num_moved_files = 0
+    while True:
+        db_files = files.File.query.filter(
+            files.File.content_storage.is_(None),
+            files.File.binary_data.is_not(None)
+        ).order_by(files.File.object_id, files.File.id).limit(batch_size).all()
+        if not db_files:
+            return num_moved_files
+        for db_file in db_files:
+            binary_data = db_file.binary_data
+            assert binary_data is not None
+            content_key = file_storage.get_content_key(binary_data)
+            storage.store(content_key, io.BytesIO(binary_data))
+            db_file.content_storage = content_storage
+            db_file.content_key = content_key
+            db_file.binary_data = None
+        db.session.commit()
+        num_moved_files += len(db_files)
+        # release the contents of this batch
+        db.session.expunge_all()
+
+
+def can_generate_preview_image(file: File) -> bool:
+    """
+    Return whether a preview image may be generated for a file.
+
+    Preview images are only generated for files stored in the database which
+    do not have a preview image yet and which can be opened as images.
+
+    :param file: the file to check
+    :return: whether a preview image may be generated
+    """
+    if file.storage != 'database' or file.preview_image_mime_type:
+        return False
+    file_extension = os.path.splitext(file.original_file_name)[1].lower()
+    return any(
+        file_extension == image_file_extension
+        for image_file_extension, format in Image.registered_extensions().items()
+        if format in Image.OPEN
+    )
+
+
+def _create_preview_image(stream: typing.BinaryIO) -> typing.Tuple[bytes, str]:
+    with Image.open(stream) as image:
+        preview_image: Image.Image = image
+        if preview_image.mode in ('I', 'I;16', 'I;16B', 'I;16L', 'F'):
+            # scale images with more than 8 bits per channel, e.g. from microscopes, to their range of values
+            preview_image = preview_image.convert('F')
+            minimum, maximum = typing.cast(typing.Tuple[float, float], preview_image.getextrema())
+            if maximum > minimum:
+                preview_image = preview_image.point(lambda value: (value - minimum) * 255 / (maximum - minimum))
+            preview_image = preview_image.convert('L')
+        # thumbnail() lets the decoder downscale while reading, e.g. for JPEG images
+        preview_image.thumbnail(size=(PREVIEW_IMAGE_MAX_SIZE, PREVIEW_IMAGE_MAX_SIZE))
+        preview_image = ImageOps.exif_transpose(preview_image)
+    preview_image_io = io.BytesIO()
+    if preview_image.has_transparency_data:
+        preview_image.convert('RGBA').save(preview_image_io, format='png')
+        return preview_image_io.getvalue(), 'image/png'
+    preview_image.convert('RGB').save(preview_image_io, format='jpeg', quality=85)
+    return preview_image_io.getvalue(), 'image/jpeg'
+
+
+def generate_preview_image(
+        object_id: int,
+        file_id: int
+) -> bool:
+    """
+    Generate a downscaled preview image for a file, unless it already has one.
+
+    :param object_id: the ID of an existing object
+    :param file_id: the ID of an existing file for this object
+    :return: whether a preview image was generated
+    :raise errors.FileDoesNotExistError: when no file with the given IDs
+        exists
+    """
+    db_file = get_mutable_file(file_id=file_id, object_id=object_id)
+    file = File.from_database(db_file)
+    if not can_generate_preview_image(file):
+        return False
+    try:
+        with file.open() as stream:
+            preview_image_binary_data, preview_image_mime_type = _create_preview_image(stream)
+    except Exception:
+        # the file might not be a valid image or might be too large to decode
+        return False
+    db_file.preview_image_binary_data = preview_image_binary_data
+    db_file.preview_image_mime_type = preview_image_mime_type
+    db.session.commit()
+    return True
+
+
+def generate_missing_preview_images(
+        batch_size: int = 100
+) -> int:
+    """
+    Generate preview images for all files that can have one, but do not yet.
+
+    :param batch_size: the number of files to query at once
+    :return: the number of generated preview images
+    """
+    num_generated_preview_images = 0
+    last_object_id, last_file_id = -1, -1
+    while True:
+        file_ids = db.session.execute(
+            db.select(
+                files.File.object_id,
+                files.File.id
+            ).where(
+                files.File.component_id.is_(None),
+                db.func.coalesce(files.File.preview_image_mime_type, '') == '',
+                db.tuple_(files.File.object_id, files.File.id) > db.tuple_(last_object_id, last_file_id)
+            ).order_by(
+                files.File.object_id,
+                files.File.id
+            ).limit(batch_size)
+        ).all()
+        if not file_ids:
+            return num_generated_preview_images
+        for object_id, file_id in file_ids:
+            if generate_preview_image(object_id=object_id, file_id=file_id):
+                num_generated_preview_images += 1
+        last_object_id, last_file_id = file_ids[-1]
+        # release the contents and preview images of this batch
+        db.session.expunge_all()
@@ -0,0 +1,216 @@
+# coding: utf-8
+"""
+Logic module for indexed properties
+
+Administrators can register properties of an action's schema as indexed
+properties, so that SampleDB creates a PostgreSQL expression index for them
+on the current object versions. Advanced searches comparing such a property,
+e.g. `temperature > 30degC` or `created before 2024-01-01`, can then use the
+index instead of extracting the property from the data of every object.
+
+As searches are not limited to the objects of a single action, the index is
+created for the property path and type and shared by all actions which have
+it registered.
+"""
+
+import dataclasses
+import hashlib
+import json
+import re
+import typing
+
+from sqlalchemy.dialects import postgresql
+import sqlalchemy.exc
+
+from . import errors
+from .actions import get_action
+from .where_filters import get_quantity_magnitude_in_base_units, get_datetime_utc_datetime_text
+from .. import db
+from ..models import indexed_properties
+from ..models.indexed_properties import IndexedPropertyType
+
+PROPERTY_TYPES = {
+    IndexedPropertyType.QUANTITY: 'quantity',
+    IndexedPropertyType.DATETIME: 'datetime',
+}
+
+
+@dataclasses.dataclass(frozen=True)
+class IndexedProperty:
+    """
+    This class provides an immutable wrapper around models.indexed_properties.IndexedProperty.
+    """
+    id: int
+    action_id: int
+    property_path: typing.Tuple[typing.Union[str, int], ...]
+    type: IndexedPropertyType
+
+    @classmethod
+    def from_database(cls, indexed_property: indexed_properties.IndexedProperty) -> 'IndexedProperty':
+        return IndexedProperty(
+            id=indexed_property.id,
+            action_id=indexed_property.action_id,
+            property_path=tuple(indexed_property.property_path),
+            type=indexed_property.type
+        )
+
+    @property
+    def index_name(self) -> str:
+        return get_index_name(self.property_path, self.type)
+
+
+def get_index_name(
+        property_path: typing.Sequence[typing.Union[str, int]],
+        type: IndexedPropertyType
+) -> str:
+    """
+    Return the name of the index for a property path and type.
+
+    :param property_path: the path to the property in the object data
+    :param type: the type of the property
+    :return: the index name
+    """
+    index_hash = hashlib.sha256(json.dumps([list(property_path), type.name]).encode('utf-8')).hexdigest()
+    return f'ix_objects_current_property_{index_hash[:16]}'
+
+
+def _get_property_schema(
+        schema: typing.Dict[str, typing.Any],
+        property_path: typing.Sequence[typing.Union[str, int]]
+) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    for path_element in property_path:
+        if isinstance(path_element, int):
+            if schema.get('type') != 'array' or not isinstance(schema.get('items'), dict):
+                return None
+            schema = schema['items']
+        else:
+            if schema.get('type') != 'object' or path_element not in schema.get('properties', {}):
+                return None
+            schema = schema['properties'][path_element]
+    return schema
+
+
+def _get_index_sql(
+        property_path: typing.Sequence[typing.Union[str, int]],
+        type: IndexedPropertyType
+) -> str:
+    # build the expressions used by where_filters, so that the index matches the search queries
+    db_obj = db.column('data', postgresql.JSONB)
+    for path_element in property_path:
+        db_obj = db_obj[path_element]
+    if type == IndexedPropertyType.QUANTITY:
+        index_expression = get_quantity_magnitude_in_base_units(db_obj)
+    else:
+        index_expression = get_datetime_utc_datetime_text(db_obj)
+    index_condition = db_obj['_type'].astext == PROPERTY_TYPES[type]
+    dialect = postgresql.dialect()  # type: ignore[no-untyped-call]
+    compile_kwargs = {'literal_binds': True}
+    return f"""
+        CREATE INDEX IF NOT EXISTS {get_index_name(property_path, type)}
+        ON objects_current (({index_expression.compile(dialect=dialect, compile_kwargs=compile_kwargs)}))
+        WHERE {index_condition.compile(dialect=dialect, compile_kwargs=compile_kwargs)}
+    """
+
+
+def get_indexed_property(indexed_property_id: int) -> IndexedProperty:
+    """
+    Return the indexed property with the given ID.
+
+    :param indexed_property_id: the ID of an existing indexed property
+    :return: the indexed property
+    :raise errors.IndexedPropertyDoesNotExistError: when no indexed property
+        with the given ID exists
+    """
+    indexed_property = indexed_properties.IndexedProperty.query.filter_by(id=indexed_property_id).first()
+    if indexed_property is None:
+        raise errors.IndexedPropertyDoesNotExistError()
+    return IndexedProperty.from_database(indexed_property)
+
+
+def get_indexed_properties(action_id: typing.Optional[int] = None) -> typing.List[IndexedProperty]:
+    """
+    Return all indexed properties, optionally only those of a given action.
+
+    :param action_id: the ID of an existing action, or None
+    :return: the list of indexed properties
+    :raise errors.ActionDoesNotExistError: when no action with the given
+        action ID exists
+    """
+    query = indexed_properties.IndexedProperty.query
+    if action_id is not None:
+        get_action(action_id)
+        query = query.filter_by(action_id=action_id)
+    return [
+        IndexedProperty.from_database(indexed_property)
+        for indexed_property in query.order_by(indexed_properties.IndexedProperty.id).all()
+    ]
+
+
+def create_indexed_property(
+        action_id: int,
+        property_path: typing.Sequence[typing.Union[str, int]],
+        type: IndexedPropertyType
+) -> IndexedProperty:
+    """
+    Register a property of an action's schema as indexed property and create
+    the index for it, unless it already exists.
+
+    Creating the index locks the objects_current table for writes while the
+    index is built.
+
+    :param action_id: the ID of an existing action
+    :param property_path: the path to the property in the object data
+    :param type: the type of the property
+    :return: the new indexed property
+    :raise errors.ActionDoesNotExistError: when no action with the given
+        action ID exists
+    :raise errors.InvalidIndexedPropertyError: when the property path does
+        not refer to a property of the given type in the action's schema
+    :raise errors.IndexedPropertyAlreadyExistsError: when the property has
+        already been registered for this action
+    """
+    action = get_action(action_id)
+    property_path = list(property_path)
+    if not property_path or not all(
+        isinstance(path_element, int) or (isinstance(path_element, str) and re.fullmatch('[A-Za-z0-9_]+', path_element))
+        for path_element in property_path
+    ):
+        raise errors.InvalidIndexedPropertyError()
+    if action.schema is None:
+        raise errors.InvalidIndexedPropertyError()
+    property_schema = _get_property_schema(action.schema, property_path)
+    if property_schema is None or property_schema.get('type') != PROPERTY_TYPES[type]:
+        raise errors.InvalidIndexedPropertyError()
+    indexed_property = indexed_properties.IndexedProperty(
+        action_id=action_id,
+        property_path=property_path,
+        type=type
+    )
+    db.session.add(indexed_property)
+    try:
+        db.session.flush()
+    except sqlalchemy.exc.IntegrityError:
+        db.session.rollback()
+        raise errors.IndexedPropertyAlreadyExistsError()
+    db.session.execute(db.text(_get_index_sql(property_path, type)))
+    db.session.commit()
+    return IndexedProperty.from_database(indexed_property)
+
+
+def delete_indexed_property(indexed_property_id: int) -> None:
+    """
+    Delete an indexed property and drop its index, unless it is still used
+    by another action.
+
+    :param indexed_property_id: the ID of an existing indexed property
+    :raise errors.IndexedPropertyDoesNotExistError: when no indexed property
+        with the given ID exists
+    """
+    indexed_property = get_indexed_property(indexed_property_id)
+    db.session.execute(db.delete(indexed_properties.IndexedProperty).where(indexed_properties.IndexedProperty.id == indexed_property_id))
+    if not any(
+        other_indexed_property.index_name == indexed_property.index_name
+        for other_indexed_property in get_indexed_properties()
+    ):
+        db.session.execute(db.text(f"DROP INDEX IF EXISTS {indexed_property.index_name}"))
+    db.session.commit()
@@ -732,6 +732,7 @@ def confirm_object_responsibility(object_location_assignment_id: int) -> None:
     if object_location_assignment.declined:
         raise errors.ObjectLocationAssignmentAlreadyDeclinedError()
     object_location_assignment.confirmed = True
+    object_location_assignment.last_modified = datetime.datetime.now(datetime.timezone.utc)
     db.session.add(object_location_assignment)
     db.session.commit()
 
@@ -751,6 +752,7 @@ def decline_object_responsibility(object_location_assignment_id: int) -> None:
     if object_location_assignment.confirmed:
         raise errors.ObjectLocationAssignmentAlreadyConfirmedError()
     object_location_assignment.declined = True
+    object_location_assignment.last_modified = datetime.datetime.now(datetime.timezone.utc)
     db.session.add(object_location_assignment)
     db.session.commit()
 
@@ -37,7 +37,7 @@ def get_object_log_entries_by_user(user_id: int, after_id: int = 0) -> typing.Li
     else:
         stmt = db.text("""
             SELECT DISTINCT object_id
-            FROM user_object_permissions_by_all
+            FROM effective_object_permissions
             WHERE (user_id = :user_id OR user_id IS NULL) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
         """).columns(
             Objects._current_table.c.object_id,
@@ -256,6 +256,40 @@ def create_batch(user_id: int, object_id: int, batch_object_ids: typing.List[int
     )
 
 
+def create_batch_log_entries(user_id: int, batch_object_ids: typing.List[int]) -> typing.List[ObjectLogEntry]:
+    """
+    Create the log entries for all objects of a batch using a single statement.
+
+    The entries are not committed and no webhooks are triggered, so that the
+    entries can be created in the same transaction as the objects.
+    post_trigger_object_log_webhooks should be called for each entry after
+    the transaction has been committed.
+
+    :param user_id: the ID of the user who created the batch
+    :param batch_object_ids: the IDs of the objects in the batch
+    :return: the new log entries
+    """
+    if not batch_object_ids:
+        return []
+    utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+    return list(db.session.scalars(
+        db.insert(ObjectLogEntry).returning(ObjectLogEntry, sort_by_parameter_order=True),
+        [
+            {
+                'type': ObjectLogEntryType.CREATE_BATCH,
+                'object_id': object_id,
+                'user_id': user_id,
+                'data': {
+                    'object_ids': batch_object_ids
+                },
+                'utc_datetime': utc_datetime,
+                'is_imported': False
+            }
+            for object_id in batch_object_ids
+        ]
+    ).all())
+
+
 def assign_location(
         user_id: int,
         object_id: int,
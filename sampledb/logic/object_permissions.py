@@ -182,12 +182,12 @@ def get_user_object_permissions(
             else:
                 return Permissions.GRANT
 
-    # select permissions from view for efficiency
+    # select permissions from the effective object permissions table for efficiency
     if include_instrument_responsible_users and include_groups and include_projects:
         stmt = db.text("""
         SELECT
         MAX(permissions_int)
-        FROM user_object_permissions_by_all
+        FROM effective_object_permissions
         WHERE (user_id = :user_id OR user_id IS NULL) AND (object_id = :object_id) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
         """)
         permissions_int_result = db.session.execute(stmt, {
@@ -250,6 +250,66 @@ def set_initial_permissions(obj: Object, user_id: typing.Optional[int] = None) -
     set_object_permissions_for_all_users(object_id=obj.object_id, permissions=permissions_for_all_users)
 
 
+def set_permissions_for_new_objects(
+        object_ids: typing.Sequence[int],
+        user_id: int,
+        copy_permissions_object_id: typing.Optional[int] = None,
+        permissions_for_group_id: typing.Optional[int] = None,
+        permissions_for_project_id: typing.Optional[int] = None,
+        permissions_for_all_users: typing.Optional[Permissions] = None
+) -> None:
+    """
+    Set the permissions for a batch of newly created objects.
+
+    The permissions are set the same way as when creating individual objects,
+    but using one statement per permissions table for all objects. The changes
+    are not committed, so that they can be part of the transaction creating
+    the objects.
+
+    :param object_ids: the IDs of the new objects
+    :param user_id: the ID of the user who created the objects
+    :param copy_permissions_object_id: the ID of an existing object to copy
+        the permissions from or None
+    :param permissions_for_group_id: the ID of an existing group to give
+        permissions to
+    :param permissions_for_project_id: the ID of an existing project to give
+        permissions to
+    :param permissions_for_all_users: permissions to be granted to all
+        signed-in users, or None
+    """
+    permissions_for_users: typing.Dict[int, Permissions] = {}
+    permissions_for_groups: typing.Dict[int, Permissions] = {}
+    permissions_for_projects: typing.Dict[int, Permissions] = {}
+    if copy_permissions_object_id is not None:
+        permissions_for_users.update(object_permissions.get_permissions_for_users(resource_id=copy_permissions_object_id))
+        permissions_for_groups.update(object_permissions.get_permissions_for_groups(resource_id=copy_permissions_object_id))
+        permissions_for_projects.update(object_permissions.get_permissions_for_projects(resource_id=copy_permissions_object_id))
+        default_permissions_for_all_users = object_permissions.get_permissions_for_all_users(resource_id=copy_permissions_object_id)
+        permissions_for_users[user_id] = Permissions.GRANT
+    elif permissions_for_group_id is not None:
+        permissions_for_groups[permissions_for_group_id] = Permissions.GRANT
+        permissions_for_users[user_id] = Permissions.GRANT
+        default_permissions_for_all_users = Permissions.NONE
+    elif permissions_for_project_id is not None:
+        permissions_for_projects[permissions_for_project_id] = Permissions.GRANT
+        permissions_for_users[user_id] = Permissions.GRANT
+        default_permissions_for_all_users = Permissions.NONE
+    else:
+        permissions_for_users.update(get_default_permissions_for_users(creator_id=user_id))
+        permissions_for_groups.update(get_default_permissions_for_groups(creator_id=user_id))
+        permissions_for_projects.update(get_default_permissions_for_projects(creator_id=user_id))
+        default_permissions_for_all_users = get_default_permissions_for_all_users(creator_id=user_id)
+    if permissions_for_all_users is None:
+        permissions_for_all_users = default_permissions_for_all_users
+    object_permissions.set_permissions_for_new_resources(
+        resource_ids=object_ids,
+        permissions_for_users=permissions_for_users,
+        permissions_for_groups=permissions_for_groups,
+        permissions_for_projects=permissions_for_projects,
+        permissions_for_all_users=permissions_for_all_users
+    )
+
+
 @dataclasses.dataclass(frozen=True)
 class ObjectInfo:
     object_id: int
@@ -310,7 +370,7 @@ def get_object_info_with_permissions(
         FROM (
             SELECT
             object_id, MAX(permissions_int) AS max_permission
-            FROM user_object_permissions_by_all
+            FROM effective_object_permissions
             WHERE (user_id = :user_id OR user_id IS NULL) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             GROUP BY (object_id)
             HAVING MAX(permissions_int) >= :min_permissions_int
@@ -398,7 +458,7 @@ def get_user_permissions_for_multiple_objects(
     stmt = db.text("""
     SELECT
     u.object_id, MAX(u.permissions_int)
-    FROM user_object_permissions_by_all as u
+    FROM effective_object_permissions as u
     WHERE (u.object_id IN :object_ids) AND (u.user_id = :user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE)
     GROUP BY (u.object_id)
     """)
@@ -453,13 +513,13 @@ def get_object_table_with_permissions(
     if name_only:
         stmt = """
         SELECT
-        o.object_id, o.version_id, o.action_id, jsonb_set('{"name": {"_type": "text", "text": ""}}', '{name,text}', o.name_cache::jsonb) as data, '{"title": "Object", "type": "object", "properties": {"name": {"title": "Name", "type": "text"}}}'::jsonb as schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.data as data_full
+        o.object_id, o.version_id, o.action_id, jsonb_set('{"name": {"_type": "text", "text": ""}}', '{name,text}', o.name_cache::jsonb) as data, '{"title": "Object", "type": "object", "properties": {"name": {"title": "Name", "type": "text"}}}'::jsonb as schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, NULL AS schema_hash, o.data as data_full, o.search_cache
         FROM objects_current AS o
         """
     else:
         stmt = """
         SELECT
-        o.object_id, o.version_id, o.action_id, o.data, o.schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.data as data_full
+        o.object_id, o.version_id, o.action_id, o.data, o.schema, o.user_id, o.utc_datetime, o.fed_object_id, o.fed_version_id, o.component_id, o.eln_import_id, o.eln_object_id, o.schema_hash, o.data as data_full, o.search_cache
         FROM objects_current AS o
         """
 
@@ -468,7 +528,7 @@ def get_object_table_with_permissions(
         JOIN (
             SELECT
             u.object_id
-            FROM user_object_permissions_by_all as u
+            FROM effective_object_permissions as u
             WHERE (u.user_id = :user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             GROUP BY (u.object_id)
             HAVING MAX(u.permissions_int) >= :min_permissions_int
@@ -483,7 +543,7 @@ def get_object_table_with_permissions(
         JOIN (
             SELECT
             u.object_id
-            FROM user_object_permissions_by_all as u
+            FROM effective_object_permissions as u
             WHERE (u.user_id = :other_user_id OR u.user_id IS NULL) AND (u.requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (u.requires_instruments IS FALSE OR :enable_instruments IS TRUE)
             GROUP BY (u.object_id)
             HAVING MAX(u.permissions_int) >= :min_other_user_permissions_int
@@ -585,7 +645,9 @@ def get_object_table_with_permissions(
         Objects._current_table.c.component_id,
         Objects._current_table.c.eln_import_id,
         Objects._current_table.c.eln_object_id,
-        db.column('data_full', postgresql.JSONB)
+        Objects._current_table.c.schema_hash,
+        db.column('data_full', postgresql.JSONB),
+        Objects._current_table.c.search_cache
     ).subquery()
     return table, parameters
 
@@ -597,6 +659,8 @@ def get_objects_with_permissions(
         sorting_func: typing.Optional[typing.Callable[[typing.Any], typing.Any]] = None,
         limit: typing.Optional[int] = None,
         offset: typing.Optional[int] = None,
+        after_object_id: typing.Optional[int] = None,
+        before_object_id: typing.Optional[int] = None,
         action_ids: typing.Optional[typing.List[int]] = None,
         action_type_ids: typing.Optional[typing.List[int]] = None,
         other_user_id: typing.Optional[int] = None,
@@ -663,6 +727,8 @@ def get_objects_with_permissions(
         sorting_func=sorting_func,
         limit=limit,
         offset=offset,
+        after_object_id=after_object_id,
+        before_object_id=before_object_id,
         num_objects_found=num_objects_found,
         **kwargs
     )
@@ -706,3 +772,55 @@ def get_object_if_user_has_permissions(user_id: int, permissions: Permissions, o
         except errors.ObjectDoesNotExistError:
             return None
         return object
+
+
+def get_number_of_inconsistent_effective_object_permissions() -> int:
+    """
+    Return the number of entries that differ between the effective object
+    permissions table and the user_object_permissions_by_all view.
+
+    The effective object permissions table is maintained by triggers, so
+    this should always be 0.
+
+    :return: the number of missing or outdated entries
+    """
+    return typing.cast(int, db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM (
+            (
+                SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+                FROM user_object_permissions_by_all
+                EXCEPT ALL
+                SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+                FROM effective_object_permissions
+            )
+            UNION ALL
+            (
+                SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+                FROM effective_object_permissions
+                EXCEPT ALL
+                SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+                FROM user_object_permissions_by_all
+            )
+        ) AS inconsistent_entries
+    """)).scalar())
+
+
+def rebuild_effective_object_permissions() -> None:
+    """
+    Recreate the effective object permissions table from the
+    user_object_permissions_by_all view.
+    """
+    db.session.execute(db.text("""
+        SELECT pg_advisory_xact_lock(hashtext('effective_object_permissions'))
+    """))
+    db.session.execute(db.text("""
+        DELETE FROM effective_object_permissions
+    """))
+    db.session.execute(db.text("""
+        INSERT INTO effective_object_permissions
+        (user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments)
+        SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+        FROM user_object_permissions_by_all
+    """))
+    db.session.commit()
@@ -1270,25 +1270,25 @@ def transform_literal_to_query(
                     permissions_filter = select(
                         1
                     ).select_from(
-                        db.text('user_object_permissions_by_all')
+                        db.text('effective_object_permissions')
                     ).where(
                         db.and_(
-                            db.literal_column('user_object_permissions_by_all.object_id') == db.literal_column(f'referenced_object_{subquery_id}_id'),
+                            db.literal_column('effective_object_permissions.object_id') == db.literal_column(f'referenced_object_{subquery_id}_id'),
                             db.or_(
-                                db.literal_column('user_object_permissions_by_all.user_id') == db.text(':user_id'),
-                                db.literal_column('user_object_permissions_by_all.user_id') == db.null()
+                                db.literal_column('effective_object_permissions.user_id') == db.text(':user_id'),
+                                db.literal_column('effective_object_permissions.user_id') == db.null()
                             ),
                             db.or_(
-                                db.literal_column('user_object_permissions_by_all.requires_anonymous_users') == db.false(),
+                                db.literal_column('effective_object_permissions.requires_anonymous_users') == db.false(),
                                 db.text(':enable_anonymous_users') == db.true()
                             ),
                             db.or_(
-                                db.literal_column('user_object_permissions_by_all.requires_instruments') == db.false(),
+                                db.literal_column('effective_object_permissions.requires_instruments') == db.false(),
                                 db.text(':enable_instruments') == db.true()
                             )
                         )
                     ).having(
-                        db.func.max(db.literal_column('user_object_permissions_by_all.permissions_int')) > 0
+                        db.func.max(db.literal_column('effective_object_permissions.permissions_int')) > 0
                     ).exists()
                 else:
                     permissions_filter = db.true()
@@ -1725,6 +1725,10 @@ def generate_filter_func(
                 query_string = query_string.replace('\\', '\\\\')
                 query_string = query_string.replace('%', '\\%')
                 query_string = query_string.replace('_', '\\_')
+                search_cache_column = getattr(data, 'search_cache_column', None)
+                if search_cache_column is not None:
+                    # use the trigram-indexed search document containing all string values
+                    return search_cache_column.ilike('%' + query_string + '%', escape='\\')
                 # escape " as that will have happened during JSON serialization in PostgreSQL
                 query_string = query_string.replace('"', '\\\\"')
                 return data.cast(String).ilike('%: "%' + query_string + '%"%', escape='\\')
@@ -1758,3 +1762,12 @@ def wrap_filter_func(
         return filter_func_impl(*args, search_notes=search_notes, **kwargs)
 
     return wrapped_filter_func, search_notes
+
+
+def rebuild_search_index() -> int:
+    """
+    Recreate the search documents used by the simple search for all objects.
+
+    :return: the number of objects in the search index
+    """
+    return Objects.update_search_caches()
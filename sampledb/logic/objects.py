@@ -216,6 +216,11 @@ def create_object_batch(
     permissions. When creating multiple objects for the same action and user
     this function should be used instead of repeatedly calling create_object.
 
+    All data is validated before the objects are created. The objects, their
+    permissions, log entries and tag usage are then created in a single
+    transaction using multi-row inserts, so either all objects are created
+    or none of them.
+
     :param action_id: the ID of an existing action
     :param data_sequence: a sequence containing the objects' data, which must
         fit to the action's schema
@@ -237,7 +242,6 @@ def create_object_batch(
     :raise errors.UserDoesNotExistError: when no user with the given
         user ID exists
     """
-    objects: typing.List[Object] = []
     actions.check_action_exists(action_id)
     users.check_user_exists(user_id)
     if data_validator_arguments is None:
@@ -245,41 +249,42 @@ def create_object_batch(
     # unless file names are explicitly provided, assume no files exist yet
     if 'file_names_by_id' not in data_validator_arguments:
         data_validator_arguments['file_names_by_id'] = {}
+    if not data_sequence:
+        return []
+    # the objects, their permissions, log entries and tag usage are created in a single transaction
     try:
-        for data in data_sequence:
-            object = Objects.create_object(
-                data=data,
-                schema=None,
-                user_id=user_id,
-                action_id=action_id,
-                validate_data=validate_data,
-                data_validator_arguments=data_validator_arguments
-            )
-            objects.append(object)
-    finally:
-        if objects:
-            # objects created before the integrity error must still be accessible
-            batch_object_ids = [object.id for object in objects]
-            user_log.create_batch(user_id=user_id, batch_object_ids=batch_object_ids)
-            for object in objects:
-                _update_object_references(object, user_id=user_id)
-                _send_user_references_notifications(object, user_id)
-                if copy_permissions_object_id is not None:
-                    object_permissions.copy_permissions(object.id, copy_permissions_object_id)
-                    object_permissions.set_user_object_permissions(object.id, user_id, Permissions.GRANT)
-                elif permissions_for_group_id is not None:
-                    object_permissions.set_group_object_permissions(object.id, permissions_for_group_id, Permissions.GRANT)
-                    object_permissions.set_user_object_permissions(object.id, user_id, Permissions.GRANT)
-                elif permissions_for_project_id is not None:
-                    object_permissions.set_project_object_permissions(object.id, permissions_for_project_id, Permissions.GRANT)
-                    object_permissions.set_user_object_permissions(object.id, user_id, Permissions.GRANT)
-                else:
-                    object_permissions.set_initial_permissions(object)
-                if permissions_for_all_users is not None:
-                    object_permissions.set_object_permissions_for_all_users(object.id, permissions_for_all_users)
-                object_log.create_batch(object_id=object.object_id, user_id=user_id, batch_object_ids=batch_object_ids)
-                tags.update_object_tag_usage(object)
-                background_tasks.post_trigger_object_permissions_webhooks(object.object_id)
+        objects = Objects.create_objects(
+            data_sequence=data_sequence,
+            schema=None,
+            user_id=user_id,
+            action_id=action_id,
+            validate_data=validate_data,
+            data_validator_arguments=data_validator_arguments,
+            connection=db.session.connection()
+        )
+        batch_object_ids = [object.id for object in objects]
+        object_permissions.set_permissions_for_new_objects(
+            object_ids=batch_object_ids,
+            user_id=user_id,
+            copy_permissions_object_id=copy_permissions_object_id,
+            permissions_for_group_id=permissions_for_group_id,
+            permissions_for_project_id=permissions_for_project_id,
+            permissions_for_all_users=permissions_for_all_users
+        )
+        object_log_entries = object_log.create_batch_log_entries(user_id=user_id, batch_object_ids=batch_object_ids)
+        tags.add_tag_usage_for_new_objects(objects)
+        # storing the user log entry commits the transaction
+        user_log.create_batch(user_id=user_id, batch_object_ids=batch_object_ids)
+    except Exception:
+        db.session.rollback()
+        raise
+    for object in objects:
+        _update_object_references(object, user_id=user_id)
+        _send_user_references_notifications(object, user_id)
+    for object_log_entry in object_log_entries:
+        background_tasks.post_trigger_object_log_webhooks(object_log_entry)
+    for object in objects:
+        background_tasks.post_trigger_object_permissions_webhooks(object.object_id)
     return objects
 
 
@@ -732,3 +737,29 @@ def get_max_object_id() -> typing.Optional[int]:
     :return: the largest existing object ID, or None if no objects exist
     """
     return typing.cast(typing.Optional[int], db.session.query(db.func.max(Objects.object_id_column)).scalar())
+
+
+def encode_object_versions(snapshot_interval: int) -> int:
+    """
+    Store previous object versions as deltas to their next version, except
+    for every n-th version, which is kept in full.
+
+    :param snapshot_interval: the interval of previous versions stored in full
+    :return: the number of versions stored as deltas
+    """
+    num_encoded_versions = 0
+    for object_id in Objects.get_object_ids_with_unencoded_previous_versions(snapshot_interval):
+        num_encoded_versions += Objects.encode_previous_versions(object_id, snapshot_interval)
+    return num_encoded_versions
+
+
+def get_object_versions_storage_size() -> int:
+    """
+    Get the disk space used by previous object versions.
+
+    :return: the size of the previous object versions table including its
+        indexes and TOAST data, in bytes
+    """
+    return typing.cast(int, db.session.execute(db.select(
+        db.func.pg_total_relation_size(Objects.previous_table.name)
+    )).scalar())
@@ -29,6 +29,8 @@ for the individual resource types, as a base to avoid code duplication.
 """
 import typing
 
+from sqlalchemy.dialects import postgresql
+
 from . import users, groups, projects
 from ..models import Permissions
 from .. import db
@@ -642,3 +644,66 @@ class ResourcePermissions:
         permissions_for_projects = self.get_permissions_for_projects(source_resource_id)
         for project_id, permissions in permissions_for_projects.items():
             self.set_permissions_for_project(target_resource_id, project_id, permissions)
+
+    def set_permissions_for_new_resources(
+            self,
+            resource_ids: typing.Sequence[int],
+            *,
+            permissions_for_users: typing.Optional[typing.Mapping[int, Permissions]] = None,
+            permissions_for_groups: typing.Optional[typing.Mapping[int, Permissions]] = None,
+            permissions_for_projects: typing.Optional[typing.Mapping[int, Permissions]] = None,
+            permissions_for_all_users: Permissions = Permissions.NONE
+    ) -> None:
+        """
+        Set the same permissions for several newly created resources.
+
+        Instead of setting the permissions of each resource individually,
+        all permissions rows are inserted using one statement per table. The
+        changes are not committed, so that the permissions can be set in the
+        same transaction that created the resources.
+
+        :param resource_ids: the IDs of resources without permissions
+        :param permissions_for_users: the permissions for individual users
+        :param permissions_for_groups: the permissions for groups
+        :param permissions_for_projects: the permissions for projects
+        :param permissions_for_all_users: the permissions for all users
+        """
+        if not resource_ids:
+            return
+        # ensure that the users, groups and projects can be found
+        for user_id in permissions_for_users or {}:
+            users.check_user_exists(user_id)
+        for group_id in permissions_for_groups or {}:
+            groups.get_group(group_id)
+        for project_id in permissions_for_projects or {}:
+            projects.get_project(project_id)
+        for table, id_name, permissions_by_id in [
+            (self._user_permissions_table, 'user_id', permissions_for_users),
+            (self._group_permissions_table, 'group_id', permissions_for_groups),
+            (self._project_permissions_table, 'project_id', permissions_for_projects),
+            (self._all_user_permissions_table, None, {None: permissions_for_all_users}),
+        ]:
+            if table is None or not permissions_by_id:
+                continue
+            rows = []
+            for resource_id in resource_ids:
+                for other_id, permissions in permissions_by_id.items():
+                    if permissions == Permissions.NONE:
+                        continue
+                    row: typing.Dict[str, typing.Any] = {
+                        self._resource_id_name: resource_id,
+                        'permissions': permissions
+                    }
+                    if id_name is not None:
+                        row[id_name] = other_id
+                    rows.append(row)
+            if not rows:
+                continue
+            insert_statement = postgresql.insert(table.__table__)
+            db.session.execute(
+                insert_statement.on_conflict_do_update(
+                    index_elements=[column.name for column in table.__table__.primary_key.columns],
+                    set_={'permissions': insert_statement.excluded.permissions}
+                ),
+                rows
+            )
@@ -159,3 +159,74 @@ def are_conditions_fulfilled(
         is_condition_fulfilled(condition, instance)
         for condition in conditions
     )
+
+
+def _compile_condition(
+        condition: typing.Dict[str, typing.Any]
+) -> typing.Callable[[typing.Dict[str, typing.Any]], bool]:
+    """
+    Compile a condition into a function equivalent to is_condition_fulfilled.
+
+    :param condition: the condition to compile
+    :return: a function checking whether the condition is fulfilled by an instance
+    """
+    if condition['type'] in ('choice_equals', 'user_equals', 'bool_equals', 'object_equals'):
+        property_name = condition['property_name']
+        if condition['type'] == 'choice_equals':
+            choice = condition['choice']
+            if choice is None:
+                return lambda instance: property_name not in instance
+            translated_choice = {'en': choice}
+
+            def is_choice_condition_fulfilled(instance: typing.Dict[str, typing.Any]) -> bool:
+                property_value = instance.get(property_name)
+                if not isinstance(property_value, dict):
+                    return False
+                text = property_value.get('text')
+                return bool(text == choice or text == translated_choice or {'en': text} == choice)
+            return is_choice_condition_fulfilled
+        if condition['type'] == 'bool_equals':
+            value_key = 'value'
+            value = condition['value']
+            if value is None:
+                return lambda instance: False
+        else:
+            value_key = 'user_id' if condition['type'] == 'user_equals' else 'object_id'
+            value = condition[value_key]
+            if value is None:
+                return lambda instance: property_name not in instance
+
+        def is_value_condition_fulfilled(instance: typing.Dict[str, typing.Any]) -> bool:
+            property_value = instance.get(property_name)
+            return isinstance(property_value, dict) and bool(property_value.get(value_key) == value)
+        return is_value_condition_fulfilled
+    if condition['type'] == 'any':
+        sub_conditions = [_compile_condition(sub_condition) for sub_condition in condition['conditions']]
+        return lambda instance: any(sub_condition(instance) for sub_condition in sub_conditions)
+    if condition['type'] == 'all':
+        sub_conditions = [_compile_condition(sub_condition) for sub_condition in condition['conditions']]
+        return lambda instance: all(sub_condition(instance) for sub_condition in sub_conditions)
+    if condition['type'] == 'not':
+        sub_condition = _compile_condition(condition['condition'])
+        return lambda instance: not sub_condition(instance)
+
+    # unknown or unfulfillable condition
+    return lambda instance: False
+
+
+def compile_conditions(
+        conditions: typing.Optional[typing.List[typing.Dict[str, typing.Any]]]
+) -> typing.Callable[[typing.Dict[str, typing.Any]], bool]:
+    """
+    Compile a list of conditions into a function equivalent to are_conditions_fulfilled.
+
+    The condition tree is only walked once, so that checking the conditions
+    for many instances does not need to evaluate the condition types again.
+
+    :param conditions: the list of conditions to compile, or None
+    :return: a function checking whether all conditions are fulfilled by an instance
+    """
+    if conditions is None:
+        return lambda instance: True
+    compiled_conditions = [_compile_condition(condition) for condition in conditions]
+    return lambda instance: all(condition(instance) for condition in compiled_conditions)
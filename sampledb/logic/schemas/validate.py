@@ -3,28 +3,44 @@
 Implementation of validate(instance, schema)
 """
 
+import collections
+import copy
 import re
 import datetime
 import decimal
 import string
+import threading
 import typing
 import math
 import json
 
+import numpy as np
+import numpy.typing as npt
 import plotly
 from flask_babel import _
 import flask
 
-from .conditions import are_conditions_fulfilled
+from .conditions import are_conditions_fulfilled, compile_conditions
 from .. import actions, errors, objects, datatypes, users, languages
 from ...models import ActionType
+from ...models.versioned_json_object_tables import get_schema_hash
 from ..errors import ObjectDoesNotExistError, ValidationError, ValidationMultiError, UserDoesNotExistError, InvalidURLError
 from .utils import units_are_valid
 from ..utils import get_translated_text, parse_url
-from ..units import get_dimensionality_for_units, get_magnitude_in_base_units, get_old_dimensionality
+from ..units import get_base_units_conversion_factor, get_dimensionality_for_units, get_magnitude_in_base_units, get_old_dimensionality
 
 OPT_IMPORT_KEYS = {'export_edit_note', 'component_uuid', 'eln_source_url', 'eln_object_url', 'eln_user_url'}
 
+# the number of compiled validators kept in memory
+COMPILED_VALIDATOR_CACHE_SIZE = 128
+
+# the positions of the separators in timeseries datetimes, all other characters must be digits
+_TIMESERIES_DATETIME_SEPARATORS = {4: '-', 7: '-', 10: ' ', 13: ':', 16: ':', 19: '.'}
+_TIMESERIES_DATETIME_LENGTH = len('YYYY-MM-DD hh:mm:ss.ffffff')
+
+# the action IDs and actions of referenced objects by object ID
+_ReferencedObjectActions = typing.Dict[int, typing.Tuple[int, typing.Optional['actions.Action']]]
+
 
 def validate(
         instance: typing.Union[typing.Dict[str, typing.Any], typing.List[typing.Any]],
@@ -37,6 +53,10 @@ def validate(
     """
     Validates the given instance using the given schema and raises a ValidationError if it is invalid.
 
+    The schema is compiled into a validator function once and the validator
+    is cached by the schema hash, see get_compiled_validator. The actions of
+    all objects referenced in the instance are loaded before validating it.
+
     :param instance: the sampledb object
     :param schema: the valid sampledb object schema
     :param path: the path to this subinstance / subschema
@@ -47,14 +67,367 @@ def validate(
     """
     if path is None:
         path = []
+    if not isinstance(schema, dict):
+        raise ValidationError('invalid schema (must be dict)', path)
+    if 'type' not in schema:
+        raise ValidationError('invalid schema (must contain type)', path)
+    referenced_object_actions = _get_referenced_object_actions(instance)
+    get_compiled_validator(schema)(instance, path, allow_disabled_languages, strict, file_names_by_id, referenced_object_actions)
+
+
+class CompiledValidator(typing.Protocol):
+    def __call__(
+        self,
+        instance: typing.Any,
+        path: typing.List[str],
+        allow_disabled_languages: bool,
+        strict: bool,
+        file_names_by_id: typing.Optional[typing.Dict[int, str]],
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        ...
+
+
+class _CompiledValidatorCache:
+    """
+    A thread-safe LRU cache mapping schema hashes to compiled validators.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._validators: collections.OrderedDict[str, CompiledValidator] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema_hash: str) -> typing.Optional[CompiledValidator]:
+        with self._lock:
+            validator = self._validators.get(schema_hash)
+            if validator is not None:
+                self._validators.move_to_end(schema_hash)
+            return validator
+
+    def set(self, schema_hash: str, validator: CompiledValidator) -> None:
+        with self._lock:
+            self._validators[schema_hash] = validator
+            self._validators.move_to_end(schema_hash)
+            while len(self._validators) > self._max_size:
+                self._validators.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._validators.clear()
+
+
+_compiled_validator_cache = _CompiledValidatorCache(COMPILED_VALIDATOR_CACHE_SIZE)
+
+
+def get_compiled_validator(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    """
+    Return the compiled validator for a schema.
+
+    Compiling a schema walks it once and precomputes everything that does not
+    depend on the instance, e.g. the validators of all properties and items,
+    the condition functions and the dimensionality of quantity units. The
+    validators are cached by schema hash, so that objects of the same action
+    share one validator.
+
+    :param schema: the sampledb object schema
+    :return: the validator function
+    """
+    try:
+        schema_hash = get_schema_hash(schema)
+    except (TypeError, ValueError):
+        # schemas which are not JSON serializable cannot be cached
+        return _compile(schema)
+    validator = _compiled_validator_cache.get(schema_hash)
+    if validator is None:
+        # compile a copy, as callers may modify the schema later on
+        validator = _compile(copy.deepcopy(schema))
+        _compiled_validator_cache.set(schema_hash, validator)
+    return validator
+
+
+def _raise_validation_errors(errors: typing.List[ValidationError]) -> None:
+    if len(errors) == 1:
+        raise errors[0]
+    elif len(errors) > 1:
+        raise ValidationMultiError(errors)
+
+
+def _compile(schema: typing.Any) -> CompiledValidator:
+    """
+    Compiles a schema into a validator function.
+
+    Compiling never fails. Invalid schemas and schemas which cannot be
+    compiled result in validators which behave like _validate.
+
+    :param schema: the sampledb object schema
+    :return: the validator function
+    """
+    if not isinstance(schema, dict) or 'type' not in schema:
+        def validate_invalid_schema(
+                instance: typing.Any,
+                path: typing.List[str],
+                allow_disabled_languages: bool,
+                strict: bool,
+                file_names_by_id: typing.Optional[typing.Dict[int, str]],
+                referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+        ) -> None:
+            _validate(instance, schema, path, allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id, referenced_object_actions=referenced_object_actions)
+        return validate_invalid_schema
+
+    instance_type = list if schema['type'] == 'array' else dict
+    compile_function = _COMPILE_FUNCTIONS.get(schema['type'], _compile_fallback)
+    try:
+        type_validator = compile_function(schema)
+    except Exception:
+        type_validator = _compile_fallback(schema)
+
+    def validate_compiled(
+            instance: typing.Any,
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        if not isinstance(instance, instance_type):
+            raise ValidationError('invalid type', path)
+        type_validator(instance, path, allow_disabled_languages, strict, file_names_by_id, referenced_object_actions)
+    return validate_compiled
+
+
+def _compile_fallback(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    def validate_uncompiled(
+            instance: typing.Any,
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        _validate(instance, schema, path, allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id, referenced_object_actions=referenced_object_actions)
+    return validate_uncompiled
+
+
+def _compile_array(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    item_validator = _compile(schema['items'])
+    min_items = schema.get('minItems') if 'minItems' in schema else None
+    max_items = schema.get('maxItems') if 'maxItems' in schema else None
+
+    def validate_array(
+            instance: typing.List[typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        if min_items is not None and len(instance) < min_items:
+            raise ValidationError(f'expected at least {min_items} items', path)
+        if max_items is not None and len(instance) > max_items:
+            raise ValidationError(f'expected at most {max_items} items', path)
+        errors = []
+        for index, item in enumerate(instance):
+            try:
+                item_validator(item, path + [str(index)], allow_disabled_languages, strict, file_names_by_id, referenced_object_actions)
+            except ValidationError as e:
+                errors.append(e)
+        _raise_validation_errors(errors)
+    return validate_array
+
+
+def _compile_object(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    property_validators = {
+        property_name: _compile(property_schema)
+        for property_name, property_schema in schema['properties'].items()
+    }
+    conditional_properties = [
+        (property_name, compile_conditions(property_schema['conditions']))
+        for property_name, property_schema in schema['properties'].items()
+        if property_schema.get('conditions') is not None
+    ]
+    required_properties = list(schema.get('required', []))
+
+    def validate_object(
+            instance: typing.Dict[str, typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        errors = []
+        properties_with_unfulfilled_conditions = set()
+        for property_name, are_conditions_fulfilled_for in conditional_properties:
+            if not are_conditions_fulfilled_for(instance):
+                properties_with_unfulfilled_conditions.add(property_name)
+                if property_name in instance or (property_name == 'name' and not path):
+                    errors.append(ValidationError(f'conditions for property "{property_name}" not fulfilled', path + [property_name]))
+        for property_name in required_properties:
+            if property_name in properties_with_unfulfilled_conditions:
+                # this property must not be included, as its conditions are not fulfilled
+                continue
+            if property_name not in instance:
+                errors.append(ValidationError(f'missing required property "{property_name}"', path + [property_name]))
+        for property_name, property_value in instance.items():
+            property_validator = property_validators.get(property_name)
+            if property_validator is None:
+                errors.append(ValidationError(f'unknown property "{property_name}"', path + [property_name]))
+                continue
+            try:
+                property_validator(property_value, path + [property_name], allow_disabled_languages, strict, file_names_by_id, referenced_object_actions)
+            except ValidationError as e:
+                errors.append(e)
+        _raise_validation_errors(errors)
+    return validate_object
+
+
+def _get_schema_units(schema: typing.Dict[str, typing.Any]) -> str:
+    if isinstance(schema['units'], str):
+        return schema['units']
+    return typing.cast(str, schema['units'][0])
+
+
+def _compile_quantity(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    try:
+        schema_quantity = datatypes.Quantity(1.0, units=_get_schema_units(schema))
+    except Exception:
+        # the error will be raised when validating an instance
+        return _compile_fallback(schema)
+
+    def validate_quantity(
+            instance: typing.Dict[str, typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        _validate_quantity(instance, schema, path, schema_quantity=schema_quantity)
+    return validate_quantity
+
+
+def _compile_timeseries(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    try:
+        dimensionality_from_schema_units = get_dimensionality_for_units(_get_schema_units(schema))
+    except Exception:
+        # the error will be raised when validating an instance
+        return _compile_fallback(schema)
+
+    def validate_timeseries(
+            instance: typing.Dict[str, typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        _validate_timeseries(instance, schema, path, dimensionality_from_schema_units=dimensionality_from_schema_units)
+    return validate_timeseries
+
+
+def _compile_simple(
+        validate_function: typing.Callable[[typing.Dict[str, typing.Any], typing.Dict[str, typing.Any], typing.List[str]], None]
+) -> typing.Callable[[typing.Dict[str, typing.Any]], CompiledValidator]:
+    def compile_simple(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+        def validate_simple(
+                instance: typing.Dict[str, typing.Any],
+                path: typing.List[str],
+                allow_disabled_languages: bool,
+                strict: bool,
+                file_names_by_id: typing.Optional[typing.Dict[int, str]],
+                referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+        ) -> None:
+            validate_function(instance, schema, path)
+        return validate_simple
+    return compile_simple
+
+
+def _compile_object_reference(
+        validate_function: typing.Callable[..., None]
+) -> typing.Callable[[typing.Dict[str, typing.Any]], CompiledValidator]:
+    def compile_object_reference(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+        def validate_object_reference(
+                instance: typing.Dict[str, typing.Any],
+                path: typing.List[str],
+                allow_disabled_languages: bool,
+                strict: bool,
+                file_names_by_id: typing.Optional[typing.Dict[int, str]],
+                referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+        ) -> None:
+            validate_function(instance, schema, path, referenced_object_actions=referenced_object_actions)
+        return validate_object_reference
+    return compile_object_reference
+
+
+def _compile_text(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    def validate_text(
+            instance: typing.Dict[str, typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        _validate_text(instance, schema, path, allow_disabled_languages=allow_disabled_languages)
+    return validate_text
+
+
+def _compile_tags(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    def validate_tags(
+            instance: typing.Dict[str, typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        _validate_tags(instance, schema, path, strict=strict)
+    return validate_tags
+
+
+def _compile_file(schema: typing.Dict[str, typing.Any]) -> CompiledValidator:
+    def validate_file(
+            instance: typing.Dict[str, typing.Any],
+            path: typing.List[str],
+            allow_disabled_languages: bool,
+            strict: bool,
+            file_names_by_id: typing.Optional[typing.Dict[int, str]],
+            referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+    ) -> None:
+        _validate_file(instance, schema, path, file_names_by_id=file_names_by_id)
+    return validate_file
+
+
+def _validate(
+        instance: typing.Union[typing.Dict[str, typing.Any], typing.List[typing.Any]],
+        schema: typing.Dict[str, typing.Any],
+        path: typing.List[str],
+        allow_disabled_languages: bool = False,
+        strict: bool = False,
+        file_names_by_id: typing.Optional[typing.Dict[int, str]] = None,
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions] = None
+) -> None:
+    """
+    Validates the given instance using the given schema without compiling it.
+
+    :param instance: the sampledb object
+    :param schema: the sampledb object schema
+    :param path: the path to this subinstance / subschema
+    :param allow_disabled_languages: whether disabled languages are allowed
+    :param strict: whether the data should be evaluated in strict mode, or backwards compatible otherwise
+    :param file_names_by_id: a dict mapping file IDs to file names, or None
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
+    :raise ValidationError: if the schema is invalid.
+    """
     if not isinstance(schema, dict):
         raise ValidationError('invalid schema (must be dict)', path)
     if 'type' not in schema:
         raise ValidationError('invalid schema (must contain type)', path)
     if schema['type'] == 'array' and isinstance(instance, list):
-        return _validate_array(instance, schema, path, allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id)
+        return _validate_array(instance, schema, path, allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id, referenced_object_actions=referenced_object_actions)
     elif schema['type'] == 'object' and isinstance(instance, dict):
-        return _validate_object(instance, schema, path, allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id)
+        return _validate_object(instance, schema, path, allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id, referenced_object_actions=referenced_object_actions)
     elif schema['type'] == 'text' and isinstance(instance, dict):
         return _validate_text(instance, schema, path, allow_disabled_languages=allow_disabled_languages)
     elif schema['type'] == 'datetime' and isinstance(instance, dict):
@@ -64,11 +437,11 @@ def validate(
     elif schema['type'] == 'quantity' and isinstance(instance, dict):
         return _validate_quantity(instance, schema, path)
     elif schema['type'] == 'sample' and isinstance(instance, dict):
-        return _validate_sample(instance, schema, path)
+        return _validate_sample(instance, schema, path, referenced_object_actions=referenced_object_actions)
     elif schema['type'] == 'measurement' and isinstance(instance, dict):
-        return _validate_measurement(instance, schema, path)
+        return _validate_measurement(instance, schema, path, referenced_object_actions=referenced_object_actions)
     elif schema['type'] == 'object_reference' and isinstance(instance, dict):
-        return _validate_object_reference(instance, schema, path)
+        return _validate_object_reference(instance, schema, path, referenced_object_actions=referenced_object_actions)
     elif schema['type'] == 'tags' and isinstance(instance, dict):
         return _validate_tags(instance, schema, path, strict=strict)
     elif schema['type'] == 'hazards' and isinstance(instance, dict):
@@ -90,7 +463,8 @@ def _validate_array(
         schema: typing.Dict[str, typing.Any], path: typing.List[str],
         allow_disabled_languages: bool = False,
         strict: bool = False,
-        file_names_by_id: typing.Optional[typing.Dict[int, str]] = None
+        file_names_by_id: typing.Optional[typing.Dict[int, str]] = None,
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions] = None
 ) -> None:
     """
     Validates the given instance using the given array schema and raises a ValidationError if it is invalid.
@@ -100,6 +474,7 @@ def _validate_array(
     :param path: the path to this subinstance / subschema
     :param strict: whether the data should be evaluated in strict mode, or backwards compatible otherwise
     :param file_names_by_id: a dict mapping file IDs to file names, or None
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, list):
@@ -111,7 +486,7 @@ def _validate_array(
     errors = []
     for index, item in enumerate(instance):
         try:
-            validate(item, schema['items'], path + [str(index)], allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id)
+            _validate(item, schema['items'], path + [str(index)], allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id, referenced_object_actions=referenced_object_actions)
         except ValidationError as e:
             errors.append(e)
     if len(errors) == 1:
@@ -221,7 +596,8 @@ def _validate_object(
         path: typing.List[str],
         allow_disabled_languages: bool = False,
         strict: bool = False,
-        file_names_by_id: typing.Optional[typing.Dict[int, str]] = None
+        file_names_by_id: typing.Optional[typing.Dict[int, str]] = None,
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions] = None
 ) -> None:
     """
     Validates the given instance using the given object schema and raises a ValidationError if it is invalid.
@@ -231,6 +607,7 @@ def _validate_object(
     :param path: the path to this subinstance / subschema
     :param strict: whether the data should be evaluated in strict mode, or backwards compatible otherwise
     :param file_names_by_id: a dict mapping file IDs to file names, or None
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, dict):
@@ -256,7 +633,7 @@ def _validate_object(
             if property_name not in schema['properties']:
                 raise ValidationError(f'unknown property "{property_name}"', path + [property_name])
             else:
-                validate(property_value, schema['properties'][property_name], path + [property_name], allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id)
+                _validate(property_value, schema['properties'][property_name], path + [property_name], allow_disabled_languages=allow_disabled_languages, strict=strict, file_names_by_id=file_names_by_id, referenced_object_actions=referenced_object_actions)
         except ValidationError as e:
             errors.append(e)
     if len(errors) == 1:
@@ -408,13 +785,19 @@ def _validate_bool(instance: typing.Dict[str, typing.Any], schema: typing.Dict[s
         raise ValidationError('value must be bool', path)
 
 
-def _validate_quantity(instance: typing.Dict[str, typing.Any], schema: typing.Dict[str, typing.Any], path: typing.List[str]) -> None:
+def _validate_quantity(
+        instance: typing.Dict[str, typing.Any],
+        schema: typing.Dict[str, typing.Any],
+        path: typing.List[str],
+        schema_quantity: typing.Optional[datatypes.Quantity] = None
+) -> None:
     """
     Validates the given instance using the given quantity object schema and raises a ValidationError if it is invalid.
 
     :param instance: the sampledb object
     :param schema: the valid sampledb object schema
     :param path: the path to this subinstance / subschema
+    :param schema_quantity: a quantity with magnitude 1 in the schema units, if already known
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, dict):
@@ -438,14 +821,11 @@ def _validate_quantity(instance: typing.Dict[str, typing.Any], schema: typing.Di
         raise ValidationError('units must be str', path)
     if not units_are_valid(instance['units']):
         raise ValidationError('Invalid/Unknown units', path)
-    try:
-        if isinstance(schema['units'], str):
-            schema_units = schema['units']
-        else:
-            schema_units = schema['units'][0]
-        schema_quantity = datatypes.Quantity(1.0, units=schema_units)
-    except Exception:
-        raise ValidationError('Unable to create schema quantity', path)
+    if schema_quantity is None:
+        try:
+            schema_quantity = datatypes.Quantity(1.0, units=_get_schema_units(schema))
+        except Exception:
+            raise ValidationError('Unable to create schema quantity', path)
 
     quantity_magnitude = None
     quantity_magnitude_in_base_units = None
@@ -503,13 +883,88 @@ def _validate_quantity(instance: typing.Dict[str, typing.Any], schema: typing.Di
         raise ValidationError(f'Invalid dimensionality, expected "{str(schema_quantity.dimensionality)}"', path)
 
 
-def _validate_sample(instance: typing.Dict[str, typing.Any], schema: typing.Dict[str, typing.Any], path: typing.List[str]) -> None:
+def _get_referenced_object_actions(
+        instance: typing.Any
+) -> _ReferencedObjectActions:
+    """
+    Load the action IDs and actions of all local objects referenced in an instance.
+
+    Objects without an action are not included, so that they are loaded while
+    validating the reference instead.
+
+    :param instance: the sampledb object or a part of it
+    :return: the action IDs and actions by object ID
+    """
+    object_ids = set()
+    subinstances = [instance]
+    while subinstances:
+        subinstance = subinstances.pop()
+        if isinstance(subinstance, list):
+            subinstances.extend(subinstance)
+        elif isinstance(subinstance, dict):
+            if (
+                subinstance.get('_type') in ('sample', 'measurement', 'object_reference') and
+                type(subinstance.get('object_id')) is int and
+                subinstance.get('component_uuid', flask.current_app.config['FEDERATION_UUID']) == flask.current_app.config['FEDERATION_UUID'] and
+                'eln_source_url' not in subinstance
+            ):
+                object_ids.add(subinstance['object_id'])
+            subinstances.extend(subinstance.values())
+    if not object_ids:
+        return {}
+    action_ids_by_object_id = {
+        object_id: action_id
+        for object_id, action_id in objects.get_action_ids_for_object_ids(list(object_ids)).items()
+        if action_id is not None
+    }
+    actions_by_id = actions.get_actions_for_action_ids(set(action_ids_by_object_id.values()))
+    return {
+        object_id: (action_id, actions_by_id.get(action_id))
+        for object_id, action_id in action_ids_by_object_id.items()
+    }
+
+
+def _get_referenced_object_action(
+        object_id: int,
+        path: typing.List[str],
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions]
+) -> typing.Tuple[typing.Optional[int], typing.Optional['actions.Action']]:
+    """
+    Get the action ID and action of a referenced object.
+
+    :param object_id: the ID of the referenced object
+    :param path: the path to the reference
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
+    :return: the action ID and the action, if the object has an action that exists
+    :raise ValidationError: if the object does not exist
+    """
+    if referenced_object_actions is not None and object_id in referenced_object_actions:
+        return referenced_object_actions[object_id]
+    try:
+        referenced_object = objects.get_object(object_id=object_id)
+    except ObjectDoesNotExistError:
+        raise ValidationError('object does not exist', path)
+    if referenced_object.action_id is None:
+        return None, None
+    try:
+        return referenced_object.action_id, actions.get_action(referenced_object.action_id)
+    except errors.ActionDoesNotExistError:
+        return referenced_object.action_id, None
+
+
+def _validate_sample(
+        instance: typing.Dict[str, typing.Any],
+        schema: typing.Dict[str, typing.Any],
+        path: typing.List[str],
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions] = None
+) -> None:
     """
     Validates the given instance using the given sample object schema and raises a ValidationError if it is invalid.
 
     :param instance: the sampledb object
     :param schema: the valid sampledb object schema
     :param path: the path to this subinstance / subschema
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, dict):
@@ -532,26 +987,30 @@ def _validate_sample(instance: typing.Dict[str, typing.Any], schema: typing.Dict
     elif 'eln_source_url' in instance:
         validate_eln_urls(instance, path)
     else:
-        try:
-            sample = objects.get_object(object_id=instance['object_id'])
-        except ObjectDoesNotExistError:
-            raise ValidationError('object does not exist', path)
-        if sample.action_id is None:
+        action_id, action = _get_referenced_object_action(instance['object_id'], path, referenced_object_actions)
+        if action_id is None:
             raise ValidationError('object must be sample', path)
-        action = actions.get_action(sample.action_id)
+        if action is None:
+            action = actions.get_action(action_id)
         if action.type is None:
             raise ValidationError('object must be sample', path)
         if ActionType.SAMPLE_CREATION not in {action.type_id, action.type.fed_id}:
             raise ValidationError('object must be sample', path)
 
 
-def _validate_measurement(instance: typing.Dict[str, typing.Any], schema: typing.Dict[str, typing.Any], path: typing.List[str]) -> None:
+def _validate_measurement(
+        instance: typing.Dict[str, typing.Any],
+        schema: typing.Dict[str, typing.Any],
+        path: typing.List[str],
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions] = None
+) -> None:
     """
     Validates the given instance using the given measurement object schema and raises a ValidationError if it is invalid.
 
     :param instance: the sampledb object
     :param schema: the valid sampledb object schema
     :param path: the path to this subinstance / subschema
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, dict):
@@ -574,13 +1033,11 @@ def _validate_measurement(instance: typing.Dict[str, typing.Any], schema: typing
     elif 'eln_source_url' in instance:
         validate_eln_urls(instance, path)
     else:
-        try:
-            measurement = objects.get_object(object_id=instance['object_id'])
-        except ObjectDoesNotExistError:
-            raise ValidationError('object does not exist', path)
-        if measurement.action_id is None:
+        action_id, action = _get_referenced_object_action(instance['object_id'], path, referenced_object_actions)
+        if action_id is None:
             raise ValidationError('object must be measurement', path)
-        action = actions.get_action(measurement.action_id)
+        if action is None:
+            action = actions.get_action(action_id)
         if action.type is None:
             raise ValidationError('object must be measurement', path)
         if ActionType.MEASUREMENT not in {action.type_id, action.type.fed_id}:
@@ -624,13 +1081,19 @@ def _validate_user(instance: typing.Dict[str, typing.Any], schema: typing.Dict[s
             raise ValidationError('user does not exist', path)
 
 
-def _validate_object_reference(instance: typing.Dict[str, typing.Any], schema: typing.Dict[str, typing.Any], path: typing.List[str]) -> None:
+def _validate_object_reference(
+        instance: typing.Dict[str, typing.Any],
+        schema: typing.Dict[str, typing.Any],
+        path: typing.List[str],
+        referenced_object_actions: typing.Optional[_ReferencedObjectActions] = None
+) -> None:
     """
     Validates the given instance using the given object reference object schema and raises a ValidationError if it is invalid.
 
     :param instance: the sampledb object
     :param schema: the valid sampledb object schema
     :param path: the path to this subinstance / subschema
+    :param referenced_object_actions: the action IDs and actions of referenced objects, or None
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, dict):
@@ -655,18 +1118,8 @@ def _validate_object_reference(instance: typing.Dict[str, typing.Any], schema: t
     elif 'eln_source_url' in instance:
         validate_eln_urls(instance, path)
     else:
-        try:
-            object = objects.get_object(object_id=instance['object_id'])
-        except ObjectDoesNotExistError:
-            raise ValidationError('object does not exist', path)
-        action = None
-        action_type = None
-        if object.action_id is not None:
-            try:
-                action = actions.get_action(object.action_id)
-                action_type = action.type
-            except errors.ActionDoesNotExistError:
-                pass
+        action_id, action = _get_referenced_object_action(instance['object_id'], path, referenced_object_actions)
+        action_type = action.type if action is not None else None
 
         filter_operator = schema.get('filter_operator', 'and')
         action_id_error = None
@@ -676,10 +1129,10 @@ def _validate_object_reference(instance: typing.Dict[str, typing.Any], schema: t
             else:
                 valid_action_ids = schema['action_id']
             if valid_action_ids is not None:
-                if object.action_id is None:
+                if action_id is None:
                     action_id_error = 'object has no action'
                 elif not any(
-                    object.action_id == valid_action_id or (
+                    action_id == valid_action_id or (
                         type(valid_action_id) is dict and
                         action is not None and
                         (
@@ -705,7 +1158,7 @@ def _validate_object_reference(instance: typing.Dict[str, typing.Any], schema: t
             else:
                 valid_action_type_ids = schema['action_type_id']
             if valid_action_type_ids is not None:
-                if object.action_id is None:
+                if action_id is None:
                     action_type_id_error = 'object has no action type'
                 else:
                     if action is None or action.type is None:
@@ -779,10 +1232,161 @@ def _validate_plotly_chart(instance: typing.Dict[str, typing.Any], schema: typin
         raise ValidationError(_('The plotly data must be valid. Look up which schema is supported by plotly.'), path)
 
 
+def _parse_timeseries_datetimes(times: typing.List[str]) -> typing.Optional[npt.NDArray[np.datetime64]]:
+    """
+    Parse timeseries datetimes in the format YYYY-MM-DD hh:mm:ss.ffffff.
+
+    Only datetimes which datetime.datetime.strptime would accept are parsed,
+    including the number of digits per field.
+
+    :param times: the datetime strings
+    :return: the parsed datetimes, or None if any string cannot be parsed
+    """
+    if not times:
+        return np.array([], dtype='datetime64[us]')
+    time_strings = np.array(times, dtype=np.str_)
+    if time_strings.dtype.itemsize != _TIMESERIES_DATETIME_LENGTH * 4 or not (np.char.str_len(time_strings) == _TIMESERIES_DATETIME_LENGTH).all():
+        return None
+    characters = time_strings.view(np.uint32).reshape(-1, _TIMESERIES_DATETIME_LENGTH).copy()
+    digit_positions = [i for i in range(_TIMESERIES_DATETIME_LENGTH) if i not in _TIMESERIES_DATETIME_SEPARATORS]
+    digits = characters[:, digit_positions]
+    if not ((digits >= ord('0')) & (digits <= ord('9'))).all():
+        return None
+    for position, separator in _TIMESERIES_DATETIME_SEPARATORS.items():
+        if not (characters[:, position] == ord(separator)).all():
+            return None
+    characters[:, 10] = ord('T')
+    iso_time_strings = characters.view(f'U{_TIMESERIES_DATETIME_LENGTH}').reshape(-1)
+    try:
+        parsed_times = iso_time_strings.astype('datetime64[us]')
+    except ValueError:
+        return None
+    # NumPy might normalize values like 24:00:00 and supports the year 0
+    if not (np.datetime_as_string(parsed_times, unit='us') == iso_time_strings).all():
+        return None
+    if (parsed_times < np.datetime64('0001-01-01', 'us')).any():
+        return None
+    return parsed_times
+
+
+def _multiply_by_decimal(
+        values: npt.NDArray[np.float64],
+        factor: decimal.Decimal
+) -> typing.Optional[npt.NDArray[np.float64]]:
+    """
+    Multiply values with a decimal factor, rounding the results like float(decimal.Decimal(value) * factor).
+
+    The factor is split into two floats and the rounding errors of the
+    products are calculated using Dekker's algorithm. As the decimal product
+    is rounded twice, results close to the midpoint between two floats are
+    calculated using decimal arithmetic instead.
+
+    :param values: the values to multiply
+    :param factor: the factor
+    :return: the products, or None if they cannot be calculated this way
+    """
+    factor_high = float(factor)
+    factor_low = float(factor - decimal.Decimal(factor_high))
+    products = values * factor_high
+    split_factor = 2.0 ** 27 + 1
+    values_split = split_factor * values
+    values_high = values_split - (values_split - values)
+    values_low = values - values_high
+    factor_split = split_factor * factor_high
+    factor_high_high = factor_split - (factor_split - factor_high)
+    factor_high_low = factor_high - factor_high_high
+    product_errors = ((values_high * factor_high_high - products) + values_high * factor_high_low + values_low * factor_high_high) + values_low * factor_high_low
+    corrections = product_errors + values * factor_low
+    # keep the sign of zero products
+    results = np.where(products == 0, products, products + corrections)
+    if not np.isfinite(results).all() or not np.isfinite(corrections).all():
+        return None
+    # the error calculation requires the partial products not to be subnormal
+    if ((products != 0) & (np.abs(products) < 2.0 ** -900)).any():
+        return None
+    distances = np.abs((products - results) + corrections)
+    spacings = np.spacing(np.abs(results))
+    is_close_to_midpoint = (
+        (np.abs(distances - spacings / 2) <= spacings * 2.0 ** -30) |
+        (np.abs(distances - spacings / 4) <= spacings * 2.0 ** -30)
+    ) & (results != 0)
+    for i in np.flatnonzero(is_close_to_midpoint).tolist():
+        results[i] = float(decimal.Decimal(float(values[i])) * factor)
+    return results
+
+
+def _get_timeseries_data_in_base_units(
+        data: typing.List[typing.Sequence[typing.Any]],
+        units: str,
+        is_relative_time: bool
+) -> typing.Optional[typing.List[typing.Sequence[typing.Any]]]:
+    """
+    Validate the points of a timeseries and convert the magnitudes to base units for the whole timeseries at once.
+
+    The data must already be a list of points with valid types. The results
+    match those of the validation for each point, including the tolerance
+    when comparing magnitudes in base units.
+
+    :param data: the timeseries data
+    :param units: the units of the timeseries
+    :param is_relative_time: whether the times are relative times in seconds
+    :return: the data with magnitudes in base units, or None if the data has
+        to be validated for each point, e.g. because it is invalid or the
+        units are not multiplicative
+    """
+    try:
+        conversion_factor = get_base_units_conversion_factor(units)
+    except errors.InvalidUnitsError:
+        return None
+    if conversion_factor is None:
+        return None
+    try:
+        magnitudes = np.array([entry[1] for entry in data], dtype=np.float64)
+        magnitudes_in_base_units = np.array([entry[2] if len(entry) == 3 else 0.0 for entry in data], dtype=np.float64)
+        sorted_times: npt.NDArray[typing.Any]
+        if is_relative_time:
+            relative_times = np.array([entry[0] for entry in data], dtype=np.float64)
+            if not np.isfinite(relative_times).all() or (np.abs(relative_times) >= 2 ** 53).any():
+                return None
+            sorted_times = np.sort(relative_times)
+        else:
+            datetimes = _parse_timeseries_datetimes([entry[0] for entry in data])
+            if datetimes is None:
+                return None
+            sorted_times = np.sort(datetimes)
+    except (OverflowError, ValueError):
+        return None
+    has_magnitude_in_base_units = np.array([len(entry) == 3 for entry in data], dtype=bool)
+    if not np.isfinite(magnitudes).all() or not np.isfinite(magnitudes_in_base_units).all():
+        return None
+    # integers might not be representable as floats
+    if (np.abs(magnitudes) >= 2 ** 53).any():
+        return None
+    if (sorted_times[1:] == sorted_times[:-1]).any():
+        return None
+    calculated_magnitudes_in_base_units = _multiply_by_decimal(magnitudes, conversion_factor)
+    if calculated_magnitudes_in_base_units is None:
+        return None
+    # points which are not clearly within the tolerance used by math.isclose are checked for each point
+    unclear_indices = np.flatnonzero(has_magnitude_in_base_units & (
+        np.abs(calculated_magnitudes_in_base_units - magnitudes_in_base_units) >
+        1e-10 * np.maximum(np.abs(calculated_magnitudes_in_base_units), np.abs(magnitudes_in_base_units))
+    ))
+    for i in unclear_indices.tolist():
+        calculated_magnitude_in_base_units = get_magnitude_in_base_units(magnitude=decimal.Decimal(data[i][1]), units=units)
+        if not math.isclose(float(calculated_magnitude_in_base_units), data[i][2]):
+            return None
+    return [
+        entry if len(entry) == 3 else [entry[0], magnitude, calculated_magnitude_in_base_units]
+        for entry, magnitude, calculated_magnitude_in_base_units in zip(data, magnitudes.tolist(), calculated_magnitudes_in_base_units.tolist())
+    ]
+
+
 def _validate_timeseries(
         instance: typing.Dict[str, typing.Any],
         schema: typing.Dict[str, typing.Any],
-        path: typing.List[str]
+        path: typing.List[str],
+        dimensionality_from_schema_units: typing.Optional[str] = None
 ) -> None:
     """
     Validates the given instance using the given timeseries schema and raises a ValidationError if it is invalid.
@@ -790,6 +1394,7 @@ def _validate_timeseries(
     :param instance: the sampledb object
     :param schema: the valid sampledb object schema
     :param path: the path to this subinstance / subschema
+    :param dimensionality_from_schema_units: the dimensionality of the schema units, if already known
     :raise ValidationError: if the schema is invalid.
     """
     if not isinstance(instance, dict):
@@ -811,14 +1416,11 @@ def _validate_timeseries(
         raise ValidationError('units must be str', path)
     if not units_are_valid(instance['units']):
         raise ValidationError('Invalid/Unknown units', path)
-    try:
-        if isinstance(schema['units'], str):
-            schema_units = schema['units']
-        else:
-            schema_units = schema['units'][0]
-        dimensionality_from_schema_units = get_dimensionality_for_units(schema_units)
-    except Exception:
-        raise ValidationError('Unable to determine dimensionality', path)
+    if dimensionality_from_schema_units is None:
+        try:
+            dimensionality_from_schema_units = get_dimensionality_for_units(_get_schema_units(schema))
+        except Exception:
+            raise ValidationError('Unable to determine dimensionality', path)
     if isinstance(schema['units'], str) and instance['units'] != schema['units']:
         if dimensionality_from_schema_units != get_dimensionality_for_units(instance['units']):
             raise ValidationError(f'Invalid units, expected {schema["units"]}', path)
@@ -843,6 +1445,12 @@ def _validate_timeseries(
     ):
         raise ValidationError('data must be list of lists containing either a datetime string or relative time in seconds, and 1 or 2 numbers', path)
 
+    data_in_base_units = _get_timeseries_data_in_base_units(instance['data'], instance['units'], is_relative_time)
+    if data_in_base_units is not None:
+        instance['data'][:] = data_in_base_units
+        return
+
+    # fall back to validating each point, e.g. to find the first invalid point
     existing_times = set()
     for i, entry in enumerate(instance['data']):
         time, magnitude = entry[:2]
@@ -921,3 +1529,22 @@ def validate_eln_urls(
                 parse_url(instance[key], valid_schemes=('http', 'https'))
             except InvalidURLError:
                 raise ValidationError(f'{key} must be a valid http oder https URL', path)
+
+
+_COMPILE_FUNCTIONS: typing.Dict[str, typing.Callable[[typing.Dict[str, typing.Any]], CompiledValidator]] = {
+    'array': _compile_array,
+    'object': _compile_object,
+    'text': _compile_text,
+    'datetime': _compile_simple(_validate_datetime),
+    'bool': _compile_simple(_validate_bool),
+    'quantity': _compile_quantity,
+    'sample': _compile_object_reference(_validate_sample),
+    'measurement': _compile_object_reference(_validate_measurement),
+    'object_reference': _compile_object_reference(_validate_object_reference),
+    'tags': _compile_tags,
+    'hazards': _compile_simple(_validate_hazards),
+    'user': _compile_simple(_validate_user),
+    'plotly_chart': _compile_simple(_validate_plotly_chart),
+    'timeseries': _compile_timeseries,
+    'file': _compile_file,
+}
@@ -6,6 +6,8 @@ import dataclasses
 import datetime
 import typing
 
+import sqlalchemy
+
 from .objects import get_object, check_object_exists
 from .components import check_component_exists, Component
 from .notifications import create_notification_for_a_failed_remote_object_import, create_notification_for_a_remote_object_import_with_notes
@@ -52,14 +54,44 @@ def get_all_shares() -> typing.List[ObjectShare]:
     ]
 
 
-def get_shares_for_component(component_id: int) -> typing.List[ObjectShare]:
+def _get_object_ids_modified_since(modified_since: datetime.datetime) -> sqlalchemy.CompoundSelect[typing.Any]:
+    return sqlalchemy.union(
+        db.select(models.Objects._current_table.c.object_id).where(models.Objects._current_table.c.utc_datetime >= modified_since),
+        db.select(models.FedObjectLogEntry.object_id).where(
+            models.FedObjectLogEntry.utc_datetime >= modified_since,
+            # import status reports do not change the shared data
+            models.FedObjectLogEntry.type != models.FedObjectLogEntryType.REMOTE_IMPORT_OBJECT
+        ),
+        db.select(models.Comment.object_id).where(models.Comment.utc_datetime >= modified_since),
+        db.select(models.Comment.object_id).join(models.FedCommentLogEntry, models.FedCommentLogEntry.comment_id == models.Comment.id).where(models.FedCommentLogEntry.utc_datetime >= modified_since),
+        db.select(models.File.object_id).where(models.File.utc_datetime >= modified_since),
+        db.select(models.FileLogEntry.object_id).where(models.FileLogEntry.utc_datetime >= modified_since),
+        db.select(models.FedFileLogEntry.object_id).where(models.FedFileLogEntry.utc_datetime >= modified_since),
+        db.select(models.ObjectLocationAssignment.object_id).where(models.ObjectLocationAssignment.last_modified >= modified_since),
+    )
+
+
+def get_shares_for_component(
+        component_id: int,
+        *,
+        after_object_id: typing.Optional[int] = None,
+        limit: typing.Optional[int] = None
+) -> typing.List[ObjectShare]:
     """
     Returns a list of all objects shared with a component.
 
-    :param: the component's ID
-    :return: the list of shares
+    :param component_id: the component's ID
+    :param after_object_id: only return shares of objects with a greater ID, or None
+    :param limit: the maximum number of shares to return, or None
+    :return: the list of shares, ordered by object ID
     """
-    shares = models.ObjectShare.query.filter_by(component_id=component_id).all()
+    query = models.ObjectShare.query.filter_by(component_id=component_id)
+    if after_object_id is not None:
+        query = query.filter(models.ObjectShare.object_id > after_object_id)
+    query = query.order_by(models.ObjectShare.object_id)
+    if limit is not None:
+        query = query.limit(limit)
+    shares = query.all()
     if len(shares) == 0:
         check_component_exists(component_id)
     return [
@@ -68,6 +100,37 @@ def get_shares_for_component(component_id: int) -> typing.List[ObjectShare]:
     ]
 
 
+def get_modified_shared_object_ids(
+        component_id: int,
+        object_ids: typing.Collection[int],
+        modified_since: datetime.datetime
+) -> typing.Set[int]:
+    """
+    Returns the IDs of objects shared with a component that were modified since a given time.
+
+    A shared object counts as modified if the share itself, the object's
+    current version, its comments, files or location assignments, or its
+    policy have changed since the given time.
+
+    :param component_id: the component's ID
+    :param object_ids: the IDs of the objects to check
+    :param modified_since: the time to check for modifications since
+    :return: the IDs of the modified objects
+    """
+    if not object_ids:
+        return set()
+    return set(db.session.execute(
+        db.select(models.ObjectShare.object_id).where(
+            models.ObjectShare.component_id == component_id,
+            models.ObjectShare.object_id.in_(object_ids),
+            db.or_(
+                models.ObjectShare.utc_datetime >= modified_since,
+                models.ObjectShare.object_id.in_(_get_object_ids_modified_since(modified_since))
+            )
+        )
+    ).scalars().all())
+
+
 def get_shares_for_object(object_id: int) -> typing.List[ObjectShare]:
     shares = models.ObjectShare.query.filter_by(object_id=object_id).all()
     if len(shares) == 0:
@@ -8,8 +8,12 @@ a more unified vocabulary without strictly enforcing a whitelist of tags.
 """
 
 
+import collections
 import dataclasses
 import typing
+
+from sqlalchemy.dialects import postgresql
+
 from .. import db
 from ..models import tags, objects
 
@@ -82,5 +86,30 @@ def update_object_tag_usage(object: objects.Object, new_subversion: bool = False
     db.session.commit()
 
 
+def add_tag_usage_for_new_objects(new_objects: typing.Sequence[objects.Object]) -> None:
+    """
+    Count the tags of newly created objects using a single upsert statement.
+
+    The changes are not committed, so that the tag usage can be updated in
+    the same transaction that created the objects.
+
+    :param new_objects: the newly created objects
+    """
+    tag_uses: typing.Counter[str] = collections.Counter()
+    for object in new_objects:
+        tag_uses.update(set(get_object_tags(object)))
+    if not tag_uses:
+        return
+    insert_statement = postgresql.insert(tags.Tag).values([
+        {'name': tag_name, 'uses': uses}
+        # sorting the tags avoids deadlocks between concurrent upserts
+        for tag_name, uses in sorted(tag_uses.items())
+    ])
+    db.session.execute(insert_statement.on_conflict_do_update(
+        index_elements=[tags.Tag.name],
+        set_={'uses': tags.Tag.uses + insert_statement.excluded.uses}
+    ))
+
+
 def get_tags() -> typing.Sequence[Tag]:
     return [Tag.from_database(tag) for tag in tags.Tag.query.order_by(tags.Tag.uses).all()]
@@ -105,6 +105,30 @@ def get_magnitude_in_base_units(
         raise errors.InvalidUnitsError()
 
 
+@functools.cache
+def get_base_units_conversion_factor(
+        units: str
+) -> typing.Optional[decimal.Decimal]:
+    """
+    Get the factor for converting a magnitude in given units to base units.
+
+    Multiplying a magnitude with this factor gives the same result as
+    get_magnitude_in_base_units, as pint converts multiplicative units
+    using a single multiplication.
+
+    :param units: the units to get the conversion factor for
+    :return: the conversion factor, or None for non-multiplicative units like degC
+    :raise errors.InvalidUnitsError: if the units cannot be understood
+    """
+    try:
+        quantity = ureg.Quantity(decimal.Decimal(1), ureg.Unit(units))
+        if not quantity._is_multiplicative:
+            return None
+        return quantity.to_base_units().magnitude
+    except Exception:
+        raise errors.InvalidUnitsError()
+
+
 @functools.cache
 def get_un_cefact_code_for_unit(
         unit: str
@@ -431,6 +431,21 @@ def get_users(
     ]
 
 
+def get_users_by_ids(user_ids: typing.Collection[int]) -> typing.Dict[int, User]:
+    """
+    Return the users with the given IDs using a single query.
+
+    :param user_ids: the IDs of the users
+    :return: a dict mapping the IDs of existing users to the users
+    """
+    if not user_ids:
+        return {}
+    return {
+        user.id: User.from_database(user)
+        for user in users.User.query.filter(users.User.id.in_(list(user_ids))).all()
+    }
+
+
 def get_users_by_email(email: str) -> typing.List[User]:
     return [
         User.from_database(user)
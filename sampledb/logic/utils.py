@@ -2,6 +2,7 @@
 """
 
 """
+import contextlib
 import datetime
 import functools
 import hashlib
@@ -11,13 +12,14 @@ import sys
 
 import flask
 import pytz
+import sqlalchemy.orm
 from flask_login import current_user
 
 from . import errors
 from .. import db
 from .background_tasks.send_mail import post_send_mail_task
 from .security_tokens import generate_token
-from ..models import Authentication, AuthenticationType, User, Tag, BackgroundTaskStatus, BackgroundTask, UserType
+from ..models import Authentication, AuthenticationType, User, Tag, BackgroundTaskStatus, BackgroundTask, UserType, Objects
 from ..utils import ansi_color
 
 
@@ -391,6 +393,40 @@ def clear_cache_functions() -> None:
         cache_function.cache_clear()  # type: ignore
 
 
+@contextlib.contextmanager
+def single_transaction() -> typing.Iterator[None]:
+    """
+    Perform all database changes made in this context in a single transaction.
+
+    Functions called in this context may commit the session, e.g. after each
+    entity they create, but these commits only release savepoints. All
+    changes, including those to objects, are committed together when the
+    context is left, or rolled back together if an exception is raised.
+
+    Changes made to the session before entering the context are committed.
+    """
+    db.session.commit()
+    previous_session = db.session()
+    with db.engine.connect() as connection:
+        transaction = connection.begin()
+        # a plain SQLAlchemy session is used, as the Flask-SQLAlchemy session would select the engine instead of the bound connection
+        session = sqlalchemy.orm.Session(bind=connection, join_transaction_mode='create_savepoint', future=True)
+        db.session.registry.set(session)  # type: ignore[arg-type]
+        try:
+            with Objects.use_connection(connection):
+                yield
+            session.commit()
+            transaction.commit()
+        except BaseException:
+            transaction.rollback()
+            # cached results may refer to changes that were rolled back
+            clear_cache_functions()
+            raise
+        finally:
+            session.close()
+            db.session.registry.set(previous_session)
+
+
 def get_data_and_schema_by_id_path(
         data: typing.Optional[typing.Union[typing.List[typing.Any], typing.Dict[str, typing.Any]]],
         schema: typing.Optional[typing.Dict[str, typing.Any]],
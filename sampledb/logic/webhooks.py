@@ -3,18 +3,26 @@
 Logic module for webhooks
 
 Webhooks allow users to subscribe to the creation of new object log entries.
+
+Messages are sent using a shared HTTP session, so that connections to each
+target host are kept alive and reused. Webhooks with batch delivery enabled
+queue their events, so that events occurring within a short time window are
+sent in a single message.
 """
 
+import concurrent.futures
 import dataclasses
 import datetime
 import hashlib
 import hmac
 import json
 import secrets
+import threading
 import typing
 
 import flask
 import requests
+import requests.adapters
 
 from . import errors
 from .components import validate_address
@@ -24,6 +32,31 @@ from ..models import webhooks as whmodel
 from ..models import Permissions
 
 WEBHOOK_TIMEOUT = 10
+# maximum number of messages sent at the same time by send_data_to_webhooks
+WEBHOOK_MAX_CONCURRENT_DELIVERIES = 8
+# maximum number of target hosts for which idle connections are kept alive
+WEBHOOK_MAX_POOLED_HOSTS = 32
+# time (in seconds) for which events are collected before they are sent to a webhook with batch delivery
+WEBHOOK_BATCH_WINDOW = 5
+WEBHOOK_MAX_BATCH_SIZE = 100
+
+_http_session: typing.Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def _get_http_session() -> requests.Session:
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            # the adapter keeps a pool of connections for each target host
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=WEBHOOK_MAX_POOLED_HOSTS,
+                pool_maxsize=WEBHOOK_MAX_CONCURRENT_DELIVERIES
+            )
+            _http_session = requests.Session()
+            _http_session.mount('https://', adapter)
+            _http_session.mount('http://', adapter)
+        return _http_session
 
 
 @dataclasses.dataclass(frozen=True)
@@ -38,6 +71,7 @@ class Webhook:
     secret: str
     name: typing.Optional[str]
     last_contact: typing.Optional[datetime.datetime]
+    batch_delivery: bool
 
     @classmethod
     def from_database(cls, webhook: whmodel.Webhook) -> 'Webhook':
@@ -48,23 +82,28 @@ class Webhook:
             target_url=webhook.target_url,
             name=webhook.name,
             secret=webhook.secret,
-            last_contact=webhook.last_contact
+            last_contact=webhook.last_contact,
+            batch_delivery=webhook.batch_delivery
         )
 
     def send_data(self, data: typing.Dict[str, typing.Any]) -> None:
-        data_str = json.dumps(data)
+        self._post(json.dumps(data))
+        update_webhook(self.id, datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None))
+
+    def _post(self, data_str: str, num_events: typing.Optional[int] = None) -> None:
         headers = {
             'X-SampleDB-Event-Type': str(self.type.name),
             'X-Sampledb-Signature': self.get_signature(data_str)
         }
+        if num_events is not None:
+            headers['X-Sampledb-Event-Count'] = str(num_events)
         try:
-            requests.post(
+            _get_http_session().post(
                 self.target_url,
                 data=data_str,
                 timeout=WEBHOOK_TIMEOUT,
                 headers=headers
             )
-            update_webhook(self.id, datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None))
         except requests.RequestException:
             raise errors.WebhookConnectionException()
 
@@ -112,6 +151,113 @@ def get_webhooks(type: typing.Optional[whmodel.WebhookType] = None, user_id: typ
     ]
 
 
+def send_data_to_webhooks(
+        deliveries: typing.Sequence[typing.Tuple[Webhook, typing.Dict[str, typing.Any]]]
+) -> typing.List[typing.Tuple[Webhook, typing.Dict[str, typing.Any]]]:
+    """
+    Send data to several webhooks concurrently.
+
+    :param deliveries: pairs of webhooks and the data to send to them
+    :return: the pairs of webhooks and data that could not be sent
+    """
+    if not deliveries:
+        return []
+    failed_deliveries = []
+    num_workers = min(len(deliveries), WEBHOOK_MAX_CONCURRENT_DELIVERIES)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(webhook._post, json.dumps(data))
+            for webhook, data in deliveries
+        ]
+        for (webhook, data), future in zip(deliveries, futures):
+            try:
+                future.result()
+            except errors.WebhookConnectionException:
+                failed_deliveries.append((webhook, data))
+    contacted_webhook_ids = {
+        webhook.id
+        for webhook, _ in deliveries
+    } - {
+        webhook.id
+        for webhook, _ in failed_deliveries
+    }
+    if contacted_webhook_ids:
+        db.session.execute(
+            db.update(
+                whmodel.Webhook
+            ).where(
+                whmodel.Webhook.id.in_(contacted_webhook_ids)
+            ).values(
+                last_contact=datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+            )
+        )
+        db.session.commit()
+    return failed_deliveries
+
+
+def add_webhook_event(webhook_id: int, data: typing.Dict[str, typing.Any]) -> None:
+    """
+    Queue an event to be sent to a webhook with batch delivery.
+
+    :param webhook_id: the ID of an existing webhook
+    :param data: the event data
+    """
+    db.session.add(whmodel.WebhookEvent(
+        webhook_id=webhook_id,
+        data=data,
+        utc_datetime=datetime.datetime.now(tz=datetime.timezone.utc)
+    ))
+    db.session.commit()
+
+
+def send_webhook_events(webhook_id: int, max_num_events: int = WEBHOOK_MAX_BATCH_SIZE) -> int:
+    """
+    Send queued events to a webhook in a single message and remove them
+    from the queue.
+
+    Events that are being sent by another process are skipped.
+
+    :param webhook_id: the ID of an existing webhook
+    :param max_num_events: the maximum number of events to send
+    :return: the number of events that were sent
+    :raise WebhookDoesNotExistError: If a Webhook with the given ID does not exist
+    :raise WebhookConnectionException: If the events could not be sent
+    """
+    webhook = get_webhook(webhook_id)
+    # the events stay locked until they have been sent and removed
+    events = db.session.execute(
+        db.select(
+            whmodel.WebhookEvent
+        ).where(
+            whmodel.WebhookEvent.webhook_id == webhook_id
+        ).order_by(
+            whmodel.WebhookEvent.id
+        ).limit(
+            max_num_events
+        ).with_for_update(
+            skip_locked=True
+        )
+    ).scalars().all()
+    if not events:
+        db.session.rollback()
+        return 0
+    try:
+        webhook._post(json.dumps([event.data for event in events]), num_events=len(events))
+    except errors.WebhookConnectionException:
+        db.session.rollback()
+        raise
+    db.session.execute(
+        db.delete(
+            whmodel.WebhookEvent
+        ).where(
+            whmodel.WebhookEvent.id.in_([event.id for event in events])
+        )
+    )
+    db.session.commit()
+    update_webhook(webhook_id, datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None))
+    return len(events)
+
+
 def update_webhook(webhook_id: int, last_contact: datetime.datetime) -> None:
     """
     Updates a Webhook.
@@ -143,7 +289,8 @@ def create_webhook(
     user_id: int,
     target_url: str,
     secret: typing.Optional[str] = None,
-    name: typing.Optional[str] = None
+    name: typing.Optional[str] = None,
+    batch_delivery: bool = False
 ) -> Webhook:
     """
     Creates/registers a new webhook.
@@ -153,6 +300,7 @@ def create_webhook(
     :param target_url: The Webhook's target URL
     :param name: An optional name for the Webhook
     :param secret: An optional secret for the Webhook
+    :param batch_delivery: Whether events should be collected and sent in batches
     :return: The created webhook
     :raise WebhookAlreadyExistsError: If a WebHook of same type with the same target defined by the same user already exists
     """
@@ -168,7 +316,8 @@ def create_webhook(
         target_url=target_url,
         secret=secret,
         name=name,
-        last_contact=None
+        last_contact=None,
+        batch_delivery=batch_delivery
     )
     db.session.add(webhook)
     db.session.commit()
@@ -180,7 +329,7 @@ def get_webhooks_for_object(object_id: int, webhook_type: whmodel.WebhookType, m
         SELECT DISTINCT user_id
         FROM (
             SELECT DISTINCT user_id
-            FROM user_object_permissions_by_all
+            FROM effective_object_permissions
             WHERE (object_id = :object_id) AND (requires_anonymous_users IS FALSE OR :enable_anonymous_users IS TRUE) AND (requires_instruments IS FALSE OR :enable_instruments IS TRUE) AND (permissions_int >= :min_permissions_int)
             UNION
             SELECT id as user_id
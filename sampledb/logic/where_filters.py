@@ -10,7 +10,7 @@ precision. These filters use operators that include a range of EPSILON of the
 left operand's magnitude in base units.
 """
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import operator
 import json
 import typing
@@ -47,19 +47,65 @@ def float_operator_greater_than_equals(left: typing.Any, right: typing.Any) -> t
     return left * (1 + db.func.sign(left) * EPSILON) >= right
 
 
-def quantity_binary_operator(db_obj: typing.Any, other: datatypes.Quantity, operator: typing.Callable[[typing.Any, typing.Any], typing.Any]) -> typing.Any:
+def get_quantity_magnitude_in_base_units(db_obj: typing.Any) -> typing.Any:
+    """
+    Return the magnitude in base units of a quantity as float expression.
+
+    This expression is also used for indexed properties, so searches for
+    quantities can use these indexes.
+    """
+    return db_obj['magnitude_in_base_units'].astext.cast(db.Float)
+
+
+def get_datetime_utc_datetime_text(db_obj: typing.Any) -> typing.Any:
+    """
+    Return the UTC datetime of a datetime as text expression.
+
+    As datetimes are stored as 'YYYY-MM-DD HH:MM:SS', they can be compared as
+    text using the "C" collation. This expression is also used for indexed
+    properties, so searches for datetimes can use these indexes.
+    """
+    return db_obj['utc_datetime'].astext.collate('C')
+
+
+def _quantity_magnitude_range_filter(db_obj: typing.Any, min_magnitude_in_base_units: typing.Optional[float], max_magnitude_in_base_units: typing.Optional[float]) -> typing.Any:
+    # the EPSILON-based operators cannot use an index, so they are combined
+    # with an indexable range that includes all values they might match
+    magnitude_in_base_units = get_quantity_magnitude_in_base_units(db_obj)
+    filters = []
+    if min_magnitude_in_base_units is not None:
+        filters.append(magnitude_in_base_units >= min_magnitude_in_base_units - 2 * abs(min_magnitude_in_base_units) * EPSILON)
+    if max_magnitude_in_base_units is not None:
+        filters.append(magnitude_in_base_units <= max_magnitude_in_base_units + 2 * abs(max_magnitude_in_base_units) * EPSILON)
+    return db.and_(*filters)
+
+
+def _datetime_range_filter(db_obj: typing.Any, min_date: typing.Optional[date], max_date: typing.Optional[date]) -> typing.Any:
+    # the date of a datetime depends on the user's timezone, so the indexable
+    # range is widened by a day in both directions to cover all timezones
+    utc_datetime_text = get_datetime_utc_datetime_text(db_obj)
+    filters = []
+    if min_date is not None:
+        filters.append(utc_datetime_text >= (min_date - timedelta(days=1)).isoformat())
+    if max_date is not None:
+        filters.append(utc_datetime_text < (max_date + timedelta(days=2)).isoformat())
+    return db.and_(*filters)
+
+
+def quantity_binary_operator(db_obj: typing.Any, other: datatypes.Quantity, operator: typing.Callable[[typing.Any, typing.Any], typing.Any], range_filter: typing.Any = True) -> typing.Any:
     return db.and_(
         db_obj['_type'].astext == 'quantity',
         db.or_(
             db_obj['dimensionality'].astext == str(other.dimensionality),
             db_obj['dimensionality'].astext == get_old_dimensionality(other.units),
         ),
-        operator(db_obj['magnitude_in_base_units'].astext.cast(db.Float), other.magnitude_in_base_units)
+        range_filter,
+        operator(get_quantity_magnitude_in_base_units(db_obj), other.magnitude_in_base_units)
     )
 
 
 def quantity_equals(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, float_operator_equals)
+    return quantity_binary_operator(db_obj, other, float_operator_equals, _quantity_magnitude_range_filter(db_obj, other.magnitude_in_base_units, other.magnitude_in_base_units))
 
 
 def quantity_less_than(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
@@ -67,7 +113,7 @@ def quantity_less_than(db_obj: typing.Any, other: datatypes.Quantity) -> typing.
 
 
 def quantity_less_than_equals(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, float_operator_less_than_equals)
+    return quantity_binary_operator(db_obj, other, float_operator_less_than_equals, _quantity_magnitude_range_filter(db_obj, None, other.magnitude_in_base_units))
 
 
 def quantity_greater_than(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
@@ -75,12 +121,13 @@ def quantity_greater_than(db_obj: typing.Any, other: datatypes.Quantity) -> typi
 
 
 def quantity_greater_than_equals(db_obj: typing.Any, other: datatypes.Quantity) -> typing.Any:
-    return quantity_binary_operator(db_obj, other, float_operator_greater_than_equals)
+    return quantity_binary_operator(db_obj, other, float_operator_greater_than_equals, _quantity_magnitude_range_filter(db_obj, other.magnitude_in_base_units, None))
 
 
 def quantity_between(db_obj: typing.Any, left: datatypes.Quantity, right: datatypes.Quantity, including: bool = True) -> typing.Any:
     if left.dimensionality != right.dimensionality:
         return False
+    magnitude_in_base_units = get_quantity_magnitude_in_base_units(db_obj)
     if including:
         return db.and_(
             db_obj['_type'].astext == 'quantity',
@@ -88,8 +135,9 @@ def quantity_between(db_obj: typing.Any, left: datatypes.Quantity, right: dataty
                 db_obj['dimensionality'].astext == str(left.dimensionality),
                 db_obj['dimensionality'].astext == get_old_dimensionality(left.units),
             ),
-            db_obj['magnitude_in_base_units'].astext.cast(db.Float) * (1 + db.func.sign(db_obj['magnitude_in_base_units'].astext.cast(db.Float)) * EPSILON) >= left.magnitude_in_base_units,
-            db_obj['magnitude_in_base_units'].astext.cast(db.Float) * (1 - db.func.sign(db_obj['magnitude_in_base_units'].astext.cast(db.Float)) * EPSILON) <= right.magnitude_in_base_units
+            _quantity_magnitude_range_filter(db_obj, left.magnitude_in_base_units, right.magnitude_in_base_units),
+            magnitude_in_base_units * (1 + db.func.sign(magnitude_in_base_units) * EPSILON) >= left.magnitude_in_base_units,
+            magnitude_in_base_units * (1 - db.func.sign(magnitude_in_base_units) * EPSILON) <= right.magnitude_in_base_units
         )
     else:
         return db.and_(
@@ -98,12 +146,12 @@ def quantity_between(db_obj: typing.Any, left: datatypes.Quantity, right: dataty
                 db_obj['dimensionality'].astext == str(left.dimensionality),
                 db_obj['dimensionality'].astext == get_old_dimensionality(left.units),
             ),
-            db_obj['magnitude_in_base_units'].astext.cast(db.Float) > left.magnitude_in_base_units,
-            db_obj['magnitude_in_base_units'].astext.cast(db.Float) < right.magnitude_in_base_units
+            magnitude_in_base_units > left.magnitude_in_base_units,
+            magnitude_in_base_units < right.magnitude_in_base_units
         )
 
 
-def datetime_binary_operator(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime], operator: typing.Callable[[typing.Any, date], typing.Any]) -> typing.Any:
+def datetime_binary_operator(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime], operator: typing.Callable[[typing.Any, date], typing.Any], is_min_date: bool = False, is_max_date: bool = False) -> typing.Any:
     if isinstance(other, datatypes.DateTime):
         other = other.utc_datetime
     other_date = other.date()
@@ -120,28 +168,29 @@ def datetime_binary_operator(db_obj: typing.Any, other: typing.Union[datatypes.D
     locale_date = db.func.date_trunc('day', local_timestamp)
     return db.and_(
         db_obj['_type'].astext == 'datetime',
+        _datetime_range_filter(db_obj, other_date if is_min_date else None, other_date if is_max_date else None),
         operator(locale_date, other_date)
     )
 
 
 def datetime_equals(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.eq)
+    return datetime_binary_operator(db_obj, other, operator.eq, is_min_date=True, is_max_date=True)
 
 
 def datetime_less_than(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.lt)
+    return datetime_binary_operator(db_obj, other, operator.lt, is_max_date=True)
 
 
 def datetime_less_than_equals(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.le)
+    return datetime_binary_operator(db_obj, other, operator.le, is_max_date=True)
 
 
 def datetime_greater_than(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.gt)
+    return datetime_binary_operator(db_obj, other, operator.gt, is_min_date=True)
 
 
 def datetime_greater_than_equals(db_obj: typing.Any, other: typing.Union[datatypes.DateTime, datetime]) -> typing.Any:
-    return datetime_binary_operator(db_obj, other, operator.ge)
+    return datetime_binary_operator(db_obj, other, operator.ge, is_min_date=True)
 
 
 def datetime_between(db_obj: typing.Any, left: typing.Union[datatypes.DateTime, datetime], right: typing.Union[datatypes.DateTime, datetime], including: bool = True) -> typing.Any:
@@ -154,12 +203,14 @@ def datetime_between(db_obj: typing.Any, left: typing.Union[datatypes.DateTime,
     if including:
         return db.and_(
             db_obj['_type'].astext == 'datetime',
+            _datetime_range_filter(db_obj, left_date, right_date),
             db.func.to_timestamp(db_obj['utc_datetime'].astext, 'YYYY-MM-DD') >= left_date,
             db.func.to_timestamp(db_obj['utc_datetime'].astext, 'YYYY-MM-DD') <= right_date,
         )
     else:
         return db.and_(
             db_obj['_type'].astext == 'datetime',
+            _datetime_range_filter(db_obj, left_date, right_date),
             db.func.to_timestamp(db_obj['utc_datetime'].astext, 'YYYY-MM-DD') > left_date,
             db.func.to_timestamp(db_obj['utc_datetime'].astext, 'YYYY-MM-DD') < right_date,
         )
@@ -13,6 +13,7 @@ from . import favorites
 from . import files
 from . import file_log
 from . import groups
+from . import indexed_properties
 from . import group_categories
 from . import info_pages
 from . import instruments
@@ -54,6 +55,7 @@ from .files import File
 from .file_log import FileLogEntry, FileLogEntryType
 from .groups import Group
 from .group_categories import GroupCategory
+from .indexed_properties import IndexedProperty, IndexedPropertyType
 from .info_pages import InfoPage, InfoPageAcknowledgement
 from .instruments import Instrument
 from .instrument_log_entries import InstrumentLogEntry
@@ -81,7 +83,7 @@ from .topics import Topic
 from .temporary_files import TemporaryFile
 from .users import User, UserType, UserFederationAlias, FederatedIdentity
 from .user_log import UserLogEntry, UserLogEntryType
-from .webhooks import Webhook, WebhookType
+from .webhooks import Webhook, WebhookType, WebhookEvent
 
 
 __all__ = [
@@ -96,6 +98,7 @@ __all__ = [
     'files',
     'file_log',
     'groups',
+    'indexed_properties',
     'group_categories',
     'info_pages',
     'instruments',
@@ -146,6 +149,8 @@ __all__ = [
     'Group',
     'GroupCategory',
     'HTTPMethod',
+    'IndexedProperty',
+    'IndexedPropertyType',
     'InfoPage',
     'InfoPageAcknowledgement',
     'Instrument',
@@ -234,5 +239,6 @@ __all__ = [
     'FedObjectLocationAssignmentLogEntryType',
     'Webhook',
     'WebhookType',
+    'WebhookEvent',
     'KeyPair'
 ]
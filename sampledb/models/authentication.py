@@ -38,6 +38,7 @@ class Authentication(Model):
     login: Mapped[typing.Dict[str, typing.Any]] = db.Column(postgresql.JSONB, nullable=False)
     type: Mapped[AuthenticationType] = db.Column(db.Enum(AuthenticationType), nullable=False)
     confirmed: Mapped[bool] = db.Column(db.Boolean, default=False, nullable=False)
+    expiration_utc_datetime: Mapped[typing.Optional[datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True, index=True)
     user: Mapped['User'] = relationship('User', back_populates="authentication_methods")
 
     if typing.TYPE_CHECKING:
@@ -48,13 +49,15 @@ class Authentication(Model):
             login: typing.Dict[str, typing.Any],
             authentication_type: AuthenticationType,
             confirmed: bool,
-            user_id: int
+            user_id: int,
+            expiration_utc_datetime: typing.Optional[datetime] = None
     ) -> None:
         super().__init__(
             user_id=user_id,
             login=login,
             type=authentication_type,
-            confirmed=confirmed
+            confirmed=confirmed,
+            expiration_utc_datetime=expiration_utc_datetime
         )
 
     def __repr__(self) -> str:
@@ -32,6 +32,13 @@ class BackgroundTask(Model):
     status: Mapped[BackgroundTaskStatus] = db.Column(db.Enum(BackgroundTaskStatus), nullable=False)
     result: Mapped[typing.Optional[typing.Dict[str, typing.Any]]] = db.Column(db.JSON, nullable=True)
     expiration_date: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    priority: Mapped[int] = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))
+    attempts: Mapped[int] = db.Column(db.Integer, nullable=False, default=0, server_default=db.text('0'))
+    max_attempts: Mapped[int] = db.Column(db.Integer, nullable=False, default=1, server_default=db.text('1'))
+    not_before: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    utc_datetime_posted: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    utc_datetime_claimed: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
+    utc_datetime_heartbeat: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.TIMESTAMP(timezone=True), nullable=True)
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["BackgroundTask"]]
@@ -44,4 +51,4 @@ class BackgroundTask(Model):
         db.session.commit()
 
     def __repr__(self) -> str:
-        return f'<{type(self).__name__}(id={self.id}, type={self.type}, auto_delete={self.auto_delete}, data={self.data}, status={self.status})>'
+        return f'<{type(self).__name__}(id={self.id}, type={self.type}, auto_delete={self.auto_delete}, data={self.data}, status={self.status}, priority={self.priority}, attempts={self.attempts})>'
@@ -43,6 +43,9 @@ class File(Model):
     component: Mapped[typing.Optional['Component']] = relationship('Component')
     preview_image_binary_data: Mapped[typing.Optional[bytes]] = db.deferred(db.Column(db.LargeBinary, nullable=True))
     preview_image_mime_type: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    content_storage: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    content_key: Mapped[typing.Optional[str]] = db.Column(db.String, nullable=True)
+    is_hidden: Mapped[bool] = db.Column(db.Boolean, nullable=False, default=False)
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["File"]]
@@ -59,6 +62,8 @@ class File(Model):
             component_id: typing.Optional[int] = None,
             preview_image_binary_data: typing.Optional[bytes] = None,
             preview_image_mime_type: typing.Optional[str] = None,
+            content_storage: typing.Optional[str] = None,
+            content_key: typing.Optional[str] = None,
     ) -> None:
         super().__init__(
             id=file_id,
@@ -71,6 +76,8 @@ class File(Model):
             component_id=component_id,
             preview_image_binary_data=preview_image_binary_data,
             preview_image_mime_type=preview_image_mime_type,
+            content_storage=content_storage,
+            content_key=content_key,
         )
 
     def __repr__(self) -> str:
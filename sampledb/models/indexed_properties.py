@@ -0,0 +1,48 @@
+# coding: utf-8
+"""
+
+"""
+
+import enum
+import typing
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Mapped
+
+from .. import db
+from .utils import Model
+
+
+class IndexedPropertyType(enum.Enum):
+    QUANTITY = 1
+    DATETIME = 2
+
+
+class IndexedProperty(Model):
+    __tablename__ = 'indexed_properties'
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    action_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('actions.id'), nullable=False)
+    property_path: Mapped[typing.List[typing.Union[str, int]]] = db.Column(postgresql.JSONB, nullable=False)
+    type: Mapped[IndexedPropertyType] = db.Column(db.Enum(IndexedPropertyType), nullable=False)
+    __table_args__ = (
+        db.UniqueConstraint('action_id', 'property_path', name='indexed_properties_action_id_property_path_key'),
+    )
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["IndexedProperty"]]
+
+    def __init__(
+            self,
+            action_id: int,
+            property_path: typing.List[typing.Union[str, int]],
+            type: IndexedPropertyType
+    ) -> None:
+        super().__init__(
+            action_id=action_id,
+            property_path=property_path,
+            type=type
+        )
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(id={self.id})>'
@@ -182,6 +182,7 @@ class ObjectLocationAssignment(Model):
     component_id: Mapped[typing.Optional[int]] = db.Column(db.Integer, db.ForeignKey('components.id'), nullable=True)
     component: Mapped[typing.Optional['Component']] = relationship('Component')
     declined: Mapped[bool] = db.Column(db.Boolean, nullable=False, default=False)
+    last_modified: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["ObjectLocationAssignment"]]
@@ -197,7 +198,8 @@ class ObjectLocationAssignment(Model):
             confirmed: bool = False,
             declined: bool = False,
             fed_id: typing.Optional[int] = None,
-            component_id: typing.Optional[int] = None
+            component_id: typing.Optional[int] = None,
+            last_modified: typing.Optional[datetime.datetime] = None
     ) -> None:
         super().__init__(
             object_id=object_id,
@@ -209,7 +211,8 @@ class ObjectLocationAssignment(Model):
             confirmed=confirmed,
             fed_id=fed_id,
             component_id=component_id,
-            declined=declined
+            declined=declined,
+            last_modified=last_modified if last_modified is not None else datetime.datetime.now(datetime.timezone.utc)
         )
 
     def __repr__(self) -> str:
@@ -0,0 +1,31 @@
+# coding: utf-8
+"""
+Add indexed expiration_utc_datetime column to authentications table and fill
+it for existing API access tokens.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('authentications', 'expiration_utc_datetime'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE authentications
+            ADD expiration_utc_datetime TIMESTAMP WITH TIME ZONE NULL
+    """))
+    db.session.execute(db.text("""
+        UPDATE authentications
+        SET expiration_utc_datetime = (login ->> 'expiration_utc_datetime')::TIMESTAMP AT TIME ZONE 'UTC'
+        WHERE type = 'API_ACCESS_TOKEN' AND login ->> 'expiration_utc_datetime' IS NOT NULL
+    """))
+    db.session.execute(db.text("""
+        CREATE INDEX ix_authentications_expiration_utc_datetime
+            ON authentications (expiration_utc_datetime)
+    """))
+    return True
@@ -0,0 +1,30 @@
+"""
+Add utc_datetime_heartbeat column to background_tasks table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('background_tasks', 'utc_datetime_heartbeat'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text(
+        """
+        ALTER TABLE background_tasks
+        ADD utc_datetime_heartbeat TIMESTAMP WITH TIME ZONE NULL
+        """
+    ))
+    # tasks claimed before this migration have not been renewed since they were claimed
+    db.session.execute(db.text(
+        """
+        UPDATE background_tasks
+        SET utc_datetime_heartbeat = COALESCE(utc_datetime_claimed, NOW())
+        WHERE status = 'CLAIMED'
+        """
+    ))
+    return True
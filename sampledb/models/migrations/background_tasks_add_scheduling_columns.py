@@ -0,0 +1,28 @@
+"""
+Add the priority, attempts, max_attempts, not_before, utc_datetime_posted and utc_datetime_claimed columns to the
+background_tasks table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('background_tasks', 'priority'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text(
+        """
+        ALTER TABLE background_tasks
+        ADD priority INTEGER NOT NULL DEFAULT 0,
+        ADD attempts INTEGER NOT NULL DEFAULT 0,
+        ADD max_attempts INTEGER NOT NULL DEFAULT 1,
+        ADD not_before TIMESTAMP WITH TIME ZONE NULL,
+        ADD utc_datetime_posted TIMESTAMP WITH TIME ZONE NULL,
+        ADD utc_datetime_claimed TIMESTAMP WITH TIME ZONE NULL
+        """
+    ))
+    return True
@@ -0,0 +1,244 @@
+# coding: utf-8
+"""
+Create the triggers maintaining the effective_object_permissions table and
+fill it with the contents of the user_object_permissions_by_all view.
+
+The triggers are statement-level triggers using transition tables, so that a
+statement changing many rows refreshes each affected object only once.
+
+Changes to the permissions of individual objects hold a shared advisory lock
+and a transaction-level advisory lock per affected object, so that they only
+wait for concurrent transactions refreshing the same objects. Changes that
+may affect the permissions of many objects, like group memberships, hold an
+exclusive advisory lock instead, as the objects they affect can only be
+determined reliably once no other transaction is refreshing permissions.
+"""
+
+import flask_sqlalchemy
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    function_exists = db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM pg_proc
+        WHERE proname = 'refresh_effective_object_permissions'
+    """)).scalar()
+    if function_exists:
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION refresh_effective_object_permissions(refreshed_object_ids integer[])
+        RETURNS void AS $$
+        BEGIN
+            DELETE FROM effective_object_permissions
+            WHERE object_id = ANY(refreshed_object_ids);
+            INSERT INTO effective_object_permissions
+            (user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments)
+            SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+            FROM user_object_permissions_by_all
+            WHERE object_id = ANY(refreshed_object_ids);
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION refresh_effective_object_permissions_for_objects(refreshed_object_ids integer[])
+        RETURNS void AS $$
+        BEGIN
+            IF cardinality(refreshed_object_ids) = 0 THEN
+                RETURN;
+            END IF;
+            PERFORM pg_advisory_xact_lock_shared(hashtext('effective_object_permissions'));
+            -- lock the objects in a fixed order to avoid deadlocks between concurrent statements
+            PERFORM pg_advisory_xact_lock(hashtext('effective_object_permissions'), refreshed_objects.object_id)
+            FROM (
+                SELECT DISTINCT object_id
+                FROM unnest(refreshed_object_ids) AS object_id
+                ORDER BY object_id
+            ) AS refreshed_objects;
+            PERFORM refresh_effective_object_permissions(refreshed_object_ids);
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION effective_object_permissions_object_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                PERFORM refresh_effective_object_permissions_for_objects(ARRAY(
+                    SELECT object_id FROM new_rows
+                ));
+            ELSIF TG_OP = 'DELETE' THEN
+                PERFORM refresh_effective_object_permissions_for_objects(ARRAY(
+                    SELECT object_id FROM old_rows
+                ));
+            ELSE
+                PERFORM refresh_effective_object_permissions_for_objects(ARRAY(
+                    SELECT object_id FROM old_rows
+                UNION
+                    SELECT object_id FROM new_rows
+                ));
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION effective_object_permissions_object_action_trigger()
+        RETURNS trigger AS $$
+        BEGIN
+            -- objects_current is updated for every new object version, but only a changed action affects permissions
+            PERFORM refresh_effective_object_permissions_for_objects(ARRAY(
+                SELECT new_rows.object_id
+                FROM new_rows
+                JOIN old_rows ON old_rows.object_id = new_rows.object_id
+                WHERE old_rows.action_id IS DISTINCT FROM new_rows.action_id
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION effective_object_permissions_group_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            changed_group_ids integer[];
+        BEGIN
+            -- the lock has to be acquired before reading any permission tables
+            PERFORM pg_advisory_xact_lock(hashtext('effective_object_permissions'));
+            IF TG_OP = 'INSERT' THEN
+                changed_group_ids := ARRAY(SELECT group_id FROM new_rows);
+            ELSIF TG_OP = 'DELETE' THEN
+                changed_group_ids := ARRAY(SELECT group_id FROM old_rows);
+            ELSE
+                changed_group_ids := ARRAY(SELECT group_id FROM old_rows UNION SELECT group_id FROM new_rows);
+            END IF;
+            PERFORM refresh_effective_object_permissions(ARRAY(
+                SELECT group_object_permissions.object_id
+                FROM group_object_permissions
+                WHERE group_object_permissions.group_id = ANY(changed_group_ids)
+            UNION
+                SELECT project_object_permissions.object_id
+                FROM group_project_permissions
+                JOIN project_object_permissions ON project_object_permissions.project_id = group_project_permissions.project_id
+                WHERE group_project_permissions.group_id = ANY(changed_group_ids)
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION effective_object_permissions_project_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            changed_project_ids integer[];
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('effective_object_permissions'));
+            IF TG_OP = 'INSERT' THEN
+                changed_project_ids := ARRAY(SELECT project_id FROM new_rows);
+            ELSIF TG_OP = 'DELETE' THEN
+                changed_project_ids := ARRAY(SELECT project_id FROM old_rows);
+            ELSE
+                changed_project_ids := ARRAY(SELECT project_id FROM old_rows UNION SELECT project_id FROM new_rows);
+            END IF;
+            PERFORM refresh_effective_object_permissions(ARRAY(
+                SELECT project_object_permissions.object_id
+                FROM project_object_permissions
+                WHERE project_object_permissions.project_id = ANY(changed_project_ids)
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION effective_object_permissions_instrument_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            changed_instrument_ids integer[];
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext('effective_object_permissions'));
+            IF TG_OP = 'INSERT' THEN
+                changed_instrument_ids := ARRAY(SELECT instrument_id FROM new_rows);
+            ELSIF TG_OP = 'DELETE' THEN
+                changed_instrument_ids := ARRAY(SELECT instrument_id FROM old_rows);
+            ELSE
+                changed_instrument_ids := ARRAY(SELECT instrument_id FROM old_rows UNION SELECT instrument_id FROM new_rows);
+            END IF;
+            PERFORM refresh_effective_object_permissions(ARRAY(
+                SELECT objects_current.object_id
+                FROM objects_current
+                JOIN actions ON actions.id = objects_current.action_id
+                WHERE actions.instrument_id = ANY(changed_instrument_ids)
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(db.text("""
+        CREATE OR REPLACE FUNCTION effective_object_permissions_action_trigger()
+        RETURNS trigger AS $$
+        DECLARE
+            changed_action_ids integer[];
+        BEGIN
+            changed_action_ids := ARRAY(
+                SELECT new_rows.id
+                FROM new_rows
+                JOIN old_rows ON old_rows.id = new_rows.id
+                WHERE old_rows.instrument_id IS DISTINCT FROM new_rows.instrument_id
+            );
+            IF cardinality(changed_action_ids) = 0 THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_advisory_xact_lock(hashtext('effective_object_permissions'));
+            PERFORM refresh_effective_object_permissions(ARRAY(
+                SELECT objects_current.object_id
+                FROM objects_current
+                WHERE objects_current.action_id = ANY(changed_action_ids)
+            ));
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+    triggers = []
+    for table_name in [
+        'user_object_permissions',
+        'group_object_permissions',
+        'project_object_permissions',
+        'all_user_object_permissions',
+        'anonymous_user_object_permissions',
+    ]:
+        triggers.append((table_name, 'effective_object_permissions_object_trigger', ['INSERT', 'UPDATE', 'DELETE']))
+    triggers.extend([
+        ('objects_current', 'effective_object_permissions_object_trigger', ['INSERT']),
+        ('objects_current', 'effective_object_permissions_object_action_trigger', ['UPDATE']),
+        ('user_group_memberships', 'effective_object_permissions_group_trigger', ['INSERT', 'UPDATE', 'DELETE']),
+        ('group_project_permissions', 'effective_object_permissions_project_trigger', ['INSERT', 'UPDATE', 'DELETE']),
+        ('user_project_permissions', 'effective_object_permissions_project_trigger', ['INSERT', 'UPDATE', 'DELETE']),
+        ('association', 'effective_object_permissions_instrument_trigger', ['INSERT', 'UPDATE', 'DELETE']),
+        ('actions', 'effective_object_permissions_action_trigger', ['UPDATE']),
+    ])
+    transition_tables = {
+        'INSERT': 'NEW TABLE AS new_rows',
+        'UPDATE': 'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+        'DELETE': 'OLD TABLE AS old_rows',
+    }
+    for table_name, trigger_function_name, events in triggers:
+        # triggers with transition tables may only handle a single event
+        for event in events:
+            db.session.execute(db.text(f"""
+                CREATE TRIGGER effective_object_permissions_{event.lower()}
+                AFTER {event} ON {table_name}
+                REFERENCING {transition_tables[event]}
+                FOR EACH STATEMENT EXECUTE PROCEDURE {trigger_function_name}()
+            """))
+    db.session.execute(db.text("""
+        DELETE FROM effective_object_permissions
+    """))
+    db.session.execute(db.text("""
+        INSERT INTO effective_object_permissions
+        (user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments)
+        SELECT user_id, object_id, permissions_int, requires_anonymous_users, requires_instruments
+        FROM user_object_permissions_by_all
+    """))
+    return True
@@ -0,0 +1,50 @@
+# coding: utf-8
+"""
+Add trigram-indexed search_cache column to objects_current table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column, table_has_index
+from ..versioned_json_object_tables import get_search_cache
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_index('objects_current', 'ix_objects_current_search_cache_trgm'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        CREATE EXTENSION IF NOT EXISTS pg_trgm
+    """))
+    if not table_has_column('objects_current', 'search_cache'):
+        db.session.execute(db.text("""
+            ALTER TABLE objects_current
+            ADD search_cache TEXT NULL
+        """))
+    previous_object_id = -1
+    while True:
+        rows = db.session.execute(db.text("""
+            SELECT object_id, data
+            FROM objects_current
+            WHERE object_id > :previous_object_id AND search_cache IS NULL
+            ORDER BY object_id
+            LIMIT 1000
+        """), {'previous_object_id': previous_object_id}).fetchall()
+        if not rows:
+            break
+        db.session.execute(db.text("""
+            UPDATE objects_current
+            SET search_cache = :search_cache
+            WHERE object_id = :object_id
+        """), [
+            {'object_id': object_id, 'search_cache': get_search_cache(data)}
+            for object_id, data in rows
+        ])
+        previous_object_id = rows[-1][0]
+    db.session.execute(db.text("""
+        CREATE INDEX ix_objects_current_search_cache_trgm
+            ON objects_current USING GIN (search_cache gin_trgm_ops)
+    """))
+    return True
@@ -0,0 +1,22 @@
+# coding: utf-8
+"""
+Add content_storage and content_key columns to files table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('files', 'content_storage'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE files
+            ADD content_storage VARCHAR NULL,
+            ADD content_key VARCHAR NULL
+    """))
+    return True
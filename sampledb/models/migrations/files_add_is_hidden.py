@@ -0,0 +1,33 @@
+# coding: utf-8
+"""
+Add is_hidden column to files table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('files', 'is_hidden'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE files
+        ADD is_hidden BOOLEAN NOT NULL DEFAULT FALSE
+    """))
+    # a file is hidden if it was hidden after it was last unhidden
+    db.session.execute(db.text("""
+        UPDATE files
+        SET is_hidden = TRUE
+        FROM (
+            SELECT object_id, file_id
+            FROM file_log_entries
+            GROUP BY object_id, file_id
+            HAVING MAX(utc_datetime) FILTER (WHERE type = 'HIDE_FILE') > COALESCE(MAX(utc_datetime) FILTER (WHERE type = 'UNHIDE_FILE'), '-infinity')
+        ) AS hidden_files
+        WHERE files.object_id = hidden_files.object_id AND files.id = hidden_files.file_id
+    """))
+    return True
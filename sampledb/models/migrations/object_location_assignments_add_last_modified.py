@@ -0,0 +1,29 @@
+# coding: utf-8
+"""
+Add last_modified column to object_location_assignments table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('object_location_assignments', 'last_modified'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE object_location_assignments
+            ADD last_modified TIMESTAMP WITH TIME ZONE NULL
+    """))
+    db.session.execute(db.text("""
+        UPDATE object_location_assignments
+        SET last_modified = COALESCE(utc_datetime, NOW())
+    """))
+    db.session.execute(db.text("""
+        ALTER TABLE object_location_assignments
+            ALTER COLUMN last_modified SET NOT NULL
+    """))
+    return True
@@ -0,0 +1,125 @@
+# coding: utf-8
+"""
+Add schema_hash columns to the objects tables and move the schemas of all
+object versions into the objects_schemas table, storing each distinct schema
+only once.
+"""
+
+import json
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+from ..versioned_json_object_tables import get_schema_hash
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('objects_current', 'schema_hash'):
+        return False
+
+    # Perform migration
+    # the constraints require a schema, so they are replaced once the schemas have been moved
+    db.session.execute(db.text("""
+        ALTER TABLE objects_current
+        DROP CONSTRAINT objects_current_not_null_check
+    """))
+    db.session.execute(db.text("""
+        ALTER TABLE objects_previous
+        DROP CONSTRAINT objects_previous_not_null_check,
+        DROP CONSTRAINT objects_previous_diff_check
+    """))
+    for table_name in ['objects_current', 'objects_previous', 'objects_subversions']:
+        # objects_subversions may have been created with the column already
+        if not table_has_column(table_name, 'schema_hash'):
+            db.session.execute(db.text(f"""
+                ALTER TABLE {table_name}
+                ADD schema_hash VARCHAR(64) NULL REFERENCES objects_schemas(hash)
+            """))
+        schemas = db.session.execute(db.text(f"""
+            SELECT DISTINCT schema
+            FROM {table_name}
+            WHERE schema_hash IS NULL AND jsonb_typeof(schema) = 'object'
+        """)).scalars().all()
+        for schema in schemas:
+            db.session.execute(db.text("""
+                INSERT INTO objects_schemas (hash, schema)
+                VALUES (:hash, :schema ::jsonb)
+                ON CONFLICT (hash) DO NOTHING
+            """), {
+                'hash': get_schema_hash(schema),
+                'schema': json.dumps(schema)
+            })
+        db.session.execute(db.text(f"""
+            UPDATE {table_name}
+            SET schema_hash = objects_schemas.hash, schema = NULL
+            FROM objects_schemas
+            WHERE {table_name}.schema_hash IS NULL AND {table_name}.schema = objects_schemas.schema
+        """))
+    db.session.execute(db.text("""
+        ALTER TABLE objects_current
+        ADD CONSTRAINT objects_current_not_null_check
+            CHECK (
+                (
+                    fed_object_id IS NOT NULL AND
+                    fed_version_id IS NOT NULL AND
+                    component_id IS NOT NULL
+                ) OR (
+                    eln_import_id IS NOT NULL AND
+                    eln_object_id IS NOT NULL
+                ) OR (
+                    action_id IS NOT NULL AND
+                    data IS NOT NULL AND
+                    (
+                        schema IS NOT NULL OR
+                        schema_hash IS NOT NULL
+                    ) AND
+                    user_id IS NOT NULL AND
+                    utc_datetime IS NOT NULL
+                )
+            )
+    """))
+    db.session.execute(db.text("""
+        ALTER TABLE objects_previous
+        ADD CONSTRAINT objects_previous_not_null_check
+            CHECK (
+                (
+                    fed_object_id IS NOT NULL AND
+                    fed_version_id IS NOT NULL AND
+                    component_id IS NOT NULL
+                ) OR (
+                    eln_import_id IS NOT NULL AND
+                    eln_object_id IS NOT NULL
+                ) OR (
+                    action_id IS NOT NULL AND
+                    (
+                        (
+                            data IS NOT NULL AND
+                            (
+                                schema IS NOT NULL OR
+                                schema_hash IS NOT NULL
+                            )
+                        ) OR
+                        diff_base_version_id IS NOT NULL
+                    ) AND
+                    user_id IS NOT NULL AND
+                    utc_datetime IS NOT NULL
+                )
+            ),
+        ADD CONSTRAINT objects_previous_diff_check
+            CHECK (
+                (
+                    diff_base_version_id IS NULL AND
+                    data_diff IS NULL AND
+                    schema_diff IS NULL
+                ) OR (
+                    diff_base_version_id > version_id AND
+                    data_diff IS NOT NULL AND
+                    (
+                        schema_diff IS NOT NULL OR
+                        schema_hash IS NOT NULL
+                    )
+                )
+            )
+    """))
+    return True
@@ -0,0 +1,68 @@
+# coding: utf-8
+"""
+Add data_diff, schema_diff and diff_base_version_id columns to objects_previous table for storing previous versions as
+deltas and update NOT NULL constraint.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('objects_previous', 'diff_base_version_id'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE objects_previous
+        ADD data_diff JSONB NULL,
+        ADD schema_diff JSONB NULL,
+        ADD diff_base_version_id INTEGER NULL
+    """))
+    db.session.execute(db.text("""
+        ALTER TABLE objects_previous
+        DROP CONSTRAINT objects_previous_not_null_check
+    """))
+    db.session.execute(db.text("""
+        ALTER TABLE objects_previous
+        ADD CONSTRAINT objects_previous_not_null_check
+            CHECK (
+                (
+                    fed_object_id IS NOT NULL AND
+                    fed_version_id IS NOT NULL AND
+                    component_id IS NOT NULL
+                ) OR (
+                    eln_import_id IS NOT NULL AND
+                    eln_object_id IS NOT NULL
+                ) OR (
+                    action_id IS NOT NULL AND
+                    (
+                        (
+                            data IS NOT NULL AND
+                            schema IS NOT NULL
+                        ) OR
+                        diff_base_version_id IS NOT NULL
+                    ) AND
+                    user_id IS NOT NULL AND
+                    utc_datetime IS NOT NULL
+                )
+            )
+    """))
+    db.session.execute(db.text("""
+        ALTER TABLE objects_previous
+        ADD CONSTRAINT objects_previous_diff_check
+            CHECK (
+                (
+                    diff_base_version_id IS NULL AND
+                    data_diff IS NULL AND
+                    schema_diff IS NULL
+                ) OR (
+                    diff_base_version_id > version_id AND
+                    data_diff IS NOT NULL AND
+                    schema_diff IS NOT NULL
+                )
+            )
+    """))
+    return True
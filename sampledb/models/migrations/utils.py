@@ -254,6 +254,17 @@ def get_migrations() -> typing.List[typing.Tuple[int, str, typing.Callable[[typi
         'webhook_type_add_object_permissions',
         "object_data_to_html_cache_entries_add_show_object_title",
         "logins_use_timestamptz",
+        "authentications_add_expiration_utc_datetime",
+        "create_objects_current_search_cache",
+        "create_effective_object_permissions_triggers",
+        "objects_previous_add_diff_columns",
+        "objects_add_schema_hash",
+        "background_tasks_add_scheduling_columns",
+        "webhooks_add_batch_delivery",
+        "object_location_assignments_add_last_modified",
+        "files_add_content_storage",
+        "files_add_is_hidden",
+        "background_tasks_add_heartbeat_column",
     ]
 
     migrations = []
@@ -391,3 +402,24 @@ def timestamp_add_timezone_utc_migration(table_name: str, column_name: str) -> b
         USING {column_name} AT TIME ZONE 'UTC'
     """))
     return True
+
+
+def table_has_index(table_name: str, index_name: str) -> bool:
+    """
+    Return whether a table has an index with a given name.
+
+    :param table_name: the name of the table
+    :param index_name: the name of the index to check for
+    :return: whether the index exists
+    """
+    return bool(db.session.execute(
+        db.text("""
+            SELECT COUNT(*)
+            FROM pg_indexes
+            WHERE tablename = :table_name AND indexname = :index_name
+        """),
+        params={
+            'table_name': table_name,
+            'index_name': index_name
+        }
+    ).scalar())
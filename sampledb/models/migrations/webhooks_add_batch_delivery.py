@@ -0,0 +1,20 @@
+"""
+Add the batch_delivery column to the webhooks table.
+"""
+
+import flask_sqlalchemy
+
+from .utils import table_has_column
+
+
+def run(db: flask_sqlalchemy.SQLAlchemy) -> bool:
+    # Skip migration by condition
+    if table_has_column('webhooks', 'batch_delivery'):
+        return False
+
+    # Perform migration
+    db.session.execute(db.text("""
+        ALTER TABLE webhooks
+        ADD batch_delivery BOOLEAN NOT NULL DEFAULT FALSE
+    """))
+    return True
@@ -79,3 +79,19 @@ class AnonymousUserObjectPermissions(Model):
 
     if typing.TYPE_CHECKING:
         query: typing.ClassVar[Query["AnonymousUserObjectPermissions"]]
+
+
+# maintained by the triggers created in the migration
+# create_effective_object_permissions_triggers, so that permission queries
+# do not have to evaluate the view user_object_permissions_by_all
+effective_object_permissions_table = db.Table(
+    'effective_object_permissions',
+    db.metadata,
+    db.Column('user_id', db.Integer, nullable=True),
+    db.Column('object_id', db.Integer, nullable=False),
+    db.Column('permissions_int', db.Integer, nullable=False),
+    db.Column('requires_anonymous_users', db.Boolean, nullable=False),
+    db.Column('requires_instruments', db.Boolean, nullable=False),
+    db.Index('ix_effective_object_permissions_object_id', 'object_id'),
+    db.Index('ix_effective_object_permissions_user_id_object_id', 'user_id', 'object_id'),
+)
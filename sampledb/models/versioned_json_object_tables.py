@@ -3,9 +3,15 @@
 
 """
 
+import collections
+import contextlib
+import copy
 import dataclasses
 import datetime
 import functools
+import hashlib
+import json
+import threading
 import typing
 
 import sqlalchemy as db
@@ -27,6 +33,8 @@ def _use_transaction(func: F) -> F:
             connection: typing.Optional[db.engine.Connection] = None,
             **kwargs: typing.Any
     ) -> typing.Any:
+        if connection is None:
+            connection = getattr(self._thread_local, 'connection', None)
         if connection is not None:
             return func(self, *args, connection=connection, **kwargs)
         assert self.bind is not None
@@ -35,6 +43,185 @@ def _use_transaction(func: F) -> F:
     return typing.cast(F, wrapped_func)
 
 
+def get_search_cache(data: typing.Optional[typing.Any]) -> typing.Optional[str]:
+    """
+    Return the search document for object data.
+
+    The search document contains all string values in the data, e.g. texts
+    in all languages, tags and units, separated by newlines. Property names
+    and the values of _type are not included.
+
+    :param data: the object data
+    :return: the search document, or None if there is no data
+    """
+    if data is None:
+        return None
+    strings: typing.List[str] = []
+    pending_values = [data]
+    while pending_values:
+        value = pending_values.pop()
+        if isinstance(value, str):
+            strings.append(value)
+        elif isinstance(value, dict):
+            pending_values.extend(
+                reversed([
+                    property_value
+                    for property_name, property_value in value.items()
+                    if property_name != '_type'
+                ])
+            )
+        elif isinstance(value, list):
+            pending_values.extend(reversed(value))
+    return '\n'.join(strings)
+
+
+def calculate_json_delta(base: typing.Any, target: typing.Any) -> typing.Dict[str, typing.Any]:
+    """
+    Return a delta for turning one JSON value into another.
+
+    A delta is a dict which is empty if the values are equal. Otherwise it
+    contains the key "=" with a replacement value, the keys "o" and "d" with
+    changed and deleted object properties, or the keys "a" and "n" with
+    changed array items and the new array length.
+
+    :param base: the JSON value the delta will be applied to
+    :param target: the JSON value that applying the delta should result in
+    :return: the delta
+    """
+    if type(base) is type(target):
+        delta: typing.Dict[str, typing.Any] = {}
+        if isinstance(target, dict):
+            changed_properties = {}
+            for property_name, property_value in target.items():
+                if property_name in base:
+                    property_delta = calculate_json_delta(base[property_name], property_value)
+                else:
+                    property_delta = {'=': property_value}
+                if property_delta:
+                    changed_properties[property_name] = property_delta
+            deleted_properties = [
+                property_name
+                for property_name in base
+                if property_name not in target
+            ]
+            if changed_properties:
+                delta['o'] = changed_properties
+            if deleted_properties:
+                delta['d'] = deleted_properties
+            return delta
+        if isinstance(target, list):
+            changed_items = {}
+            for index, item in enumerate(target):
+                if index < len(base):
+                    item_delta = calculate_json_delta(base[index], item)
+                else:
+                    item_delta = {'=': item}
+                if item_delta:
+                    changed_items[str(index)] = item_delta
+            if changed_items:
+                delta['a'] = changed_items
+            if len(base) != len(target):
+                delta['n'] = len(target)
+            return delta
+        if base == target:
+            return delta
+    return {'=': copy.deepcopy(target)}
+
+
+def _patch_json_value(value: typing.Any, delta: typing.Dict[str, typing.Any]) -> typing.Any:
+    if '=' in delta:
+        return copy.deepcopy(delta['='])
+    if isinstance(value, dict):
+        for property_name in delta.get('d', []):
+            del value[property_name]
+        for property_name, property_delta in delta.get('o', {}).items():
+            value[property_name] = _patch_json_value(value.get(property_name), property_delta)
+    elif isinstance(value, list):
+        length = delta.get('n', len(value))
+        del value[length:]
+        value.extend([None] * (length - len(value)))
+        for index, item_delta in delta.get('a', {}).items():
+            value[int(index)] = _patch_json_value(value[int(index)], item_delta)
+    return value
+
+
+def apply_json_delta(base: typing.Any, delta: typing.Dict[str, typing.Any]) -> typing.Any:
+    """
+    Apply a delta created by calculate_json_delta to a JSON value.
+
+    :param base: the JSON value to apply the delta to, which is not modified
+    :param delta: the delta
+    :return: the resulting JSON value
+    """
+    return _patch_json_value(copy.deepcopy(base), delta)
+
+
+def get_schema_hash(schema: typing.Dict[str, typing.Any]) -> str:
+    """
+    Return the content hash used for storing a schema in the schema table.
+
+    :param schema: the JSON schema
+    :return: the hex-encoded SHA-256 hash of the canonical JSON representation
+    """
+    return hashlib.sha256(json.dumps(schema, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+class _SchemaCache:
+    """
+    A thread-safe LRU cache mapping schema hashes to serialized schemas.
+
+    As schemas are content-addressed, cached schemas can never be outdated.
+    Schemas are stored serialized, so that every lookup returns a new copy
+    which callers may modify.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._schemas: collections.OrderedDict[str, str] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, schema_hash: str) -> bool:
+        with self._lock:
+            return schema_hash in self._schemas
+
+    def get(self, schema_hash: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        with self._lock:
+            serialized_schema = self._schemas.get(schema_hash)
+            if serialized_schema is None:
+                return None
+            self._schemas.move_to_end(schema_hash)
+        return typing.cast(typing.Dict[str, typing.Any], json.loads(serialized_schema))
+
+    def set(self, schema_hash: str, schema: typing.Dict[str, typing.Any]) -> None:
+        if self._max_size <= 0:
+            return
+        serialized_schema = json.dumps(schema)
+        with self._lock:
+            self._schemas[schema_hash] = serialized_schema
+            self._schemas.move_to_end(schema_hash)
+            while len(self._schemas) > self._max_size:
+                self._schemas.popitem(last=False)
+
+
+def _get_object_id_sorting_direction(
+        order_by_clause: typing.Any,
+        object_id_column: typing.Any
+) -> typing.Optional[bool]:
+    """
+    Return whether an ORDER BY clause sorts by object ID in descending order.
+
+    :param order_by_clause: the ORDER BY clause, e.g. created by a function from logic.object_sorting
+    :param object_id_column: the object ID column
+    :return: whether the clause sorts descendingly, or None if it does not sort by object ID
+    """
+    modifier = getattr(order_by_clause, 'modifier', None)
+    if modifier in (db.sql.operators.asc_op, db.sql.operators.desc_op):
+        order_by_clause = order_by_clause.element
+    if not isinstance(order_by_clause, db.sql.ColumnElement) or not order_by_clause.compare(object_id_column):
+        return None
+    return modifier == db.sql.operators.desc_op
+
+
 class DataValidator(typing.Protocol):
     def __call__(
         self,
@@ -66,7 +253,6 @@ class Object:
     version_id: int
     action_id: typing.Optional[int]
     data: typing.Optional[typing.Dict[str, typing.Any]]
-    schema: typing.Optional[typing.Dict[str, typing.Any]]
     user_id: typing.Optional[int]
     utc_datetime: typing.Optional[datetime.datetime]
     fed_object_id: typing.Optional[int]
@@ -74,6 +260,10 @@ class Object:
     component_id: typing.Optional[int]
     eln_import_id: typing.Optional[int]
     eln_object_id: typing.Optional[str]
+    schema_hash: typing.Optional[str] = dataclasses.field(default=None, kw_only=True)
+    # the schema is only set if it is known, otherwise it is resolved using schema_hash when it is accessed
+    _schema: typing.Optional[typing.Dict[str, typing.Any]] = dataclasses.field(default=None, repr=False, compare=False, kw_only=True)
+    _schema_resolver: typing.Optional[typing.Callable[[str], typing.Optional[typing.Dict[str, typing.Any]]]] = dataclasses.field(default=None, repr=False, compare=False, kw_only=True)
     _component_cache: typing.List[typing.Optional['Component']] = dataclasses.field(default_factory=lambda: [None], repr=False, kw_only=True)
     _eln_import_cache: typing.List[typing.Optional['ELNImport']] = dataclasses.field(default_factory=lambda: [None], repr=False, kw_only=True)
 
@@ -81,6 +271,12 @@ class Object:
     def id(self) -> int:
         return self.object_id
 
+    @property
+    def schema(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        if self._schema is None and self.schema_hash is not None and self._schema_resolver is not None:
+            self._schema = self._schema_resolver(self.schema_hash)
+        return self._schema
+
     @property
     def fed_id(self) -> typing.Optional[int]:
         return self.fed_object_id
@@ -119,11 +315,34 @@ class VersionedJSONSerializableObjectTables:
     can use the metadata attribute to access the SQLAlchemy MetaData object associated with these tables. You can then
     call metadata.create_all(bind) to create the tables.
 
+    If delta_encoding_snapshot_interval is set, previous versions are stored as deltas to the next version, except
+    for every n-th version, which is stored in full to limit the number of deltas that need to be applied when reading
+    a version.
+
+    Schemas are stored once per distinct schema in a separate table, identified by a hash of their contents. They are
+    only loaded when accessed and kept in an in-memory cache, as most objects share the schemas of few actions.
+
     You should **not** interact with the tables yourself. Instead, use the functions provided by this class.
 
     For information on JSON schemas, see http://json-schema.org/.
     """
 
+    _object_column_names = (
+        'object_id',
+        'version_id',
+        'action_id',
+        'data',
+        'schema',
+        'user_id',
+        'utc_datetime',
+        'fed_object_id',
+        'fed_version_id',
+        'component_id',
+        'eln_import_id',
+        'eln_object_id',
+        'schema_hash',
+    )
+
     def __init__(
             self,
             table_name_prefix: str,
@@ -135,7 +354,9 @@ class VersionedJSONSerializableObjectTables:
             action_schema_column: typing.Optional[typing.Any] = None,
             metadata: typing.Optional[db.MetaData] = None,
             data_validator: typing.Optional[DataValidator] = None,
-            schema_validator: typing.Optional[SchemaValidator] = None
+            schema_validator: typing.Optional[SchemaValidator] = None,
+            delta_encoding_snapshot_interval: typing.Optional[int] = None,
+            schema_cache_size: int = 256
     ) -> None:
         """
         Creates new instance for storing versioned, JSON-serializable objects using three tables.
@@ -147,10 +368,18 @@ class VersionedJSONSerializableObjectTables:
         :param metadata: an SQLAlchemy MetaData object used for creating the two tables (optional)
         :param data_validator: a data validator function (given the data and the schema) (optional)
         :param schema_validator: a schema validator function (given the schema) (optional)
+        :param delta_encoding_snapshot_interval: the interval of previous versions stored in full, or None to store all previous versions in full (optional)
+        :param schema_cache_size: the maximum number of schemas cached in memory (optional)
         """
         if metadata is None:
             metadata = db.MetaData()
         self.metadata = metadata
+        self._schemas_table = db.Table(
+            table_name_prefix + '_schemas',
+            self.metadata,
+            db.Column('hash', db.String(64), nullable=False, primary_key=True),
+            db.Column('schema', postgresql.JSONB, nullable=False)
+        )
         self._current_table = db.Table(
             table_name_prefix + '_current',
             self.metadata,
@@ -166,10 +395,12 @@ class VersionedJSONSerializableObjectTables:
             db.Column('component_id', db.Integer),
             db.Column('name_cache', db.JSON),
             db.Column('tags_cache', db.JSON),
+            db.Column('search_cache', db.Text, nullable=True),
             db.Column('eln_import_id', db.Integer, nullable=True),
             db.Column('eln_object_id', db.String, nullable=True),
+            db.Column('schema_hash', db.String(64), db.ForeignKey(self._schemas_table.c.hash), nullable=True),
             db.CheckConstraint(
-                '(fed_object_id IS NOT NULL AND fed_version_id IS NOT NULL AND component_id IS NOT NULL) OR (eln_import_id IS NOT NULL AND eln_object_id IS NOT NULL) OR (action_id IS NOT NULL AND data IS NOT NULL AND schema IS NOT NULL AND user_id IS NOT NULL AND utc_datetime IS NOT NULL)',
+                '(fed_object_id IS NOT NULL AND fed_version_id IS NOT NULL AND component_id IS NOT NULL) OR (eln_import_id IS NOT NULL AND eln_object_id IS NOT NULL) OR (action_id IS NOT NULL AND data IS NOT NULL AND (schema IS NOT NULL OR schema_hash IS NOT NULL) AND user_id IS NOT NULL AND utc_datetime IS NOT NULL)',
                 name=table_name_prefix + '_current_not_null_check'
             ),
             db.UniqueConstraint('fed_object_id', 'fed_version_id', 'component_id', name=table_name_prefix + '_current_fed_object_id_component_id_key')
@@ -189,10 +420,18 @@ class VersionedJSONSerializableObjectTables:
             db.Column('component_id', db.Integer, nullable=True),
             db.Column('eln_import_id', db.Integer, nullable=True),
             db.Column('eln_object_id', db.String, nullable=True),
+            db.Column('data_diff', postgresql.JSONB, nullable=True),
+            db.Column('schema_diff', postgresql.JSONB, nullable=True),
+            db.Column('diff_base_version_id', db.Integer, nullable=True),
+            db.Column('schema_hash', db.String(64), db.ForeignKey(self._schemas_table.c.hash), nullable=True),
             db.PrimaryKeyConstraint('object_id', 'version_id'),
             db.CheckConstraint(
-                '(fed_object_id IS NOT NULL AND fed_version_id IS NOT NULL AND component_id IS NOT NULL) OR (eln_import_id IS NOT NULL AND eln_object_id IS NOT NULL) OR (action_id IS NOT NULL AND data IS NOT NULL AND schema IS NOT NULL AND user_id IS NOT NULL AND utc_datetime IS NOT NULL)',
+                '(fed_object_id IS NOT NULL AND fed_version_id IS NOT NULL AND component_id IS NOT NULL) OR (eln_import_id IS NOT NULL AND eln_object_id IS NOT NULL) OR (action_id IS NOT NULL AND ((data IS NOT NULL AND (schema IS NOT NULL OR schema_hash IS NOT NULL)) OR diff_base_version_id IS NOT NULL) AND user_id IS NOT NULL AND utc_datetime IS NOT NULL)',
                 name=table_name_prefix + '_previous_not_null_check'
+            ),
+            db.CheckConstraint(
+                '(diff_base_version_id IS NULL AND data_diff IS NULL AND schema_diff IS NULL) OR (diff_base_version_id > version_id AND data_diff IS NOT NULL AND (schema_diff IS NOT NULL OR schema_hash IS NOT NULL))',
+                name=table_name_prefix + '_previous_diff_check'
             )
         )
         self._subversions_table = db.Table(
@@ -207,6 +446,7 @@ class VersionedJSONSerializableObjectTables:
             db.Column('user_id', db.Integer, nullable=True),
             db.Column('utc_datetime', db.TIMESTAMP(timezone=True), nullable=True),
             db.Column('utc_datetime_subversion', db.TIMESTAMP(timezone=True), nullable=False),
+            db.Column('schema_hash', db.String(64), db.ForeignKey(self._schemas_table.c.hash), nullable=True),
             db.PrimaryKeyConstraint('object_id', 'version_id', 'subversion_id')
         )
         if user_id_column is not None:
@@ -236,6 +476,427 @@ class VersionedJSONSerializableObjectTables:
             self.metadata.create_all(self.bind)
         self._data_validator = data_validator
         self._schema_validator = schema_validator
+        self.delta_encoding_snapshot_interval = delta_encoding_snapshot_interval
+        self._schema_cache = _SchemaCache(schema_cache_size)
+        # the connection set by use_connection for the current thread
+        self._thread_local = threading.local()
+
+    @contextlib.contextmanager
+    def use_connection(
+            self,
+            connection: db.engine.Connection
+    ) -> typing.Iterator[None]:
+        """
+        Uses the given connection for all operations in the current thread, unless another connection is passed.
+
+        This allows changing objects in a transaction shared with other changes, e.g. those of an ORM session.
+
+        :param connection: the SQLAlchemy connection
+        """
+        previous_connection = getattr(self._thread_local, 'connection', None)
+        self._thread_local.connection = connection
+        try:
+            yield
+        finally:
+            self._thread_local.connection = previous_connection
+
+    def _copy_current_version_to_previous_versions(
+            self,
+            object_id: int,
+            data: typing.Optional[typing.Dict[str, typing.Any]],
+            schema: typing.Optional[typing.Dict[str, typing.Any]],
+            connection: db.engine.Connection
+    ) -> bool:
+        """
+        Copies the current version of an object to the table of previous object versions.
+
+        If delta encoding is enabled, the version is stored as delta to the given data and schema of the next version,
+        unless it is a snapshot version or the delta would not be smaller than the version itself.
+
+        :param object_id: the ID of the existing object
+        :param data: the data of the next version
+        :param schema: the schema of the next version
+        :param connection: the SQLAlchemy connection
+        :return: whether the current version was copied
+        """
+        current_columns = [
+            self._current_table.c.object_id,
+            self._current_table.c.version_id,
+            self._current_table.c.action_id,
+            self._current_table.c.data,
+            self._current_table.c.schema,
+            self._current_table.c.user_id,
+            self._current_table.c.utc_datetime,
+            self._current_table.c.fed_object_id,
+            self._current_table.c.fed_version_id,
+            self._current_table.c.component_id,
+            self._current_table.c.eln_import_id,
+            self._current_table.c.eln_object_id,
+            self._current_table.c.schema_hash,
+        ]
+        if self.delta_encoding_snapshot_interval is None:
+            return bool(connection.execute(
+                self._previous_table
+                .insert()
+                .from_select(
+                    [column.name for column in current_columns],
+                    self._current_table
+                    .select()
+                    .with_only_columns(*current_columns)
+                    .where(self._current_table.c.object_id == db.bindparam('oid'))
+                ),
+                [{'oid': object_id}]
+            ).rowcount == 1)
+        current_object = connection.execute(
+            db.select(*current_columns)
+            .where(self._current_table.c.object_id == object_id)
+            .with_for_update()
+        ).fetchone()
+        if current_object is None:
+            return False
+        values = dict(current_object._mapping)
+        if current_object.version_id % self.delta_encoding_snapshot_interval != 0:
+            values.update(self._get_delta_values(
+                current_object.data,
+                current_object.schema,
+                current_object.schema_hash,
+                data,
+                schema,
+                current_object.version_id + 1
+            ))
+        connection.execute(
+            self._previous_table
+            .insert()
+            .values(**values)
+        )
+        return True
+
+    @staticmethod
+    def _get_delta_values(
+            data: typing.Optional[typing.Dict[str, typing.Any]],
+            schema: typing.Optional[typing.Dict[str, typing.Any]],
+            schema_hash: typing.Optional[str],
+            base_data: typing.Optional[typing.Dict[str, typing.Any]],
+            base_schema: typing.Optional[typing.Dict[str, typing.Any]],
+            base_version_id: int
+    ) -> typing.Dict[str, typing.Any]:
+        data_diff = calculate_json_delta(base_data, data)
+        if schema_hash is not None:
+            # the schema is already stored only once in the schema table
+            if len(json.dumps(data_diff)) >= len(json.dumps(data)):
+                return {}
+            schema_diff = None
+        else:
+            schema_diff = calculate_json_delta(base_schema, schema)
+            if len(json.dumps(data_diff)) + len(json.dumps(schema_diff)) >= len(json.dumps(data)) + len(json.dumps(schema)):
+                return {}
+        return {
+            'data': db.null(),
+            'schema': db.null(),
+            'data_diff': data_diff,
+            'schema_diff': db.null() if schema_diff is None else schema_diff,
+            'diff_base_version_id': base_version_id,
+        }
+
+    def _store_schema(
+            self,
+            schema: typing.Optional[typing.Dict[str, typing.Any]],
+            connection: db.engine.Connection
+    ) -> typing.Optional[str]:
+        """
+        Stores a schema in the schema table, unless it has been stored before.
+
+        :param schema: the JSON schema or None
+        :param connection: the SQLAlchemy connection
+        :return: the schema hash, or None if schema is None
+        """
+        if schema is None:
+            return None
+        schema_hash = get_schema_hash(schema)
+        connection.execute(
+            postgresql.insert(self._schemas_table)
+            .values(hash=schema_hash, schema=schema)
+            .on_conflict_do_nothing(index_elements=[self._schemas_table.c.hash])
+        )
+        self._schema_cache.set(schema_hash, schema)
+        return schema_hash
+
+    def _load_schemas(
+            self,
+            schema_hashes: typing.Iterable[typing.Optional[str]],
+            connection: db.engine.Connection
+    ) -> None:
+        """
+        Loads the schemas with the given hashes into the schema cache, unless they are cached already.
+
+        :param schema_hashes: the schema hashes
+        :param connection: the SQLAlchemy connection
+        """
+        missing_schema_hashes = {
+            schema_hash
+            for schema_hash in schema_hashes
+            if schema_hash is not None and schema_hash not in self._schema_cache
+        }
+        if not missing_schema_hashes:
+            return
+        for schema_hash, schema in connection.execute(
+            db.select(
+                self._schemas_table.c.hash,
+                self._schemas_table.c.schema
+            ).where(
+                self._schemas_table.c.hash.in_(missing_schema_hashes)
+            )
+        ).fetchall():
+            self._schema_cache.set(schema_hash, schema)
+
+    def _get_schema(
+            self,
+            schema_hash: str,
+            connection: db.engine.Connection
+    ) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """
+        Returns the schema with the given hash from the schema cache or the schema table.
+
+        :param schema_hash: the schema hash
+        :param connection: the SQLAlchemy connection
+        :return: the schema, or None if no schema with this hash exists
+        """
+        schema = self._schema_cache.get(schema_hash)
+        if schema is None:
+            schema = connection.execute(
+                db.select(self._schemas_table.c.schema).where(self._schemas_table.c.hash == schema_hash)
+            ).scalar()
+            if schema is not None:
+                self._schema_cache.set(schema_hash, schema)
+        return schema
+
+    def _get_schema_resolver(
+            self,
+            connection: db.engine.Connection
+    ) -> typing.Callable[[str], typing.Optional[typing.Dict[str, typing.Any]]]:
+        """
+        Returns a function resolving schema hashes of objects loaded or created using the given connection.
+
+        While the connection is open, schemas are read using it, so that schemas stored in its transaction are found.
+
+        :param connection: the SQLAlchemy connection
+        :return: the schema resolver
+        """
+        def resolve_schema(schema_hash: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+            schema = self._schema_cache.get(schema_hash)
+            if schema is not None:
+                return schema
+            if not connection.closed:
+                return self._get_schema(schema_hash, connection=connection)
+            assert self.bind is not None
+            with self.bind.connect() as new_connection:
+                return self._get_schema(schema_hash, connection=new_connection)
+        return resolve_schema
+
+    def _get_object(
+            self,
+            row: typing.Any,
+            connection: db.engine.Connection,
+            **kwargs: typing.Any
+    ) -> Object:
+        """
+        Creates an object from a row containing the object columns.
+
+        :param row: the row
+        :param connection: the SQLAlchemy connection the row was read with
+        :param kwargs: values to use instead of the row values, e.g. decoded data
+        :return: the object
+        """
+        values = {
+            column_name: getattr(row, column_name)
+            for column_name in self._object_column_names
+        }
+        values.update(kwargs)
+        values['_schema'] = values.pop('schema')
+        return Object(**values, _schema_resolver=self._get_schema_resolver(connection))
+
+    def _get_objects(
+            self,
+            rows: typing.Sequence[typing.Any],
+            connection: db.engine.Connection
+    ) -> typing.List[Object]:
+        """
+        Creates objects from rows containing the object columns.
+
+        The schemas of the objects are loaded into the schema cache, so that they can be resolved when accessed.
+
+        :param rows: the rows
+        :param connection: the SQLAlchemy connection
+        :return: the objects
+        """
+        self._load_schemas((row.schema_hash for row in rows), connection=connection)
+        return [self._get_object(row, connection=connection) for row in rows]
+
+    def _decode_previous_versions(
+            self,
+            previous_objects: typing.Sequence[typing.Any],
+            connection: db.engine.Connection,
+            current_object: typing.Optional[Object] = None,
+            delta_base_objects: typing.Sequence[typing.Any] = ()
+    ) -> typing.List[Object]:
+        """
+        Creates objects from rows of the table of previous object versions, applying deltas where necessary.
+
+        :param previous_objects: the rows, containing all columns of the table of previous object versions
+        :param connection: the SQLAlchemy connection
+        :param current_object: the current version of the object, if already known (optional)
+        :param delta_base_objects: additional rows forming complete delta chains, e.g. from _get_delta_chain (optional)
+        :return: the objects in the order of the given rows
+        """
+        rows_by_version = {
+            (row.object_id, row.version_id): row
+            for row in list(previous_objects) + list(delta_base_objects)
+        }
+        # versions which are known not to be previous versions, e.g. because they are the current version
+        non_previous_versions = {
+            (row.object_id, row.diff_base_version_id)
+            for row in delta_base_objects
+            if row.diff_base_version_id is not None and (row.object_id, row.diff_base_version_id) not in rows_by_version
+        }
+        # imported federated versions may share their version ID with the current version, in which case the row is used
+        if current_object is not None and (current_object.object_id, current_object.version_id) not in rows_by_version:
+            non_previous_versions.add((current_object.object_id, current_object.version_id))
+        # decoded versions consist of data, schema hash and schema, which is only set for versions without a schema hash
+        decoded_versions: typing.Dict[typing.Tuple[int, int], typing.Tuple[typing.Any, typing.Optional[str], typing.Any]] = {}
+        objects = []
+        for previous_object in previous_objects:
+            delta_chain = []
+            version_key = (previous_object.object_id, previous_object.version_id)
+            while version_key not in decoded_versions:
+                row = rows_by_version.get(version_key)
+                if row is None and version_key not in non_previous_versions:
+                    chain_rows = self._get_delta_chain(*version_key, connection=connection)
+                    chain_versions = {
+                        (chain_row.object_id, chain_row.version_id)
+                        for chain_row in chain_rows
+                    }
+                    non_previous_versions.add(version_key)
+                    for chain_row in chain_rows:
+                        rows_by_version.setdefault((chain_row.object_id, chain_row.version_id), chain_row)
+                        if chain_row.diff_base_version_id is not None:
+                            non_previous_versions.add((chain_row.object_id, chain_row.diff_base_version_id))
+                    non_previous_versions.difference_update(chain_versions)
+                    row = rows_by_version.get(version_key)
+                if row is None:
+                    # the base version of a delta is the current version
+                    if current_object is not None and current_object.object_id == version_key[0]:
+                        base_object: typing.Optional[Object] = current_object
+                    else:
+                        base_object = self.get_current_object(version_key[0], connection=connection)
+                    if base_object is None or base_object.version_id != version_key[1]:
+                        raise ValueError(f'Missing version {version_key[1]} of object {version_key[0]}')
+                    decoded_versions[version_key] = self._get_decoded_version(base_object)
+                elif row.diff_base_version_id is None:
+                    decoded_versions[version_key] = self._get_decoded_version(row)
+                else:
+                    delta_chain.append(row)
+                    version_key = (row.object_id, row.diff_base_version_id)
+            for row in reversed(delta_chain):
+                base_data, base_schema_hash, base_schema = decoded_versions[(row.object_id, row.diff_base_version_id)]
+                data = apply_json_delta(base_data, row.data_diff)
+                if row.schema_diff is None:
+                    decoded_versions[(row.object_id, row.version_id)] = (data, row.schema_hash, None)
+                else:
+                    # versions encoded before schemas were stored in the schema table contain a schema delta
+                    if base_schema_hash is not None:
+                        base_schema = self._get_schema(base_schema_hash, connection=connection)
+                    decoded_versions[(row.object_id, row.version_id)] = (data, None, apply_json_delta(base_schema, row.schema_diff))
+            data, schema_hash, schema = decoded_versions[(previous_object.object_id, previous_object.version_id)]
+            objects.append(self._get_object(
+                previous_object,
+                connection=connection,
+                data=data,
+                schema=schema,
+                schema_hash=schema_hash
+            ))
+        self._load_schemas((object.schema_hash for object in objects), connection=connection)
+        return objects
+
+    @staticmethod
+    def _get_decoded_version(
+            object: typing.Any
+    ) -> typing.Tuple[typing.Any, typing.Optional[str], typing.Any]:
+        if object.schema_hash is not None:
+            return object.data, object.schema_hash, None
+        return object.data, None, object.schema
+
+    def _get_delta_chain(
+            self,
+            object_id: int,
+            version_id: int,
+            connection: db.engine.Connection
+    ) -> typing.Sequence[typing.Any]:
+        """
+        Queries a previous object version and the previous versions its delta is based on.
+
+        :param object_id: the ID of the existing object
+        :param version_id: the ID of the object's previous version
+        :param connection: the SQLAlchemy connection
+        :return: the rows of the table of previous object versions
+        """
+        delta_chain = db.select(
+            self._previous_table
+        ).where(
+            self._previous_table.c.object_id == object_id,
+            self._previous_table.c.version_id == version_id
+        ).cte('delta_chain', recursive=True)
+        delta_base = self._previous_table.alias('delta_base')
+        delta_chain = delta_chain.union_all(
+            db.select(
+                delta_base
+            ).join(
+                delta_chain,
+                db.and_(
+                    delta_base.c.object_id == delta_chain.c.object_id,
+                    delta_base.c.version_id == delta_chain.c.diff_base_version_id
+                )
+            )
+        )
+        return connection.execute(db.select(delta_chain)).fetchall()
+
+    def _materialize_dependent_versions(
+            self,
+            object_id: int,
+            version_id: int,
+            connection: db.engine.Connection
+    ) -> None:
+        """
+        Stores the previous versions with deltas based on a given version in full, so that the version can be changed.
+
+        :param object_id: the ID of the existing object
+        :param version_id: the ID of the object version that will be changed
+        :param connection: the SQLAlchemy connection
+        """
+        dependent_objects = connection.execute(
+            db.select(
+                self._previous_table
+            ).where(
+                self._previous_table.c.object_id == object_id,
+                self._previous_table.c.diff_base_version_id == version_id
+            )
+        ).fetchall()
+        for dependent_object in self._decode_previous_versions(dependent_objects, connection=connection):
+            connection.execute(
+                self._previous_table
+                .update()
+                .where(
+                    self._previous_table.c.object_id == dependent_object.object_id,
+                    self._previous_table.c.version_id == dependent_object.version_id
+                )
+                .values(
+                    data=dependent_object.data,
+                    schema=db.null(),
+                    schema_hash=dependent_object.schema_hash or self._store_schema(dependent_object.schema, connection=connection),
+                    data_diff=db.null(),
+                    schema_diff=db.null(),
+                    diff_base_version_id=None
+                )
+            )
 
     @_use_transaction
     def create_object(
@@ -303,6 +964,7 @@ class VersionedJSONSerializableObjectTables:
                             data_validator_arguments['allow_disabled_languages'] = False
                         self._data_validator(data, schema, **data_validator_arguments)
         version_id = 0
+        schema_hash = self._store_schema(schema, connection=connection)
         object_id = typing.cast(int, connection.execute(
             self._current_table
             .insert()
@@ -312,7 +974,9 @@ class VersionedJSONSerializableObjectTables:
                 data=data,
                 name_cache=data.get('name', {}).get('text') if data else None,
                 tags_cache=data.get('tags') if data else None,
-                schema=schema,
+                search_cache=get_search_cache(data),
+                schema=db.null(),
+                schema_hash=schema_hash,
                 user_id=user_id,
                 utc_datetime=utc_datetime,
                 fed_object_id=fed_object_id,
@@ -330,7 +994,6 @@ class VersionedJSONSerializableObjectTables:
             version_id=version_id,
             action_id=action_id,
             data=data,
-            schema=schema,
             user_id=user_id,
             utc_datetime=utc_datetime,
             fed_object_id=fed_object_id,
@@ -338,9 +1001,115 @@ class VersionedJSONSerializableObjectTables:
             component_id=component_id,
             eln_import_id=eln_import_id,
             eln_object_id=eln_object_id,
+            schema_hash=schema_hash,
+            _schema=schema,
+            _schema_resolver=self._get_schema_resolver(connection),
         )
         return obj
 
+    @_use_transaction
+    def create_objects(
+            self,
+            data_sequence: typing.Sequence[typing.Dict[str, typing.Any]],
+            schema: typing.Optional[typing.Dict[str, typing.Any]],
+            user_id: typing.Optional[int],
+            action_id: int,
+            utc_datetime: typing.Optional[datetime.datetime] = None,
+            connection: typing.Optional[db.engine.Connection] = None,
+            validate_data: bool = True,
+            data_validator_arguments: typing.Optional[typing.Dict[str, typing.Any]] = None
+    ) -> typing.List[Object]:
+        """
+        Creates several objects with the same schema in the table for current objects, using multi-row inserts.
+
+        The schema is validated and stored once and all data is validated before any object is created.
+
+        :param data_sequence: a sequence of JSON serializable objects containing the object data
+        :param schema: a JSON schema describing the data (may be None if action's schema is to be used)
+        :param user_id: the ID of the user who created the objects
+        :param action_id: the ID of the action which was used to create the objects
+        :param utc_datetime: the datetime (in UTC) when the objects were created (optional, defaults to now(timezone.utc))
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :param validate_data: whether the data must be validated
+        :param data_validator_arguments: additional keyword arguments to the data validator
+        :return: the newly created objects, in the order of data_sequence
+        :raise ValueError: if no action with the given ID exists
+        """
+        assert connection is not None  # ensured by decorator
+        if not data_sequence:
+            return []
+        if utc_datetime is None:
+            utc_datetime = datetime.datetime.now(datetime.timezone.utc)
+        if schema is None and self._action_schema_column is not None and self._action_id_column is not None:
+            action = connection.execute(
+                db
+                .select(
+                    self._action_schema_column
+                )
+                .where(self._action_id_column == action_id)
+            ).fetchone()
+            if action is None:
+                raise ValueError(f'Action with id {action_id} not found')
+            schema = action[0]
+        if schema is not None and self._schema_validator:
+            self._schema_validator(schema)
+        if schema is not None and self._data_validator and validate_data:
+            if data_validator_arguments is None:
+                data_validator_arguments = {}
+            if 'allow_disabled_languages' not in data_validator_arguments:
+                data_validator_arguments['allow_disabled_languages'] = False
+            for data in data_sequence:
+                self._data_validator(data, schema, **data_validator_arguments)
+        version_id = 0
+        schema_hash = self._store_schema(schema, connection=connection)
+        object_ids = connection.execute(
+            self._current_table
+            .insert()
+            .returning(
+                self._current_table.c.object_id,
+                sort_by_parameter_order=True
+            ),
+            [
+                {
+                    'version_id': version_id,
+                    'action_id': action_id,
+                    'data': data,
+                    'name_cache': data.get('name', {}).get('text') if data else None,
+                    'tags_cache': data.get('tags') if data else None,
+                    'search_cache': get_search_cache(data),
+                    # the schema column is left NULL, as the schema is stored in the schema table
+                    'schema_hash': schema_hash,
+                    'user_id': user_id,
+                    'utc_datetime': utc_datetime,
+                    'fed_object_id': None,
+                    'fed_version_id': None,
+                    'component_id': None,
+                    'eln_import_id': None,
+                    'eln_object_id': None,
+                }
+                for data in data_sequence
+            ]
+        ).scalars().all()
+        return [
+            Object(
+                object_id=object_id,
+                version_id=version_id,
+                action_id=action_id,
+                data=data,
+                user_id=user_id,
+                utc_datetime=utc_datetime,
+                fed_object_id=None,
+                fed_version_id=None,
+                component_id=None,
+                eln_import_id=None,
+                eln_object_id=None,
+                schema_hash=schema_hash,
+                _schema=schema,
+                _schema_resolver=self._get_schema_resolver(connection),
+            )
+            for object_id, data in zip(object_ids, data_sequence)
+        ]
+
     @_use_transaction
     def update_object(
             self,
@@ -377,11 +1146,14 @@ class VersionedJSONSerializableObjectTables:
         if schema is not None or data is not None:
             if schema is None:
                 schema_row = connection.execute(
-                    db.select(self._current_table.c.schema).where(self._current_table.c.object_id == object_id)
+                    db.select(self._current_table.c.schema, self._current_table.c.schema_hash).where(self._current_table.c.object_id == object_id)
                 ).fetchone()
                 if schema_row is None:
                     return None
-                schema = schema_row[0]
+                if schema_row.schema_hash is not None:
+                    schema = self._get_schema(schema_row.schema_hash, connection=connection)
+                else:
+                    schema = schema_row.schema
             if validate_schema and self._schema_validator and schema is not None:
                 self._schema_validator(schema)
             if validate_data and self._data_validator and schema is not None and data is not None:
@@ -390,44 +1162,7 @@ class VersionedJSONSerializableObjectTables:
                 self._data_validator(data, schema, **data_validator_arguments)
 
         # Copy current version to previous versions
-        if connection.execute(
-            self._previous_table
-            .insert()
-            .from_select(
-                [
-                    'object_id',
-                    'version_id',
-                    'action_id',
-                    'data',
-                    'schema',
-                    'user_id',
-                    'utc_datetime',
-                    'fed_object_id',
-                    'fed_version_id',
-                    'component_id',
-                    'eln_import_id',
-                    'eln_object_id',
-                ],
-                self._current_table
-                .select()
-                .with_only_columns(
-                    self._current_table.c.object_id,
-                    self._current_table.c.version_id,
-                    self._current_table.c.action_id,
-                    self._current_table.c.data,
-                    self._current_table.c.schema,
-                    self._current_table.c.user_id,
-                    self._current_table.c.utc_datetime,
-                    self._current_table.c.fed_object_id,
-                    self._current_table.c.fed_version_id,
-                    self._current_table.c.component_id,
-                    self._current_table.c.eln_import_id,
-                    self._current_table.c.eln_object_id,
-                )
-                .where(self._current_table.c.object_id == db.bindparam('oid'))
-            ),
-            [{'oid': object_id}]
-        ).rowcount != 1:
+        if not self._copy_current_version_to_previous_versions(object_id, data, schema, connection=connection):
             return None
         # Update current version to new version
         connection.execute(
@@ -439,7 +1174,9 @@ class VersionedJSONSerializableObjectTables:
                 data=data,
                 name_cache=data.get('name', {}).get('text') if data else None,
                 tags_cache=data.get('tags') if data else None,
-                schema=schema,
+                search_cache=get_search_cache(data),
+                schema=db.null(),
+                schema_hash=self._store_schema(schema, connection=connection),
                 user_id=user_id,
                 utc_datetime=utc_datetime
             ),
@@ -521,44 +1258,7 @@ class VersionedJSONSerializableObjectTables:
             return object
         elif current.fed_version_id is None or current.fed_version_id < fed_version_id:
             # Copy current version to previous versions
-            if connection.execute(
-                self._previous_table
-                .insert()
-                .from_select(
-                    [
-                        'object_id',
-                        'version_id',
-                        'action_id',
-                        'data',
-                        'schema',
-                        'user_id',
-                        'utc_datetime',
-                        'fed_object_id',
-                        'fed_version_id',
-                        'component_id',
-                        'eln_import_id',
-                        'eln_object_id'
-                    ],
-                    self._current_table
-                    .select()
-                    .with_only_columns(
-                        self._current_table.c.object_id,
-                        self._current_table.c.version_id,
-                        self._current_table.c.action_id,
-                        self._current_table.c.data,
-                        self._current_table.c.schema,
-                        self._current_table.c.user_id,
-                        self._current_table.c.utc_datetime,
-                        self._current_table.c.fed_object_id,
-                        self._current_table.c.fed_version_id,
-                        self._current_table.c.component_id,
-                        self._current_table.c.eln_import_id,
-                        self._current_table.c.eln_object_id,
-                    )
-                    .where(self._current_table.c.object_id == db.bindparam('oid'))
-                ),
-                [{'oid': current.object_id}]
-            ).rowcount != 1:
+            if not self._copy_current_version_to_previous_versions(current.object_id, data, schema, connection=connection):
                 return None
             # Update current version to new version
             connection.execute(
@@ -571,7 +1271,9 @@ class VersionedJSONSerializableObjectTables:
                     data=data,
                     name_cache=data.get('name', {}).get('text') if data else None,
                     tags_cache=data.get('tags') if data else None,
-                    schema=schema,
+                    search_cache=get_search_cache(data),
+                    schema=db.null(),
+                    schema_hash=self._store_schema(schema, connection=connection),
                     action_id=action_id,
                     user_id=user_id,
                     utc_datetime=utc_datetime,
@@ -599,7 +1301,8 @@ class VersionedJSONSerializableObjectTables:
                     version_id=max(max_version_id, current.version_id) + 1,
                     action_id=action_id,
                     data=data,
-                    schema=schema,
+                    schema=db.null(),
+                    schema_hash=self._store_schema(schema, connection=connection),
                     user_id=user_id,
                     utc_datetime=utc_datetime,
                     fed_object_id=fed_object_id,
@@ -671,18 +1374,7 @@ class VersionedJSONSerializableObjectTables:
         previous_objects = connection.execute(
             db
             .select(
-                self._previous_table.c.object_id,
-                self._previous_table.c.version_id,
-                self._previous_table.c.action_id,
-                self._previous_table.c.data,
-                self._previous_table.c.schema,
-                self._previous_table.c.user_id,
-                self._previous_table.c.utc_datetime,
-                self._previous_table.c.fed_object_id,
-                self._previous_table.c.fed_version_id,
-                self._previous_table.c.component_id,
-                self._previous_table.c.eln_import_id,
-                self._previous_table.c.eln_object_id,
+                self._previous_table
             )
             .where(db.and_(
                 self._previous_table.c.object_id == object_id,
@@ -691,7 +1383,7 @@ class VersionedJSONSerializableObjectTables:
         ).fetchall()
         if previous_objects:
             selected_table = self._previous_table
-            object_data = Object(*previous_objects[0])
+            object_data = self._decode_previous_versions(previous_objects, connection=connection)[0]
         else:
             current_object = self.get_current_object(object_id, connection=connection)
             if current_object is not None and current_object.version_id == version_id:
@@ -726,7 +1418,8 @@ class VersionedJSONSerializableObjectTables:
                     subversion_id=subversion_id,
                     action_id=object_data.action_id,
                     data=object_data.data,
-                    schema=object_data.schema,
+                    schema=db.null(),
+                    schema_hash=object_data.schema_hash or self._store_schema(object_data.schema, connection=connection),
                     user_id=object_data.user_id,
                     utc_datetime=object_data.utc_datetime,
                     utc_datetime_subversion=utc_datetime_subversion
@@ -734,14 +1427,22 @@ class VersionedJSONSerializableObjectTables:
         ).rowcount != 1:
             return None
 
+        # Previous versions stored as deltas to this version need to be stored in full before changing it
+        self._materialize_dependent_versions(object_id, version_id, connection=connection)
+
         # Update current version to new version
         if selected_table == self._current_table:
             cache_values = {
                 'name_cache': data.get('name', {}).get('text') if data else None,
                 'tags_cache': data.get('tags') if data else None,
+                'search_cache': get_search_cache(data),
             }
         else:
-            cache_values = {}
+            cache_values = {
+                'data_diff': db.null(),
+                'schema_diff': db.null(),
+                'diff_base_version_id': None,
+            }
         connection.execute(
             selected_table
             .update()
@@ -749,7 +1450,8 @@ class VersionedJSONSerializableObjectTables:
             .values(
                 action_id=action_id,
                 data=data,
-                schema=schema,
+                schema=db.null(),
+                schema_hash=self._store_schema(schema, connection=connection),
                 user_id=user_id,
                 utc_datetime=utc_datetime,
                 **cache_values
@@ -838,12 +1540,13 @@ class VersionedJSONSerializableObjectTables:
                 self._current_table.c.component_id,
                 self._current_table.c.eln_import_id,
                 self._current_table.c.eln_object_id,
+                self._current_table.c.schema_hash,
             )
             .where(self._current_table.c.object_id == object_id)
         ).fetchone()
         if current_object is None:
             return None
-        return Object(*current_object)
+        return self._get_objects([current_object], connection=connection)[0]
 
     @_use_transaction
     def get_previous_subversion(
@@ -862,11 +1565,12 @@ class VersionedJSONSerializableObjectTables:
                 self._subversions_table.c.schema,
                 self._subversions_table.c.user_id,
                 self._subversions_table.c.utc_datetime,
-                db.null(),  # fed_object_id
-                db.null(),  # fed_version_id
-                db.null(),  # component_id
-                db.null(),  # eln_import_id
-                db.null(),  # eln_object_id
+                db.null().label('fed_object_id'),
+                db.null().label('fed_version_id'),
+                db.null().label('component_id'),
+                db.null().label('eln_import_id'),
+                db.null().label('eln_object_id'),
+                self._subversions_table.c.schema_hash,
             )
             .where(
                 db.and_(
@@ -878,7 +1582,7 @@ class VersionedJSONSerializableObjectTables:
         ).first()
         if previous_object_subversion is None:
             return None
-        return Object(*previous_object_subversion)
+        return self._get_objects([previous_object_subversion], connection=connection)[0]
 
     @_use_transaction
     def get_current_fed_object(
@@ -905,6 +1609,7 @@ class VersionedJSONSerializableObjectTables:
                 self._current_table.c.component_id,
                 self._current_table.c.eln_import_id,
                 self._current_table.c.eln_object_id,
+                self._current_table.c.schema_hash,
             )
             .where(db.and_(
                 self._current_table.c.component_id == component_id,
@@ -913,7 +1618,7 @@ class VersionedJSONSerializableObjectTables:
         ).fetchone()
         if current_object is None:
             return None
-        return Object(*current_object)
+        return self._get_objects([current_object], connection=connection)[0]
 
     @_use_transaction
     def get_fed_object_version(
@@ -929,18 +1634,7 @@ class VersionedJSONSerializableObjectTables:
         previous_objects = connection.execute(
             db
             .select(
-                self._previous_table.c.object_id,
-                self._previous_table.c.version_id,
-                self._previous_table.c.action_id,
-                self._previous_table.c.data,
-                self._previous_table.c.schema,
-                self._previous_table.c.user_id,
-                self._previous_table.c.utc_datetime,
-                self._previous_table.c.fed_object_id,
-                self._previous_table.c.fed_version_id,
-                self._previous_table.c.component_id,
-                self._previous_table.c.eln_import_id,
-                self._previous_table.c.eln_object_id,
+                self._previous_table
             )
             .where(db.and_(db.and_(
                 self._previous_table.c.component_id == component_id,
@@ -949,7 +1643,7 @@ class VersionedJSONSerializableObjectTables:
             ))
         ).fetchall()
         if previous_objects:
-            return Object(*previous_objects[0])
+            return self._decode_previous_versions(previous_objects[:1], connection=connection)[0]
         current_object = self.get_current_fed_object(component_id, fed_object_id, connection=connection)
         if current_object is not None and current_object.fed_version_id == fed_version_id:
             return current_object
@@ -967,11 +1661,18 @@ class VersionedJSONSerializableObjectTables:
             sorting_func: typing.Optional[typing.Callable[[typing.Any, typing.Any], typing.Any]] = None,
             limit: typing.Optional[int] = None,
             offset: typing.Optional[int] = None,
-            num_objects_found: typing.Optional[typing.List[int]] = None
+            num_objects_found: typing.Optional[typing.List[int]] = None,
+            after_object_id: typing.Optional[int] = None,
+            before_object_id: typing.Optional[int] = None,
+            estimate_num_objects_found: bool = False
     ) -> typing.List[Object]:
         """
         Queries and returns all objects matching a given filter.
 
+        Instead of using an offset, objects can be paginated using after_object_id and before_object_id, which only
+        return the objects following or preceding the object with the given ID in the sorting order. As this can use
+        the primary key index instead of skipping rows, it requires sorting by object ID.
+
         :param filter_func: a lambda that may return an SQLAlchemy filter when given a table
         :param action_table: a SQLAlchemy table object containing the actions to filter by (see action_filter)
         :param action_filter: a SQLAlchemy comparator, used to query only objects created by specific actions
@@ -982,7 +1683,11 @@ class VersionedJSONSerializableObjectTables:
         :param limit: limits the number of returned objects, if set
         :param offset: an offset to apply to the query
         :param num_objects_found: a list used to return the number of objects found in, using the 0-th element
+        :param after_object_id: the ID of the object the returned objects follow in the sorting order (optional)
+        :param before_object_id: the ID of the object the returned objects precede in the sorting order (optional)
+        :param estimate_num_objects_found: whether to use the query planner's estimate for num_objects_found
         :return: a list of objects as object_type
+        :raise ValueError: if after_object_id or before_object_id is set without sorting by object ID
         """
         assert connection is not None  # ensured by decorator
 
@@ -1005,7 +1710,7 @@ class VersionedJSONSerializableObjectTables:
             table.c.component_id,
             table.c.eln_import_id,
             table.c.eln_object_id,
-            db.sql.expression.text('COUNT(*) OVER()')
+            table.c.schema_hash
         )
 
         selectable = table
@@ -1038,8 +1743,47 @@ class VersionedJSONSerializableObjectTables:
         filter_data_column = table.c.data_full if hasattr(table.c, 'data_full') else table.c.data
         # set object_id_column to allow access to table.c.object_id in filter_func (e.g. for file search)
         filter_data_column.object_id_column = table.c.object_id
+        # set search_cache_column to allow using the indexed search document in filter_func (e.g. for simple search)
+        filter_data_column.search_cache_column = table.c.search_cache if hasattr(table.c, 'search_cache') else None
         select_statement = select_statement.where(filter_func(filter_data_column))
-        select_statement = select_statement.order_by(sorting_func(table.c, self._previous_table.c))
+
+        if num_objects_found is not None:
+            num_objects_found.clear()
+            if estimate_num_objects_found:
+                num_objects_found.append(self._estimate_number_of_rows(select_statement, parameters, connection=connection))
+            elif after_object_id is None and before_object_id is None:
+                # count all objects found in the same query, unless the query is restricted by pagination cursors
+                select_statement = select_statement.add_columns(db.sql.expression.text('COUNT(*) OVER()'))
+            else:
+                num_objects_found.append(connection.execute(
+                    db.select(db.func.count()).select_from(select_statement.subquery()),  # pylint: disable=not-callable
+                    parameters
+                ).scalar_one())
+
+        order_by_clause = sorting_func(table.c, self._previous_table.c)
+        reverse_objects = False
+        if after_object_id is not None or before_object_id is not None:
+            is_descending = _get_object_id_sorting_direction(order_by_clause, table.c.object_id)
+            if is_descending is None:
+                raise ValueError("Using after_object_id or before_object_id requires sorting by object ID")
+            if after_object_id is not None:
+                if is_descending:
+                    select_statement = select_statement.where(table.c.object_id < after_object_id)
+                else:
+                    select_statement = select_statement.where(table.c.object_id > after_object_id)
+            if before_object_id is not None:
+                if is_descending:
+                    select_statement = select_statement.where(table.c.object_id > before_object_id)
+                else:
+                    select_statement = select_statement.where(table.c.object_id < before_object_id)
+                if after_object_id is None:
+                    # query the objects directly preceding the cursor in reverse order
+                    reverse_objects = True
+                    if is_descending:
+                        order_by_clause = db.sql.asc(table.c.object_id)
+                    else:
+                        order_by_clause = db.sql.desc(table.c.object_id)
+        select_statement = select_statement.order_by(order_by_clause)
 
         if limit is not None:
             select_statement = select_statement.limit(limit)
@@ -1051,13 +1795,37 @@ class VersionedJSONSerializableObjectTables:
             select_statement,
             parameters
         ).fetchall()
-        if num_objects_found is not None:
-            num_objects_found.clear()
+        if num_objects_found is not None and not num_objects_found:
             if objects:
                 num_objects_found.append(objects[0][-1])
             else:
                 num_objects_found.append(0)
-        return [Object(*obj[:-1]) for obj in objects]
+        if reverse_objects:
+            objects = list(reversed(objects))
+        return self._get_objects(objects, connection=connection)
+
+    @staticmethod
+    def _estimate_number_of_rows(
+            select_statement: typing.Any,
+            parameters: typing.Dict[str, typing.Any],
+            connection: db.engine.Connection
+    ) -> int:
+        """
+        Returns the query planner's estimate of the number of rows returned by a select statement.
+
+        :param select_statement: the select statement
+        :param parameters: query parameters for the select statement
+        :param connection: the SQLAlchemy connection
+        :return: the estimated number of rows
+        """
+        compiled_statement = select_statement.compile(dialect=connection.dialect, compile_kwargs={'render_postcompile': True})
+        query_plan = connection.exec_driver_sql(
+            'EXPLAIN (FORMAT JSON) ' + str(compiled_statement),
+            dict(compiled_statement.params, **parameters)
+        ).scalar_one()
+        if isinstance(query_plan, str):
+            query_plan = json.loads(query_plan)
+        return int(query_plan[0]['Plan']['Plan Rows'])
 
     @_use_transaction
     def get_object_versions(
@@ -1080,26 +1848,13 @@ class VersionedJSONSerializableObjectTables:
         previous_objects = connection.execute(
             db
             .select(
-                self._previous_table.c.object_id,
-                self._previous_table.c.version_id,
-                self._previous_table.c.action_id,
-                self._previous_table.c.data,
-                self._previous_table.c.schema,
-                self._previous_table.c.user_id,
-                self._previous_table.c.utc_datetime,
-                self._previous_table.c.fed_object_id,
-                self._previous_table.c.fed_version_id,
-                self._previous_table.c.component_id,
-                self._previous_table.c.eln_import_id,
-                self._previous_table.c.eln_object_id,
+                self._previous_table
             )
             .where(self._previous_table.c.object_id == object_id)
             # .order_by(db.asc(self._previous_table.c.version_id))
             .order_by(db.asc(self._previous_table.c.utc_datetime))
         ).fetchall()
-        objects = []
-        for obj in previous_objects:
-            objects.append(Object(*obj))
+        objects = self._decode_previous_versions(previous_objects, connection=connection, current_object=current_object)
         objects.append(current_object)
         return objects
 
@@ -1119,29 +1874,14 @@ class VersionedJSONSerializableObjectTables:
         :return: the object as object_type or None if the object or this version of it does not exist
         """
         assert connection is not None  # ensured by decorator
-        previous_objects = connection.execute(
-            db
-            .select(
-                self._previous_table.c.object_id,
-                self._previous_table.c.version_id,
-                self._previous_table.c.action_id,
-                self._previous_table.c.data,
-                self._previous_table.c.schema,
-                self._previous_table.c.user_id,
-                self._previous_table.c.utc_datetime,
-                self._previous_table.c.fed_object_id,
-                self._previous_table.c.fed_version_id,
-                self._previous_table.c.component_id,
-                self._previous_table.c.eln_import_id,
-                self._previous_table.c.eln_object_id,
-            )
-            .where(db.and_(
-                self._previous_table.c.object_id == object_id,
-                self._previous_table.c.version_id == version_id
-            ))
-        ).fetchall()
+        delta_chain = self._get_delta_chain(object_id, version_id, connection=connection)
+        previous_objects = [
+            previous_object
+            for previous_object in delta_chain
+            if previous_object.version_id == version_id
+        ]
         if previous_objects:
-            return Object(*previous_objects[0])
+            return self._decode_previous_versions(previous_objects, connection=connection, delta_base_objects=delta_chain)[0]
         current_object = self.get_current_object(object_id, connection=connection)
         if current_object is not None and current_object.version_id == version_id:
             return current_object
@@ -1207,6 +1947,133 @@ class VersionedJSONSerializableObjectTables:
                 result[object_id] = None
         return result
 
+    @_use_transaction
+    def update_search_caches(
+            self,
+            batch_size: int = 1000,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> int:
+        """
+        Recreates the search documents of all current object versions.
+
+        :param batch_size: the number of objects to update at once
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :return: the number of updated objects
+        """
+        assert connection is not None  # ensured by decorator
+        num_updated_objects = 0
+        previous_object_id = None
+        while True:
+            select_statement = db.select(
+                self._current_table.c.object_id,
+                self._current_table.c.data
+            ).order_by(self._current_table.c.object_id).limit(batch_size)
+            if previous_object_id is not None:
+                select_statement = select_statement.where(self._current_table.c.object_id > previous_object_id)
+            rows = connection.execute(select_statement).fetchall()
+            if not rows:
+                break
+            connection.execute(
+                self._current_table
+                .update()
+                .where(self._current_table.c.object_id == db.bindparam('oid'))
+                .values(search_cache=db.bindparam('search_cache')),
+                [
+                    {'oid': object_id, 'search_cache': get_search_cache(data)}
+                    for object_id, data in rows
+                ]
+            )
+            num_updated_objects += len(rows)
+            previous_object_id = rows[-1][0]
+        return num_updated_objects
+
+    @_use_transaction
+    def get_object_ids_with_unencoded_previous_versions(
+            self,
+            snapshot_interval: int,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> typing.List[int]:
+        """
+        Queries the IDs of objects with previous versions that are stored in full, even though they are no snapshot versions.
+
+        :param snapshot_interval: the interval of previous versions stored in full
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :return: the object IDs
+        """
+        assert connection is not None  # ensured by decorator
+        return list(connection.execute(
+            db.select(
+                self._previous_table.c.object_id
+            ).where(
+                self._previous_table.c.diff_base_version_id.is_(None),
+                self._previous_table.c.version_id % snapshot_interval != 0
+            ).distinct().order_by(self._previous_table.c.object_id)
+        ).scalars().all())
+
+    @_use_transaction
+    def encode_previous_versions(
+            self,
+            object_id: int,
+            snapshot_interval: int,
+            connection: typing.Optional[db.engine.Connection] = None
+    ) -> int:
+        """
+        Stores the previous versions of an object as deltas to their next version, except for snapshot versions.
+
+        Versions are kept in full if their next version does not exist or if the delta would not be smaller than the
+        version itself.
+
+        :param object_id: the ID of the existing object
+        :param snapshot_interval: the interval of previous versions stored in full
+        :param connection: the SQLAlchemy connection (optional, defaults to a new connection using self.bind)
+        :return: the number of versions stored as deltas
+        """
+        assert connection is not None  # ensured by decorator
+        # lock the object to prevent concurrent updates
+        connection.execute(
+            db.select(self._current_table.c.object_id)
+            .where(self._current_table.c.object_id == object_id)
+            .with_for_update()
+        )
+        objects_by_version_id = {
+            object.version_id: object
+            for object in self.get_object_versions(object_id, connection=connection)
+        }
+        unencoded_version_ids = connection.execute(
+            db.select(
+                self._previous_table.c.version_id
+            ).where(
+                self._previous_table.c.object_id == object_id,
+                self._previous_table.c.diff_base_version_id.is_(None)
+            ).order_by(self._previous_table.c.version_id)
+        ).scalars().all()
+        num_encoded_versions = 0
+        for version_id in unencoded_version_ids:
+            if version_id % snapshot_interval == 0:
+                continue
+            object = objects_by_version_id.get(version_id)
+            base_object = objects_by_version_id.get(version_id + 1)
+            if object is None or base_object is None:
+                continue
+            delta_values = self._get_delta_values(object.data, object.schema, object.schema_hash, base_object.data, base_object.schema, base_object.version_id)
+            if not delta_values:
+                continue
+            connection.execute(
+                self._previous_table
+                .update()
+                .where(
+                    self._previous_table.c.object_id == object_id,
+                    self._previous_table.c.version_id == version_id
+                )
+                .values(**delta_values)
+            )
+            num_encoded_versions += 1
+        return num_encoded_versions
+
     @property
     def current_table(self) -> db.Table:
         return self._current_table
+
+    @property
+    def previous_table(self) -> db.Table:
+        return self._previous_table
@@ -28,6 +28,7 @@ class Webhook(Model):
     name: Mapped[typing.Optional[str]] = db.Column(db.String, default=None, nullable=True)
     secret: Mapped[str] = db.Column(db.String, nullable=False)
     last_contact: Mapped[typing.Optional[datetime.datetime]] = db.Column(db.DateTime, default=None, nullable=True)
+    batch_delivery: Mapped[bool] = db.Column(db.Boolean, default=False, server_default=db.false(), nullable=False)
     __table_args__ = (
         db.UniqueConstraint('user_id', 'type', 'target_url', name='_user_id_type_target_url_uc'),
     )
@@ -42,7 +43,8 @@ class Webhook(Model):
         target_url: str,
         secret: str,
         name: typing.Optional[str],
-        last_contact: typing.Optional[datetime.datetime] = None
+        last_contact: typing.Optional[datetime.datetime] = None,
+        batch_delivery: bool = False
     ) -> None:
         super().__init__(
             user_id=user_id,
@@ -50,8 +52,24 @@ class Webhook(Model):
             target_url=target_url,
             name=name,
             secret=secret,
-            last_contact=last_contact
+            last_contact=last_contact,
+            batch_delivery=batch_delivery
         )
 
     def __repr__(self) -> str:
         return f'<{type(self).__name__}(id={self.id})>'
+
+
+class WebhookEvent(Model):
+    __tablename__ = "webhook_events"
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    webhook_id: Mapped[int] = db.Column(db.Integer, db.ForeignKey('webhooks.id', ondelete='CASCADE'), nullable=False, index=True)
+    data: Mapped[typing.Dict[str, typing.Any]] = db.Column(db.JSON, nullable=False)
+    utc_datetime: Mapped[datetime.datetime] = db.Column(db.TIMESTAMP(timezone=True), nullable=False)
+
+    if typing.TYPE_CHECKING:
+        query: typing.ClassVar[Query["WebhookEvent"]]
+
+    def __repr__(self) -> str:
+        return f'<{type(self).__name__}(id={self.id}, webhook_id={self.webhook_id})>'
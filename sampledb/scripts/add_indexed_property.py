@@ -0,0 +1,52 @@
+# coding: utf-8
+"""
+Script for registering an indexed property for an action, so that advanced
+searches for this property can use a database index.
+
+Usage: sampledb add_indexed_property <action_id> <property_path> <quantity|datetime>
+
+The property path consists of the property names and array indices separated
+by dots, e.g. temperature or measurements.0.temperature.
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.indexed_properties import create_indexed_property
+from ..logic.errors import ActionDoesNotExistError, IndexedPropertyAlreadyExistsError, InvalidIndexedPropertyError
+from ..models import IndexedPropertyType
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 3 or not all(arguments) or arguments[2] not in ('quantity', 'datetime'):
+        print(__doc__)
+        sys.exit(1)
+    action_id_str, property_path_str, type_str = arguments
+    try:
+        action_id = int(action_id_str)
+    except ValueError:
+        print("Error: action_id must be an integer", file=sys.stderr)
+        sys.exit(1)
+    property_path: typing.List[typing.Union[str, int]] = [
+        int(path_element) if path_element.isdigit() else path_element
+        for path_element in property_path_str.split('.')
+    ]
+    app = create_app()
+    with app.app_context():
+        try:
+            indexed_property = create_indexed_property(
+                action_id=action_id,
+                property_path=property_path,
+                type=IndexedPropertyType[type_str.upper()]
+            )
+        except ActionDoesNotExistError:
+            print("Error: No action with this ID exists", file=sys.stderr)
+            sys.exit(1)
+        except InvalidIndexedPropertyError:
+            print(f"Error: The action schema does not contain a {type_str} property with this path", file=sys.stderr)
+            sys.exit(1)
+        except IndexedPropertyAlreadyExistsError:
+            print("Error: This property is already indexed for this action", file=sys.stderr)
+            sys.exit(1)
+        print(f"Success: the property is indexed as indexed property #{indexed_property.id}")
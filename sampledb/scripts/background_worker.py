@@ -0,0 +1,52 @@
+# coding: utf-8
+"""
+Script for running a process that only handles background tasks, e.g. so
+that the SampleDB server processes can set BACKGROUND_TASK_HANDLER_THREADS
+to 0 and only post tasks. Multiple worker processes may run at the same
+time. By default, the configured BACKGROUND_TASK_HANDLER_THREADS is used as
+number of handler threads, or 4 if it is set to 0.
+
+On SIGINT or SIGTERM, the worker finishes the tasks currently being handled
+and releases any other claimed tasks before exiting.
+
+Usage: sampledb background_worker [<num_handler_threads>]
+"""
+import signal
+import sys
+import time
+import typing
+
+from .. import create_app, config
+from ..logic.background_tasks import stop_handler_threads
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1:
+        print(__doc__)
+        sys.exit(1)
+    num_handler_threads: typing.Optional[int] = None
+    if arguments:
+        try:
+            num_handler_threads = int(arguments[0])
+        except ValueError:
+            num_handler_threads = 0
+        if num_handler_threads <= 0:
+            print("Error: num_handler_threads must be a positive integer", file=sys.stderr)
+            sys.exit(1)
+    if num_handler_threads is not None:
+        config.BACKGROUND_TASK_HANDLER_THREADS = num_handler_threads
+    elif not isinstance(config.BACKGROUND_TASK_HANDLER_THREADS, int) or config.BACKGROUND_TASK_HANDLER_THREADS == 0:
+        config.BACKGROUND_TASK_HANDLER_THREADS = 4
+    # create_app resets claimed tasks if possible and starts the handler threads
+    app = create_app(include_dashboard=False)
+    if not app.config['ENABLE_BACKGROUND_TASKS']:
+        print("Error: background tasks are disabled, see ENABLE_BACKGROUND_TASKS", file=sys.stderr)
+        sys.exit(1)
+    print(f"Handling background tasks using {app.config['BACKGROUND_TASK_HANDLER_THREADS']} threads")
+    # handle SIGTERM, e.g. from process managers or container runtimes, like SIGINT
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        stop_handler_threads(app)
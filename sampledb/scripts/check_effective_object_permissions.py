@@ -0,0 +1,33 @@
+# coding: utf-8
+"""
+Script for checking whether the effective object permissions, which are used
+to speed up permission queries, are consistent with the permissions granted
+to users, groups and projects. With the argument repair, the effective object
+permissions will be rebuilt if they are inconsistent.
+
+Usage: sampledb check_effective_object_permissions [repair]
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.object_permissions import get_number_of_inconsistent_effective_object_permissions, rebuild_effective_object_permissions
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1 or (arguments and arguments[0] != 'repair'):
+        print(__doc__)
+        sys.exit(1)
+    repair = bool(arguments)
+    app = create_app()
+    with app.app_context():
+        num_inconsistent_entries = get_number_of_inconsistent_effective_object_permissions()
+        if num_inconsistent_entries == 0:
+            print("Success: the effective object permissions are consistent")
+            return
+        if not repair:
+            print(f"Error: found {num_inconsistent_entries} inconsistent effective object permission entries", file=sys.stderr)
+            sys.exit(1)
+        rebuild_effective_object_permissions()
+        print(f"Success: repaired {num_inconsistent_entries} inconsistent effective object permission entries")
@@ -0,0 +1,36 @@
+# coding: utf-8
+"""
+Script for storing existing previous object versions as deltas to their next
+version, except for every n-th version, which is kept in full. By default,
+the configured OBJECT_VERSION_SNAPSHOT_INTERVAL is used as interval.
+
+Usage: sampledb encode_object_versions [<snapshot_interval>]
+"""
+import sys
+import typing
+
+from .. import create_app
+from ..logic.objects import encode_object_versions, get_object_versions_storage_size
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1:
+        print(__doc__)
+        sys.exit(1)
+    snapshot_interval: typing.Optional[int] = None
+    if arguments:
+        try:
+            snapshot_interval = int(arguments[0])
+        except ValueError:
+            snapshot_interval = 0
+        if snapshot_interval <= 0:
+            print("Error: snapshot_interval must be a positive integer", file=sys.stderr)
+            sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        if snapshot_interval is None:
+            snapshot_interval = app.config['OBJECT_VERSION_SNAPSHOT_INTERVAL']
+        storage_size_before = get_object_versions_storage_size()
+        num_encoded_versions = encode_object_versions(snapshot_interval)
+        storage_size_after = get_object_versions_storage_size()
+        print(f"Success: {num_encoded_versions} object versions were stored as deltas (previous versions used {storage_size_before} bytes before and {storage_size_after} bytes after, space freed by updated rows is reused after VACUUM)")
@@ -0,0 +1,32 @@
+# coding: utf-8
+"""
+Script for generating downscaled preview images for existing image files which
+do not have a preview image yet. Files are handled in batches, so the script
+can be interrupted and run again.
+
+Usage: sampledb generate_preview_images [<batch_size>]
+"""
+import sys
+import typing
+
+from .. import create_app
+from ..logic.files import generate_missing_preview_images
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1:
+        print(__doc__)
+        sys.exit(1)
+    batch_size = 100
+    if arguments:
+        try:
+            batch_size = int(arguments[0])
+        except ValueError:
+            batch_size = 0
+        if batch_size <= 0:
+            print("Error: batch_size must be a positive integer", file=sys.stderr)
+            sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        num_generated_preview_images = generate_missing_preview_images(batch_size)
+        print(f"Success: {num_generated_preview_images} preview images were generated")
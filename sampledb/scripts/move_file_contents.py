@@ -0,0 +1,41 @@
+# coding: utf-8
+"""
+Script for moving the contents of uploaded files out of the database into
+the file storage configured using FILE_CONTENT_STORAGE. The contents are moved
+in batches, so the script can be interrupted and run again.
+
+Usage: sampledb move_file_contents [<batch_size>]
+"""
+import sys
+import typing
+
+from .. import create_app
+from ..logic import errors
+from ..logic.files import move_file_contents_to_storage
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) > 1:
+        print(__doc__)
+        sys.exit(1)
+    batch_size = 100
+    if arguments:
+        try:
+            batch_size = int(arguments[0])
+        except ValueError:
+            batch_size = 0
+        if batch_size <= 0:
+            print("Error: batch_size must be a positive integer", file=sys.stderr)
+            sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        content_storage = app.config['FILE_CONTENT_STORAGE']
+        if content_storage == 'database':
+            print("Error: FILE_CONTENT_STORAGE must be set to 'filesystem' or 's3'", file=sys.stderr)
+            sys.exit(1)
+        try:
+            num_moved_files = move_file_contents_to_storage(content_storage, batch_size)
+        except errors.FileContentStorageError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Success: the contents of {num_moved_files} files were moved to the {content_storage} storage (space freed in the files table is reused after VACUUM)")
@@ -0,0 +1,21 @@
+# coding: utf-8
+"""
+Script for rebuilding the index used by the simple object search.
+
+Usage: sampledb rebuild_search_index
+"""
+import sys
+import typing
+
+from .. import create_app
+from ..logic.object_search import rebuild_search_index
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 0:
+        print(__doc__)
+        sys.exit(1)
+    app = create_app()
+    with app.app_context():
+        num_objects = rebuild_search_index()
+        print(f"Success: the search index was rebuilt for {num_objects} objects")
@@ -0,0 +1,46 @@
+# coding: utf-8
+"""
+Script for removing an indexed property from an action.
+
+Usage: sampledb remove_indexed_property <action_id> <property_path>
+
+The property path consists of the property names and array indices separated
+by dots, e.g. temperature or measurements.0.temperature.
+"""
+
+import sys
+import typing
+
+from .. import create_app
+from ..logic.indexed_properties import delete_indexed_property, get_indexed_properties
+from ..logic.errors import ActionDoesNotExistError
+
+
+def main(arguments: typing.List[str]) -> None:
+    if len(arguments) != 2 or not all(arguments):
+        print(__doc__)
+        sys.exit(1)
+    action_id_str, property_path_str = arguments
+    try:
+        action_id = int(action_id_str)
+    except ValueError:
+        print("Error: action_id must be an integer", file=sys.stderr)
+        sys.exit(1)
+    property_path = tuple(
+        int(path_element) if path_element.isdigit() else path_element
+        for path_element in property_path_str.split('.')
+    )
+    app = create_app()
+    with app.app_context():
+        try:
+            indexed_properties = get_indexed_properties(action_id)
+        except ActionDoesNotExistError:
+            print("Error: No action with this ID exists", file=sys.stderr)
+            sys.exit(1)
+        for indexed_property in indexed_properties:
+            if indexed_property.property_path == property_path:
+                delete_indexed_property(indexed_property.id)
+                print("Success: the indexed property has been removed")
+                return
+        print("Error: This property is not indexed for this action", file=sys.stderr)
+        sys.exit(1)
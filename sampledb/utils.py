@@ -5,6 +5,7 @@
 
 import base64
 import functools
+import io
 import json
 import os
 import typing
@@ -14,10 +15,14 @@ import flask
 import flask_login
 import sqlalchemy
 import werkzeug
+import werkzeug.exceptions
 
 from . import logic, db
 from .models import Permissions, migrations
 
+if typing.TYPE_CHECKING:
+    from .logic.files import File
+
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
 
@@ -132,6 +137,11 @@ def empty_database(
     with engine.begin() as connection:
         # delete views, as SQLAlchemy cannot reflect them
         connection.execute(db.text("DROP VIEW IF EXISTS user_object_permissions_by_all"))
+        # delete effective object permissions triggers, as they depend on the view
+        for function_name in ['effective_object_permissions_object_trigger', 'effective_object_permissions_object_action_trigger', 'effective_object_permissions_group_trigger', 'effective_object_permissions_project_trigger', 'effective_object_permissions_instrument_trigger', 'effective_object_permissions_action_trigger']:
+            connection.execute(db.text(f"DROP FUNCTION IF EXISTS {function_name}() CASCADE"))
+        for function_name in ['refresh_effective_object_permissions_for_objects', 'refresh_effective_object_permissions']:
+            connection.execute(db.text(f"DROP FUNCTION IF EXISTS {function_name}(integer[])"))
         # delete instruments -> objects_current foreign key, as it prevents sorting the tables
         connection.execute(db.text("ALTER TABLE IF EXISTS instruments DROP CONSTRAINT IF EXISTS instruments_object_id_fkey"))
         # delete users -> eln_imports foreign key, as it prevents sorting the tables
@@ -163,3 +173,79 @@ def generate_content_security_policy_nonce() -> str:
 
 def text_to_bool(text: str) -> bool:
     return text.lower() not in {'', 'false', 'no', 'off', '0'}
+
+
+def get_file_etag(file: 'File') -> typing.Optional[str]:
+    """
+    Return a strong ETag for the contents of a file.
+
+    As file contents cannot be changed, the ETag is derived from their hash.
+
+    :param file: the file to get the ETag for
+    :return: the ETag, or None if the file has no hash information
+    """
+    if file.hash is None or not file.hash.algorithm or not file.hash.hexdigest:
+        return None
+    return f'{file.hash.algorithm}-{file.hash.hexdigest}'
+
+
+def send_file_content(
+        file: 'File',
+        mimetype: typing.Optional[str] = None,
+        as_attachment: bool = False,
+        download_name: typing.Optional[str] = None
+) -> flask.Response:
+    """
+    Send the contents of a file, supporting conditional and range requests.
+
+    If-None-Match is checked before the contents are opened, so that cached
+    contents can be validated without reading them from the content storage
+    or fetching them from another component.
+
+    :param file: the file to send the contents of
+    :param mimetype: the MIME type to send the contents as
+    :param as_attachment: whether the contents should be downloaded
+    :param download_name: the file name to send the contents with
+    :return: the response
+    :raise logic.errors.InvalidFileStorageError: if the file has no contents
+    :raise logic.errors.FederationFileNotAvailableError: if the contents of an
+        imported file cannot be fetched
+    """
+    etag = get_file_etag(file)
+    if etag is not None and flask.request.if_none_match.contains_weak(etag):
+        response = flask.Response(status=304)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        if file.utc_datetime is not None:
+            response.last_modified = file.utc_datetime
+        return response
+    stream = file.open()
+    size: typing.Optional[int]
+    if isinstance(stream, io.BytesIO):
+        size = stream.getbuffer().nbytes
+    elif file.storage == 'database':
+        size = file.binary_data_size
+    else:
+        size = None
+    response = flask.send_file(
+        stream,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        etag=etag if etag is not None else False,
+        last_modified=file.utc_datetime,
+        conditional=False
+    )
+    if size is not None:
+        response.content_length = size
+        # werkzeug only sets this header when responding to range requests
+        response.accept_ranges = 'bytes'
+    try:
+        # handles Range, If-Range and If-Modified-Since using the ETag and size set above
+        response.make_conditional(flask.request, accept_ranges=True, complete_length=size)
+    except werkzeug.exceptions.RequestedRangeNotSatisfiable:
+        stream.close()
+        raise
+    if response.status_code == 304:
+        stream.close()
+    return response
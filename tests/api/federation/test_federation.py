@@ -12,6 +12,7 @@ from sampledb import models
 from sampledb.logic import shares, actions, objects, component_authentication, components, files
 from sampledb.logic.component_authentication import add_token_authentication
 from sampledb.logic.components import add_component
+from sampledb.logic.federation.update import FEDERATION_SYNC_OVERLAP
 from sampledb.logic.users import create_user_alias
 
 UUID_1 = '28b8d3ca-fb5f-59d9-8090-bfdbd6d07a71'
@@ -358,3 +359,90 @@ def test_federation_metadata(flask_server, component_token):
     assert r.status_code == 200
     data = r.json()
     assert 'sp' in data and 'idp' in data and 'enabled' in data
+
+
+def test_get_objects_modified_since_last_sync(flask_server, component_token, user, action):
+    component, token = component_token
+    data = {'name': {'_type': 'text', 'text': 'Object'}}
+    object_ids = [
+        objects.create_object(user_id=user.id, action_id=action.id, data=data).id
+        for _ in range(3)
+    ]
+    for object_id in object_ids:
+        shares.add_object_share(object_id, component.id, {'access': {'objects': True, 'action': True}}, user.id)
+    headers = {'Authorization': 'Bearer {}'.format(token)}
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers)
+    assert r.status_code == 200
+    assert [obj['object_id'] for obj in r.json()['objects']] == object_ids
+    assert 'next_after' not in r.json()
+
+    time.sleep(0.01)
+    # changes shortly before the last synchronization are sent again, in case of clock differences
+    last_sync_timestamp = (datetime.datetime.now(datetime.timezone.utc) + FEDERATION_SYNC_OVERLAP).strftime('%Y-%m-%d %H:%M:%S.%f')
+    time.sleep(0.01)
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params={'last_sync_timestamp': last_sync_timestamp})
+    assert r.status_code == 200
+    assert r.json()['objects'] == []
+    # referenced data is sent for unmodified objects as well, as it might have changed
+    assert [action_data['action_id'] for action_data in r.json()['actions']] == [action.id]
+
+    objects.update_object(object_ids[1], data={'name': {'_type': 'text', 'text': 'Updated Object'}}, user_id=user.id)
+    logic.comments.create_comment(object_ids[2], user.id, 'Comment')
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params={'last_sync_timestamp': last_sync_timestamp})
+    assert r.status_code == 200
+    assert [obj['object_id'] for obj in r.json()['objects']] == object_ids[1:]
+    assert [action_data['action_id'] for action_data in r.json()['actions']] == [action.id]
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params={'limit': '2'})
+    assert r.status_code == 200
+    assert [obj['object_id'] for obj in r.json()['objects']] == object_ids[:2]
+    assert r.json()['next_after'] == object_ids[1]
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params={'limit': '2', 'after': str(object_ids[1])})
+    assert r.status_code == 200
+    assert [obj['object_id'] for obj in r.json()['objects']] == object_ids[2:]
+    assert r.json()['next_after'] is None
+
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params={'limit': '0'})
+    assert r.status_code == 400
+    r = requests.get(flask_server.base_url + 'federation/v1/shares/objects/', headers=headers, params={'after': 'x'})
+    assert r.status_code == 400
+
+
+def test_import_statuses(flask_server, component_token, simple_object, user):
+    component, token = component_token
+    shares.add_object_share(simple_object.id, component.id, {'access': {'objects': True}}, user.id)
+    import_status_data = {
+        'success': True,
+        'notes': [],
+        'utc_datetime': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        'object_id': 42
+    }
+    headers = {'Authorization': 'Bearer {}'.format(token)}
+
+    r = requests.put(
+        flask_server.base_url + 'federation/v1/shares/objects/import_status',
+        headers=headers,
+        json={}
+    )
+    assert r.status_code == 400
+
+    r = requests.put(
+        flask_server.base_url + 'federation/v1/shares/objects/import_status',
+        headers=headers,
+        json={str(simple_object.id): {'success': True}}
+    )
+    assert r.status_code == 400
+    assert shares.get_share(simple_object.id, component.id).import_status is None
+
+    r = requests.put(
+        flask_server.base_url + 'federation/v1/shares/objects/import_status',
+        headers=headers,
+        json={
+            str(simple_object.id): import_status_data,
+            str(simple_object.id + 1): import_status_data
+        }
+    )
+    assert r.status_code == 204
+    assert shares.get_share(simple_object.id, component.id).import_status == import_status_data
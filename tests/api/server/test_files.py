@@ -329,6 +329,60 @@ def test_create_database_file_with_preview_image(flask_server, object, auth):
     assert files[0].preview_image_binary_data == preview_image_stream.getvalue()
 
 
+def test_create_database_file_with_multipart_upload(flask_server, object, auth):
+    files = sampledb.logic.files.get_files_for_object(object.id)
+    assert len(files) == 0
+    r = requests.post(
+        flask_server.base_url + 'api/v1/objects/{}/files/'.format(object.object_id),
+        files={'file': ('test.txt', b'test')},
+        data={
+            'hash_algorithm': 'sha512',
+            'hash_hexdigest': hashlib.sha512(b'test').hexdigest()
+        },
+        auth=auth,
+        allow_redirects=False
+    )
+    assert r.status_code == 201
+    files = sampledb.logic.files.get_files_for_object(object.id)
+    assert len(files) == 1
+    assert files[0].storage == 'database'
+    assert files[0].original_file_name == 'test.txt'
+    with files[0].open() as f:
+        assert f.read().decode('utf-8') == 'test'
+    assert files[0].hash is not None
+    assert files[0].hash.algorithm == 'sha512'
+    assert files[0].hash.hexdigest == hashlib.sha512(b'test').hexdigest()
+
+    r = requests.post(
+        flask_server.base_url + 'api/v1/objects/{}/files/'.format(object.object_id),
+        files={'file': ('test.txt', b'test')},
+        data={
+            'original_file_name': 'other.txt'
+        },
+        auth=auth,
+        allow_redirects=False
+    )
+    assert r.status_code == 201
+    files = sampledb.logic.files.get_files_for_object(object.id)
+    assert len(files) == 2
+    assert files[1].original_file_name == 'other.txt'
+    assert files[1].hash.algorithm == sampledb.logic.files.DEFAULT_HASH_ALGORITHM
+    assert files[1].hash.hexdigest == getattr(hashlib, sampledb.logic.files.DEFAULT_HASH_ALGORITHM)(b'test').hexdigest()
+
+
+def test_create_database_file_with_invalid_multipart_upload(flask_server, object, auth):
+    for data, files in [
+        ({'hash_algorithm': 'sha256', 'hash_hexdigest': hashlib.sha256(b'other').hexdigest()}, {'file': ('test.txt', b'test')}),
+        ({'hash_algorithm': 'md5'}, {'file': ('test.txt', b'test')}),
+        ({'storage': 'database'}, {'file': ('test.txt', b'test')}),
+        ({'original_file_name': 'test.txt'}, {'content': ('test.txt', b'test')}),
+        ({'preview_image_mime_type': 'image/svg+xml'}, {'file': ('test.txt', b'test'), 'preview_image': ('preview.png', b'test')}),
+    ]:
+        r = requests.post(flask_server.base_url + 'api/v1/objects/{}/files/'.format(object.object_id), files=files, data=data, auth=auth, allow_redirects=False)
+        assert r.status_code == 400
+    assert len(sampledb.logic.files.get_files_for_object(object.id)) == 0
+
+
 def test_get_database_file(flask_server, object, auth, user, tmpdir):
     preview_image = Image.new('RGBA', (100, 100), (255, 255, 255, 255))
     preview_image_stream = io.BytesIO()
@@ -361,6 +415,49 @@ def test_get_database_file(flask_server, object, auth, user, tmpdir):
     }
 
 
+def test_get_database_file_content(flask_server, object, auth, user):
+    sampledb.logic.files.create_database_file(
+        object_id=object.id,
+        user_id=user.id,
+        file_name='test.txt',
+        save_content=lambda stream: stream.write(b'0123456789')
+    )
+    url = flask_server.base_url + 'api/v1/objects/{}/files/0/content'.format(object.object_id)
+    r = requests.get(url, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert r.content == b'0123456789'
+    assert r.headers['Accept-Ranges'] == 'bytes'
+    etag = r.headers['ETag']
+    assert etag == '"{}-{}"'.format(sampledb.logic.files.DEFAULT_HASH_ALGORITHM, getattr(hashlib, sampledb.logic.files.DEFAULT_HASH_ALGORITHM)(b'0123456789').hexdigest())
+
+    r = requests.get(url, auth=auth, headers={'Range': 'bytes=2-5'}, allow_redirects=False)
+    assert r.status_code == 206
+    assert r.content == b'2345'
+    assert r.headers['Content-Range'] == 'bytes 2-5/10'
+
+    r = requests.get(url, auth=auth, headers={'Range': 'bytes=20-'}, allow_redirects=False)
+    assert r.status_code == 416
+
+    r = requests.get(url, auth=auth, headers={'If-None-Match': etag}, allow_redirects=False)
+    assert r.status_code == 304
+    assert r.content == b''
+
+    r = requests.get(url, auth=auth, headers={'Range': 'bytes=8-', 'If-Range': etag}, allow_redirects=False)
+    assert r.status_code == 206
+    assert r.content == b'89'
+
+    r = requests.get(url, auth=auth, headers={'Range': 'bytes=8-', 'If-Range': '"sha256-other"'}, allow_redirects=False)
+    assert r.status_code == 200
+    assert r.content == b'0123456789'
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/{}/files/1/content'.format(object.object_id), auth=auth, allow_redirects=False)
+    assert r.status_code == 404
+
+    sampledb.logic.files.create_url_file(object.id, user.id, 'https://example.com/file')
+    r = requests.get(flask_server.base_url + 'api/v1/objects/{}/files/1/content'.format(object.object_id), auth=auth, allow_redirects=False)
+    assert r.status_code == 404
+
+
 def test_get_files(flask_server, object, auth, user):
     sampledb.logic.files.create_url_file(
         object_id=object.id,
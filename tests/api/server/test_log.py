@@ -3,6 +3,7 @@
 
 """
 
+import datetime
 import requests
 import pytest
 import secrets
@@ -73,3 +74,59 @@ def test_api_log_remove_token(flask_server, auth_user, action):
 
     api_log_entries = sampledb.logic.api_log.get_api_log_entries(api_token_id=api_token_id)
     assert len(api_log_entries) == 0
+
+
+def test_api_log_without_buffer(flask_server, auth_user, action):
+    auth, user = auth_user
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+    flask_server.app.config['API_LOG_FLUSH_INTERVAL_MILLISECONDS'] = 0
+
+    requests.get(flask_server.base_url + 'api/v1/objects/1/versions/0', headers=auth)
+    api_log_entries = sampledb.models.APILogEntry.query.filter_by(api_token_id=api_token_id).all()
+    assert len(api_log_entries) == 1
+    assert api_log_entries[0].route == '/api/v1/objects/1/versions/0'
+
+
+def test_api_log_full_buffer(flask_server, auth_user, action):
+    auth, user = auth_user
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+    flask_server.app.config['API_LOG_MAX_BUFFER_SIZE'] = 0
+
+    num_dropped_log_entries = sampledb.logic.api_log.get_number_of_dropped_log_entries()
+    requests.get(flask_server.base_url + 'api/v1/objects/1/versions/0', headers=auth)
+    assert sampledb.logic.api_log.get_number_of_dropped_log_entries() == num_dropped_log_entries + 1
+    assert len(sampledb.logic.api_log.get_api_log_entries(api_token_id=api_token_id)) == 0
+
+
+def test_api_log_failed_flush(flask_server, auth_user, monkeypatch):
+    api_token_id = sampledb.models.authentication.Authentication.query.all()[0].id
+    flask_server.app.config['API_LOG_FLUSH_INTERVAL_MILLISECONDS'] = 60 * 1000
+    flask_server.app.config['API_LOG_FLUSH_BATCH_SIZE'] = 100
+    flask_server.app.config['API_LOG_MAX_BUFFER_SIZE'] = 3
+
+    def create_entry(route):
+        return {
+            'api_token_id': api_token_id,
+            'method': sampledb.models.HTTPMethod.GET,
+            'route': route,
+            'utc_datetime': datetime.datetime.now(datetime.timezone.utc)
+        }
+
+    def insert_log_entries(entries):
+        # entries created while the database is unavailable
+        api_log_writer.add(create_entry('/api/v1/objects/3'), flask_server.app)
+        api_log_writer.add(create_entry('/api/v1/objects/4'), flask_server.app)
+        raise RuntimeError()
+
+    api_log_writer = sampledb.logic.api_log._APILogWriter()
+    api_log_writer.add(create_entry('/api/v1/objects/1'), flask_server.app)
+    api_log_writer.add(create_entry('/api/v1/objects/2'), flask_server.app)
+    with monkeypatch.context() as m:
+        m.setattr(sampledb.logic.api_log, '_insert_log_entries', insert_log_entries)
+        with pytest.raises(RuntimeError):
+            api_log_writer.flush()
+    assert api_log_writer.num_dropped_entries == 1
+    api_log_writer.stop()
+    api_log_writer.flush()
+    api_log_entries = sampledb.logic.api_log.get_api_log_entries(api_token_id=api_token_id)
+    assert [api_log_entry.route for api_log_entry in api_log_entries] == ['/api/v1/objects/3', '/api/v1/objects/2', '/api/v1/objects/1']
@@ -855,6 +855,37 @@ def test_get_objects_with_limit_and_offset(flask_server, auth, user, action):
     ]
 
 
+def test_get_objects_with_cursors(flask_server, auth, user, action):
+    object_ids = []
+    for i in range(10):
+        data = {
+            'name': {
+                '_type': 'text',
+                'text': str(i)
+            }
+        }
+        object_ids.append(sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id).object_id)
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"limit": 3, "after": object_ids[7]}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [object["object_id"] for object in r.json()] == [object_ids[6], object_ids[5], object_ids[4]]
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"limit": 3, "before": object_ids[2]}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [object["object_id"] for object in r.json()] == [object_ids[5], object_ids[4], object_ids[3]]
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"after": object_ids[7], "before": object_ids[4]}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [object["object_id"] for object in r.json()] == [object_ids[6], object_ids[5]]
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"limit": 3, "after": object_ids[1], "offset": 5}, auth=auth, allow_redirects=False)
+    assert r.status_code == 200
+    assert [object["object_id"] for object in r.json()] == [object_ids[0]]
+
+    r = requests.get(flask_server.base_url + 'api/v1/objects/', params={"after": "last"}, auth=auth, allow_redirects=False)
+    assert r.status_code == 400
+
+
 def test_get_objects_with_name_only(flask_server, auth, user):
     action = sampledb.logic.actions.create_action(
         action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
@@ -1111,6 +1142,62 @@ def test_create_object(flask_server, auth, user, action):
  - unknown property "test" (at test)"""
 
 
+def test_create_object_batch(flask_server, auth, user, action):
+    object_json = {
+        'action_id': action.id,
+        'data': [
+            {
+                'name': {
+                    '_type': 'text',
+                    'text': f'Example {i}'
+                }
+            }
+            for i in range(3)
+        ]
+    }
+    r = requests.post(flask_server.base_url + 'api/v1/objects/batch', auth=auth, json=object_json)
+    assert r.status_code == 201
+    object_ids = r.json()['object_ids']
+    assert len(object_ids) == 3
+    for i, object_id in enumerate(object_ids):
+        object = sampledb.logic.objects.get_object(object_id)
+        assert object.version_id == 0
+        assert object.action_id == action.id
+        assert object.user_id == user.id
+        assert object.data == object_json['data'][i]
+        assert sampledb.logic.object_permissions.get_user_object_permissions(object_id, user.id) == sampledb.models.Permissions.GRANT
+
+    object_json['data'].append({
+        'name': {
+            '_type': 'text',
+            'value': 'Example'
+        }
+    })
+    r = requests.post(flask_server.base_url + 'api/v1/objects/batch', auth=auth, json=object_json)
+    assert r.status_code == 400
+    assert r.json()['message'].startswith('validation failed for data at index 3:')
+    assert r.json()['index'] == 3
+    assert len(sampledb.logic.objects.get_objects()) == 3
+
+    object_json['data'] = []
+    r = requests.post(flask_server.base_url + 'api/v1/objects/batch', auth=auth, json=object_json)
+    assert r.status_code == 400
+    assert r.json()['message'] == 'data must be a non-empty list'
+
+    object_json['data'] = [
+        {
+            'name': {
+                '_type': 'text',
+                'text': 'Example'
+            }
+        }
+    ] * (flask_server.app.config['MAX_BATCH_SIZE'] + 1)
+    r = requests.post(flask_server.base_url + 'api/v1/objects/batch', auth=auth, json=object_json)
+    assert r.status_code == 400
+    assert r.json()['message'] == f"data must contain at most {flask_server.app.config['MAX_BATCH_SIZE']} entries"
+    assert len(sampledb.logic.objects.get_objects()) == 3
+
+
 def test_search_objects(flask_server, auth, user, other_user, action):
     data = {
         'name': {
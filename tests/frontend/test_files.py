@@ -8,6 +8,7 @@ import zipfile
 import requests
 import pytest
 from bs4 import BeautifulSoup
+from PIL import Image
 
 import sampledb
 import sampledb.models
@@ -101,6 +102,48 @@ def test_get_file(flask_server, user):
     assert r.content == 'Example Content'.encode('utf-8')
 
 
+def test_get_image_file_preview_and_thumbnail(flask_server, user):
+    schema = {
+        'title': 'Example Object',
+        'type': 'object',
+        'properties': {
+            'name': {
+                'title': 'Name',
+                'type': 'text'
+            }
+        }, 'required': ['name']
+    }
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema=schema
+    )
+    object = sampledb.logic.objects.create_object(
+        data={'name': {'_type': 'text', 'text': 'Example Object'}},
+        user_id=user.id,
+        action_id=action.id
+    )
+    session = requests.session()
+    assert session.get(flask_server.base_url + 'users/{}/autologin'.format(user.id)).status_code == 200
+
+    image_stream = io.BytesIO()
+    Image.new('RGB', (1024, 1024), (255, 0, 0)).save(image_stream, format='PNG')
+    image_binary_data = image_stream.getvalue()
+    file = sampledb.logic.files.create_database_file(object.id, user.id, 'image.png', lambda stream: stream.write(image_binary_data))
+    sampledb.logic.files.generate_preview_image(object.id, file.id)
+    file = sampledb.logic.files.get_file(file.id, object.id)
+    assert file.preview_image_binary_data
+
+    r = session.get(flask_server.base_url + 'objects/{}/files/{}?preview'.format(object.id, file.id))
+    assert r.status_code == 200
+    assert r.headers['Content-Type'] == 'image/png'
+    assert r.content == image_binary_data
+
+    r = session.get(flask_server.base_url + 'objects/{}/files/{}?thumbnail'.format(object.id, file.id))
+    assert r.status_code == 200
+    assert r.headers['Content-Type'] == file.preview_image_mime_type
+    assert r.content == file.preview_image_binary_data
+
+
 def test_upload_files(flask_server, user):
     schema = {
         'title': 'Example Object',
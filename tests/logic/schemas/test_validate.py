@@ -2,8 +2,12 @@
 """
 
 """
+import copy
 import datetime
+import decimal
+import json
 import math
+import os
 import typing
 import uuid
 
@@ -13,7 +17,9 @@ import sampledb
 import sqlalchemy as db
 from sampledb.logic.objects import create_object, get_object
 from sampledb.logic.schemas import validate
+from sampledb.logic.schemas.validate import get_compiled_validator, _validate
 from sampledb.logic.errors import ValidationError
+from sampledb.logic.units import get_magnitude_in_base_units
 
 
 def test_validate_invalid_type():
@@ -1674,6 +1680,98 @@ def test_validate_object_reference(flask_server):
     validate(instance, schema)
 
 
+def test_validate_object_references_loaded_in_bulk(monkeypatch):
+    from sampledb.models.users import User, UserType
+    from sampledb.models.actions import Action
+    user = User("User", "example@example.com", UserType.OTHER)
+    actions = [
+        Action(
+            action_type_id=action_type_id,
+            schema={
+                "title": "Object Information",
+                "type": "object",
+                "properties": {
+                    "name": {
+                        "title": "Object Name",
+                        "type": "text"
+                    }
+                },
+                'required': ['name']
+            }
+        )
+        for action_type_id in [sampledb.models.ActionType.SAMPLE_CREATION, sampledb.models.ActionType.MEASUREMENT]
+    ]
+    sampledb.db.session.add(user)
+    sampledb.db.session.add_all(actions)
+    sampledb.db.session.commit()
+    sample_ids = [
+        create_object(data={'name': {'_type': 'text', 'text': f'Sample {i}'}}, user_id=user.id, action_id=actions[0].id).id
+        for i in range(20)
+    ]
+    measurement_id = create_object(data={'name': {'_type': 'text', 'text': 'Measurement'}}, user_id=user.id, action_id=actions[1].id).id
+    schema = {
+        'title': 'Example',
+        'type': 'object',
+        'properties': {
+            'samples': {
+                'title': 'Samples',
+                'type': 'array',
+                'items': {
+                    'title': 'Sample',
+                    'type': 'sample'
+                }
+            },
+            'measurement': {
+                'title': 'Measurement',
+                'type': 'measurement'
+            },
+            'object': {
+                'title': 'Object',
+                'type': 'object_reference',
+                'action_id': actions[1].id
+            }
+        }
+    }
+    instance = {
+        'samples': [
+            {
+                '_type': 'sample',
+                'object_id': sample_id
+            }
+            for sample_id in sample_ids
+        ],
+        'measurement': {
+            '_type': 'measurement',
+            'object_id': measurement_id
+        },
+        'object': {
+            '_type': 'object_reference',
+            'object_id': measurement_id
+        }
+    }
+
+    def get_object(*args, **kwargs):
+        raise AssertionError('objects should be loaded in bulk')
+
+    def get_action(*args, **kwargs):
+        raise AssertionError('actions should be loaded in bulk')
+
+    monkeypatch.setattr(sampledb.logic.objects, 'get_object', get_object)
+    monkeypatch.setattr(sampledb.logic.actions, 'get_action', get_action)
+    validate(instance, schema)
+
+    instance['samples'][0]['object_id'] = measurement_id
+    with pytest.raises(ValidationError) as exc_info:
+        validate(instance, schema)
+    assert exc_info.value.message == 'object must be sample (at samples -> 0)'
+    monkeypatch.undo()
+
+    instance['samples'][0]['object_id'] = measurement_id + 1
+    with pytest.raises(ValidationError) as exc_info:
+        validate(instance, schema)
+    assert exc_info.value.message == 'object does not exist (at samples -> 0)'
+
+
 def test_validate_object_reference_with_filter_operator():
     user = sampledb.logic.users.create_user("User", "example@example.com", sampledb.models.UserType.PERSON)
     action = sampledb.logic.actions.create_action(
@@ -2712,6 +2810,90 @@ def test_validate_timeseries_type_mismatch():
         validate(instance, schema)
 
 
+def test_validate_timeseries_magnitude_in_base_units():
+    schema = {
+        'title': 'Example',
+        'type': 'timeseries',
+        'units': ['mbar', 'degC']
+    }
+    magnitudes = [i * 0.37 - 1234.5 for i in range(10000)] + [0, -0.0, 1, 408.2607508250703]
+    for units in ['mbar', 'degC']:
+        start_datetime = datetime.datetime(2023, 1, 2, 3, 4, 5, 678900)
+        instance = {
+            '_type': 'timeseries',
+            'units': units,
+            'data': [
+                [(start_datetime + datetime.timedelta(seconds=i)).strftime('%Y-%m-%d %H:%M:%S.%f'), magnitude]
+                for i, magnitude in enumerate(magnitudes)
+            ]
+        }
+        validate(instance, schema)
+        for entry, magnitude in zip(instance['data'], magnitudes):
+            assert entry[1] == magnitude
+            assert repr(entry[2]) == repr(float(get_magnitude_in_base_units(decimal.Decimal(magnitude), units)))
+
+        instance = {
+            '_type': 'timeseries',
+            'units': units,
+            'data': [
+                [float(i), magnitude]
+                for i, magnitude in enumerate(magnitudes)
+            ]
+        }
+        validate(instance, schema)
+        for entry, magnitude in zip(instance['data'], magnitudes):
+            assert entry[1] == magnitude
+            assert repr(entry[2]) == repr(float(get_magnitude_in_base_units(decimal.Decimal(magnitude), units)))
+
+
+def test_validate_timeseries_magnitude_in_base_units_tolerance():
+    schema = {
+        'title': 'Example',
+        'type': 'timeseries',
+        'units': 'mbar'
+    }
+    instance = {
+        '_type': 'timeseries',
+        'units': 'mbar',
+        'data': [
+            ["2023-01-02 03:04:05.678900", 1, 100 * (1 + 0.9e-9)],
+            ["2023-01-02 03:04:06.678900", 2, 200 * (1 - 0.9e-9)]
+        ]
+    }
+    validate(instance, schema)
+    instance = {
+        '_type': 'timeseries',
+        'units': 'mbar',
+        'data': [
+            ["2023-01-02 03:04:05.678900", 1, 100],
+            ["2023-01-02 03:04:06.678900", 2, 200 * (1 + 1.1e-9)]
+        ]
+    }
+    with pytest.raises(ValidationError) as exc_info:
+        validate(instance, schema)
+    assert exc_info.value.message == 'magnitude_in_base_units and magnitude do not match'
+
+
+def test_validate_timeseries_invalid_datetime():
+    schema = {
+        'title': 'Example',
+        'type': 'timeseries',
+        'units': 'm'
+    }
+    for invalid_datetime in ['2023-02-30 03:04:06.678900', '2023-01-02 24:00:00.000000', '0000-01-02 03:04:06.678900', '2023-01-02T03:04:06.678900']:
+        instance = {
+            '_type': 'timeseries',
+            'units': 'm',
+            'data': [
+                ["2023-01-02 03:04:05.678900", 1, 1],
+                [invalid_datetime, 2, 2]
+            ]
+        }
+        with pytest.raises(ValidationError) as exc_info:
+            validate(instance, schema)
+        assert exc_info.value.message == 'invalid datetime in timeseries, expected format: YYYY-MM-DD hh:mm:ss.ffffff'
+
+
 def test_validate_file():
     schema = {
         'type': 'file',
@@ -2728,3 +2910,77 @@ def test_validate_file():
         validate(instance, schema, file_names_by_id={})
     with pytest.raises(ValidationError):
         validate(instance, schema, file_names_by_id={1: 'test.png'})
+
+
+def test_compiled_validator_cache():
+    schema = {
+        'title': 'Example',
+        'type': 'object',
+        'properties': {
+            'name': {
+                'title': 'Name',
+                'type': 'text'
+            }
+        },
+        'required': ['name']
+    }
+    validator = get_compiled_validator(schema)
+    assert get_compiled_validator(copy.deepcopy(schema)) is validator
+    instance = {
+        'name': {
+            '_type': 'text',
+            'text': 'Example'
+        }
+    }
+    validator(instance, [], False, False, None, None)
+    # the compiled validator must not be affected by changes to the schema
+    schema['required'].append('other')
+    with pytest.raises(ValidationError):
+        validate(instance, schema)
+    validator(instance, [], False, False, None, None)
+    assert get_compiled_validator(schema) is not validator
+
+
+def test_compiled_validator_invalid_subschema():
+    schema = {
+        'title': 'Example',
+        'type': 'object',
+        'properties': {
+            'name': {
+                'title': 'Name',
+                'type': 'text'
+            },
+            'other': {
+                'title': 'Other'
+            }
+        },
+        'required': ['name']
+    }
+    instance = {
+        'name': {
+            '_type': 'text',
+            'text': 'Example'
+        }
+    }
+    validate(instance, schema)
+    instance['other'] = {
+        '_type': 'text',
+        'text': 'Example'
+    }
+    with pytest.raises(ValidationError) as exc_info:
+        validate(instance, schema)
+    assert exc_info.value.message == 'invalid schema (must contain type) (at other)'
+    assert exc_info.value.paths == [['other']]
+
+
+def test_compiled_validator_equivalence():
+    test_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'test_data'))
+    with open(os.path.join(test_data_dir, 'schemas', 'ombe_measurement.sampledb.json'), encoding='utf-8') as schema_file:
+        schema = json.load(schema_file)
+    with open(os.path.join(test_data_dir, 'objects', 'ombe-1.sampledb.json'), encoding='utf-8') as object_file:
+        data = json.load(object_file)
+    uncompiled_instance = copy.deepcopy(data)
+    _validate(uncompiled_instance, schema, [])
+    compiled_instance = copy.deepcopy(data)
+    validate(compiled_instance, schema)
+    assert compiled_instance == uncompiled_instance
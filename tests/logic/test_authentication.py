@@ -2,11 +2,14 @@
 """
 
 """
+import datetime
 import secrets
 
 import pytest
 
+from sampledb import db
 from sampledb.logic import errors, users, authentication
+from sampledb.models import Authentication
 
 
 @pytest.fixture
@@ -103,3 +106,75 @@ def test_bcrypt_long_passwords():
     assert authentication._validate_password_hash(password=password1, password_hash=password_hash2)
     assert authentication._validate_password_hash(password=password2, password_hash=password_hash1)
     assert authentication._validate_password_hash(password=password2, password_hash=password_hash2)
+
+
+def test_login_via_api_token_uses_verified_token_cache(app, user_id, monkeypatch):
+    authentication._verified_api_token_cache.clear()
+    api_token = secrets.token_hex(32)
+    authentication.add_api_token(user_id, api_token, 'Example API Token')
+    authentication_method_id = authentication.get_api_tokens(user_id)[0].id
+
+    validated_password_hashes = []
+    validate_password_hash = authentication._validate_password_hash
+
+    def _validate_password_hash(password, password_hash):
+        validated_password_hashes.append(password_hash)
+        return validate_password_hash(password, password_hash)
+
+    monkeypatch.setattr(authentication, '_validate_password_hash', _validate_password_hash)
+
+    with app.test_request_context('/api/v1/objects/'):
+        assert authentication.login_via_api_token(api_token).id == user_id
+        assert len(validated_password_hashes) == 1
+        assert authentication.login_via_api_token(api_token).id == user_id
+        assert len(validated_password_hashes) == 1
+        assert authentication.login_via_api_token(api_token[:8] + secrets.token_hex(28)) is None
+        assert len(validated_password_hashes) == 2
+
+        assert authentication.remove_authentication_method(authentication_method_id)
+        assert authentication.login_via_api_token(api_token) is None
+
+
+def test_login_via_api_token_with_disabled_token_cache(app, user_id, monkeypatch):
+    authentication._verified_api_token_cache.clear()
+    app.config['API_TOKEN_CACHE_TIMEOUT'] = 0
+    api_token = secrets.token_hex(32)
+    authentication.add_api_token(user_id, api_token, 'Example API Token')
+
+    validated_password_hashes = []
+    validate_password_hash = authentication._validate_password_hash
+
+    def _validate_password_hash(password, password_hash):
+        validated_password_hashes.append(password_hash)
+        return validate_password_hash(password, password_hash)
+
+    monkeypatch.setattr(authentication, '_validate_password_hash', _validate_password_hash)
+
+    with app.test_request_context('/api/v1/objects/'):
+        assert authentication.login_via_api_token(api_token).id == user_id
+        assert authentication.login_via_api_token(api_token).id == user_id
+        assert len(validated_password_hashes) == 2
+
+
+def test_expired_api_access_tokens(app, user_id):
+    api_access_token_info = authentication.generate_api_access_token(user_id, 'Example API Access Token')
+    authentication_method = Authentication.query.filter_by(user_id=user_id).one()
+    assert authentication_method.expiration_utc_datetime == datetime.datetime.strptime(api_access_token_info['expiration_utc_datetime'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=datetime.timezone.utc)
+
+    with app.test_request_context('/api/v1/objects/'):
+        assert authentication.login_via_api_access_token(api_access_token_info['access_token']).id == user_id
+        assert authentication.login_via_api_refresh_token(api_access_token_info['refresh_token']).id == user_id
+
+    authentication_method.expiration_utc_datetime = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+    db.session.add(authentication_method)
+    db.session.commit()
+
+    with app.test_request_context('/api/v1/objects/'):
+        assert authentication.login_via_api_access_token(api_access_token_info['access_token']) is None
+        assert authentication.login_via_api_refresh_token(api_access_token_info['refresh_token']) is None
+        assert authentication.refresh_api_access_token(api_access_token_info['refresh_token']) is None
+    assert not authentication.get_authentication_methods(user_id, {authentication.AuthenticationType.API_ACCESS_TOKEN})
+    assert Authentication.query.filter_by(user_id=user_id).count() == 1
+
+    authentication.remove_expired_api_access_tokens()
+    assert Authentication.query.filter_by(user_id=user_id).count() == 0
@@ -1,4 +1,7 @@
+import datetime
+
 from sampledb import db
+import sampledb.models
 import sampledb.logic.background_tasks
 import sampledb.logic.background_tasks.core
 import time
@@ -94,3 +97,169 @@ def test_background_tasks_result_exception(enable_background_tasks):
 
     assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED
     assert task.result is None
+
+
+def test_claim_background_tasks(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    # only post tasks without handling them
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+
+    task_ids = []
+    for i in range(3):
+        task_status, task = sampledb.logic.background_tasks.post_background_task('test', {'value': i}, False)
+        assert task_status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.POSTED
+        task_ids.append(task.id)
+
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(2)
+    assert [task.id for task in claimed_tasks] == task_ids[:2]
+    assert all(task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.CLAIMED for task in claimed_tasks)
+
+    # tasks locked by another transaction are skipped
+    with db.engine.connect() as connection:
+        connection.execute(
+            db.select(
+                sampledb.models.BackgroundTask.id
+            ).where(
+                sampledb.models.BackgroundTask.id == task_ids[2]
+            ).with_for_update()
+        )
+        assert sampledb.logic.background_tasks.core._claim_background_tasks(2) == []
+
+    sampledb.logic.background_tasks.core._release_background_tasks(claimed_tasks[1:])
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(5)
+    assert [task.id for task in claimed_tasks] == task_ids[1:]
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(5) == []
+
+
+def test_claim_expired_background_tasks(app, monkeypatch):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+
+    task_ids = [
+        sampledb.logic.background_tasks.post_background_task('test', {'value': i}, False)[1].id
+        for i in range(2)
+    ]
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(2)
+    assert [task.id for task in claimed_tasks] == task_ids
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(2) == []
+
+    # simulate both claims having been renewed last before the claim timeout
+    db.session.execute(
+        db.update(
+            sampledb.models.BackgroundTask
+        ).values(
+            utc_datetime_heartbeat=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=app.config['BACKGROUND_TASK_CLAIM_TIMEOUT'] + 60)
+        )
+    )
+    db.session.commit()
+
+    # the claim of a task handled by this process is renewed
+    monkeypatch.setattr(sampledb.logic.background_tasks.core, 'handled_task_ids', {task_ids[0]})
+    sampledb.logic.background_tasks.core._renew_background_task_claims()
+
+    # the task with the expired claim is claimed again
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(2)
+    assert [task.id for task in claimed_tasks] == [task_ids[1]]
+    assert claimed_tasks[0].status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.CLAIMED
+    assert claimed_tasks[0].attempts == 2
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(2) == []
+
+
+def test_claim_background_tasks_by_priority(app, monkeypatch):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    monkeypatch.setitem(sampledb.logic.background_tasks.core.CONCURRENCY_LIMITS, 'test_limited', 1)
+
+    low_priority_task = sampledb.logic.background_tasks.post_background_task('test', {}, False, priority=-1)[1]
+    limited_tasks = [
+        sampledb.logic.background_tasks.post_background_task('test_limited', {}, False, priority=1)[1]
+        for _ in range(2)
+    ]
+    task = sampledb.logic.background_tasks.post_background_task('test', {}, False)[1]
+    high_priority_task = sampledb.logic.background_tasks.post_background_task('test', {}, False, priority=2)[1]
+
+    # the second limited task may not be claimed until the first one is done
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(3)
+    assert [task.id for task in claimed_tasks] == [high_priority_task.id, limited_tasks[0].id]
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(3)
+    assert [task.id for task in claimed_tasks] == [task.id, low_priority_task.id]
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(3) == []
+
+    metrics = {
+        task_metrics.type: task_metrics
+        for task_metrics in sampledb.logic.background_tasks.get_background_task_metrics()
+    }
+    assert metrics['test'].num_claimed_tasks == 3
+    assert metrics['test'].num_posted_tasks == 0
+    assert metrics['test_limited'].num_claimed_tasks == 1
+    assert metrics['test_limited'].num_posted_tasks == 1
+    assert metrics['test_limited'].max_waiting_time is not None
+    assert metrics['test_limited'].concurrency_limit == 1
+
+    sampledb.logic.background_tasks.core._set_background_task_status_with_result(limited_tasks[0], sampledb.logic.background_tasks.core.BackgroundTaskStatus.DONE, None)
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(3)
+    assert [task.id for task in claimed_tasks] == [limited_tasks[1].id]
+
+
+def test_claim_background_tasks_with_expired_claim_and_concurrency_limit(app, monkeypatch):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+    monkeypatch.setitem(sampledb.logic.background_tasks.core.CONCURRENCY_LIMITS, 'test_limited', 1)
+
+    stale_task = sampledb.logic.background_tasks.post_background_task('test_limited', {}, False, priority=1)[1]
+    other_task = sampledb.logic.background_tasks.post_background_task('test_limited', {}, False)[1]
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(2)
+    assert [task.id for task in claimed_tasks] == [stale_task.id]
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(2) == []
+
+    # the process handling the task stopped without renewing its claim
+    db.session.execute(
+        db.update(
+            sampledb.models.BackgroundTask
+        ).where(
+            sampledb.models.BackgroundTask.id == stale_task.id
+        ).values(
+            utc_datetime_heartbeat=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=app.config['BACKGROUND_TASK_CLAIM_TIMEOUT'] + 60)
+        )
+    )
+    db.session.commit()
+
+    # the stale claim does not count against the concurrency limit
+    with db.engine.begin() as connection:
+        assert sampledb.logic.background_tasks.core._get_num_claimed_tasks_by_type(connection) == {}
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(1)
+    assert [task.id for task in claimed_tasks] == [stale_task.id]
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(1) == []
+
+    sampledb.logic.background_tasks.core._set_background_task_status_with_result(claimed_tasks[0], sampledb.logic.background_tasks.core.BackgroundTaskStatus.DONE, None)
+    claimed_tasks = sampledb.logic.background_tasks.core._claim_background_tasks(1)
+    assert [task.id for task in claimed_tasks] == [other_task.id]
+
+
+def test_retry_background_tasks(app):
+    app.config['ENABLE_BACKGROUND_TASKS'] = True
+    app.config['BACKGROUND_TASK_HANDLER_THREADS'] = 0
+
+    task = sampledb.logic.background_tasks.post_background_task('test', {}, False, max_attempts=2)[1]
+    assert task.attempts == 0
+    assert task.max_attempts == 2
+
+    task = sampledb.logic.background_tasks.core._claim_background_tasks(1)[0]
+    assert task.attempts == 1
+    sampledb.logic.background_tasks.core._set_background_task_status_with_result(task, sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED, None)
+    assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.POSTED
+    assert task.not_before is not None
+
+    # the task may only be retried after a delay
+    assert sampledb.logic.background_tasks.core._claim_background_tasks(1) == []
+    metrics = sampledb.logic.background_tasks.get_background_task_metrics()
+    assert len(metrics) == 1
+    assert metrics[0].num_scheduled_tasks == 1
+    assert metrics[0].num_posted_tasks == 0
+
+    task.not_before = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=1)
+    db.session.commit()
+    task = sampledb.logic.background_tasks.core._claim_background_tasks(1)[0]
+    assert task.attempts == 2
+    sampledb.logic.background_tasks.core._set_background_task_status_with_result(task, sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED, None)
+    assert task.status == sampledb.logic.background_tasks.core.BackgroundTaskStatus.FAILED
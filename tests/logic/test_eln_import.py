@@ -22,6 +22,12 @@ from sampledb import logic, db
 from .test_export import set_up_state
 
 
+def _read_archive_file(file_content):
+    if isinstance(file_content, export.ArchiveFile):
+        return b''.join(file_content.iter_chunks())
+    return file_content
+
+
 @pytest.fixture
 def user(flask_server):
     return logic.users.create_user(
@@ -70,6 +76,7 @@ def eln_zip_bytes_unsigned(user, app):
         zip_bytes = io.BytesIO()
         with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
             for file_name, file_content in binary_archive_files.items():
+                file_content = _read_archive_file(file_content)
                 if file_name == 'sampledb_export/ro-crate-metadata.json.minisig':
                     continue
                 zip_file.writestr(file_name, file_content)
@@ -471,6 +478,7 @@ def test_parse_sampledb_eln_file_ro_crate_metadata_modified(user, app, flask_ser
         zip_bytes = io.BytesIO()
         with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
             for file_name, file_content in binary_archive_files.items():
+                file_content = _read_archive_file(file_content)
                 if file_name == 'sampledb_export/ro-crate-metadata.json':
                     file_content = file_content.decode().replace(
                         '"description": "SampleDB .eln export generated for user #1"',
@@ -878,6 +886,7 @@ def test_parse_sampledb_eln_file_object_modified(user, app, flask_server, modify
         zip_bytes = io.BytesIO()
         with zipfile.ZipFile(zip_bytes, 'w') as zip_file:
             for file_name, file_content in binary_archive_files.items():
+                file_content = _read_archive_file(file_content)
                 if file_name == modify_file:
                     file_content = (file_content.decode()[:-8] + "modified").encode()
                 zip_file.writestr(file_name, file_content)
@@ -9,6 +9,7 @@ import os.path
 import sys
 import tarfile
 import tempfile
+import tracemalloc
 import zipfile
 
 import minisign
@@ -315,6 +316,35 @@ def test_tar_gz_export(user, app):
             assert text_file.read() == b'Example Content'
 
 
+@pytest.mark.parametrize('iter_archive_chunks', [export._iter_zip_archive_chunks, export._iter_tar_gz_archive_chunks])
+def test_streamed_archive_memory_usage(iter_archive_chunks):
+    chunk = b'0123456789abcdef' * (64 * 1024)
+    num_chunks = 64
+
+    def iter_chunks():
+        for _ in range(num_chunks):
+            yield chunk
+
+    archive_files = {
+        'sampledb_export/README.txt': b'Example',
+        'sampledb_export/objects/1/files/0/large.bin': export.ArchiveFile(
+            size=len(chunk) * num_chunks,
+            iter_chunks=iter_chunks
+        )
+    }
+    archive_size = 0
+    tracemalloc.start()
+    try:
+        for archive_chunk in iter_archive_chunks(archive_files):
+            archive_size += len(archive_chunk)
+        _, peak_memory_usage = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert archive_size > 0
+    # the 64 MiB file must not be held in memory at once
+    assert peak_memory_usage < 8 * len(chunk)
+
+
 def test_eln_export(user, app):
     set_up_state(user)
 
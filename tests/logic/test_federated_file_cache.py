@@ -0,0 +1,64 @@
+# coding: utf-8
+"""
+
+"""
+
+import hashlib
+import os
+
+import pytest
+
+from sampledb.logic import federated_file_cache
+
+UUID_1 = '28b8d3ca-fb5f-59d9-8090-bfdbd6d07a71'
+
+
+@pytest.fixture
+def cache_directory(app, tmp_path):
+    app.config['FEDERATED_FILE_CACHE_DIRECTORY'] = str(tmp_path)
+    app.config['FEDERATED_FILE_CACHE_SIZE'] = 10
+    return tmp_path
+
+
+def test_cache_disabled(app):
+    app.config['FEDERATED_FILE_CACHE_DIRECTORY'] = None
+    assert not federated_file_cache.store_file_content(UUID_1, 1, 1, b'content')
+    assert federated_file_cache.get_cached_file_content(UUID_1, 1, 1) is None
+    assert not federated_file_cache.is_file_content_cached(UUID_1, 1, 1)
+
+
+def test_store_and_get_file_content(cache_directory):
+    assert federated_file_cache.get_cached_file_content(UUID_1, 1, 1) is None
+    assert federated_file_cache.store_file_content(UUID_1, 1, 1, b'abc')
+    assert federated_file_cache.is_file_content_cached(UUID_1, 1, 1)
+    assert not federated_file_cache.is_file_content_cached(UUID_1, 1, 2)
+    assert federated_file_cache.get_cached_file_content(UUID_1, 1, 1) == b'abc'
+    assert federated_file_cache.get_cached_file_content(UUID_1, 2, 1) is None
+
+
+def test_validate_file_content_hash(cache_directory):
+    expected_hash = ('sha256', hashlib.sha256(b'abc').hexdigest())
+    assert not federated_file_cache.store_file_content(UUID_1, 1, 1, b'abd', expected_hash)
+    assert federated_file_cache.store_file_content(UUID_1, 1, 1, b'abc', expected_hash)
+    assert federated_file_cache.get_cached_file_content(UUID_1, 1, 1, expected_hash) == b'abc'
+
+    other_hash = ('sha256', hashlib.sha256(b'abd').hexdigest())
+    assert federated_file_cache.get_cached_file_content(UUID_1, 1, 1, other_hash) is None
+    # invalid contents are removed from the cache
+    assert not federated_file_cache.is_file_content_cached(UUID_1, 1, 1)
+
+
+def test_evict_least_recently_used(cache_directory):
+    assert not federated_file_cache.store_file_content(UUID_1, 1, 1, b'12345678901')
+
+    assert federated_file_cache.store_file_content(UUID_1, 1, 1, b'1234')
+    assert federated_file_cache.store_file_content(UUID_1, 1, 2, b'1234')
+    # mark the first file as older, as the modification times may be equal otherwise
+    for file_name in os.listdir(cache_directory):
+        os.utime(cache_directory / file_name, (0, 0))
+    assert federated_file_cache.get_cached_file_content(UUID_1, 1, 1) == b'1234'
+    assert federated_file_cache.store_file_content(UUID_1, 1, 3, b'1234')
+
+    assert federated_file_cache.is_file_content_cached(UUID_1, 1, 1)
+    assert not federated_file_cache.is_file_content_cached(UUID_1, 1, 2)
+    assert federated_file_cache.is_file_content_cached(UUID_1, 1, 3)
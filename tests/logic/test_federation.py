@@ -10,6 +10,7 @@ from copy import deepcopy
 import datetime
 import flask
 import pytest
+import requests
 
 import sampledb.logic.components
 from sampledb import logic, db
@@ -3809,37 +3810,37 @@ def test_update_shares(component, users, groups, projects):
 
     def mock_put(*args, **kwargs):
         request_data.append((args, kwargs))
+        response = requests.Response()
+        response.status_code = 204
+        return response
 
     backup_put = sampledb.logic.federation.update.put
     sampledb.logic.federation.update.put = mock_put
 
     update_shares(component, updates)
     for args, kwargs in request_data:
-        if 'json' in kwargs:
-            assert sampledb.logic.shares.parse_object_share_import_status(kwargs['json']) is not None
-        if 'json' in kwargs and 'utc_datetime' in kwargs['json']:
-            utc_datetime_str = kwargs['json']['utc_datetime']
+        for import_status in kwargs['json'].values():
+            assert sampledb.logic.shares.parse_object_share_import_status(import_status) is not None
+            utc_datetime_str = import_status['utc_datetime']
             datetime.datetime.strptime(utc_datetime_str, '%Y-%m-%d %H:%M:%S').replace(tzinfo=datetime.timezone.utc)
-            kwargs['json']['utc_datetime'] = None
+            import_status['utc_datetime'] = None
     assert request_data == [
         ((), {
-            'endpoint': '/federation/v1/shares/objects/1/import_status',
+            'endpoint': '/federation/v1/shares/objects/import_status',
             'component': component,
             'json': {
-                'notes': [],
-                'object_id': 1,
-                'success': True,
-                'utc_datetime': None
-            }
-        }),
-        ((), {
-            'endpoint': '/federation/v1/shares/objects/2/import_status',
-            'component': component,
-            'json': {
-                'notes': [],
-                'object_id': 2,
-                'success': True,
-                'utc_datetime': None
+                '1': {
+                    'notes': [],
+                    'object_id': 1,
+                    'success': True,
+                    'utc_datetime': None
+                },
+                '2': {
+                    'notes': [],
+                    'object_id': 2,
+                    'success': True,
+                    'utc_datetime': None
+                }
             }
         })
     ]
@@ -3905,6 +3906,47 @@ def test_update_shares(component, users, groups, projects):
     assert project_permissions[local_project3.id] == Permissions.GRANT
 
 
+def test_update_shares_single_transaction(component, monkeypatch):
+    user1 = deepcopy(USER_DATA)
+    user1['user_id'] = 1
+    object1 = deepcopy(OBJECT_DATA)
+    object1['object_id'] = 1
+    object1['versions'][0]['version_id'] = 0
+    object1['versions'][0]['user']['user_id'] = 1
+    object2 = deepcopy(OBJECT_DATA)
+    object2['object_id'] = 2
+    object2['versions'][0]['version_id'] = 0
+    object2['versions'][0]['user']['user_id'] = 1
+    updates = {
+        'objects': [object1, object2],
+        'users': [user1],
+        'actions': [ACTION_DATA]
+    }
+
+    import_object = sampledb.logic.federation.update.import_object
+
+    def failing_import_object(object_data, *args, **kwargs):
+        if object_data['fed_object_id'] == 2:
+            raise errors.InvalidDataExportError()
+        return import_object(object_data, *args, **kwargs)
+
+    monkeypatch.setattr(sampledb.logic.federation.update, 'import_object', failing_import_object)
+    with pytest.raises(errors.InvalidDataExportError):
+        update_shares(component, updates)
+
+    # neither the first object nor the entities it depends on were imported
+    with pytest.raises(errors.ObjectDoesNotExistError):
+        get_fed_object(1, component.id)
+    assert len(User.query.all()) == 0
+    assert len(Action.query.all()) == 0
+
+    monkeypatch.setattr(sampledb.logic.federation.update, 'import_object', import_object)
+    update_shares(component, updates)
+    _check_object(object1, component)
+    _check_object(object2, component)
+    _check_user(user1)
+
+
 def test_update_users(component):
     user1 = deepcopy(USER_DATA)
     user1['user_id'] = 1
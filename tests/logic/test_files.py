@@ -4,11 +4,15 @@
 """
 
 import datetime
+import hashlib
+import io
 import os
 import time
 
 import numpy as np
 import pytest
+import requests
+from PIL import Image
 
 import sampledb
 from sampledb.models import User, UserType, Action, Object
@@ -232,6 +236,42 @@ def test_hide_file(user: User, object: Object):
     assert file.hide_reason == "Reason"
 
 
+def test_get_files_for_objects(monkeypatch, user: User, action: Action, object: Object):
+    other_object = objects.create_object(user_id=user.id, action_id=action.id, data={'name': {'_type': 'text', 'text': 'Object'}})
+    files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(b"1"))
+    files.create_url_file(object.object_id, user.id, "http://localhost")
+    files.create_database_file(object_id=other_object.object_id, user_id=user.id, file_name="other.txt", save_content=lambda stream: stream.write(b"2"))
+    files.update_file_information(object.object_id, 0, user.id, title="Title 1", description="Description 1")
+    files.update_file_information(object.object_id, 0, user.id, title="Title 2", description="Description 2")
+    files.update_file_information(object.object_id, 1, user.id, title="", description="", url="http://example.com")
+    files.hide_file(other_object.object_id, 0, user.id, "Reason")
+
+    files_by_object_id = files.get_files_for_objects([object.object_id, other_object.object_id, object.object_id + 100])
+    assert set(files_by_object_id) == {object.object_id, other_object.object_id, object.object_id + 100}
+    assert files_by_object_id[object.object_id + 100] == []
+    database_file, url_file = files_by_object_id[object.object_id]
+    other_file, = files_by_object_id[other_object.object_id]
+
+    # the file infos are loaded in bulk, so neither log entries nor users are queried separately
+    monkeypatch.setattr(sampledb.models.FileLogEntry, 'query', None)
+    monkeypatch.setattr(sampledb.logic.users, 'get_user', None)
+    assert database_file.title == "Title 2"
+    assert database_file.description == "Description 2"
+    assert not database_file.is_hidden
+    assert database_file.hide_reason is None
+    assert database_file.uploader.id == user.id
+    assert url_file.url == "http://example.com"
+    assert url_file.title == "http://localhost"
+    assert url_file.description is None
+    assert other_file.title == "other.txt"
+    assert other_file.description is None
+    assert other_file.is_hidden
+    assert other_file.hide_reason == "Reason"
+    monkeypatch.undo()
+
+    assert [file.title for file in files.get_files_for_object(object.object_id)] == ["Title 2", "http://localhost"]
+
+
 def test_create_fed_url_file(object, user, component):
     dt = datetime.datetime.fromtimestamp(1430674212).replace(tzinfo=datetime.timezone.utc)
     assert len(files.get_files_for_object(object_id=object.object_id)) == 0
@@ -474,3 +514,125 @@ def test_deferred_attribute_performance(user: User, object: Object):
     assert logic_without_data_access < logic_with_data_access / 2
     assert np.isclose(logic_with_data_access, models_with_data_access, rtol=1)
     assert np.isclose(logic_without_data_access, models_without_data_access, rtol=2)
+
+
+def test_filesystem_file_content_storage(app, tmp_path, user: User, object: Object):
+    app.config['FILE_CONTENT_STORAGE'] = 'filesystem'
+    app.config['FILE_CONTENT_DIRECTORY'] = str(tmp_path)
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(b"content"))
+    content_key = file.hash.hexdigest
+    assert file.content_storage == 'filesystem'
+    assert file.content_key == content_key
+    assert os.path.isfile(tmp_path / content_key[:2] / content_key[2:4] / content_key)
+    assert sampledb.models.files.File.query.filter_by(object_id=object.object_id, id=file.id).first().binary_data is None
+
+    # the storage can be changed without affecting existing files
+    app.config['FILE_CONTENT_STORAGE'] = 'database'
+    file = files.get_file_for_object(object.object_id, file.id)
+    with file.open() as f:
+        assert f.read() == b"content"
+    assert file.binary_data_size == 7
+    assert b''.join(file.iter_binary_data(chunk_size=3)) == b"content"
+    assert file.binary_data == b"content"
+
+
+def test_move_file_contents_to_storage(app, tmp_path, user: User, object: Object):
+    for i in range(3):
+        files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(f"content {i}".encode('utf-8')))
+    files.create_url_file(object_id=object.object_id, user_id=user.id, url='https://example.com/file')
+    app.config['FILE_CONTENT_DIRECTORY'] = str(tmp_path)
+    assert files.move_file_contents_to_storage('filesystem', batch_size=2) == 3
+    assert files.move_file_contents_to_storage('filesystem', batch_size=2) == 0
+    for i, file in enumerate(files.get_files_for_object(object.object_id)[:3]):
+        assert file.content_storage == 'filesystem'
+        with file.open() as f:
+            assert f.read() == f"content {i}".encode('utf-8')
+
+    app.config['FILE_CONTENT_DIRECTORY'] = None
+    with pytest.raises(errors.FileContentStorageError):
+        files.move_file_contents_to_storage('filesystem')
+
+
+def test_s3_file_content_storage(app, monkeypatch, user: User, object: Object):
+    stored_objects = {}
+
+    def mock_request(method, url, headers, timeout, data=None, stream=False):
+        assert headers['authorization'].startswith('AWS4-HMAC-SHA256 Credential=access_key/')
+        assert url.startswith('http://minio.example.com:9000/sampledb/')
+        response = requests.Response()
+        response.status_code = 200
+        if method == 'PUT':
+            content = data.read()
+            assert hashlib.sha256(content).hexdigest() == headers['x-amz-content-sha256']
+            stored_objects[url] = content
+        elif url not in stored_objects:
+            response.status_code = 404
+        elif method == 'HEAD':
+            response.headers['Content-Length'] = str(len(stored_objects[url]))
+        else:
+            response.raw = io.BytesIO(stored_objects[url])
+        return response
+
+    monkeypatch.setattr(requests, 'request', mock_request)
+    app.config['FILE_CONTENT_STORAGE'] = 's3'
+    app.config['FILE_CONTENT_S3_ENDPOINT_URL'] = 'http://minio.example.com:9000'
+    app.config['FILE_CONTENT_S3_BUCKET'] = 'sampledb'
+    app.config['FILE_CONTENT_S3_ACCESS_KEY_ID'] = 'access_key'
+    app.config['FILE_CONTENT_S3_SECRET_ACCESS_KEY'] = 'secret_key'
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(b"content"))
+    assert file.content_storage == 's3'
+    assert list(stored_objects) == [f'http://minio.example.com:9000/sampledb/{file.content_key}']
+    file = files.get_file_for_object(object.object_id, file.id)
+    assert file.binary_data_size == 7
+    with file.open() as f:
+        assert f.read() == b"content"
+
+
+def _get_png_image_data(size, mode='RGB'):
+    image_data = io.BytesIO()
+    Image.new(mode, size, 'red').save(image_data, format='PNG')
+    return image_data.getvalue()
+
+
+def test_generate_preview_image(app, user: User, object: Object):
+    image_data = _get_png_image_data((2000, 1000))
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.png", save_content=lambda stream: stream.write(image_data))
+    assert file.preview_image_mime_type == ''
+    file = files.get_file_for_object(object.object_id, file.id)
+    assert file.preview_image_mime_type == 'image/jpeg'
+    preview_image = Image.open(io.BytesIO(file.preview_image_binary_data))
+    assert preview_image.size == (files.PREVIEW_IMAGE_MAX_SIZE, files.PREVIEW_IMAGE_MAX_SIZE // 2)
+
+    # images with transparency are stored as PNG
+    image_data = _get_png_image_data((100, 100), mode='RGBA')
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.png", save_content=lambda stream: stream.write(image_data))
+    file = files.get_file_for_object(object.object_id, file.id)
+    assert file.preview_image_mime_type == 'image/png'
+    assert Image.open(io.BytesIO(file.preview_image_binary_data)).size == (100, 100)
+
+    # existing preview images are not replaced
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.png", save_content=lambda stream: stream.write(image_data), preview_image_binary_data=b'preview', preview_image_mime_type='image/png')
+    assert not files.generate_preview_image(object.object_id, file.id)
+    assert files.get_file_for_object(object.object_id, file.id).preview_image_binary_data == b'preview'
+
+    # files which are not images are skipped
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.txt", save_content=lambda stream: stream.write(image_data))
+    assert not files.generate_preview_image(object.object_id, file.id)
+    file = files.create_database_file(object_id=object.object_id, user_id=user.id, file_name="test.png", save_content=lambda stream: stream.write(b"invalid"))
+    assert not files.generate_preview_image(object.object_id, file.id)
+    assert files.get_file_for_object(object.object_id, file.id).preview_image_mime_type == ''
+
+    with pytest.raises(errors.FileDoesNotExistError):
+        files.generate_preview_image(object.object_id, 100)
+
+
+def test_generate_missing_preview_images(app, user: User, object: Object):
+    app.config['GENERATE_PREVIEW_IMAGES'] = False
+    image_data = _get_png_image_data((100, 100))
+    for file_name in ["test.png", "test.txt", "test.png", "test.png"]:
+        files.create_database_file(object_id=object.object_id, user_id=user.id, file_name=file_name, save_content=lambda stream: stream.write(image_data))
+    files.create_url_file(object_id=object.object_id, user_id=user.id, url='https://example.com/test.png')
+    assert all(not file.preview_image_mime_type for file in files.get_files_for_object(object.object_id))
+    assert files.generate_missing_preview_images(batch_size=2) == 3
+    assert files.generate_missing_preview_images(batch_size=2) == 0
+    assert [file.preview_image_mime_type for file in files.get_files_for_object(object.object_id)] == ['image/jpeg', '', 'image/jpeg', 'image/jpeg', None]
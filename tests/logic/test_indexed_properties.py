@@ -0,0 +1,174 @@
+# coding: utf-8
+"""
+
+"""
+
+import datetime
+
+import flask
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import sampledb
+from sampledb import db
+from sampledb.logic import datatypes, errors, indexed_properties, where_filters
+from sampledb.models import IndexedPropertyType, Objects
+
+
+@pytest.fixture
+def user():
+    return sampledb.logic.users.create_user(name="User", email="example@example.com", type=sampledb.models.UserType.PERSON)
+
+
+@pytest.fixture
+def action():
+    return sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'temperature': {
+                    'title': 'Temperature',
+                    'type': 'quantity',
+                    'units': 'K'
+                },
+                'measurements': {
+                    'title': 'Measurements',
+                    'type': 'array',
+                    'items': {
+                        'title': 'Measurement',
+                        'type': 'object',
+                        'properties': {
+                            'started': {
+                                'title': 'Started',
+                                'type': 'datetime'
+                            }
+                        }
+                    }
+                }
+            },
+            'required': ['name']
+        }
+    )
+
+
+def _index_exists(index_name):
+    return bool(db.session.execute(db.text("""
+        SELECT COUNT(*)
+        FROM pg_indexes
+        WHERE tablename = 'objects_current' AND indexname = :index_name
+    """), {'index_name': index_name}).scalar())
+
+
+def _uses_index(filter, index_name):
+    statement = db.select(Objects.object_id_column).where(filter).compile(dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True})
+    db.session.execute(db.text("SET LOCAL enable_seqscan = off"))
+    query_plan = '\n'.join(db.session.execute(db.text(f"EXPLAIN {statement}")).scalars().all())
+    db.session.rollback()
+    return index_name in query_plan
+
+
+def test_create_indexed_property(action):
+    assert indexed_properties.get_indexed_properties() == []
+    indexed_property = indexed_properties.create_indexed_property(action.id, ['temperature'], IndexedPropertyType.QUANTITY)
+    assert indexed_property.action_id == action.id
+    assert indexed_property.property_path == ('temperature',)
+    assert indexed_property.type == IndexedPropertyType.QUANTITY
+    assert indexed_properties.get_indexed_property(indexed_property.id) == indexed_property
+    assert indexed_properties.get_indexed_properties() == [indexed_property]
+    assert indexed_properties.get_indexed_properties(action.id) == [indexed_property]
+    assert _index_exists(indexed_property.index_name)
+
+    with pytest.raises(errors.IndexedPropertyAlreadyExistsError):
+        indexed_properties.create_indexed_property(action.id, ['temperature'], IndexedPropertyType.QUANTITY)
+    assert indexed_properties.get_indexed_properties() == [indexed_property]
+
+
+def test_create_invalid_indexed_property(action):
+    with pytest.raises(errors.ActionDoesNotExistError):
+        indexed_properties.create_indexed_property(action.id + 1, ['temperature'], IndexedPropertyType.QUANTITY)
+    for property_path, type in [
+        ([], IndexedPropertyType.QUANTITY),
+        (['temperature'], IndexedPropertyType.DATETIME),
+        (['name'], IndexedPropertyType.QUANTITY),
+        (['unknown'], IndexedPropertyType.QUANTITY),
+        (['measurements', 'started'], IndexedPropertyType.DATETIME),
+        (['measurements', 0, "started'"], IndexedPropertyType.DATETIME),
+    ]:
+        with pytest.raises(errors.InvalidIndexedPropertyError):
+            indexed_properties.create_indexed_property(action.id, property_path, type)
+    assert indexed_properties.get_indexed_properties() == []
+
+
+def test_delete_indexed_property(action):
+    other_action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema=action.schema
+    )
+    indexed_property = indexed_properties.create_indexed_property(action.id, ['temperature'], IndexedPropertyType.QUANTITY)
+    other_indexed_property = indexed_properties.create_indexed_property(other_action.id, ['temperature'], IndexedPropertyType.QUANTITY)
+    assert indexed_property.index_name == other_indexed_property.index_name
+
+    indexed_properties.delete_indexed_property(indexed_property.id)
+    assert indexed_properties.get_indexed_properties() == [other_indexed_property]
+    assert _index_exists(indexed_property.index_name)
+
+    indexed_properties.delete_indexed_property(other_indexed_property.id)
+    assert indexed_properties.get_indexed_properties() == []
+    assert not _index_exists(indexed_property.index_name)
+
+    with pytest.raises(errors.IndexedPropertyDoesNotExistError):
+        indexed_properties.delete_indexed_property(indexed_property.id)
+
+
+def test_search_indexed_quantity(user, action):
+    for temperature in [10, 20, 30]:
+        sampledb.logic.objects.create_object(action_id=action.id, data={
+            'name': {'_type': 'text', 'text': f'Object at {temperature} K'},
+            'temperature': {
+                '_type': 'quantity',
+                'units': 'K',
+                'dimensionality': '[temperature]',
+                'magnitude_in_base_units': temperature
+            }
+        }, user_id=user.id)
+    data = db.literal_column('data').cast(postgresql.JSONB)
+    filter = where_filters.quantity_greater_than_equals(data['temperature'], datatypes.Quantity(20, 'K'))
+    index_name = indexed_properties.get_index_name(['temperature'], IndexedPropertyType.QUANTITY)
+    assert not _uses_index(filter, index_name)
+
+    indexed_properties.create_indexed_property(action.id, ['temperature'], IndexedPropertyType.QUANTITY)
+    assert _uses_index(filter, index_name)
+    assert _uses_index(where_filters.quantity_less_than(data['temperature'], datatypes.Quantity(20, 'K')), index_name)
+    assert _uses_index(where_filters.quantity_between(data['temperature'], datatypes.Quantity(15, 'K'), datatypes.Quantity(25, 'K')), index_name)
+    objects = sampledb.logic.objects.get_objects(filter_func=lambda data: where_filters.quantity_greater_than_equals(data['temperature'], datatypes.Quantity(20, 'K')))
+    assert sorted(object.data['temperature']['magnitude_in_base_units'] for object in objects) == [20, 30]
+
+
+def test_search_indexed_datetime(user, action):
+    for day in [1, 2, 3]:
+        sampledb.logic.objects.create_object(action_id=action.id, data={
+            'name': {'_type': 'text', 'text': f'Object from day {day}'},
+            'measurements': [
+                {
+                    'started': {
+                        '_type': 'datetime',
+                        'utc_datetime': f'2024-01-0{day} 12:00:00'
+                    }
+                }
+            ]
+        }, user_id=user.id)
+    data = db.literal_column('data').cast(postgresql.JSONB)
+    index_name = indexed_properties.get_index_name(['measurements', 0, 'started'], IndexedPropertyType.DATETIME)
+    indexed_properties.create_indexed_property(action.id, ['measurements', 0, 'started'], IndexedPropertyType.DATETIME)
+    with flask.current_app.test_request_context():
+        filter = where_filters.datetime_greater_than(data['measurements'][0]['started'], datetime.datetime(2024, 1, 1))
+        assert _uses_index(filter, index_name)
+        assert _uses_index(where_filters.datetime_between(data['measurements'][0]['started'], datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 2)), index_name)
+        objects = sampledb.logic.objects.get_objects(filter_func=lambda data: where_filters.datetime_greater_than(data['measurements'][0]['started'], datetime.datetime(2024, 1, 1)))
+    assert sorted(object.data['name']['text'] for object in objects) == ['Object from day 2', 'Object from day 3']
@@ -811,3 +811,72 @@ def test_get_user_permissions_for_multiple_objects(users, instrument_action_obje
 
     sampledb.logic.projects.update_group_project_permissions(project.id, group.id, Permissions.READ)
     assert sampledb.logic.object_permissions.get_user_permissions_for_multiple_objects(user_id, [object_id]) == {object_id: Permissions.READ}
+
+
+def test_effective_object_permissions(users, instrument, instrument_action_object, independent_action_object):
+    user_id = users[0].id
+    object_id = independent_action_object.object_id
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    group_id = sampledb.logic.groups.create_group("Example Group", "", users[1].id).id
+    object_permissions.set_group_object_permissions(group_id=group_id, object_id=object_id, permissions=Permissions.WRITE)
+    sampledb.logic.groups.add_user_to_group(group_id=group_id, user_id=user_id)
+    assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    project_id = sampledb.logic.projects.create_project("Example Project", "", users[1].id).id
+    object_permissions.set_project_object_permissions(project_id=project_id, object_id=object_id, permissions=Permissions.GRANT)
+    sampledb.logic.projects.add_group_to_project(project_id, group_id, Permissions.GRANT)
+    assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.GRANT
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    sampledb.logic.projects.delete_project(project_id)
+    assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    sampledb.logic.groups.remove_user_from_group(group_id=group_id, user_id=user_id)
+    assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.NONE
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    sampledb.logic.instruments.add_instrument_responsible_user(instrument.id, user_id)
+    assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=instrument_action_object.object_id) == Permissions.GRANT
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    object_permissions.set_object_permissions_for_all_users(object_id=object_id, permissions=Permissions.READ)
+    assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.READ
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+
+def test_effective_object_permissions_for_statements(users, instrument, independent_action, objects):
+    user_id = users[0].id
+    object_ids = [object.object_id for object in objects]
+    for object_id in object_ids:
+        object_permissions.set_user_object_permissions(user_id=user_id, object_id=object_id, permissions=Permissions.WRITE)
+        assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.WRITE
+
+    # a single statement changing the permissions of multiple objects
+    sampledb.db.session.execute(sampledb.db.delete(UserObjectPermissions).where(UserObjectPermissions.user_id == user_id))
+    sampledb.db.session.commit()
+    for object_id in object_ids:
+        assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.NONE
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+    sampledb.logic.instruments.add_instrument_responsible_user(instrument.id, user_id)
+    sampledb.db.session.execute(sampledb.db.update(Action).where(Action.id == independent_action.id).values(instrument_id=instrument.id))
+    sampledb.db.session.commit()
+    for object_id in object_ids:
+        assert object_permissions.get_user_object_permissions(user_id=user_id, object_id=object_id) == Permissions.GRANT
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+
+def test_rebuild_effective_object_permissions(user, independent_action_object):
+    object_id = independent_action_object.object_id
+    object_permissions.set_user_object_permissions(user_id=user.id, object_id=object_id, permissions=Permissions.WRITE)
+    sampledb.db.session.execute(sampledb.db.text("DELETE FROM effective_object_permissions"))
+    sampledb.db.session.commit()
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() > 0
+    assert object_permissions.get_user_object_permissions(user_id=user.id, object_id=object_id) == Permissions.NONE
+
+    object_permissions.rebuild_effective_object_permissions()
+    assert object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+    assert object_permissions.get_user_object_permissions(user_id=user.id, object_id=object_id) == Permissions.WRITE
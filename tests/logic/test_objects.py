@@ -131,6 +131,107 @@ def test_create_object_with_missing_user(user, action) -> None:
         sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id + 1)
 
 
+def test_create_object_batch(user, user2) -> None:
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Object Name',
+                    'type': 'text'
+                },
+                'tags': {
+                    'title': 'Tags',
+                    'type': 'tags'
+                }
+            },
+            'required': ['name']
+        }
+    )
+    sampledb.logic.objects.create_object(action_id=action.id, user_id=user.id, data={
+        'name': {
+            '_type': 'text',
+            'text': 'Example'
+        },
+        'tags': {
+            '_type': 'tags',
+            'tags': ['existing']
+        }
+    })
+    data_sequence = [
+        {
+            'name': {
+                '_type': 'text',
+                'text': f'Example {i}'
+            },
+            'tags': {
+                '_type': 'tags',
+                'tags': ['existing', 'new'] if i % 2 else ['existing']
+            }
+        }
+        for i in range(5)
+    ]
+    objects = sampledb.logic.objects.create_object_batch(
+        action_id=action.id,
+        data_sequence=data_sequence,
+        user_id=user.id,
+        permissions_for_all_users=sampledb.models.Permissions.READ
+    )
+    assert [object.data for object in objects] == data_sequence
+    assert [object.id for object in objects] == sorted(object.id for object in objects)
+    batch_object_ids = [object.id for object in objects]
+    for object in objects:
+        assert object == sampledb.logic.objects.get_object(object.id)
+        assert object.schema == action.schema
+        assert sampledb.logic.object_permissions.get_object_permissions_for_users(object.id) == {
+            user.id: sampledb.models.Permissions.GRANT
+        }
+        assert sampledb.logic.object_permissions.get_object_permissions_for_all_users(object.id) == sampledb.models.Permissions.READ
+        log_entries = sampledb.logic.object_log.get_object_log_entries(object.id)
+        assert len(log_entries) == 1
+        assert log_entries[0].type == sampledb.models.ObjectLogEntryType.CREATE_BATCH
+        assert log_entries[0].data == {'object_ids': batch_object_ids}
+    assert {
+        tag.name: tag.uses
+        for tag in sampledb.logic.tags.get_tags()
+    } == {
+        'existing': 6,
+        'new': 2
+    }
+    user_log_entries = sampledb.logic.user_log.get_user_log_entries(user.id)
+    assert user_log_entries[0].type == sampledb.models.UserLogEntryType.CREATE_BATCH
+    assert user_log_entries[0].data == {'object_ids': batch_object_ids}
+
+    objects = sampledb.logic.objects.create_object_batch(
+        action_id=action.id,
+        data_sequence=data_sequence[:2],
+        user_id=user2.id,
+        copy_permissions_object_id=objects[0].id
+    )
+    for object in objects:
+        assert sampledb.logic.object_permissions.get_object_permissions_for_users(object.id) == {
+            user.id: sampledb.models.Permissions.GRANT,
+            user2.id: sampledb.models.Permissions.GRANT
+        }
+        assert sampledb.logic.object_permissions.get_object_permissions_for_all_users(object.id) == sampledb.models.Permissions.READ
+
+    num_objects = len(sampledb.logic.objects.get_objects())
+    with pytest.raises(sampledb.logic.errors.ValidationError):
+        sampledb.logic.objects.create_object_batch(
+            action_id=action.id,
+            data_sequence=data_sequence + [{}],
+            user_id=user.id
+        )
+    assert len(sampledb.logic.objects.get_objects()) == num_objects
+    assert sampledb.logic.objects.create_object_batch(
+        action_id=action.id,
+        data_sequence=[],
+        user_id=user.id
+    ) == []
+
+
 def test_update_object(user, action, user2) -> None:
     data = {
         'name': {
@@ -208,6 +208,33 @@ def test_find_by_special_characters(user, special_character) -> None:
     for object in objects:
         assert data['name']['text'] in object.data['name']['text']
 
+def test_find_by_simple_text_in_search_cache(user, action) -> None:
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Name'
+        },
+        'tags': {
+            '_type': 'tags',
+            'tags': ['example', 'other']
+        }
+    }
+    object = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    assert sampledb.models.versioned_json_object_tables.get_search_cache(data) == 'Name\nexample\nother'
+
+    for query_string, object_ids in [
+        ('name', [object.id]),
+        ('exam', [object.id]),
+        ('other', [object.id]),
+        ('tags', []),
+        ('text', []),
+    ]:
+        filter_func, search_tree, use_advanced_search = sampledb.logic.object_search.generate_filter_func(query_string, use_advanced_search=False)
+        assert not use_advanced_search
+        filter_func, search_notes = sampledb.logic.object_search.wrap_filter_func(filter_func)
+        assert [found_object.id for found_object in sampledb.logic.objects.get_objects(filter_func=filter_func)] == object_ids
+
+
 def test_find_by_tag(user, action) -> None:
     data = {
         'name': {
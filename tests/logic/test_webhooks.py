@@ -3,9 +3,11 @@
 
 """
 from datetime import datetime, timezone
+import json
 
 import flask
 import pytest
+import requests
 import sampledb
 import sampledb.logic
 import sampledb.models
@@ -177,3 +179,57 @@ def test_remove_webhook(user1, user2):
         webhooks.get_webhook(wh2.id)
     with pytest.raises(errors.WebhookDoesNotExistError):
         webhooks.remove_webhook(wh2.id + 1)
+
+
+class _FakeHTTPSession:
+    def __init__(self, failing_urls=()):
+        self.requests = []
+        self.failing_urls = set(failing_urls)
+
+    def post(self, url, data, timeout, headers):
+        if url in self.failing_urls:
+            raise requests.ConnectionError()
+        self.requests.append((url, json.loads(data), headers))
+
+
+def test_send_data_to_webhooks(user1, monkeypatch):
+    http_session = _FakeHTTPSession(failing_urls={'https://example.org'})
+    monkeypatch.setattr(webhooks, '_get_http_session', lambda: http_session)
+    wh1 = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url='https://example.com')
+    wh2 = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url='https://example.org')
+    failed_deliveries = webhooks.send_data_to_webhooks([
+        (wh1, {'value': 1}),
+        (wh2, {'value': 2})
+    ])
+    assert failed_deliveries == [(wh2, {'value': 2})]
+    assert [(url, data) for url, data, headers in http_session.requests] == [('https://example.com', {'value': 1})]
+    assert http_session.requests[0][2]['X-Sampledb-Signature'] == wh1.get_signature(json.dumps({'value': 1}))
+    assert webhooks.get_webhook(wh1.id).last_contact is not None
+    assert webhooks.get_webhook(wh2.id).last_contact is None
+
+
+def test_send_webhook_events(user1, monkeypatch):
+    http_session = _FakeHTTPSession()
+    monkeypatch.setattr(webhooks, '_get_http_session', lambda: http_session)
+    webhook = webhooks.create_webhook(type=WebhookType.OBJECT_LOG, user_id=user1.id, target_url='https://example.com', batch_delivery=True)
+    assert webhook.batch_delivery
+    assert webhooks.send_webhook_events(webhook.id) == 0
+    for i in range(3):
+        webhooks.add_webhook_event(webhook.id, {'value': i})
+    assert webhooks.send_webhook_events(webhook.id, max_num_events=2) == 2
+    assert webhooks.send_webhook_events(webhook.id, max_num_events=2) == 1
+    assert webhooks.send_webhook_events(webhook.id, max_num_events=2) == 0
+    assert [data for url, data, headers in http_session.requests] == [
+        [{'value': 0}, {'value': 1}],
+        [{'value': 2}]
+    ]
+    assert [headers['X-Sampledb-Event-Count'] for url, data, headers in http_session.requests] == ['2', '1']
+
+    # events are kept if they could not be sent
+    http_session.failing_urls.add('https://example.com')
+    webhooks.add_webhook_event(webhook.id, {'value': 3})
+    with pytest.raises(errors.WebhookConnectionException):
+        webhooks.send_webhook_events(webhook.id)
+    http_session.failing_urls.clear()
+    assert webhooks.send_webhook_events(webhook.id) == 1
+    assert http_session.requests[-1][1] == [{'value': 3}]
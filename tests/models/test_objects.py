@@ -14,7 +14,8 @@ from sqlalchemy.orm import sessionmaker, declarative_base
 
 import sampledb
 import sampledb.utils
-from sampledb.models.versioned_json_object_tables import VersionedJSONSerializableObjectTables, Object
+from sampledb.logic import object_sorting
+from sampledb.models.versioned_json_object_tables import VersionedJSONSerializableObjectTables, Object, calculate_json_delta, apply_json_delta, get_schema_hash
 
 __author__ = 'Florian Rhiem <f.rhiem@fz-juelich.de>'
 
@@ -151,6 +152,34 @@ def test_get_current_objects(session: sessionmaker(), objects: VersionedJSONSeri
     assert current_objects == [object1, object2] or current_objects == [object2, object1]
 
 
+def test_get_current_objects_pagination(session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(id=0, name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    object_ids = [
+        objects.create_object(action_id=action.id, data={}, schema={}, user_id=user.id).object_id
+        for _ in range(6)
+    ]
+    num_objects_found = []
+    assert [object.object_id for object in objects.get_current_objects(limit=2, after_object_id=object_ids[4], num_objects_found=num_objects_found)] == [object_ids[3], object_ids[2]]
+    assert num_objects_found == [6]
+    assert [object.object_id for object in objects.get_current_objects(limit=2, before_object_id=object_ids[1])] == [object_ids[3], object_ids[2]]
+    assert [object.object_id for object in objects.get_current_objects(after_object_id=object_ids[4], before_object_id=object_ids[1])] == [object_ids[3], object_ids[2]]
+
+    ascending_object_id = object_sorting.ascending(object_sorting.object_id())
+    assert [object.object_id for object in objects.get_current_objects(limit=2, after_object_id=object_ids[1], sorting_func=ascending_object_id)] == [object_ids[2], object_ids[3]]
+    assert [object.object_id for object in objects.get_current_objects(limit=2, before_object_id=object_ids[4], sorting_func=ascending_object_id)] == [object_ids[2], object_ids[3]]
+
+    with pytest.raises(ValueError):
+        objects.get_current_objects(after_object_id=object_ids[1], sorting_func=object_sorting.ascending(object_sorting.last_modification_date()))
+
+    num_objects_found = []
+    assert len(objects.get_current_objects(limit=2, num_objects_found=num_objects_found, estimate_num_objects_found=True)) == 2
+    assert len(num_objects_found) == 1 and num_objects_found[0] >= 0
+
+
 def test_get_current_objects_action_filter(session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
     user = User(id=0, name="User")
     session.add(user)
@@ -355,3 +384,205 @@ def test_get_previous_subversion(session: sessionmaker(), objects: VersionedJSON
     previous_subversion = objects.get_previous_subversion(object_id=object.object_id, version_id=object.version_id)
     assert previous_subversion is not None
     assert previous_subversion.utc_datetime == v1_datetime
+
+
+@pytest.fixture
+def delta_encoded_objects(engine):
+    objects = VersionedJSONSerializableObjectTables(
+        'test_objects3',
+        user_id_column=User.id,
+        action_id_column=Action.id,
+        action_schema_column=Action.schema,
+        delta_encoding_snapshot_interval=3
+    )
+    objects.bind = engine
+
+    # create the object tables
+    objects.metadata.create_all(engine)
+    return objects
+
+
+@pytest.mark.parametrize(['base', 'target'], [
+    [None, None],
+    [None, {'a': 1}],
+    [{'a': 1}, None],
+    [{'a': 1, 'b': [1, 2, 3]}, {'a': 1, 'b': [1, 2, 3]}],
+    [{'a': 1, 'b': [1, 2, 3]}, {'a': 2, 'c': [1, 2, 3]}],
+    [{'a': [1, 2, 3]}, {'a': [1, 5]}],
+    [{'a': [1, 2]}, {'a': [1, 2, {'b': 'c'}, None]}],
+    [{'a': {'b': {'c': 1.5}}}, {'a': {'b': {'c': 1.5, 'd': 'e'}}}],
+    [{'a': 1}, {'a': 1.0}],
+    [{'a': 1}, {'a': True}],
+    [{'a': [1, 2]}, {'a': {'0': 1, '1': 2}}],
+    [[{'a': 1}], [{'a': 2}]],
+])
+def test_json_delta(base, target):
+    delta = calculate_json_delta(base, target)
+    result = apply_json_delta(base, delta)
+    assert result == target
+    assert type(result) is type(target)
+    if isinstance(target, dict):
+        assert all(type(result[key]) is type(target[key]) for key in target)
+    if repr(base) == repr(target):
+        assert delta == {}
+
+
+def test_delta_encoded_object_versions(session: sessionmaker(), delta_encoded_objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    schema = {'type': 'object', 'properties': {f'p{i}': {'type': 'array'} for i in range(10)}}
+    data = {'values': list(range(100))}
+    object = delta_encoded_objects.create_object(action_id=action.id, data=data, schema=schema, user_id=user.id)
+    versions = [object]
+    for i in range(1, 8):
+        data = {'values': list(range(100)) + list(range(i))}
+        versions.append(delta_encoded_objects.update_object(object.object_id, data=data, schema=schema, user_id=user.id))
+    assert delta_encoded_objects.get_object_versions(object.object_id) == versions
+    for version in versions:
+        assert delta_encoded_objects.get_object_version(object.object_id, version.version_id) == version
+
+    with delta_encoded_objects.bind.connect() as connection:
+        rows = connection.execute(
+            db.select(
+                delta_encoded_objects.previous_table.c.version_id,
+                delta_encoded_objects.previous_table.c.diff_base_version_id
+            ).order_by(delta_encoded_objects.previous_table.c.version_id)
+        ).fetchall()
+    assert [tuple(row) for row in rows] == [
+        (0, None),
+        (1, 2),
+        (2, 3),
+        (3, None),
+        (4, 5),
+        (5, 6),
+        (6, None),
+    ]
+
+    # restoring a delta encoded version
+    restored_object = delta_encoded_objects.restore_object_version(object.object_id, version_id=2, user_id=user.id)
+    assert restored_object.data == versions[2].data
+    assert restored_object.schema == versions[2].schema
+    assert delta_encoded_objects.get_object_versions(object.object_id)[:-1] == versions
+
+
+def test_update_delta_encoded_object_version(session: sessionmaker(), delta_encoded_objects: VersionedJSONSerializableObjectTables) -> None:
+    v1_datetime = datetime.datetime.now(datetime.timezone.utc)
+    object = delta_encoded_objects.insert_fed_object_version(fed_object_id=1, fed_version_id=0, component_id=1, action_id=None, data={'values': list(range(100))}, schema=None, user_id=None, utc_datetime=v1_datetime)
+    v2_datetime = v1_datetime + datetime.timedelta(seconds=10)
+    v3_datetime = v1_datetime + datetime.timedelta(seconds=20)
+    object1 = delta_encoded_objects.insert_fed_object_version(fed_object_id=1, fed_version_id=1, component_id=1, action_id=None, data={'values': list(range(101))}, schema=None, user_id=None, utc_datetime=v2_datetime)
+    object2 = delta_encoded_objects.insert_fed_object_version(fed_object_id=1, fed_version_id=2, component_id=1, action_id=None, data={'values': list(range(102))}, schema=None, user_id=None, utc_datetime=v3_datetime)
+    assert object2.version_id == 2
+    assert delta_encoded_objects.get_fed_object_version(component_id=1, fed_object_id=1, fed_version_id=1) == object1
+
+    # version 1 is stored as delta to version 2, so changing version 2 must not change version 1
+    updated_object2 = delta_encoded_objects.update_object_version(object_id=object.object_id, version_id=2, action_id=None, data={'values': []}, schema=None, user_id=None, utc_datetime=v3_datetime)
+    assert updated_object2.data == {'values': []}
+    assert delta_encoded_objects.get_object_version(object.object_id, 1) == object1
+
+    # changing version 1 must not change version 2
+    updated_object1 = delta_encoded_objects.update_object_version(object_id=object.object_id, version_id=1, action_id=None, data={'values': [1]}, schema=None, user_id=None, utc_datetime=v2_datetime)
+    assert updated_object1.data == {'values': [1]}
+    assert delta_encoded_objects.get_object_versions(object.object_id) == [object, updated_object1, updated_object2]
+    assert delta_encoded_objects.get_previous_subversion(object.object_id, 1).data == object1.data
+
+
+def test_encode_previous_versions(session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    object = objects.create_object(action_id=action.id, data={'values': list(range(100))}, schema={}, user_id=user.id)
+    for i in range(1, 5):
+        objects.update_object(object.object_id, data={'values': list(range(100 + i))}, schema={}, user_id=user.id)
+    versions = objects.get_object_versions(object.object_id)
+
+    assert objects.get_object_ids_with_unencoded_previous_versions(snapshot_interval=2) == [object.object_id]
+    assert objects.encode_previous_versions(object.object_id, snapshot_interval=2) == 2
+    assert objects.get_object_ids_with_unencoded_previous_versions(snapshot_interval=2) == []
+    assert objects.get_object_versions(object.object_id) == versions
+    for version in versions:
+        assert objects.get_object_version(object.object_id, version.version_id) == version
+
+
+def test_schemas_stored_once(engine, session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    schema1 = {'type': 'object', 'properties': {'name': {'type': 'string'}}}
+    schema2 = {'properties': {'name': {'type': 'string'}}, 'type': 'object', 'title': 'Object'}
+    object1 = objects.create_object(action_id=action.id, data={'test': 'A'}, schema=schema1, user_id=user.id)
+    object2 = objects.create_object(action_id=action.id, data={'test': 'B'}, schema=dict(schema1), user_id=user.id)
+    objects.update_object(object1.object_id, data={'test': 'C'}, schema=None, user_id=user.id)
+    objects.update_object(object2.object_id, data={'test': 'D'}, schema=schema2, user_id=user.id)
+    assert object1.schema_hash == object2.schema_hash == get_schema_hash(schema1)
+    with engine.connect() as connection:
+        assert connection.execute(db.select(db.func.count()).select_from(objects._schemas_table)).scalar() == 2
+        assert connection.execute(db.select(db.func.count()).select_from(objects._current_table).where(objects._current_table.c.schema.is_not(None))).scalar() == 0
+
+    # schemas are loaded from the schema table when accessed
+    uncached_objects = VersionedJSONSerializableObjectTables(
+        'test_objects',
+        user_id_column=User.id,
+        action_id_column=Action.id,
+        action_schema_column=Action.schema,
+        schema_cache_size=0
+    )
+    uncached_objects.bind = engine
+    versions = uncached_objects.get_object_versions(object2.object_id)
+    assert [version.schema_hash for version in versions] == [get_schema_hash(schema1), get_schema_hash(schema2)]
+    assert [version.schema for version in versions] == [schema1, schema2]
+    assert uncached_objects.get_object_version(object1.object_id, 1).schema == schema1
+    assert [object.schema for object in uncached_objects.get_current_objects()] == [schema2, schema1]
+
+
+def test_schemas_resolved_in_transaction(engine, session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    uncached_objects = VersionedJSONSerializableObjectTables(
+        'test_objects',
+        user_id_column=User.id,
+        action_id_column=Action.id,
+        action_schema_column=Action.schema,
+        schema_cache_size=0
+    )
+    uncached_objects.bind = engine
+    schema = {'type': 'object', 'properties': {'name': {'type': 'string'}}}
+    with engine.connect() as connection:
+        with connection.begin() as transaction:
+            object = uncached_objects.create_object(action_id=action.id, data={'test': 'A'}, schema=schema, user_id=user.id, connection=connection)
+            # the schema has not been committed yet, so it can only be found using the same connection
+            assert uncached_objects.get_current_object(object.object_id, connection=connection).schema == schema
+            transaction.rollback()
+    assert uncached_objects.get_current_objects() == []
+
+
+def test_legacy_object_schemas(engine, session: sessionmaker(), objects: VersionedJSONSerializableObjectTables) -> None:
+    user = User(name="User")
+    session.add(user)
+    action = Action(id=0, schema={})
+    session.add(action)
+    session.commit()
+    schema = {'type': 'object', 'properties': {'values': {'type': 'array'}}}
+    object = objects.create_object(action_id=action.id, data={'values': list(range(100))}, schema=schema, user_id=user.id)
+    objects.update_object(object.object_id, data={'values': list(range(101))}, schema=schema, user_id=user.id)
+    # simulate object versions stored before the schema table was introduced
+    with engine.begin() as connection:
+        for table in [objects._current_table, objects._previous_table]:
+            connection.execute(table.update().values(schema=schema, schema_hash=None))
+    assert [version.schema for version in objects.get_object_versions(object.object_id)] == [schema, schema]
+    objects.update_object(object.object_id, data={'values': list(range(102))}, schema=None, user_id=user.id)
+    assert objects.get_current_object(object.object_id).schema == schema
+    assert objects.get_current_object(object.object_id).schema_hash == get_schema_hash(schema)
+    assert objects.encode_previous_versions(object.object_id, snapshot_interval=2) == 1
+    assert [version.schema for version in objects.get_object_versions(object.object_id)] == [schema, schema, schema]
+    assert [version.data for version in objects.get_object_versions(object.object_id)] == [{'values': list(range(100 + i))} for i in range(3)]
@@ -0,0 +1,66 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sampledb
+import sampledb.__main__ as scripts
+from sampledb.models import IndexedPropertyType
+
+
+@pytest.fixture
+def action():
+    return sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'temperature': {
+                    'title': 'Temperature',
+                    'type': 'quantity',
+                    'units': 'K'
+                }
+            },
+            'required': ['name']
+        }
+    )
+
+
+def test_add_indexed_property(action, capsys):
+    scripts.main([scripts.__file__, 'add_indexed_property', str(action.id), 'temperature', 'quantity'])
+    assert 'Success' in capsys.readouterr()[0]
+    indexed_properties = sampledb.logic.indexed_properties.get_indexed_properties()
+    assert len(indexed_properties) == 1
+    assert indexed_properties[0].action_id == action.id
+    assert indexed_properties[0].property_path == ('temperature',)
+    assert indexed_properties[0].type == IndexedPropertyType.QUANTITY
+
+
+def test_add_indexed_property_invalid_property(action, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'add_indexed_property', str(action.id), 'name', 'quantity'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
+    assert not sampledb.logic.indexed_properties.get_indexed_properties()
+
+
+def test_add_indexed_property_invalid_action_id(action, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'add_indexed_property', str(action.id + 1), 'temperature', 'quantity'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
+    assert not sampledb.logic.indexed_properties.get_indexed_properties()
+
+
+def test_add_indexed_property_arguments(action, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'add_indexed_property', str(action.id), 'temperature', 'text'])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]
+    assert not sampledb.logic.indexed_properties.get_indexed_properties()
@@ -0,0 +1,71 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sampledb
+import sampledb.__main__ as scripts
+from sampledb import db
+from sampledb.models import Permissions
+
+
+@pytest.fixture
+def object_with_permissions():
+    user = sampledb.logic.users.create_user(name='Example User', email='example@example.org', type=sampledb.models.UserType.PERSON)
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Schema',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                }
+            },
+            'required': ['name']
+        }
+    )
+    object = sampledb.logic.objects.create_object(
+        action_id=action.id,
+        data={
+            'name': {
+                '_type': 'text',
+                'text': 'Example Object'
+            }
+        },
+        user_id=user.id
+    )
+    sampledb.logic.object_permissions.set_object_permissions_for_all_users(object_id=object.id, permissions=Permissions.READ)
+    return object
+
+
+def test_check_effective_object_permissions(object_with_permissions, capsys):
+    scripts.main([scripts.__file__, 'check_effective_object_permissions'])
+    assert 'Success' in capsys.readouterr()[0]
+
+
+def test_check_effective_object_permissions_inconsistent(object_with_permissions, capsys):
+    db.session.execute(db.text("DELETE FROM effective_object_permissions"))
+    db.session.commit()
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'check_effective_object_permissions'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
+    assert sampledb.logic.object_permissions.get_number_of_inconsistent_effective_object_permissions() > 0
+
+
+def test_check_effective_object_permissions_repair(object_with_permissions, capsys):
+    db.session.execute(db.text("DELETE FROM effective_object_permissions"))
+    db.session.commit()
+    scripts.main([scripts.__file__, 'check_effective_object_permissions', 'repair'])
+    assert 'Success' in capsys.readouterr()[0]
+    assert sampledb.logic.object_permissions.get_number_of_inconsistent_effective_object_permissions() == 0
+
+
+def test_check_effective_object_permissions_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'check_effective_object_permissions', 'fix'])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]
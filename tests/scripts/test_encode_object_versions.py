@@ -0,0 +1,67 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sampledb
+import sampledb.__main__ as scripts
+from sampledb.models import Objects
+
+
+def test_encode_object_versions(capsys):
+    user = sampledb.logic.users.create_user(name='Example User', email='example@example.org', type=sampledb.models.UserType.PERSON)
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Schema',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'description': {
+                    'title': 'Description',
+                    'type': 'text',
+                    'multiline': True
+                }
+            },
+            'required': ['name']
+        }
+    )
+    data = {
+        'name': {
+            '_type': 'text',
+            'text': 'Example Object'
+        },
+        'description': {
+            '_type': 'text',
+            'text': 'Example Description\n' * 100
+        }
+    }
+    object = sampledb.logic.objects.create_object(action_id=action.id, data=data, user_id=user.id)
+    for i in range(1, 5):
+        data['name']['text'] = f'Example Object {i}'
+        sampledb.logic.objects.update_object(object_id=object.id, data=data, user_id=user.id)
+    versions = sampledb.logic.objects.get_object_versions(object.id)
+    assert Objects.get_object_ids_with_unencoded_previous_versions(snapshot_interval=2) == [object.id]
+
+    scripts.main([scripts.__file__, 'encode_object_versions', '2'])
+    output = capsys.readouterr()[0]
+    assert 'Success' in output
+    assert '2 object versions' in output
+    assert Objects.get_object_ids_with_unencoded_previous_versions(snapshot_interval=2) == []
+    assert sampledb.logic.objects.get_object_versions(object.id) == versions
+
+
+def test_encode_object_versions_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'encode_object_versions', '2', '3'])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]
+
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'encode_object_versions', '0'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
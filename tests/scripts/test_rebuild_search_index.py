@@ -0,0 +1,53 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sampledb
+import sampledb.__main__ as scripts
+from sampledb import db
+
+
+def test_rebuild_search_index(capsys):
+    user = sampledb.logic.users.create_user(name='Example User', email='example@example.org', type=sampledb.models.UserType.PERSON)
+    action = sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Schema',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                }
+            },
+            'required': ['name']
+        }
+    )
+    object = sampledb.logic.objects.create_object(
+        action_id=action.id,
+        data={
+            'name': {
+                '_type': 'text',
+                'text': 'Example Object'
+            }
+        },
+        user_id=user.id
+    )
+    db.session.execute(db.text("UPDATE objects_current SET search_cache = NULL"))
+    db.session.commit()
+    filter_func, _, _ = sampledb.logic.object_search.generate_filter_func('Example', use_advanced_search=False)
+    filter_func, _ = sampledb.logic.object_search.wrap_filter_func(filter_func)
+    assert not sampledb.logic.objects.get_objects(filter_func=filter_func)
+
+    scripts.main([scripts.__file__, 'rebuild_search_index'])
+    assert 'Success' in capsys.readouterr()[0]
+    assert [found_object.id for found_object in sampledb.logic.objects.get_objects(filter_func=filter_func)] == [object.id]
+
+
+def test_rebuild_search_index_arguments(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'rebuild_search_index', 1])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]
@@ -0,0 +1,53 @@
+# coding: utf-8
+"""
+
+"""
+
+import pytest
+import sampledb
+import sampledb.__main__ as scripts
+from sampledb.models import IndexedPropertyType
+
+
+@pytest.fixture
+def action():
+    return sampledb.logic.actions.create_action(
+        action_type_id=sampledb.models.ActionType.SAMPLE_CREATION,
+        schema={
+            'title': 'Example Object',
+            'type': 'object',
+            'properties': {
+                'name': {
+                    'title': 'Name',
+                    'type': 'text'
+                },
+                'temperature': {
+                    'title': 'Temperature',
+                    'type': 'quantity',
+                    'units': 'K'
+                }
+            },
+            'required': ['name']
+        }
+    )
+
+
+def test_remove_indexed_property(action, capsys):
+    sampledb.logic.indexed_properties.create_indexed_property(action.id, ['temperature'], IndexedPropertyType.QUANTITY)
+    scripts.main([scripts.__file__, 'remove_indexed_property', str(action.id), 'temperature'])
+    assert 'Success' in capsys.readouterr()[0]
+    assert not sampledb.logic.indexed_properties.get_indexed_properties()
+
+
+def test_remove_indexed_property_not_indexed(action, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'remove_indexed_property', str(action.id), 'temperature'])
+    assert exc_info.value != 0
+    assert 'Error' in capsys.readouterr()[1]
+
+
+def test_remove_indexed_property_arguments(action, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        scripts.main([scripts.__file__, 'remove_indexed_property', str(action.id)])
+    assert exc_info.value != 0
+    assert 'Usage' in capsys.readouterr()[0]